@@ -12,20 +12,26 @@ K = number of classes (possible target values)
 """
 
 import copy
+import time
 import pickle
+import multiprocessing
 import cv2
 import numpy
 import pandas
-import skimage.measure
 import skimage.morphology
+import scipy.sparse
+import scipy.sparse.csgraph
+import scipy.spatial
 from gewittergefahr.gg_utils import nwp_model_utils
 from gewittergefahr.gg_utils import file_system_utils
 from gewittergefahr.gg_utils import error_checking
 from generalexam.ge_utils import front_utils
-from generalexam.ge_utils import a_star_search
 from generalexam.machine_learning import machine_learning_utils as ml_utils
 
 NEGATIVE_SKELETON_LINE_QUALITY = -1.
+SECONDS_TO_MINUTES = 1. / 60
+NEIGHBOUR_ROW_OFFSETS = numpy.array([-1, -1, -1, 0, 0, 1, 1, 1], dtype=int)
+NEIGHBOUR_COLUMN_OFFSETS = numpy.array([-1, 0, 1, -1, 1, -1, 0, 1], dtype=int)
 
 ROW_INDICES_COLUMN = 'row_indices'
 COLUMN_INDICES_COLUMN = 'column_indices'
@@ -52,6 +58,11 @@ BINARY_FREQUENCY_BIAS_KEY = 'binary_frequency_bias'
 ROW_NORMALIZED_CONTINGENCY_TABLE_KEY = 'row_normalized_ct_as_matrix'
 COLUMN_NORMALIZED_CONTINGENCY_TABLE_KEY = 'column_normalized_ct_as_matrix'
 
+ACTUAL_TO_PREDICTED_DISTANCES_KEY = 'actual_to_predicted_distances_metres'
+NEAREST_PREDICTED_INDICES_KEY = 'nearest_predicted_front_indices'
+PREDICTED_TO_ACTUAL_DISTANCES_KEY = 'predicted_to_actual_distances_metres'
+NEAREST_ACTUAL_INDICES_KEY = 'nearest_actual_front_indices'
+
 EVALUATION_DICT_KEYS = [
     PREDICTED_REGION_TABLE_KEY, ACTUAL_POLYLINE_TABLE_KEY,
     NEIGH_DISTANCE_METRES_KEY, BINARY_CONTINGENCY_TABLE_KEY, BINARY_POD_KEY,
@@ -60,6 +71,21 @@ EVALUATION_DICT_KEYS = [
     COLUMN_NORMALIZED_CONTINGENCY_TABLE_KEY
 ]
 
+READING_STAGE_NAME = 'reading'
+REGION_STAGE_NAME = 'images_to_regions'
+AREA_FILTER_STAGE_NAME = 'discard_regions_with_small_area'
+SKELETONIZATION_STAGE_NAME = 'skeletonize_frontal_regions'
+MAIN_SKELETON_STAGE_NAME = 'find_main_skeletons'
+XY_CONVERSION_STAGE_NAME = 'convert_regions_rowcol_to_narr_xy'
+
+PIPELINE_STAGE_NAMES = [
+    READING_STAGE_NAME, REGION_STAGE_NAME, AREA_FILTER_STAGE_NAME,
+    SKELETONIZATION_STAGE_NAME, MAIN_SKELETON_STAGE_NAME,
+    XY_CONVERSION_STAGE_NAME
+]
+
+NUM_PADDING_PIXELS_FOR_CROP = 1
+
 KERNEL_MATRIX_FOR_ENDPOINT_FILTER = numpy.array([[1, 1, 1],
                                                  [1, 10, 1],
                                                  [1, 1, 1]], dtype=numpy.uint8)
@@ -125,6 +151,56 @@ def _one_region_to_binary_image(
     return binary_image_matrix
 
 
+def _one_region_to_cropped_binary_image(
+        row_indices_in_region, column_indices_in_region,
+        num_padding_pixels=NUM_PADDING_PIXELS_FOR_CROP):
+    """Converts one region to a binary image, cropped to its bounding box.
+
+    The image is the bounding box of the region, padded with
+    `num_padding_pixels` empty pixels on each side.  Padding is not clipped at
+    the edge of the full grid, so the crop behaves like the full image
+    for any morphological operation that treats the outside as background.
+
+    P = number of points in region
+    m = number of rows in cropped image
+    n = number of columns in cropped image
+
+    :param row_indices_in_region: length-P numpy array with row indices
+        (integers) of grid cells in region.
+    :param column_indices_in_region: Same as above, except for columns.
+    :param num_padding_pixels: Number of empty pixels on each side of bounding
+        box.
+    :return: binary_image_matrix: m-by-n numpy array of integers (0 or 1).  If
+        binary_image_matrix[i, j] = 1, pixel [i + first_row,
+        j + first_column] of the full grid is part of the region.
+    :return: first_row: Row offset of cropped image in full grid (may be
+        negative).
+    :return: first_column: Column offset of cropped image in full grid (may be
+        negative).
+    """
+
+    row_indices_in_region = numpy.asarray(row_indices_in_region, dtype=int)
+    column_indices_in_region = numpy.asarray(
+        column_indices_in_region, dtype=int)
+
+    first_row = numpy.min(row_indices_in_region) - num_padding_pixels
+    first_column = numpy.min(column_indices_in_region) - num_padding_pixels
+    num_rows = (
+        numpy.max(row_indices_in_region) - first_row + 1 + num_padding_pixels
+    )
+    num_columns = (
+        numpy.max(column_indices_in_region) - first_column + 1 +
+        num_padding_pixels
+    )
+
+    binary_image_matrix = _one_region_to_binary_image(
+        row_indices_in_region=row_indices_in_region - first_row,
+        column_indices_in_region=column_indices_in_region - first_column,
+        num_grid_rows=num_rows, num_grid_columns=num_columns)
+
+    return binary_image_matrix, first_row, first_column
+
+
 def _one_binary_image_to_region(binary_image_matrix):
     """Converts one binary image to a region.
 
@@ -239,6 +315,183 @@ def _get_skeleton_line_quality(
     return endpoint_length_metres / sinuosity
 
 
+def _get_pixel_adjacency_matrix(
+        row_indices, column_indices, x_grid_spacing_metres,
+        y_grid_spacing_metres):
+    """Creates adjacency matrix for pixels in one region.
+
+    Two pixels are adjacent if they are horizontal, vertical, or diagonal
+    neighbours (8-connectivity).
+
+    P = number of pixels in region
+
+    :param row_indices: length-P numpy array with row indices of pixels.
+    :param column_indices: length-P numpy array with column indices of pixels.
+    :param x_grid_spacing_metres: Spacing between grid points in adjacent
+        columns.
+    :param y_grid_spacing_metres: Spacing between grid points in adjacent rows.
+    :return: adjacency_matrix: P-by-P instance of `scipy.sparse.csr_matrix`,
+        where adjacency_matrix[i, j] is the distance (metres) between adjacent
+        pixels i and j.  Non-adjacent pairs are not stored.
+    """
+
+    # Pad with one empty row and column on each side, so that neighbours of
+    # edge pixels do not wrap around to the other side of the grid.
+    num_pixels = len(row_indices)
+    num_columns = numpy.max(column_indices) + 3
+    linear_indices = (row_indices + 1) * num_columns + column_indices + 1
+    sort_indices = numpy.argsort(linear_indices)
+    sorted_linear_indices = linear_indices[sort_indices]
+
+    first_pixel_indices = []
+    second_pixel_indices = []
+    distances_metres = []
+
+    for k in range(len(NEIGHBOUR_ROW_OFFSETS)):
+        these_neighbour_indices = linear_indices + (
+            NEIGHBOUR_ROW_OFFSETS[k] * num_columns + NEIGHBOUR_COLUMN_OFFSETS[k]
+        )
+
+        these_positions = numpy.minimum(
+            numpy.searchsorted(sorted_linear_indices, these_neighbour_indices),
+            num_pixels - 1)
+        these_pixel_indices = numpy.where(
+            sorted_linear_indices[these_positions] == these_neighbour_indices
+        )[0]
+
+        first_pixel_indices.append(these_pixel_indices)
+        second_pixel_indices.append(
+            sort_indices[these_positions[these_pixel_indices]])
+
+        this_distance_metres = numpy.sqrt(
+            (NEIGHBOUR_ROW_OFFSETS[k] * y_grid_spacing_metres) ** 2 +
+            (NEIGHBOUR_COLUMN_OFFSETS[k] * x_grid_spacing_metres) ** 2)
+        distances_metres.append(
+            numpy.full(len(these_pixel_indices), this_distance_metres))
+
+    return scipy.sparse.csr_matrix(
+        (numpy.concatenate(distances_metres),
+         (numpy.concatenate(first_pixel_indices),
+          numpy.concatenate(second_pixel_indices))),
+        shape=(num_pixels, num_pixels))
+
+
+def _get_shortest_path(predecessor_indices, start_index, end_index):
+    """Retrieves shortest path from single-source search.
+
+    P = number of pixels in region
+    N = number of pixels in path
+
+    :param predecessor_indices: length-P numpy array of predecessors, created by
+        `scipy.sparse.csgraph.dijkstra` with source at `start_index`.
+    :param start_index: Index of start pixel.
+    :param end_index: Index of end pixel.
+    :return: path_indices: length-N numpy array with indices of pixels in path,
+        from start to end.
+    :raises: ValueError: if end pixel cannot be reached from start pixel.
+    """
+
+    path_indices = [end_index]
+    while path_indices[-1] != start_index:
+        this_predecessor_index = predecessor_indices[path_indices[-1]]
+
+        # `scipy.sparse.csgraph` marks unreachable pixels with a negative
+        # predecessor (-9999), which would otherwise be used as an index.
+        if this_predecessor_index < 0:
+            error_string = (
+                'Pixel {0:d} cannot be reached from pixel {1:d}.'
+            ).format(end_index, start_index)
+            raise ValueError(error_string)
+
+        path_indices.append(this_predecessor_index)
+
+    return numpy.array(path_indices[::-1], dtype=int)
+
+
+def _find_main_skeleton_one_region(
+        row_indices, column_indices, endpoint_rows, endpoint_columns,
+        x_grid_spacing_metres, y_grid_spacing_metres,
+        min_endpoint_length_metres):
+    """Finds main skeleton line for one region.
+
+    The main skeleton line is the shortest path, between any two endpoints,
+    with the greatest quality (see `_get_skeleton_line_quality`).  The adjacency
+    graph is built once and one single-source search is run per endpoint, which
+    yields paths between all pairs of endpoints.
+
+    P = number of pixels in region
+    E = number of endpoints
+    N = number of pixels in main skeleton line
+
+    :param row_indices: length-P numpy array with row indices of pixels, sorted
+        in row-major order (as returned by `numpy.where`).
+    :param column_indices: length-P numpy array with column indices of pixels.
+    :param endpoint_rows: length-E numpy array with row indices of endpoints.
+    :param endpoint_columns: length-E numpy array with column indices of
+        endpoints.
+    :param x_grid_spacing_metres: See doc for `find_main_skeletons`.
+    :param y_grid_spacing_metres: Same.
+    :param min_endpoint_length_metres: Same.
+    :return: skeleton_rows: length-N numpy array with row indices of pixels in
+        main skeleton line.  If there is no valid skeleton line, this is None.
+    :return: skeleton_columns: Same but for columns.
+    """
+
+    num_endpoints = len(endpoint_rows)
+    if num_endpoints < 2:
+        return None, None
+
+    adjacency_matrix = _get_pixel_adjacency_matrix(
+        row_indices=row_indices, column_indices=column_indices,
+        x_grid_spacing_metres=x_grid_spacing_metres,
+        y_grid_spacing_metres=y_grid_spacing_metres)
+
+    num_columns = numpy.max(column_indices) + 1
+    linear_indices = row_indices * num_columns + column_indices
+    endpoint_indices = numpy.searchsorted(
+        linear_indices, endpoint_rows * num_columns + endpoint_columns)
+
+    arc_length_matrix_metres, predecessor_matrix = (
+        scipy.sparse.csgraph.dijkstra(
+            adjacency_matrix, directed=False, indices=endpoint_indices,
+            return_predecessors=True)
+    )
+    arc_length_matrix_metres = arc_length_matrix_metres[:, endpoint_indices]
+
+    endpoint_length_matrix_metres = numpy.sqrt(
+        (x_grid_spacing_metres * numpy.subtract.outer(
+            endpoint_columns, endpoint_columns)) ** 2 +
+        (y_grid_spacing_metres * numpy.subtract.outer(
+            endpoint_rows, endpoint_rows)) ** 2
+    )
+
+    valid_flag_matrix = numpy.logical_and(
+        numpy.isfinite(arc_length_matrix_metres),
+        endpoint_length_matrix_metres >= min_endpoint_length_metres)
+    valid_flag_matrix[numpy.tril_indices(num_endpoints)] = False
+
+    # Quality = endpoint length / sinuosity = endpoint length^2 / arc length.
+    quality_matrix = numpy.full(
+        (num_endpoints, num_endpoints), NEGATIVE_SKELETON_LINE_QUALITY)
+    quality_matrix[valid_flag_matrix] = (
+        endpoint_length_matrix_metres[valid_flag_matrix] ** 2 /
+        arc_length_matrix_metres[valid_flag_matrix]
+    )
+
+    best_linear_index = numpy.argmax(quality_matrix)
+    if quality_matrix.flat[best_linear_index] <= 0:
+        return None, None
+
+    start_endpoint_index, end_endpoint_index = numpy.unravel_index(
+        best_linear_index, quality_matrix.shape)
+    path_indices = _get_shortest_path(
+        predecessor_indices=predecessor_matrix[start_endpoint_index, :],
+        start_index=endpoint_indices[start_endpoint_index],
+        end_index=endpoint_indices[end_endpoint_index])
+
+    return row_indices[path_indices], column_indices[path_indices]
+
+
 def _get_distance_between_fronts(
         first_x_coords_metres, first_y_coords_metres, second_x_coords_metres,
         second_y_coords_metres):
@@ -272,6 +525,346 @@ def _get_distance_between_fronts(
     return numpy.median(shortest_distances_metres)
 
 
+def _get_medians_by_segment(input_values, num_values_by_segment):
+    """Computes median of each contiguous segment in array.
+
+    S = number of segments
+
+    :param input_values: 1-D numpy array of values, where each segment is a
+        contiguous block.
+    :param num_values_by_segment: length-S numpy array with number of values in
+        each segment.
+    :return: median_by_segment: length-S numpy array of medians.  If a segment
+        is empty, its median is NaN.
+    """
+
+    num_segments = len(num_values_by_segment)
+    segment_indices = numpy.repeat(
+        numpy.linspace(0, num_segments - 1, num=num_segments, dtype=int),
+        num_values_by_segment)
+
+    sorted_values = input_values[
+        numpy.lexsort((input_values, segment_indices))]
+    first_indices = numpy.cumsum(num_values_by_segment) - num_values_by_segment
+
+    median_by_segment = numpy.full(num_segments, numpy.nan)
+    nonempty_indices = numpy.where(num_values_by_segment > 0)[0]
+
+    median_by_segment[nonempty_indices] = 0.5 * (
+        sorted_values[
+            first_indices[nonempty_indices] +
+            (num_values_by_segment[nonempty_indices] - 1) // 2
+        ] +
+        sorted_values[
+            first_indices[nonempty_indices] +
+            num_values_by_segment[nonempty_indices] // 2
+        ]
+    )
+
+    return median_by_segment
+
+
+def _get_distance_matrix_one_time(
+        actual_x_coords_by_front_metres, actual_y_coords_by_front_metres,
+        predicted_x_coords_by_front_metres, predicted_y_coords_by_front_metres):
+    """Returns distance between each pair of actual and predicted fronts.
+
+    All fronts should be valid at the same time.  Distances are defined as in
+    `_get_distance_between_fronts`, where the actual front is the first front.
+    A KD-tree is built for each predicted front, and all points in actual fronts
+    are queried against it at once.
+
+    A = number of actual fronts
+    F = number of predicted fronts
+
+    :param actual_x_coords_by_front_metres: length-A list, where each element is
+        a numpy array of x-coordinates in one actual front.
+    :param actual_y_coords_by_front_metres: Same but for y-coordinates.
+    :param predicted_x_coords_by_front_metres: length-F list, where each element
+        is a numpy array of x-coordinates in one predicted front.
+    :param predicted_y_coords_by_front_metres: Same but for y-coordinates.
+    :return: distance_matrix_metres: A-by-F numpy array, where
+        distance_matrix_metres[i, j] is the distance from the [i]th actual
+        front to the [j]th predicted front.  If either front has no points,
+        distance_matrix_metres[i, j] = infinity.
+    """
+
+    num_points_by_actual_front = numpy.array(
+        [len(x) for x in actual_x_coords_by_front_metres], dtype=int)
+    actual_xy_matrix_metres = numpy.transpose(numpy.vstack((
+        numpy.concatenate(actual_x_coords_by_front_metres).astype(float),
+        numpy.concatenate(actual_y_coords_by_front_metres).astype(float)
+    )))
+
+    num_actual_fronts = len(actual_x_coords_by_front_metres)
+    num_predicted_fronts = len(predicted_x_coords_by_front_metres)
+    distance_matrix_metres = numpy.full(
+        (num_actual_fronts, num_predicted_fronts), numpy.inf)
+
+    for j in range(num_predicted_fronts):
+        if len(predicted_x_coords_by_front_metres[j]) == 0:
+            continue
+
+        this_kd_tree = scipy.spatial.cKDTree(numpy.transpose(numpy.vstack((
+            numpy.array(predicted_x_coords_by_front_metres[j], dtype=float),
+            numpy.array(predicted_y_coords_by_front_metres[j], dtype=float)
+        ))))
+
+        these_shortest_distances_metres = this_kd_tree.query(
+            actual_xy_matrix_metres)[0]
+        distance_matrix_metres[:, j] = _get_medians_by_segment(
+            input_values=these_shortest_distances_metres,
+            num_values_by_segment=num_points_by_actual_front)
+
+    distance_matrix_metres[numpy.isnan(distance_matrix_metres)] = numpy.inf
+    return distance_matrix_metres
+
+
+def _group_indices_by_time(valid_times_unix_sec):
+    """Groups array indices by valid time.
+
+    :param valid_times_unix_sec: 1-D numpy array of valid times.
+    :return: indices_by_time_dict: Dictionary, where each key is a valid time
+        and the corresponding value is a 1-D numpy array of indices (in
+        ascending order) with said valid time.
+    """
+
+    sort_indices = numpy.argsort(valid_times_unix_sec, kind='mergesort')
+    unique_times_unix_sec, first_sorted_indices = numpy.unique(
+        valid_times_unix_sec[sort_indices], return_index=True)
+
+    return dict(zip(
+        unique_times_unix_sec,
+        numpy.split(sort_indices, first_sorted_indices[1:])
+    ))
+
+
+def _front_types_to_integers(front_type_strings):
+    """Converts front types from strings to integers.
+
+    :param front_type_strings: 1-D list of front types (each must be accepted
+        by `front_utils.string_id_to_integer`).
+    :return: front_type_integers: 1-D numpy array of front types (integers).
+    """
+
+    return numpy.array(
+        [front_utils.string_id_to_integer(s) for s in front_type_strings],
+        dtype=int)
+
+
+def _get_binary_contingency_table(front_matching_dict, neigh_distance_metres):
+    """Creates binary contingency table from matched fronts.
+
+    :param front_matching_dict: Dictionary created by `match_fronts`.
+    :param neigh_distance_metres: See doc for `get_binary_contingency_table`.
+    :return: binary_contingency_table_as_dict: Same.
+    """
+
+    actual_front_predicted_flags = (
+        front_matching_dict[ACTUAL_TO_PREDICTED_DISTANCES_KEY] <
+        neigh_distance_metres
+    )
+    predicted_front_verified_flags = (
+        front_matching_dict[PREDICTED_TO_ACTUAL_DISTANCES_KEY] <
+        neigh_distance_metres
+    )
+
+    return {
+        NUM_ACTUAL_FRONTS_PREDICTED_KEY:
+            int(numpy.sum(actual_front_predicted_flags)),
+        NUM_PREDICTED_FRONTS_VERIFIED_KEY:
+            int(numpy.sum(predicted_front_verified_flags)),
+        NUM_FALSE_POSITIVES_KEY:
+            int(numpy.sum(numpy.invert(predicted_front_verified_flags))),
+        NUM_FALSE_NEGATIVES_KEY:
+            int(numpy.sum(numpy.invert(actual_front_predicted_flags)))
+    }
+
+
+def _get_row_normalized_contingency_table(
+        front_matching_dict, predicted_region_table, actual_polyline_table,
+        neigh_distance_metres):
+    """Creates row-normalized contingency table from matched fronts.
+
+    :param front_matching_dict: Dictionary created by `match_fronts`.
+    :param predicted_region_table: See doc for
+        `get_row_normalized_contingency_table`.
+    :param actual_polyline_table: Same.
+    :param neigh_distance_metres: Same.
+    :return: row_normalized_ct_as_matrix: Same.
+    """
+
+    num_classes = 1 + len(front_utils.VALID_STRING_IDS)
+    row_normalized_ct_as_matrix = numpy.full(
+        (num_classes, num_classes), 0, dtype=int)
+
+    predicted_front_type_ints = _front_types_to_integers(
+        predicted_region_table[front_utils.FRONT_TYPE_COLUMN].values)
+    actual_front_type_ints = _front_types_to_integers(
+        actual_polyline_table[front_utils.FRONT_TYPE_COLUMN].values)
+
+    matched_flags = numpy.invert(
+        front_matching_dict[PREDICTED_TO_ACTUAL_DISTANCES_KEY] >
+        neigh_distance_metres
+    )
+    observed_front_type_ints = numpy.full(
+        len(predicted_front_type_ints), front_utils.NO_FRONT_INTEGER_ID,
+        dtype=int)
+    observed_front_type_ints[matched_flags] = actual_front_type_ints[
+        front_matching_dict[NEAREST_ACTUAL_INDICES_KEY][matched_flags]
+    ]
+
+    numpy.add.at(
+        row_normalized_ct_as_matrix,
+        (predicted_front_type_ints, observed_front_type_ints), 1)
+
+    row_normalized_ct_as_matrix = row_normalized_ct_as_matrix.astype(float)
+
+    for k in range(1, num_classes):
+        if numpy.sum(row_normalized_ct_as_matrix[k, :]) == 0:
+            row_normalized_ct_as_matrix[k, :] = numpy.nan
+        else:
+            row_normalized_ct_as_matrix[k, :] = (
+                row_normalized_ct_as_matrix[k, :] /
+                numpy.sum(row_normalized_ct_as_matrix[k, :]))
+
+    return row_normalized_ct_as_matrix[1:, :]
+
+
+def _get_column_normalized_contingency_table(
+        front_matching_dict, predicted_region_table, actual_polyline_table,
+        neigh_distance_metres):
+    """Creates column-normalized contingency table from matched fronts.
+
+    :param front_matching_dict: Dictionary created by `match_fronts`.
+    :param predicted_region_table: See doc for
+        `get_column_normalized_contingency_table`.
+    :param actual_polyline_table: Same.
+    :param neigh_distance_metres: Same.
+    :return: column_normalized_ct_as_matrix: Same.
+    """
+
+    num_classes = 1 + len(front_utils.VALID_STRING_IDS)
+    column_normalized_ct_as_matrix = numpy.full(
+        (num_classes, num_classes), 0, dtype=int)
+
+    predicted_front_type_ints = _front_types_to_integers(
+        predicted_region_table[front_utils.FRONT_TYPE_COLUMN].values)
+    actual_front_type_ints = _front_types_to_integers(
+        actual_polyline_table[front_utils.FRONT_TYPE_COLUMN].values)
+
+    matched_flags = numpy.invert(
+        front_matching_dict[ACTUAL_TO_PREDICTED_DISTANCES_KEY] >
+        neigh_distance_metres
+    )
+    forecast_front_type_ints = numpy.full(
+        len(actual_front_type_ints), front_utils.NO_FRONT_INTEGER_ID,
+        dtype=int)
+    forecast_front_type_ints[matched_flags] = predicted_front_type_ints[
+        front_matching_dict[NEAREST_PREDICTED_INDICES_KEY][matched_flags]
+    ]
+
+    numpy.add.at(
+        column_normalized_ct_as_matrix,
+        (forecast_front_type_ints, actual_front_type_ints), 1)
+
+    column_normalized_ct_as_matrix = column_normalized_ct_as_matrix.astype(float)
+
+    for k in range(1, num_classes):
+        if numpy.sum(column_normalized_ct_as_matrix[:, k]) == 0:
+            column_normalized_ct_as_matrix[:, k] = numpy.nan
+        else:
+            column_normalized_ct_as_matrix[:, k] = (
+                column_normalized_ct_as_matrix[:, k] /
+                numpy.sum(column_normalized_ct_as_matrix[:, k]))
+
+    return column_normalized_ct_as_matrix[:, 1:]
+
+
+def _predictions_to_objects_one_time(argument_tuple):
+    """Converts gridded predictions at one time step to objects.
+
+    This method is the unit of work for `gridded_predictions_to_objects`.  It
+    takes one tuple, rather than keyword arguments, so that it can be used with
+    `multiprocessing.Pool.imap`.
+
+    :param argument_tuple: Tuple with the following elements.
+    argument_tuple[0]: prediction_file_name: See doc for
+        `gridded_predictions_to_objects`.
+    argument_tuple[1]: valid_time_unix_sec: Valid time.
+    argument_tuple[2]: read_label_matrix_function: See doc for
+        `gridded_predictions_to_objects`.
+    argument_tuple[3]: min_object_area_metres2: Same.
+    argument_tuple[4]: min_endpoint_length_metres: Same.
+    :return: predicted_region_table: See doc for
+        `gridded_predictions_to_objects`.
+    :return: stage_time_dict: Dictionary, where each key is an element of
+        `PIPELINE_STAGE_NAMES` and the value is time spent (seconds) in the
+        given stage.
+    """
+
+    (prediction_file_name, valid_time_unix_sec, read_label_matrix_function,
+     min_object_area_metres2, min_endpoint_length_metres) = argument_tuple
+
+    grid_spacing_metres = nwp_model_utils.get_xy_grid_spacing(
+        model_name=nwp_model_utils.NARR_MODEL_NAME)[0]
+    num_grid_rows, num_grid_columns = nwp_model_utils.get_grid_dimensions(
+        model_name=nwp_model_utils.NARR_MODEL_NAME)
+    image_times_unix_sec = numpy.array([valid_time_unix_sec], dtype=int)
+
+    stage_time_dict = {}
+
+    start_time_unix_sec = time.time()
+    print 'Reading data from: "{0:s}"...'.format(prediction_file_name)
+    predicted_label_matrix = read_label_matrix_function(prediction_file_name)
+    stage_time_dict[READING_STAGE_NAME] = time.time() - start_time_unix_sec
+
+    start_time_unix_sec = time.time()
+    predicted_region_table = images_to_regions(
+        predicted_label_matrix=predicted_label_matrix,
+        image_times_unix_sec=image_times_unix_sec)
+    del predicted_label_matrix
+    stage_time_dict[REGION_STAGE_NAME] = time.time() - start_time_unix_sec
+
+    start_time_unix_sec = time.time()
+    predicted_region_table = discard_regions_with_small_area(
+        predicted_region_table=predicted_region_table,
+        x_grid_spacing_metres=grid_spacing_metres,
+        y_grid_spacing_metres=grid_spacing_metres,
+        min_area_metres2=min_object_area_metres2)
+    stage_time_dict[AREA_FILTER_STAGE_NAME] = time.time() - start_time_unix_sec
+
+    start_time_unix_sec = time.time()
+    predicted_region_table = skeletonize_frontal_regions(
+        predicted_region_table=predicted_region_table,
+        num_grid_rows=num_grid_rows, num_grid_columns=num_grid_columns)
+    stage_time_dict[SKELETONIZATION_STAGE_NAME] = (
+        time.time() - start_time_unix_sec
+    )
+
+    start_time_unix_sec = time.time()
+    predicted_region_table = find_main_skeletons(
+        predicted_region_table=predicted_region_table,
+        image_times_unix_sec=image_times_unix_sec,
+        num_grid_rows=num_grid_rows, num_grid_columns=num_grid_columns,
+        x_grid_spacing_metres=grid_spacing_metres,
+        y_grid_spacing_metres=grid_spacing_metres,
+        min_endpoint_length_metres=min_endpoint_length_metres)
+    stage_time_dict[MAIN_SKELETON_STAGE_NAME] = (
+        time.time() - start_time_unix_sec
+    )
+
+    start_time_unix_sec = time.time()
+    predicted_region_table = convert_regions_rowcol_to_narr_xy(
+        predicted_region_table=predicted_region_table,
+        are_predictions_from_fcn=False)
+    stage_time_dict[XY_CONVERSION_STAGE_NAME] = (
+        time.time() - start_time_unix_sec
+    )
+
+    return predicted_region_table, stage_time_dict
+
+
 def determinize_probabilities(class_probability_matrix, binarization_threshold):
     """Determinizes probabilistic predictions.
 
@@ -328,36 +921,27 @@ def images_to_regions(predicted_label_matrix, image_times_unix_sec):
     error_checking.assert_is_numpy_array(
         image_times_unix_sec, exact_dimensions=numpy.array([num_images]))
 
-    region_times_unix_sec = []
-    front_types = []
-    row_indices_by_region = []
-    column_indices_by_region = []
-
-    for i in range(num_images):
-        this_region_matrix = skimage.measure.label(
-            predicted_label_matrix[i, ...], connectivity=2)
+    ragged_region_dict = front_utils.frontal_images_to_ragged_regions(
+        predicted_label_matrix)
+    first_point_index_by_region = ragged_region_dict[
+        front_utils.FIRST_POINT_INDEX_BY_REGION_KEY]
 
-        this_num_regions = numpy.max(this_region_matrix)
-        for j in range(this_num_regions):
-            these_row_indices, these_column_indices = numpy.where(
-                this_region_matrix == j + 1)
-            row_indices_by_region.append(numpy.array(these_row_indices))
-            column_indices_by_region.append(numpy.array(these_column_indices))
-
-            region_times_unix_sec.append(image_times_unix_sec[i])
-            this_integer_front_id = predicted_label_matrix[
-                i, these_row_indices[0], these_column_indices[0]]
-
-            if this_integer_front_id == front_utils.WARM_FRONT_INTEGER_ID:
-                front_types.append(front_utils.WARM_FRONT_STRING_ID)
-            else:
-                front_types.append(front_utils.COLD_FRONT_STRING_ID)
+    front_types = numpy.where(
+        ragged_region_dict[front_utils.INTEGER_ID_BY_REGION_KEY] ==
+        front_utils.WARM_FRONT_INTEGER_ID,
+        front_utils.WARM_FRONT_STRING_ID, front_utils.COLD_FRONT_STRING_ID
+    ).tolist()
 
     predicted_region_dict = {
-        front_utils.TIME_COLUMN: region_times_unix_sec,
+        front_utils.TIME_COLUMN: image_times_unix_sec[
+            ragged_region_dict[front_utils.IMAGE_INDEX_BY_REGION_KEY]],
         front_utils.FRONT_TYPE_COLUMN: front_types,
-        ROW_INDICES_COLUMN: row_indices_by_region,
-        COLUMN_INDICES_COLUMN: column_indices_by_region
+        ROW_INDICES_COLUMN: front_utils.ragged_to_list_by_region(
+            flat_array=ragged_region_dict[front_utils.ROW_INDICES_KEY],
+            first_point_index_by_region=first_point_index_by_region),
+        COLUMN_INDICES_COLUMN: front_utils.ragged_to_list_by_region(
+            flat_array=ragged_region_dict[front_utils.COLUMN_INDICES_KEY],
+            first_point_index_by_region=first_point_index_by_region)
     }
     return pandas.DataFrame.from_dict(predicted_region_dict)
 
@@ -470,8 +1054,65 @@ def discard_regions_with_small_area(
         predicted_region_table.index[rows_to_drop], axis=0, inplace=False)
 
 
-def skeletonize_frontal_regions(
+def _skeletonize_regions_by_time(
         predicted_region_table, num_grid_rows, num_grid_columns):
+    """Skeletonizes frontal regions with one pass per time and front type.
+
+    Regions with the same time and front type cannot touch (otherwise they would
+    be one region), and thinning looks only at the 3-by-3 neighbourhood of each
+    pixel.  Thus, thinning all these regions in one image gives the same result
+    as thinning each region separately.
+
+    :param predicted_region_table: See doc for `skeletonize_frontal_regions`.
+    :param num_grid_rows: Same.
+    :param num_grid_columns: Same.
+    :return: predicted_region_table: Same.
+    """
+
+    region_times_unix_sec = predicted_region_table[
+        front_utils.TIME_COLUMN].values
+    front_type_strings = predicted_region_table[
+        front_utils.FRONT_TYPE_COLUMN].values
+
+    for this_time_unix_sec in numpy.unique(region_times_unix_sec):
+        for this_front_type_string in numpy.unique(front_type_strings):
+            these_region_indices = numpy.where(numpy.logical_and(
+                region_times_unix_sec == this_time_unix_sec,
+                front_type_strings == this_front_type_string
+            ))[0]
+
+            if len(these_region_indices) == 0:
+                continue
+
+            this_region_id_matrix = numpy.full(
+                (num_grid_rows, num_grid_columns), -1, dtype=int)
+
+            for i in these_region_indices:
+                this_region_id_matrix[
+                    predicted_region_table[ROW_INDICES_COLUMN].values[i],
+                    predicted_region_table[COLUMN_INDICES_COLUMN].values[i]
+                ] = i
+
+            this_skeleton_matrix = skimage.morphology.thin(
+                this_region_id_matrix >= 0)
+            these_rows, these_columns = numpy.where(this_skeleton_matrix)
+            these_region_ids = this_region_id_matrix[these_rows, these_columns]
+
+            for i in these_region_indices:
+                these_flags = these_region_ids == i
+                predicted_region_table[ROW_INDICES_COLUMN].values[i] = (
+                    these_rows[these_flags]
+                )
+                predicted_region_table[COLUMN_INDICES_COLUMN].values[i] = (
+                    these_columns[these_flags]
+                )
+
+    return predicted_region_table
+
+
+def skeletonize_frontal_regions(
+        predicted_region_table, num_grid_rows, num_grid_columns,
+        one_pass_per_time=False):
     """Skeletonizes ("thins out") frontal regions.
 
     This makes frontal regions look more like polylines (with infinitesimal
@@ -481,6 +1122,10 @@ def skeletonize_frontal_regions(
     :param predicted_region_table: See documentation for `images_to_regions`.
     :param num_grid_rows: M in discussion at top of file.
     :param num_grid_columns: N in discussion at top of file.
+    :param one_pass_per_time: Boolean flag.  If True, all regions with the same
+        time and front type will be thinned in one pass over the full grid.  If
+        False, each region will be thinned separately, on a crop around its
+        bounding box.  Results are the same either way.
     :return: predicted_region_table: Same as input, but with thinner regions.
     """
 
@@ -488,22 +1133,33 @@ def skeletonize_frontal_regions(
     error_checking.assert_is_greater(num_grid_rows, 0)
     error_checking.assert_is_integer(num_grid_columns)
     error_checking.assert_is_greater(num_grid_columns, 0)
+    error_checking.assert_is_boolean(one_pass_per_time)
+
+    if one_pass_per_time:
+        return _skeletonize_regions_by_time(
+            predicted_region_table=predicted_region_table,
+            num_grid_rows=num_grid_rows, num_grid_columns=num_grid_columns)
 
     num_regions = len(predicted_region_table.index)
     for i in range(num_regions):
-        this_binary_image_matrix = _one_region_to_binary_image(
+        (this_binary_image_matrix, this_first_row, this_first_column
+        ) = _one_region_to_cropped_binary_image(
             row_indices_in_region=
             predicted_region_table[ROW_INDICES_COLUMN].values[i],
             column_indices_in_region=
-            predicted_region_table[COLUMN_INDICES_COLUMN].values[i],
-            num_grid_rows=num_grid_rows, num_grid_columns=num_grid_columns)
+            predicted_region_table[COLUMN_INDICES_COLUMN].values[i])
 
         this_binary_image_matrix = skimage.morphology.thin(
             this_binary_image_matrix).astype(int)
+        these_rows, these_columns = _one_binary_image_to_region(
+            this_binary_image_matrix)
 
-        (predicted_region_table[ROW_INDICES_COLUMN].values[i],
-         predicted_region_table[COLUMN_INDICES_COLUMN].values[i]) = (
-             _one_binary_image_to_region(this_binary_image_matrix))
+        predicted_region_table[ROW_INDICES_COLUMN].values[i] = (
+            these_rows + this_first_row
+        )
+        predicted_region_table[COLUMN_INDICES_COLUMN].values[i] = (
+            these_columns + this_first_column
+        )
 
     return predicted_region_table
 
@@ -546,59 +1202,42 @@ def find_main_skeletons(
         print 'Finding main skeleton for region {0:d} of {1:d}...'.format(
             i + 1, num_regions)
 
-        this_binary_region_matrix = _one_region_to_binary_image(
+        (this_binary_region_matrix, this_first_row, this_first_column
+        ) = _one_region_to_cropped_binary_image(
             row_indices_in_region=
             predicted_region_table[ROW_INDICES_COLUMN].values[i],
             column_indices_in_region=
-            predicted_region_table[COLUMN_INDICES_COLUMN].values[i],
-            num_grid_rows=num_grid_rows, num_grid_columns=num_grid_columns)
+            predicted_region_table[COLUMN_INDICES_COLUMN].values[i])
 
         this_binary_endpoint_matrix = _find_endpoints_of_skeleton(
             this_binary_region_matrix)
         these_endpoint_rows, these_endpoint_columns = numpy.where(
             this_binary_endpoint_matrix == 1)
-        this_num_endpoints = len(these_endpoint_rows)
-
-        this_max_quality = 0.
-        this_main_skeleton_rows = None
-        this_main_skeleton_columns = None
-
-        for j in range(this_num_endpoints):
-            for k in range(j + 1, this_num_endpoints):
-                this_grid_search_object = a_star_search.GridSearch(
-                    binary_region_matrix=this_binary_region_matrix)
-
-                (this_skeleton_rows, this_skeleton_columns
-                ) = a_star_search.run_a_star(
-                    grid_search_object=this_grid_search_object,
-                    start_row=these_endpoint_rows[j],
-                    start_column=these_endpoint_columns[j],
-                    end_row=these_endpoint_rows[k],
-                    end_column=these_endpoint_columns[k])
-
-                if this_skeleton_rows is None:
-                    continue
-
-                this_quality = _get_skeleton_line_quality(
-                    row_indices=this_skeleton_rows,
-                    column_indices=this_skeleton_columns,
-                    x_grid_spacing_metres=x_grid_spacing_metres,
-                    y_grid_spacing_metres=y_grid_spacing_metres,
-                    min_endpoint_length_metres=min_endpoint_length_metres)
-
-                if this_quality <= this_max_quality:
-                    continue
-
-                this_max_quality = this_quality + 0.
-                this_main_skeleton_rows = this_skeleton_rows + 0
-                this_main_skeleton_columns = this_skeleton_columns + 0
+
+        these_rows, these_columns = _one_binary_image_to_region(
+            this_binary_region_matrix)
+
+        (this_main_skeleton_rows, this_main_skeleton_columns
+        ) = _find_main_skeleton_one_region(
+            row_indices=these_rows, column_indices=these_columns,
+            endpoint_rows=these_endpoint_rows,
+            endpoint_columns=these_endpoint_columns,
+            x_grid_spacing_metres=x_grid_spacing_metres,
+            y_grid_spacing_metres=y_grid_spacing_metres,
+            min_endpoint_length_metres=min_endpoint_length_metres)
+
+        if this_main_skeleton_rows is None:
+            rows_to_drop.append(i)
+        else:
+            this_main_skeleton_rows = this_main_skeleton_rows + this_first_row
+            this_main_skeleton_columns = (
+                this_main_skeleton_columns + this_first_column
+            )
 
         predicted_region_table[ROW_INDICES_COLUMN].values[
             i] = this_main_skeleton_rows
         predicted_region_table[COLUMN_INDICES_COLUMN].values[
             i] = this_main_skeleton_columns
-        if this_main_skeleton_rows is None:
-            rows_to_drop.append(i)
 
     if len(rows_to_drop) == 0:
         return predicted_region_table
@@ -625,18 +1264,13 @@ def project_polylines_latlng_to_narr(polyline_table):
     polyline_table.y_coords_metres: length-V numpy array of y-coordinates.
     """
 
-    num_fronts = len(polyline_table.index)
-    x_coords_by_front_metres = [numpy.array([])] * num_fronts
-    y_coords_by_front_metres = [numpy.array([])] * num_fronts
-
-    for i in range(num_fronts):
-        x_coords_by_front_metres[i], y_coords_by_front_metres[i] = (
-            nwp_model_utils.project_latlng_to_xy(
-                latitudes_deg=polyline_table[
-                    front_utils.LATITUDES_COLUMN].values[i],
-                longitudes_deg=polyline_table[
-                    front_utils.LONGITUDES_COLUMN].values[i],
-                model_name=nwp_model_utils.NARR_MODEL_NAME))
+    x_coords_by_front_metres, y_coords_by_front_metres = (
+        front_utils.project_polylines_latlng_to_narr(
+            latitudes_by_polyline_deg=list(
+                polyline_table[front_utils.LATITUDES_COLUMN].values),
+            longitudes_by_polyline_deg=list(
+                polyline_table[front_utils.LONGITUDES_COLUMN].values)
+        ))
 
     argument_dict = {
         X_COORDS_COLUMN: x_coords_by_front_metres,
@@ -701,6 +1335,260 @@ def convert_regions_rowcol_to_narr_xy(
     return predicted_region_table.assign(**argument_dict)
 
 
+def gridded_predictions_to_objects(
+        prediction_file_names, valid_times_unix_sec,
+        read_label_matrix_function, min_object_area_metres2,
+        min_endpoint_length_metres, num_processes=1):
+    """Converts gridded predictions to objects (skeleton lines).
+
+    Each time step is handled independently, by the following stages:
+
+    [1] Read predicted labels with `read_label_matrix_function`
+    [2] `images_to_regions`
+    [3] `discard_regions_with_small_area`
+    [4] `skeletonize_frontal_regions`
+    [5] `find_main_skeletons`
+    [6] `convert_regions_rowcol_to_narr_xy`
+
+    If `num_processes` > 1, time steps are spread over a pool of processes.
+    Each process holds the grid for only one time step at once, and results
+    are returned in the same order as `prediction_file_names`, so output does
+    not depend on the number of processes.
+
+    T = number of time steps
+
+    :param prediction_file_names: length-T list of paths to files with gridded
+        predictions.
+    :param valid_times_unix_sec: length-T numpy array of valid times.
+    :param read_label_matrix_function: Function that reads one file and returns
+        a 1-by-M-by-N numpy array of predicted labels (see doc for
+        `images_to_regions`).  If `num_processes` > 1, this must be picklable
+        (e.g., a module-level function or `functools.partial` thereof).
+    :param min_object_area_metres2: See doc for
+        `discard_regions_with_small_area`.
+    :param min_endpoint_length_metres: See doc for `find_main_skeletons`.
+    :param num_processes: Number of processes.
+    :return: predicted_region_table: See doc for
+        `convert_regions_rowcol_to_narr_xy`.
+    """
+
+    error_checking.assert_is_string_list(prediction_file_names)
+    num_times = len(prediction_file_names)
+
+    error_checking.assert_is_integer_numpy_array(valid_times_unix_sec)
+    error_checking.assert_is_numpy_array(
+        valid_times_unix_sec, exact_dimensions=numpy.array([num_times]))
+    error_checking.assert_is_integer(num_processes)
+    error_checking.assert_is_geq(num_processes, 1)
+
+    argument_tuples = [
+        (prediction_file_names[i], valid_times_unix_sec[i],
+         read_label_matrix_function, min_object_area_metres2,
+         min_endpoint_length_metres)
+        for i in range(num_times)
+    ]
+
+    if num_processes == 1:
+        pool_object = None
+        result_iterator = (
+            _predictions_to_objects_one_time(a) for a in argument_tuples
+        )
+    else:
+        pool_object = multiprocessing.Pool(processes=num_processes)
+        result_iterator = pool_object.imap(
+            _predictions_to_objects_one_time, argument_tuples, chunksize=1)
+
+    list_of_predicted_region_tables = []
+    total_stage_time_dict = dict.fromkeys(PIPELINE_STAGE_NAMES, 0.)
+
+    try:
+        for this_region_table, this_stage_time_dict in result_iterator:
+            for this_stage_name in PIPELINE_STAGE_NAMES:
+                total_stage_time_dict[this_stage_name] += (
+                    this_stage_time_dict[this_stage_name]
+                )
+
+            if len(list_of_predicted_region_tables) > 0:
+                this_region_table = this_region_table.align(
+                    list_of_predicted_region_tables[0], axis=1
+                )[0]
+
+            list_of_predicted_region_tables.append(this_region_table)
+    finally:
+        if pool_object is not None:
+            pool_object.close()
+            pool_object.join()
+
+    for this_stage_name in PIPELINE_STAGE_NAMES:
+        print (
+            'Time spent in stage "{0:s}" (summed over {1:d} time steps) = '
+            '{2:.2f} minutes'
+        ).format(this_stage_name, num_times,
+                 SECONDS_TO_MINUTES * total_stage_time_dict[this_stage_name])
+
+    return pandas.concat(
+        list_of_predicted_region_tables, axis=0, ignore_index=True)
+
+
+def match_fronts(predicted_region_table, actual_polyline_table):
+    """Matches each actual front with the nearest predicted front, and v-v.
+
+    Only fronts valid at the same time are matched.  Distances are defined as in
+    `_get_distance_between_fronts`, where the actual front is always the first
+    front.  Fronts are grouped by time only once, and all distances at each
+    time are computed with KD-trees.
+
+    A = number of actual fronts
+    F = number of predicted fronts
+
+    :param predicted_region_table: See doc for `get_binary_contingency_table`.
+    :param actual_polyline_table: Same.
+    :return: front_matching_dict: Dictionary with the following keys.
+    front_matching_dict['actual_to_predicted_distances_metres']: length-A numpy
+        array of distances from each actual front to the nearest predicted
+        front.  If there is no predicted front at the same time, this is
+        infinity.
+    front_matching_dict['nearest_predicted_front_indices']: length-A numpy
+        array with index of nearest predicted front (row in
+        `predicted_region_table`) for each actual front.  If there is no
+        predicted front at the same time, this is -1.
+    front_matching_dict['predicted_to_actual_distances_metres']: length-F numpy
+        array of distances from the nearest actual front to each predicted
+        front.
+    front_matching_dict['nearest_actual_front_indices']: length-F numpy array
+        with index of nearest actual front (row in `actual_polyline_table`) for
+        each predicted front.
+    """
+
+    actual_indices_by_time_dict = _group_indices_by_time(
+        actual_polyline_table[front_utils.TIME_COLUMN].values)
+    predicted_indices_by_time_dict = _group_indices_by_time(
+        predicted_region_table[front_utils.TIME_COLUMN].values)
+
+    num_actual_fronts = len(actual_polyline_table.index)
+    num_predicted_fronts = len(predicted_region_table.index)
+
+    actual_to_predicted_distances_metres = numpy.full(
+        num_actual_fronts, numpy.inf)
+    nearest_predicted_front_indices = numpy.full(
+        num_actual_fronts, -1, dtype=int)
+    predicted_to_actual_distances_metres = numpy.full(
+        num_predicted_fronts, numpy.inf)
+    nearest_actual_front_indices = numpy.full(
+        num_predicted_fronts, -1, dtype=int)
+
+    actual_x_coords_by_front_metres = actual_polyline_table[
+        X_COORDS_COLUMN].values
+    actual_y_coords_by_front_metres = actual_polyline_table[
+        Y_COORDS_COLUMN].values
+    predicted_x_coords_by_front_metres = predicted_region_table[
+        X_COORDS_COLUMN].values
+    predicted_y_coords_by_front_metres = predicted_region_table[
+        Y_COORDS_COLUMN].values
+
+    for this_time_unix_sec in actual_indices_by_time_dict:
+        if this_time_unix_sec not in predicted_indices_by_time_dict:
+            continue
+
+        these_actual_indices = actual_indices_by_time_dict[this_time_unix_sec]
+        these_predicted_indices = predicted_indices_by_time_dict[
+            this_time_unix_sec]
+
+        this_distance_matrix_metres = _get_distance_matrix_one_time(
+            actual_x_coords_by_front_metres=[
+                actual_x_coords_by_front_metres[i] for i in these_actual_indices
+            ],
+            actual_y_coords_by_front_metres=[
+                actual_y_coords_by_front_metres[i] for i in these_actual_indices
+            ],
+            predicted_x_coords_by_front_metres=[
+                predicted_x_coords_by_front_metres[j]
+                for j in these_predicted_indices
+            ],
+            predicted_y_coords_by_front_metres=[
+                predicted_y_coords_by_front_metres[j]
+                for j in these_predicted_indices
+            ]
+        )
+
+        these_nearest_indices = numpy.argmin(
+            this_distance_matrix_metres, axis=1)
+        actual_to_predicted_distances_metres[these_actual_indices] = (
+            this_distance_matrix_metres[
+                numpy.arange(len(these_actual_indices)), these_nearest_indices]
+        )
+        nearest_predicted_front_indices[these_actual_indices] = (
+            these_predicted_indices[these_nearest_indices]
+        )
+
+        these_nearest_indices = numpy.argmin(
+            this_distance_matrix_metres, axis=0)
+        predicted_to_actual_distances_metres[these_predicted_indices] = (
+            this_distance_matrix_metres[
+                these_nearest_indices,
+                numpy.arange(len(these_predicted_indices))
+            ]
+        )
+        nearest_actual_front_indices[these_predicted_indices] = (
+            these_actual_indices[these_nearest_indices]
+        )
+
+    return {
+        ACTUAL_TO_PREDICTED_DISTANCES_KEY: actual_to_predicted_distances_metres,
+        NEAREST_PREDICTED_INDICES_KEY: nearest_predicted_front_indices,
+        PREDICTED_TO_ACTUAL_DISTANCES_KEY: predicted_to_actual_distances_metres,
+        NEAREST_ACTUAL_INDICES_KEY: nearest_actual_front_indices
+    }
+
+
+def get_contingency_tables(
+        predicted_region_table, actual_polyline_table, neigh_distance_metres,
+        front_matching_dict=None):
+    """Creates all contingency tables in one pass.
+
+    This is much faster than calling `get_binary_contingency_table`,
+    `get_row_normalized_contingency_table`, and
+    `get_column_normalized_contingency_table` separately, because fronts are
+    matched only once.
+
+    :param predicted_region_table: See doc for `get_binary_contingency_table`.
+    :param actual_polyline_table: Same.
+    :param neigh_distance_metres: Same.
+    :param front_matching_dict: Dictionary created by `match_fronts`.  If None,
+        will be created here.
+    :return: binary_contingency_table_as_dict: See doc for
+        `get_binary_contingency_table`.
+    :return: row_normalized_ct_as_matrix: See doc for
+        `get_row_normalized_contingency_table`.
+    :return: column_normalized_ct_as_matrix: See doc for
+        `get_column_normalized_contingency_table`.
+    """
+
+    error_checking.assert_is_greater(neigh_distance_metres, 0.)
+
+    if front_matching_dict is None:
+        front_matching_dict = match_fronts(
+            predicted_region_table=predicted_region_table,
+            actual_polyline_table=actual_polyline_table)
+
+    binary_contingency_table_as_dict = _get_binary_contingency_table(
+        front_matching_dict=front_matching_dict,
+        neigh_distance_metres=neigh_distance_metres)
+    row_normalized_ct_as_matrix = _get_row_normalized_contingency_table(
+        front_matching_dict=front_matching_dict,
+        predicted_region_table=predicted_region_table,
+        actual_polyline_table=actual_polyline_table,
+        neigh_distance_metres=neigh_distance_metres)
+    column_normalized_ct_as_matrix = _get_column_normalized_contingency_table(
+        front_matching_dict=front_matching_dict,
+        predicted_region_table=predicted_region_table,
+        actual_polyline_table=actual_polyline_table,
+        neigh_distance_metres=neigh_distance_metres)
+
+    return (binary_contingency_table_as_dict, row_normalized_ct_as_matrix,
+            column_normalized_ct_as_matrix)
+
+
 def get_binary_contingency_table(
         predicted_region_table, actual_polyline_table, neigh_distance_metres):
     """Creates binary (front vs. no front) contingency table.
@@ -730,91 +1618,13 @@ def get_binary_contingency_table(
 
     error_checking.assert_is_greater(neigh_distance_metres, 0.)
 
-    actual_front_times_unix_sec = actual_polyline_table[
-        front_utils.TIME_COLUMN].values
-    predicted_front_times_unix_sec = predicted_region_table[
-        front_utils.TIME_COLUMN].values
-
-    num_actual_fronts = len(actual_polyline_table.index)
-    num_actual_fronts_predicted = 0
-    num_false_negatives = 0
-
-    for i in range(num_actual_fronts):
-        these_predicted_front_indices = numpy.where(
-            predicted_front_times_unix_sec == actual_front_times_unix_sec[i])[0]
-        found_match = False
-
-        for j in these_predicted_front_indices:
-            try:
-                this_distance_metres = _get_distance_between_fronts(
-                    first_x_coords_metres=
-                    actual_polyline_table[X_COORDS_COLUMN].values[i],
-                    first_y_coords_metres=
-                    actual_polyline_table[Y_COORDS_COLUMN].values[i],
-                    second_x_coords_metres=
-                    predicted_region_table[X_COORDS_COLUMN].values[j],
-                    second_y_coords_metres=
-                    predicted_region_table[Y_COORDS_COLUMN].values[j])
-            except:
-                print actual_polyline_table[X_COORDS_COLUMN].values[i]
-                print actual_polyline_table[Y_COORDS_COLUMN].values[i]
-                print predicted_region_table[X_COORDS_COLUMN].values[j]
-                print predicted_region_table[Y_COORDS_COLUMN].values[j]
-
-            if this_distance_metres < neigh_distance_metres:
-                found_match = True
-                break
-
-        if found_match:
-            num_actual_fronts_predicted += 1
-        else:
-            num_false_negatives += 1
-
-    num_predicted_fronts = len(predicted_region_table.index)
-    num_predicted_fronts_verified = 0
-    num_false_positives = 0
-
-    for i in range(num_predicted_fronts):
-        these_actual_front_indices = numpy.where(
-            actual_front_times_unix_sec == predicted_front_times_unix_sec[i])[0]
-        found_match = False
-
-        for j in these_actual_front_indices:
-            this_distance_metres = _get_distance_between_fronts(
-                second_x_coords_metres=
-                predicted_region_table[X_COORDS_COLUMN].values[i],
-                second_y_coords_metres=
-                predicted_region_table[Y_COORDS_COLUMN].values[i],
-                first_x_coords_metres=
-                actual_polyline_table[X_COORDS_COLUMN].values[j],
-                first_y_coords_metres=
-                actual_polyline_table[Y_COORDS_COLUMN].values[j])
-
-            # this_distance_metres = _get_distance_between_fronts(
-            #     first_x_coords_metres=
-            #     predicted_region_table[X_COORDS_COLUMN].values[i],
-            #     first_y_coords_metres=
-            #     predicted_region_table[Y_COORDS_COLUMN].values[i],
-            #     second_x_coords_metres=
-            #     actual_polyline_table[X_COORDS_COLUMN].values[j],
-            #     second_y_coords_metres=
-            #     actual_polyline_table[Y_COORDS_COLUMN].values[j])
-
-            if this_distance_metres < neigh_distance_metres:
-                found_match = True
-                break
-
-        if found_match:
-            num_predicted_fronts_verified += 1
-        else:
-            num_false_positives += 1
+    front_matching_dict = match_fronts(
+        predicted_region_table=predicted_region_table,
+        actual_polyline_table=actual_polyline_table)
 
-    return {
-        NUM_ACTUAL_FRONTS_PREDICTED_KEY: num_actual_fronts_predicted,
-        NUM_PREDICTED_FRONTS_VERIFIED_KEY: num_predicted_fronts_verified,
-        NUM_FALSE_POSITIVES_KEY: num_false_positives,
-        NUM_FALSE_NEGATIVES_KEY: num_false_negatives
-    }
+    return _get_binary_contingency_table(
+        front_matching_dict=front_matching_dict,
+        neigh_distance_metres=neigh_distance_metres)
 
 
 def get_row_normalized_contingency_table(
@@ -839,79 +1649,15 @@ def get_row_normalized_contingency_table(
 
     error_checking.assert_is_greater(neigh_distance_metres, 0.)
 
-    num_predicted_fronts = len(predicted_region_table.index)
-    actual_front_times_unix_sec = actual_polyline_table[
-        front_utils.TIME_COLUMN].values
-    predicted_front_times_unix_sec = predicted_region_table[
-        front_utils.TIME_COLUMN].values
-
-    num_classes = 1 + len(front_utils.VALID_STRING_IDS)
-    row_normalized_ct_as_matrix = numpy.full(
-        (num_classes, num_classes), 0, dtype=int)
-
-    for i in range(num_predicted_fronts):
-        these_actual_front_indices = numpy.where(
-            actual_front_times_unix_sec == predicted_front_times_unix_sec[i])[0]
-        these_distances_to_actual_metres = []
-
-        for j in these_actual_front_indices:
-            # this_distance_metres = _get_distance_between_fronts(
-            #     first_x_coords_metres=
-            #     predicted_region_table[X_COORDS_COLUMN].values[i],
-            #     first_y_coords_metres=
-            #     predicted_region_table[Y_COORDS_COLUMN].values[i],
-            #     second_x_coords_metres=
-            #     actual_polyline_table[X_COORDS_COLUMN].values[j],
-            #     second_y_coords_metres=
-            #     actual_polyline_table[Y_COORDS_COLUMN].values[j])
-
-            this_distance_metres = _get_distance_between_fronts(
-                second_x_coords_metres=
-                predicted_region_table[X_COORDS_COLUMN].values[i],
-                second_y_coords_metres=
-                predicted_region_table[Y_COORDS_COLUMN].values[i],
-                first_x_coords_metres=
-                actual_polyline_table[X_COORDS_COLUMN].values[j],
-                first_y_coords_metres=
-                actual_polyline_table[Y_COORDS_COLUMN].values[j])
-
-            these_distances_to_actual_metres.append(this_distance_metres)
-
-        if len(these_distances_to_actual_metres):
-            these_distances_to_actual_metres = numpy.array(
-                these_distances_to_actual_metres)
-            this_min_distance = numpy.min(these_distances_to_actual_metres)
-            this_actual_front_index = these_actual_front_indices[
-                numpy.argmin(these_distances_to_actual_metres)]
-        else:
-            this_min_distance = numpy.inf
-
-        this_predicted_front_type_int = front_utils.string_id_to_integer(
-            predicted_region_table[front_utils.FRONT_TYPE_COLUMN].values[i])
-
-        if this_min_distance > neigh_distance_metres:
-            row_normalized_ct_as_matrix[
-                this_predicted_front_type_int,
-                front_utils.NO_FRONT_INTEGER_ID] += 1
-        else:
-            this_actual_front_type_int = front_utils.string_id_to_integer(
-                actual_polyline_table[front_utils.FRONT_TYPE_COLUMN].values[
-                    this_actual_front_index])
-
-            row_normalized_ct_as_matrix[
-                this_predicted_front_type_int, this_actual_front_type_int] += 1
-
-    row_normalized_ct_as_matrix = row_normalized_ct_as_matrix.astype(float)
-
-    for k in range(1, num_classes):
-        if numpy.sum(row_normalized_ct_as_matrix[k, :]) == 0:
-            row_normalized_ct_as_matrix[k, :] = numpy.nan
-        else:
-            row_normalized_ct_as_matrix[k, :] = (
-                row_normalized_ct_as_matrix[k, :] /
-                numpy.sum(row_normalized_ct_as_matrix[k, :]))
+    front_matching_dict = match_fronts(
+        predicted_region_table=predicted_region_table,
+        actual_polyline_table=actual_polyline_table)
 
-    return row_normalized_ct_as_matrix[1:, :]
+    return _get_row_normalized_contingency_table(
+        front_matching_dict=front_matching_dict,
+        predicted_region_table=predicted_region_table,
+        actual_polyline_table=actual_polyline_table,
+        neigh_distance_metres=neigh_distance_metres)
 
 
 def get_column_normalized_contingency_table(
@@ -934,69 +1680,15 @@ def get_column_normalized_contingency_table(
 
     error_checking.assert_is_greater(neigh_distance_metres, 0.)
 
-    num_actual_fronts = len(actual_polyline_table.index)
-    actual_front_times_unix_sec = actual_polyline_table[
-        front_utils.TIME_COLUMN].values
-    predicted_front_times_unix_sec = predicted_region_table[
-        front_utils.TIME_COLUMN].values
-
-    num_classes = 1 + len(front_utils.VALID_STRING_IDS)
-    column_normalized_ct_as_matrix = numpy.full(
-        (num_classes, num_classes), 0, dtype=int)
-
-    for i in range(num_actual_fronts):
-        these_predicted_front_indices = numpy.where(
-            predicted_front_times_unix_sec == actual_front_times_unix_sec[i])[0]
-        these_distances_to_predicted_metres = []
-
-        for j in these_predicted_front_indices:
-            this_distance_metres = _get_distance_between_fronts(
-                first_x_coords_metres=
-                actual_polyline_table[X_COORDS_COLUMN].values[i],
-                first_y_coords_metres=
-                actual_polyline_table[Y_COORDS_COLUMN].values[i],
-                second_x_coords_metres=
-                predicted_region_table[X_COORDS_COLUMN].values[j],
-                second_y_coords_metres=
-                predicted_region_table[Y_COORDS_COLUMN].values[j])
-
-            these_distances_to_predicted_metres.append(this_distance_metres)
-
-        if len(these_distances_to_predicted_metres):
-            these_distances_to_predicted_metres = numpy.array(
-                these_distances_to_predicted_metres)
-            this_min_distance = numpy.min(these_distances_to_predicted_metres)
-            this_predicted_front_index = these_predicted_front_indices[
-                numpy.argmin(these_distances_to_predicted_metres)]
-        else:
-            this_min_distance = numpy.inf
+    front_matching_dict = match_fronts(
+        predicted_region_table=predicted_region_table,
+        actual_polyline_table=actual_polyline_table)
 
-        this_actual_front_type_int = front_utils.string_id_to_integer(
-            actual_polyline_table[front_utils.FRONT_TYPE_COLUMN].values[i])
-
-        if this_min_distance > neigh_distance_metres:
-            column_normalized_ct_as_matrix[
-                front_utils.NO_FRONT_INTEGER_ID,
-                this_actual_front_type_int] += 1
-        else:
-            this_predicted_front_type_int = front_utils.string_id_to_integer(
-                predicted_region_table[front_utils.FRONT_TYPE_COLUMN].values[
-                    this_predicted_front_index])
-
-            column_normalized_ct_as_matrix[
-                this_predicted_front_type_int, this_actual_front_type_int] += 1
-
-    column_normalized_ct_as_matrix = column_normalized_ct_as_matrix.astype(float)
-
-    for k in range(1, num_classes):
-        if numpy.sum(column_normalized_ct_as_matrix[:, k]) == 0:
-            column_normalized_ct_as_matrix[:, k] = numpy.nan
-        else:
-            column_normalized_ct_as_matrix[:, k] = (
-                column_normalized_ct_as_matrix[:, k] /
-                numpy.sum(column_normalized_ct_as_matrix[:, k]))
-
-    return column_normalized_ct_as_matrix[:, 1:]
+    return _get_column_normalized_contingency_table(
+        front_matching_dict=front_matching_dict,
+        predicted_region_table=predicted_region_table,
+        actual_polyline_table=actual_polyline_table,
+        neigh_distance_metres=neigh_distance_metres)
 
 
 def get_binary_pod(binary_contingency_table_as_dict):
@@ -31,6 +31,13 @@ ROW_INDICES_ONE_REGION = numpy.array(
 COLUMN_INDICES_ONE_REGION = numpy.array(
     [0, 1, 5, 1, 5, 6, 1, 2, 5, 6, 1, 2, 5, 2, 3, 4], dtype=int)
 
+# The following constants are used to test _one_region_to_cropped_binary_image.
+CROPPED_IMAGE_MATRIX_ONE_REGION = numpy.pad(
+    BINARY_IMAGE_MATRIX_ONE_REGION[:, :-1], pad_width=1, mode='constant',
+    constant_values=0)
+FIRST_ROW_IN_CROP = -1
+FIRST_COLUMN_IN_CROP = -1
+
 # The following constants are used to test _find_endpoints_of_skeleton.
 BINARY_SKELETON_MATRIX = numpy.array([[1, 0, 0, 0, 0, 0, 0, 0],
                                       [0, 1, 1, 0, 0, 0, 1, 0],
@@ -309,6 +316,49 @@ COLUMN_NORMALIZED_CT_AS_MATRIX = numpy.array([[1. / 3, 0.25],
                                               [0., 0.],
                                               [2. / 3, 0.75]])
 
+# The following constants are used to test _get_pixel_adjacency_matrix.
+ROWS_FOR_ADJACENCY = numpy.array([0, 0, 1, 2], dtype=int)
+COLUMNS_FOR_ADJACENCY = numpy.array([0, 1, 1, 2], dtype=int)
+X_SPACING_FOR_ADJACENCY_METRES = 2.
+Y_SPACING_FOR_ADJACENCY_METRES = 1.
+
+THIS_DIAGONAL_DISTANCE_METRES = numpy.sqrt(5.)
+ADJACENCY_MATRIX_METRES = numpy.array(
+    [[0, 2, THIS_DIAGONAL_DISTANCE_METRES, 0],
+     [2, 0, 1, 0],
+     [THIS_DIAGONAL_DISTANCE_METRES, 1, 0, THIS_DIAGONAL_DISTANCE_METRES],
+     [0, 0, THIS_DIAGONAL_DISTANCE_METRES, 0]])
+
+# The following constants are used to test _get_shortest_path.  The search
+# starts at pixel 1, and pixel 4 cannot be reached.
+PREDECESSOR_INDICES = numpy.array([3, -9999, 0, 1, -9999], dtype=int)
+PATH_START_INDEX = 1
+PATH_END_INDEX = 2
+PATH_INDICES = numpy.array([1, 3, 0, 2], dtype=int)
+UNREACHABLE_END_INDEX = 4
+
+# The following constants are used to test _find_main_skeleton_one_region.  The
+# skeleton is a horizontal line with one branch, which goes up from the middle
+# of the line.  The main skeleton line is the horizontal line, which connects
+# the two endpoints farthest apart.
+THIS_SKELETON_MATRIX = numpy.array([[0, 0, 0, 1, 0, 0, 0],
+                                    [0, 0, 0, 1, 0, 0, 0],
+                                    [1, 1, 1, 1, 1, 1, 1]], dtype=int)
+
+ROWS_IN_BRANCHED_SKELETON, COLUMNS_IN_BRANCHED_SKELETON = numpy.where(
+    THIS_SKELETON_MATRIX == 1)
+ENDPOINT_ROWS_IN_BRANCHED_SKELETON = numpy.array([0, 2, 2], dtype=int)
+ENDPOINT_COLUMNS_IN_BRANCHED_SKELETON = numpy.array([3, 0, 6], dtype=int)
+
+MAIN_SKELETON_ROWS = numpy.full(7, 2, dtype=int)
+MAIN_SKELETON_COLUMNS = numpy.linspace(0, 6, num=7, dtype=int)
+
+# The following constants are used to test _get_medians_by_segment.
+VALUES_BY_SEGMENT = numpy.array(
+    [5., 1., 3., 4., 2., 8., 6., 10., 0., 7.])
+NUM_VALUES_BY_SEGMENT = numpy.array([3, 0, 4, 1, 2], dtype=int)
+MEDIAN_BY_SEGMENT = numpy.array([3., numpy.nan, 5., 10., 3.5])
+
 # The following constants are used to test performance metrics.
 FAKE_BINARY_CT_AS_DICT = {
     object_based_eval.NUM_ACTUAL_FRONTS_PREDICTED_KEY: 100,
@@ -324,6 +374,22 @@ BINARY_FAR = 200. / 250
 BINARY_CSI = (110. / 100 + 250. / 50 - 1.) ** -1
 BINARY_FREQUENCY_BIAS = (100. / 110) * (250. / 50)
 
+# The following constants are used to test gridded_predictions_to_objects.
+PREDICTION_FILE_NAMES = [
+    'predictions_time0.p', 'predictions_time1.p', 'predictions_time2.p'
+]
+PREDICTION_TIMES_UNIX_SEC = numpy.array([0, 10800, 21600], dtype=int)
+BINARIZATION_THRESHOLD_BY_FILE_NAME = {
+    PREDICTION_FILE_NAMES[0]: 0.75,
+    PREDICTION_FILE_NAMES[1]: 0.6,
+    PREDICTION_FILE_NAMES[2]: 0.9
+}
+
+NARR_GRID_SPACING_METRES = nwp_model_utils.get_xy_grid_spacing(
+    model_name=nwp_model_utils.NARR_MODEL_NAME)[0]
+MIN_OBJECT_AREA_METRES2 = 1.5 * NARR_GRID_SPACING_METRES ** 2
+MIN_ENDPOINT_LENGTH_METRES = 1.5 * NARR_GRID_SPACING_METRES
+
 
 def _compare_tables(first_table, second_table):
     """Compares two pandas DataFrames.
@@ -359,6 +425,74 @@ def _compare_tables(first_table, second_table):
     return True
 
 
+def _read_label_matrix_for_test(prediction_file_name):
+    """Creates predicted labels for one time step, instead of reading a file.
+
+    This is a module-level function, so that it can be pickled and sent to
+    other processes by `gridded_predictions_to_objects`.
+
+    :param prediction_file_name: One of `PREDICTION_FILE_NAMES`.
+    :return: predicted_label_matrix: 1-by-M-by-N numpy array of predicted
+        labels.
+    """
+
+    return object_based_eval.determinize_probabilities(
+        class_probability_matrix=PROBABILITY_MATRIX,
+        binarization_threshold=BINARIZATION_THRESHOLD_BY_FILE_NAME[
+            prediction_file_name])
+
+
+def _predictions_to_objects_time_by_time():
+    """Converts gridded predictions to objects, one time step at a time.
+
+    This is the per-time path that `gridded_predictions_to_objects` replaces.
+    Each stage is run on the main process, and the region tables are
+    concatenated at the end.
+
+    :return: predicted_region_table: See doc for
+        `object_based_eval.gridded_predictions_to_objects`.
+    """
+
+    num_grid_rows, num_grid_columns = nwp_model_utils.get_grid_dimensions(
+        model_name=nwp_model_utils.NARR_MODEL_NAME)
+    list_of_predicted_region_tables = []
+
+    for i in range(len(PREDICTION_FILE_NAMES)):
+        these_times_unix_sec = PREDICTION_TIMES_UNIX_SEC[[i]]
+
+        this_region_table = object_based_eval.images_to_regions(
+            predicted_label_matrix=_read_label_matrix_for_test(
+                PREDICTION_FILE_NAMES[i]),
+            image_times_unix_sec=these_times_unix_sec)
+
+        this_region_table = object_based_eval.discard_regions_with_small_area(
+            predicted_region_table=this_region_table,
+            x_grid_spacing_metres=NARR_GRID_SPACING_METRES,
+            y_grid_spacing_metres=NARR_GRID_SPACING_METRES,
+            min_area_metres2=MIN_OBJECT_AREA_METRES2)
+
+        this_region_table = object_based_eval.skeletonize_frontal_regions(
+            predicted_region_table=this_region_table,
+            num_grid_rows=num_grid_rows, num_grid_columns=num_grid_columns)
+
+        this_region_table = object_based_eval.find_main_skeletons(
+            predicted_region_table=this_region_table,
+            image_times_unix_sec=these_times_unix_sec,
+            num_grid_rows=num_grid_rows, num_grid_columns=num_grid_columns,
+            x_grid_spacing_metres=NARR_GRID_SPACING_METRES,
+            y_grid_spacing_metres=NARR_GRID_SPACING_METRES,
+            min_endpoint_length_metres=MIN_ENDPOINT_LENGTH_METRES)
+
+        this_region_table = object_based_eval.convert_regions_rowcol_to_narr_xy(
+            predicted_region_table=this_region_table,
+            are_predictions_from_fcn=False)
+
+        list_of_predicted_region_tables.append(this_region_table)
+
+    return pandas.concat(
+        list_of_predicted_region_tables, axis=0, ignore_index=True)
+
+
 class ObjectBasedEvaluationTests(unittest.TestCase):
     """Each method is a unit test for object_based_evaluation.py."""
 
@@ -376,6 +510,19 @@ class ObjectBasedEvaluationTests(unittest.TestCase):
         self.assertTrue(numpy.array_equal(
             this_binary_image_matrix, BINARY_IMAGE_MATRIX_ONE_REGION))
 
+    def test_one_region_to_cropped_binary_image(self):
+        """Ensures correct output from _one_region_to_cropped_binary_image."""
+
+        (this_binary_image_matrix, this_first_row, this_first_column
+        ) = object_based_eval._one_region_to_cropped_binary_image(
+            row_indices_in_region=ROW_INDICES_ONE_REGION,
+            column_indices_in_region=COLUMN_INDICES_ONE_REGION)
+
+        self.assertTrue(numpy.array_equal(
+            this_binary_image_matrix, CROPPED_IMAGE_MATRIX_ONE_REGION))
+        self.assertTrue(this_first_row == FIRST_ROW_IN_CROP)
+        self.assertTrue(this_first_column == FIRST_COLUMN_IN_CROP)
+
     def test_one_binary_image_to_region(self):
         """Ensures correct output from _one_binary_image_to_region."""
 
@@ -514,13 +661,33 @@ class ObjectBasedEvaluationTests(unittest.TestCase):
         self.assertTrue(_compare_tables(
             this_region_table, PREDICTED_REGION_TABLE_SANS_SMALL_AREA))
 
-    def test_skeletonize_frontal_regions(self):
-        """Ensures correct output from skeletonize_frontal_regions."""
+    def test_skeletonize_frontal_regions_by_region(self):
+        """Ensures correct output from skeletonize_frontal_regions.
+
+        In this case, each region is thinned separately.
+        """
 
         this_skeleton_table = object_based_eval.skeletonize_frontal_regions(
             predicted_region_table=copy.deepcopy(PREDICTED_REGION_TABLE),
             num_grid_rows=PREDICTED_LABEL_MATRIX.shape[1],
-            num_grid_columns=PREDICTED_LABEL_MATRIX.shape[2])
+            num_grid_columns=PREDICTED_LABEL_MATRIX.shape[2],
+            one_pass_per_time=False)
+
+        self.assertTrue(_compare_tables(
+            this_skeleton_table, PREDICTED_SKELETON_TABLE))
+
+    def test_skeletonize_frontal_regions_by_time(self):
+        """Ensures correct output from skeletonize_frontal_regions.
+
+        In this case, all regions with the same time and front type are thinned
+        together.
+        """
+
+        this_skeleton_table = object_based_eval.skeletonize_frontal_regions(
+            predicted_region_table=copy.deepcopy(PREDICTED_REGION_TABLE),
+            num_grid_rows=PREDICTED_LABEL_MATRIX.shape[1],
+            num_grid_columns=PREDICTED_LABEL_MATRIX.shape[2],
+            one_pass_per_time=True)
 
         self.assertTrue(_compare_tables(
             this_skeleton_table, PREDICTED_SKELETON_TABLE))
@@ -626,6 +793,98 @@ class ObjectBasedEvaluationTests(unittest.TestCase):
             this_column_normalized_ct_matrix, COLUMN_NORMALIZED_CT_AS_MATRIX,
             atol=TOLERANCE, equal_nan=True))
 
+    def test_get_pixel_adjacency_matrix(self):
+        """Ensures correct output from _get_pixel_adjacency_matrix."""
+
+        this_adjacency_matrix = object_based_eval._get_pixel_adjacency_matrix(
+            row_indices=ROWS_FOR_ADJACENCY,
+            column_indices=COLUMNS_FOR_ADJACENCY,
+            x_grid_spacing_metres=X_SPACING_FOR_ADJACENCY_METRES,
+            y_grid_spacing_metres=Y_SPACING_FOR_ADJACENCY_METRES)
+
+        self.assertTrue(numpy.allclose(
+            this_adjacency_matrix.toarray(), ADJACENCY_MATRIX_METRES,
+            atol=TOLERANCE))
+
+    def test_get_shortest_path(self):
+        """Ensures correct output from _get_shortest_path."""
+
+        these_path_indices = object_based_eval._get_shortest_path(
+            predecessor_indices=PREDECESSOR_INDICES,
+            start_index=PATH_START_INDEX, end_index=PATH_END_INDEX)
+
+        self.assertTrue(numpy.array_equal(these_path_indices, PATH_INDICES))
+
+    def test_get_shortest_path_start_equals_end(self):
+        """Ensures correct output from _get_shortest_path.
+
+        In this case, the start and end pixels are the same.
+        """
+
+        these_path_indices = object_based_eval._get_shortest_path(
+            predecessor_indices=PREDECESSOR_INDICES,
+            start_index=PATH_START_INDEX, end_index=PATH_START_INDEX)
+
+        self.assertTrue(numpy.array_equal(
+            these_path_indices, numpy.array([PATH_START_INDEX], dtype=int)))
+
+    def test_get_shortest_path_unreachable(self):
+        """Ensures that _get_shortest_path errors out.
+
+        In this case, the end pixel cannot be reached from the start pixel.
+        """
+
+        with self.assertRaises(ValueError):
+            object_based_eval._get_shortest_path(
+                predecessor_indices=PREDECESSOR_INDICES,
+                start_index=PATH_START_INDEX, end_index=UNREACHABLE_END_INDEX)
+
+    def test_find_main_skeleton_one_region(self):
+        """Ensures correct output from _find_main_skeleton_one_region."""
+
+        these_rows, these_columns = (
+            object_based_eval._find_main_skeleton_one_region(
+                row_indices=ROWS_IN_BRANCHED_SKELETON,
+                column_indices=COLUMNS_IN_BRANCHED_SKELETON,
+                endpoint_rows=ENDPOINT_ROWS_IN_BRANCHED_SKELETON,
+                endpoint_columns=ENDPOINT_COLUMNS_IN_BRANCHED_SKELETON,
+                x_grid_spacing_metres=X_GRID_SPACING_METRES,
+                y_grid_spacing_metres=Y_GRID_SPACING_METRES,
+                min_endpoint_length_metres=X_GRID_SPACING_METRES)
+        )
+
+        self.assertTrue(numpy.array_equal(these_rows, MAIN_SKELETON_ROWS))
+        self.assertTrue(numpy.array_equal(these_columns, MAIN_SKELETON_COLUMNS))
+
+    def test_get_medians_by_segment(self):
+        """Ensures correct output from _get_medians_by_segment."""
+
+        these_medians = object_based_eval._get_medians_by_segment(
+            input_values=VALUES_BY_SEGMENT,
+            num_values_by_segment=NUM_VALUES_BY_SEGMENT)
+
+        self.assertTrue(numpy.allclose(
+            these_medians, MEDIAN_BY_SEGMENT, atol=TOLERANCE, equal_nan=True))
+
+    def test_get_contingency_tables(self):
+        """Ensures correct output from get_contingency_tables."""
+
+        (this_binary_ct_as_dict, this_row_normalized_ct_matrix,
+         this_column_normalized_ct_matrix
+        ) = object_based_eval.get_contingency_tables(
+            predicted_region_table=PREDICTED_REGION_TABLE_FOR_CT,
+            actual_polyline_table=ACTUAL_POLYLINE_TABLE,
+            neigh_distance_metres=NEIGH_DISTANCE_METRES)
+
+        self.assertTrue(
+            this_binary_ct_as_dict == BINARY_CONTINGENCY_TABLE_AS_DICT)
+        self.assertTrue(numpy.allclose(
+            this_row_normalized_ct_matrix, ROW_NORMALIZED_CT_AS_MATRIX,
+            atol=TOLERANCE, equal_nan=True))
+        self.assertTrue(numpy.allclose(
+            this_column_normalized_ct_matrix, COLUMN_NORMALIZED_CT_AS_MATRIX,
+            atol=TOLERANCE, equal_nan=True))
+
     def test_get_binary_pod(self):
         """Ensures correct output from get_binary_pod."""
 
@@ -674,6 +933,41 @@ class ObjectBasedEvaluationTests(unittest.TestCase):
         self.assertTrue(numpy.isclose(
             this_binary_freq_bias, BINARY_FREQUENCY_BIAS, atol=TOLERANCE))
 
+    def test_gridded_predictions_to_objects_one_process(self):
+        """Ensures correct output from gridded_predictions_to_objects.
+
+        In this case, using one process.
+        """
+
+        this_region_table = object_based_eval.gridded_predictions_to_objects(
+            prediction_file_names=PREDICTION_FILE_NAMES,
+            valid_times_unix_sec=PREDICTION_TIMES_UNIX_SEC,
+            read_label_matrix_function=_read_label_matrix_for_test,
+            min_object_area_metres2=MIN_OBJECT_AREA_METRES2,
+            min_endpoint_length_metres=MIN_ENDPOINT_LENGTH_METRES,
+            num_processes=1)
+
+        this_expected_table = _predictions_to_objects_time_by_time()
+        self.assertTrue(len(this_expected_table.index) > 0)
+        self.assertTrue(_compare_tables(this_region_table, this_expected_table))
+
+    def test_gridded_predictions_to_objects_two_processes(self):
+        """Ensures correct output from gridded_predictions_to_objects.
+
+        In this case, using two processes.
+        """
+
+        this_region_table = object_based_eval.gridded_predictions_to_objects(
+            prediction_file_names=PREDICTION_FILE_NAMES,
+            valid_times_unix_sec=PREDICTION_TIMES_UNIX_SEC,
+            read_label_matrix_function=_read_label_matrix_for_test,
+            min_object_area_metres2=MIN_OBJECT_AREA_METRES2,
+            min_endpoint_length_metres=MIN_ENDPOINT_LENGTH_METRES,
+            num_processes=2)
+
+        this_expected_table = _predictions_to_objects_time_by_time()
+        self.assertTrue(_compare_tables(this_region_table, this_expected_table))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -5,7 +5,6 @@ import numpy
 import pandas
 import matplotlib.pyplot as pyplot
 from gewittergefahr.gg_utils import histograms
-from gewittergefahr.gg_utils import nwp_model_utils
 from gewittergefahr.gg_utils import number_rounding as rounder
 from gewittergefahr.gg_utils import file_system_utils
 from gewittergefahr.plotting import plotting_utils
@@ -67,29 +66,16 @@ def _project_fronts_latlng_to_narr(front_line_table):
     front_line_table.y_coords_metres: length-P numpy array of y-coordinates.
     """
 
-    num_fronts = len(front_line_table.index)
-    projection_object = nwp_model_utils.init_model_projection(
-        nwp_model_utils.NARR_MODEL_NAME)
-
-    x_coords_by_front_metres = [numpy.array([])] * num_fronts
-    y_coords_by_front_metres = [numpy.array([])] * num_fronts
-
-    for i in range(num_fronts):
-        if numpy.mod(i, 1000) == 0:
-            print (
-                'Have projected {0:d} of {1:d} fronts to NARR coordinates...'
-            ).format(i, num_fronts)
-
-        (x_coords_by_front_metres[i], y_coords_by_front_metres[i]
-        ) = nwp_model_utils.project_latlng_to_xy(
-            latitudes_deg=front_line_table[
-                front_utils.LATITUDES_COLUMN].values[i],
-            longitudes_deg=front_line_table[
-                front_utils.LONGITUDES_COLUMN].values[i],
-            projection_object=projection_object,
-            model_name=nwp_model_utils.NARR_MODEL_NAME)
+    x_coords_by_front_metres, y_coords_by_front_metres = (
+        front_utils.project_polylines_latlng_to_narr(
+            latitudes_by_polyline_deg=list(
+                front_line_table[front_utils.LATITUDES_COLUMN].values),
+            longitudes_by_polyline_deg=list(
+                front_line_table[front_utils.LONGITUDES_COLUMN].values)
+        ))
 
-    print 'Projected all {0:d} fronts to NARR coordinates!'.format(num_fronts)
+    print 'Projected all {0:d} fronts to NARR coordinates!'.format(
+        len(x_coords_by_front_metres))
     return front_line_table.assign(**{
         X_COORDS_COLUMN: x_coords_by_front_metres,
         Y_COORDS_COLUMN: y_coords_by_front_metres
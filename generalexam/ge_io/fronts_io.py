@@ -2,10 +2,13 @@
 
 import os.path
 import pickle
+import numpy
+import pandas
 from gewittergefahr.gg_utils import time_conversion
 from gewittergefahr.gg_utils import file_system_utils
 from gewittergefahr.gg_utils import error_checking
 from generalexam.ge_utils import front_utils
+from generalexam.ge_utils import utils
 
 TIME_FORMAT_MONTH = '%Y%m'
 TIME_FORMAT_IN_FILE_NAMES = '%Y%m%d%H'
@@ -16,6 +19,28 @@ VALID_FILE_TYPES = [POLYLINE_FILE_TYPE, GRIDDED_FILE_TYPE]
 
 PATHLESS_PREFIX_FOR_POLYLINE_FILES = 'front_locations'
 PATHLESS_PREFIX_FOR_GRIDDED_FILES = 'narr_frontal_grids'
+PATHLESS_PREFIX_FOR_TARGET_STORES = 'dilated_targets'
+
+TARGET_STORE_EXTENSION = '.npy'
+TARGET_STORE_INDEX_SUFFIX = '_index'
+TARGET_STORE_INDEX_EXTENSION = '.npz'
+TEMP_FILE_SUFFIX = '.tmp'
+VALID_TIMES_KEY = 'valid_times_unix_sec'
+SOURCE_MTIMES_KEY = 'source_mtimes_unix_sec'
+
+COLUMNAR_FILE_EXTENSION = '.npz'
+TIMES_KEY = 'unix_times_sec'
+FRONT_TYPES_KEY = 'front_type_integers'
+FIRST_VERTEX_INDICES_KEY = 'first_vertex_index_by_front'
+FIRST_WARM_POINT_INDICES_KEY = 'first_warm_point_index_by_time'
+FIRST_COLD_POINT_INDICES_KEY = 'first_cold_point_index_by_time'
+
+TIME_INTERVAL_SEC = 10800
+DAYS_TO_SECONDS = 86400
+NUM_TIMES_PER_MONTHLY_STORE = 31 * 8
+VALID_NUM_CLASSES = [2, 3]
+VALID_FRONT_TYPE_STRINGS = [
+    front_utils.WARM_FRONT_STRING_ID, front_utils.COLD_FRONT_STRING_ID]
 
 REQUIRED_POLYLINE_COLUMNS = [
     front_utils.FRONT_TYPE_COLUMN, front_utils.TIME_COLUMN,
@@ -42,6 +67,249 @@ def _check_file_type(file_type):
         raise ValueError(error_string)
 
 
+def _check_target_store_metadata(num_classes, dilation_distance_metres):
+    """Error-checks metadata for store with dilated target images.
+
+    :param num_classes: Number of classes (must be in list
+        `VALID_NUM_CLASSES`).
+    :param dilation_distance_metres: Dilation distance.
+    :raises: ValueError: if `num_classes not in VALID_NUM_CLASSES`.
+    """
+
+    error_checking.assert_is_integer(num_classes)
+    if num_classes not in VALID_NUM_CLASSES:
+        error_string = (
+            '\n\n{0:s}\nValid numbers of classes (listed above) do not '
+            'include {1:d}.'
+        ).format(str(VALID_NUM_CLASSES), num_classes)
+        raise ValueError(error_string)
+
+    error_checking.assert_is_geq(dilation_distance_metres, 0.)
+
+
+def _target_store_to_index_file(store_file_name):
+    """Returns name of index that accompanies store with dilated targets.
+
+    :param store_file_name: Path to store (see `find_dilated_target_store`).
+    :return: index_file_name: Path to index, with valid times in the store and
+        modification times of the files from which they were created.
+    """
+
+    return '{0:s}{1:s}{2:s}'.format(
+        os.path.splitext(store_file_name)[0], TARGET_STORE_INDEX_SUFFIX,
+        TARGET_STORE_INDEX_EXTENSION)
+
+
+def _read_target_store_index(store_file_name):
+    """Reads index for store with dilated targets.
+
+    T = number of time steps in store
+
+    :param store_file_name: Path to store (see `find_dilated_target_store`).
+    :return: valid_times_unix_sec: length-T numpy array of valid times.  If the
+        store does not exist, this is an empty array.
+    :return: source_mtimes_unix_sec: length-T numpy array with modification
+        time of each source file (with frontal grids) when the targets were
+        created.  NaN means that the source file did not exist.
+    """
+
+    index_file_name = _target_store_to_index_file(store_file_name)
+    if not (os.path.isfile(store_file_name) and
+            os.path.isfile(index_file_name)):
+        return numpy.array([], dtype=int), numpy.array([])
+
+    index_dict = numpy.load(index_file_name)
+    return index_dict[VALID_TIMES_KEY], index_dict[SOURCE_MTIMES_KEY]
+
+
+def _time_to_index_in_monthly_store(valid_time_unix_sec):
+    """Returns index of valid time in monthly store.
+
+    :param valid_time_unix_sec: Valid time.
+    :return: time_index: Array index along the first axis of the monthly store.
+    :raises: ValueError: if valid time is not a multiple of 3 hours.
+    """
+
+    if numpy.mod(valid_time_unix_sec, TIME_INTERVAL_SEC) != 0:
+        error_string = (
+            'Valid time ({0:d}) is not a multiple of {1:d} seconds.'
+        ).format(valid_time_unix_sec, TIME_INTERVAL_SEC)
+        raise ValueError(error_string)
+
+    month_start_time_unix_sec = time_conversion.string_to_unix_sec(
+        time_conversion.unix_sec_to_string(
+            valid_time_unix_sec, TIME_FORMAT_MONTH),
+        TIME_FORMAT_MONTH)
+
+    return int(
+        (valid_time_unix_sec - month_start_time_unix_sec) / TIME_INTERVAL_SEC
+    )
+
+
+def _get_source_mtimes(top_directory_name, valid_times_unix_sec):
+    """Returns modification time of each file with frontal grids.
+
+    T = number of time steps
+
+    :param top_directory_name: Name of top-level directory with gridded files.
+    :param valid_times_unix_sec: length-T numpy array of valid times.
+    :return: source_mtimes_unix_sec: length-T numpy array of modification
+        times.  NaN means that the file does not exist.
+    """
+
+    source_mtimes_unix_sec = numpy.full(len(valid_times_unix_sec), numpy.nan)
+
+    for i in range(len(valid_times_unix_sec)):
+        this_file_name = find_file_for_one_time(
+            top_directory_name=top_directory_name,
+            file_type=GRIDDED_FILE_TYPE,
+            valid_time_unix_sec=valid_times_unix_sec[i],
+            raise_error_if_missing=False)
+
+        if os.path.isfile(this_file_name):
+            source_mtimes_unix_sec[i] = os.path.getmtime(this_file_name)
+
+    return source_mtimes_unix_sec
+
+
+def _ragged_column_to_flat(array_by_row, dtype):
+    """Converts ragged column (one numpy array per row) to flat array.
+
+    R = number of rows
+    P = total number of values
+
+    :param array_by_row: length-R list (or object array) of 1-D numpy arrays.
+    :param dtype: Data type for output array.
+    :return: flat_array: length-P numpy array, containing all values in
+        `array_by_row` concatenated.
+    :return: first_index_by_row: numpy array (length R + 1) with index of first
+        value in each row.  The last element is P.
+    """
+
+    num_values_by_row = numpy.array([len(a) for a in array_by_row], dtype=int)
+    first_index_by_row = numpy.concatenate((
+        numpy.array([0], dtype=int), numpy.cumsum(num_values_by_row)
+    ))
+
+    if len(array_by_row) == 0:
+        return numpy.array([], dtype=dtype), first_index_by_row
+
+    return (numpy.concatenate(tuple(array_by_row)).astype(dtype),
+            first_index_by_row)
+
+
+def _flat_to_ragged_column(flat_array, first_index_by_row, row_indices):
+    """Converts flat array to ragged column, for selected rows only.
+
+    This is the inverse of `_ragged_column_to_flat`.
+
+    :param flat_array: See doc for `_ragged_column_to_flat`.
+    :param first_index_by_row: Same.
+    :param row_indices: 1-D numpy array of rows to keep.
+    :return: array_by_row: List of 1-D numpy arrays (one per row in
+        `row_indices`).
+    """
+
+    return [
+        flat_array[first_index_by_row[i]:first_index_by_row[i + 1]]
+        for i in row_indices
+    ]
+
+
+def _get_month_start_times(first_time_unix_sec, last_time_unix_sec):
+    """Returns start time of each month in time period.
+
+    :param first_time_unix_sec: Start of time period.
+    :param last_time_unix_sec: End of time period.
+    :return: month_start_times_unix_sec: 1-D numpy array with start time of each
+        month that overlaps the period.
+    """
+
+    month_start_times_unix_sec = []
+    this_time_unix_sec = first_time_unix_sec
+
+    while True:
+        this_month_string = time_conversion.unix_sec_to_string(
+            this_time_unix_sec, TIME_FORMAT_MONTH)
+        this_month_start_unix_sec = time_conversion.string_to_unix_sec(
+            this_month_string, TIME_FORMAT_MONTH)
+        if this_month_start_unix_sec > last_time_unix_sec:
+            break
+
+        month_start_times_unix_sec.append(this_month_start_unix_sec)
+        this_time_unix_sec = this_month_start_unix_sec + 32 * DAYS_TO_SECONDS
+
+    return numpy.array(month_start_times_unix_sec, dtype=int)
+
+
+def _read_one_month_from_pickle_files(
+        top_directory_name, file_type, month_start_time_unix_sec,
+        first_time_unix_sec, last_time_unix_sec, valid_times_unix_sec=None):
+    """Reads fronts for part of one month from files with one time step each.
+
+    :param top_directory_name: Name of top-level directory (see
+        `find_file_for_one_time`).
+    :param file_type: Type of file (either "polylines" or "narr_grids").
+    :param month_start_time_unix_sec: Start of month.
+    :param first_time_unix_sec: Start of time period.
+    :param last_time_unix_sec: End of time period.
+    :param valid_times_unix_sec: 1-D numpy array of valid times to read.  If
+        None, will read every time step in the period (skipping missing files).
+        If specified, will read only these time steps (those in the month and
+        period), and will raise an error if any file is missing.
+    :return: front_table: pandas DataFrame created by `read_polylines_from_file`
+        or `read_narr_grids_from_file`.  If there are no files, this is None.
+    """
+
+    month_end_time_unix_sec = time_conversion.string_to_unix_sec(
+        time_conversion.unix_sec_to_string(
+            month_start_time_unix_sec + 32 * DAYS_TO_SECONDS,
+            TIME_FORMAT_MONTH),
+        TIME_FORMAT_MONTH) - 1
+
+    first_time_in_month_unix_sec = TIME_INTERVAL_SEC * int(numpy.ceil(
+        float(max([first_time_unix_sec, month_start_time_unix_sec])) /
+        TIME_INTERVAL_SEC
+    ))
+    last_time_in_month_unix_sec = min(
+        [last_time_unix_sec, month_end_time_unix_sec])
+
+    if valid_times_unix_sec is None:
+        times_to_read_unix_sec = range(
+            first_time_in_month_unix_sec, last_time_in_month_unix_sec + 1,
+            TIME_INTERVAL_SEC)
+        raise_error_if_missing = False
+    else:
+        times_to_read_unix_sec = numpy.unique(valid_times_unix_sec[
+            numpy.logical_and(
+                valid_times_unix_sec >= first_time_in_month_unix_sec,
+                valid_times_unix_sec <= last_time_in_month_unix_sec)
+        ])
+        raise_error_if_missing = True
+
+    list_of_front_tables = []
+
+    for this_time_unix_sec in times_to_read_unix_sec:
+        this_file_name = find_file_for_one_time(
+            top_directory_name=top_directory_name, file_type=file_type,
+            valid_time_unix_sec=int(this_time_unix_sec),
+            raise_error_if_missing=raise_error_if_missing)
+        if not os.path.isfile(this_file_name):
+            continue
+
+        if file_type == POLYLINE_FILE_TYPE:
+            list_of_front_tables.append(
+                read_polylines_from_file(this_file_name))
+        else:
+            list_of_front_tables.append(
+                read_narr_grids_from_file(this_file_name))
+
+    if len(list_of_front_tables) == 0:
+        return None
+
+    return pandas.concat(list_of_front_tables, axis=0, ignore_index=True)
+
+
 def write_polylines_to_file(front_table, pickle_file_name):
     """Writes one or more frontal polylines to Pickle file.
 
@@ -211,3 +479,755 @@ def find_file_for_one_time(
         raise ValueError(error_string)
 
     return front_file_name
+
+
+def parse_file_name_for_one_time(front_file_name):
+    """Parses metadata from name of file with one time step.
+
+    This is the inverse of `find_file_for_one_time`.
+
+    :param front_file_name: Path to file (see `find_file_for_one_time`).
+    :return: top_directory_name: See doc for `find_file_for_one_time`.
+    :return: file_type: Same.
+    :return: valid_time_unix_sec: Same.
+    :raises: ValueError: if the file name was not created by
+        `find_file_for_one_time`.
+    """
+
+    error_checking.assert_is_string(front_file_name)
+
+    pathless_file_name = os.path.split(front_file_name)[-1]
+    extensionless_file_name = os.path.splitext(pathless_file_name)[0]
+    pathless_file_prefix, valid_time_string = extensionless_file_name.rsplit(
+        '_', 1)
+
+    if pathless_file_prefix == PATHLESS_PREFIX_FOR_POLYLINE_FILES:
+        file_type = POLYLINE_FILE_TYPE
+    elif pathless_file_prefix == PATHLESS_PREFIX_FOR_GRIDDED_FILES:
+        file_type = GRIDDED_FILE_TYPE
+    else:
+        error_string = 'Cannot parse file name: "{0:s}"'.format(
+            front_file_name)
+        raise ValueError(error_string)
+
+    top_directory_name = os.path.split(os.path.split(front_file_name)[0])[0]
+    valid_time_unix_sec = time_conversion.string_to_unix_sec(
+        valid_time_string, TIME_FORMAT_IN_FILE_NAMES)
+
+    return top_directory_name, file_type, valid_time_unix_sec
+
+
+def find_dilated_target_store(
+        top_directory_name, valid_time_unix_sec, num_classes,
+        dilation_distance_metres, for_fcn_input=False,
+        raise_error_if_missing=True):
+    """Finds monthly store with dilated target images.
+
+    The monthly store is a binary file (numpy format) with one uint8 target
+    image for each 3-hour time step in the month, created from the gridded
+    file (see `find_file_for_one_time`) by converting to an image, binarizing
+    (if there are 2 classes), subsetting for FCN input (if desired), and
+    dilating.  It is accompanied by an index, listing the time steps that have
+    been written and the modification time of each gridded file at that point.
+    A time step is stale (see `find_stale_times_in_target_store`) if its
+    gridded file has since been modified.
+
+    :param top_directory_name: Name of top-level directory with gridded files.
+    :param valid_time_unix_sec: Any valid time in the month.
+    :param num_classes: Number of classes (2 or 3).
+    :param dilation_distance_metres: Dilation distance.
+    :param for_fcn_input: Boolean flag.  If True, target images are subset with
+        `machine_learning_utils.subset_narr_grid_for_fcn_input`.
+    :param raise_error_if_missing: Boolean flag.  If store is missing and
+        raise_error_if_missing = True, this method will error out.  If store is
+        missing and raise_error_if_missing = False, this method will return the
+        *expected* path to the store.
+    :return: store_file_name: Path to store.
+    """
+
+    error_checking.assert_is_string(top_directory_name)
+    _check_target_store_metadata(
+        num_classes=num_classes,
+        dilation_distance_metres=dilation_distance_metres)
+    error_checking.assert_is_boolean(for_fcn_input)
+    error_checking.assert_is_boolean(raise_error_if_missing)
+
+    month_string = time_conversion.unix_sec_to_string(
+        valid_time_unix_sec, TIME_FORMAT_MONTH)
+
+    store_file_name = '{0:s}/{1:s}/{2:s}_{3:d}classes_{4:06d}m{5:s}_{1:s}{6:s}'
+    store_file_name = store_file_name.format(
+        top_directory_name, month_string, PATHLESS_PREFIX_FOR_TARGET_STORES,
+        num_classes, int(numpy.round(dilation_distance_metres)),
+        '_fcn' if for_fcn_input else '', TARGET_STORE_EXTENSION)
+
+    if raise_error_if_missing and not os.path.isfile(store_file_name):
+        error_string = (
+            'Cannot find file.  Expected at location: "{0:s}"'.format(
+                store_file_name))
+        raise ValueError(error_string)
+
+    return store_file_name
+
+
+def find_stale_times_in_target_store(
+        top_directory_name, valid_times_unix_sec, num_classes,
+        dilation_distance_metres, for_fcn_input=False):
+    """Finds stale time steps in stores with dilated target images.
+
+    A time step is stale if it is not in the store or if its gridded file has
+    been modified since the targets were written.
+
+    T = number of time steps
+
+    :param top_directory_name: See doc for `find_dilated_target_store`.
+    :param valid_times_unix_sec: length-T numpy array of valid times.
+    :param num_classes: See doc for `find_dilated_target_store`.
+    :param dilation_distance_metres: Same.
+    :param for_fcn_input: Same.
+    :return: stale_flags: length-T numpy array of Boolean flags.
+    """
+
+    error_checking.assert_is_integer_numpy_array(valid_times_unix_sec)
+    error_checking.assert_is_numpy_array(valid_times_unix_sec, num_dimensions=1)
+
+    store_file_names = numpy.array([
+        find_dilated_target_store(
+            top_directory_name=top_directory_name, valid_time_unix_sec=t,
+            num_classes=num_classes,
+            dilation_distance_metres=dilation_distance_metres,
+            for_fcn_input=for_fcn_input, raise_error_if_missing=False)
+        for t in valid_times_unix_sec
+    ])
+
+    source_mtimes_unix_sec = _get_source_mtimes(
+        top_directory_name=top_directory_name,
+        valid_times_unix_sec=valid_times_unix_sec)
+    stale_flags = numpy.full(len(valid_times_unix_sec), True, dtype=bool)
+
+    for this_store_file_name in numpy.unique(store_file_names):
+        these_indices = numpy.where(
+            store_file_names == this_store_file_name)[0]
+        these_stored_times_unix_sec, these_stored_mtimes_unix_sec = (
+            _read_target_store_index(this_store_file_name)
+        )
+
+        for i in these_indices:
+            these_matches = numpy.where(
+                these_stored_times_unix_sec == valid_times_unix_sec[i])[0]
+            if len(these_matches) == 0:
+                continue
+
+            # If the gridded file no longer exists, the stored targets are the
+            # only copy and cannot be regenerated, so they are kept.
+            stale_flags[i] = not (
+                numpy.isnan(source_mtimes_unix_sec[i]) or
+                these_stored_mtimes_unix_sec[these_matches[0]] ==
+                source_mtimes_unix_sec[i]
+            )
+
+    return stale_flags
+
+
+def write_dilated_targets_to_store(
+        top_directory_name, target_matrix, valid_times_unix_sec, num_classes,
+        dilation_distance_metres, for_fcn_input=False):
+    """Writes dilated target images to monthly stores.
+
+    If the store for a given month does not yet exist, it is created.  Time
+    steps already in the store are overwritten.
+
+    T = number of time steps
+    M = number of rows in each image
+    N = number of columns in each image
+
+    :param top_directory_name: See doc for `find_dilated_target_store`.
+    :param target_matrix: T-by-M-by-N numpy array of integer labels (from the
+        list `front_utils.VALID_INTEGER_IDS`).
+    :param valid_times_unix_sec: length-T numpy array of valid times.
+    :param num_classes: See doc for `find_dilated_target_store`.
+    :param dilation_distance_metres: Same.
+    :param for_fcn_input: Same.
+    """
+
+    error_checking.assert_is_integer_numpy_array(valid_times_unix_sec)
+    error_checking.assert_is_numpy_array(valid_times_unix_sec, num_dimensions=1)
+    num_times = len(valid_times_unix_sec)
+
+    utils.assert_is_integer_numpy_array(target_matrix)
+    error_checking.assert_is_numpy_array(target_matrix, num_dimensions=3)
+    error_checking.assert_is_numpy_array(
+        target_matrix, exact_dimensions=numpy.array(
+            (num_times,) + target_matrix.shape[1:]))
+    error_checking.assert_is_geq_numpy_array(target_matrix, 0)
+    error_checking.assert_is_less_than_numpy_array(target_matrix, num_classes)
+
+    store_file_names = numpy.array([
+        find_dilated_target_store(
+            top_directory_name=top_directory_name, valid_time_unix_sec=t,
+            num_classes=num_classes,
+            dilation_distance_metres=dilation_distance_metres,
+            for_fcn_input=for_fcn_input, raise_error_if_missing=False)
+        for t in valid_times_unix_sec
+    ])
+
+    source_mtimes_unix_sec = _get_source_mtimes(
+        top_directory_name=top_directory_name,
+        valid_times_unix_sec=valid_times_unix_sec)
+
+    for this_store_file_name in numpy.unique(store_file_names):
+        these_time_indices = numpy.where(
+            store_file_names == this_store_file_name)[0]
+        these_indices_in_store = numpy.array([
+            _time_to_index_in_monthly_store(t)
+            for t in valid_times_unix_sec[these_time_indices]
+        ], dtype=int)
+
+        these_old_times_unix_sec, these_old_mtimes_unix_sec = (
+            _read_target_store_index(this_store_file_name)
+        )
+
+        if len(these_old_times_unix_sec) == 0:
+            file_system_utils.mkdir_recursive_if_necessary(
+                file_name=this_store_file_name)
+
+            this_store_matrix = numpy.lib.format.open_memmap(
+                this_store_file_name, mode='w+', dtype=numpy.uint8,
+                shape=(NUM_TIMES_PER_MONTHLY_STORE,) + target_matrix.shape[1:])
+        else:
+            this_store_matrix = numpy.load(this_store_file_name, mmap_mode='r+')
+
+        this_store_matrix[these_indices_in_store, ...] = target_matrix[
+            these_time_indices, ...].astype(numpy.uint8)
+        this_store_matrix.flush()
+        del this_store_matrix
+
+        these_keep_flags = numpy.invert(numpy.in1d(
+            these_old_times_unix_sec, valid_times_unix_sec[these_time_indices]
+        ))
+        these_new_times_unix_sec = numpy.concatenate((
+            these_old_times_unix_sec[these_keep_flags],
+            valid_times_unix_sec[these_time_indices]
+        ))
+        these_new_mtimes_unix_sec = numpy.concatenate((
+            these_old_mtimes_unix_sec[these_keep_flags],
+            source_mtimes_unix_sec[these_time_indices]
+        ))
+
+        # The index is written last, so that it never lists time steps whose
+        # targets have not been written.  It is written to a temporary file and
+        # then renamed, so that readers never see a partial index.
+        these_sort_indices = numpy.argsort(these_new_times_unix_sec)
+        this_index_file_name = _target_store_to_index_file(this_store_file_name)
+        this_temp_file_name = this_index_file_name + TEMP_FILE_SUFFIX
+
+        this_file_handle = open(this_temp_file_name, 'wb')
+        numpy.savez(
+            this_file_handle,
+            **{VALID_TIMES_KEY: these_new_times_unix_sec[these_sort_indices],
+               SOURCE_MTIMES_KEY: these_new_mtimes_unix_sec[these_sort_indices]}
+        )
+        this_file_handle.close()
+
+        os.rename(this_temp_file_name, this_index_file_name)
+
+
+def read_dilated_targets_from_store(
+        top_directory_name, valid_times_unix_sec, num_classes,
+        dilation_distance_metres, for_fcn_input=False, check_staleness=True):
+    """Reads dilated target images (at many time steps) from monthly stores.
+
+    Each store is memory-mapped, so only the requested time steps are read from
+    disk.
+
+    T = number of time steps
+
+    :param top_directory_name: See doc for `find_dilated_target_store`.
+    :param valid_times_unix_sec: length-T numpy array of valid times.
+    :param num_classes: See doc for `find_dilated_target_store`.
+    :param dilation_distance_metres: Same.
+    :param for_fcn_input: Same.
+    :param check_staleness: Boolean flag.  If True, this method checks that no
+        valid time is missing or stale.  Set this to False only if the caller
+        has already called `find_stale_times_in_target_store`.
+    :return: target_matrix: T-by-M-by-N numpy array of 8-bit unsigned integers
+        (from the list `front_utils.VALID_INTEGER_IDS`).
+    :raises: ValueError: if `check_staleness = True` and any valid time is not
+        in the store or is stale (see `find_stale_times_in_target_store`).
+    """
+
+    error_checking.assert_is_integer_numpy_array(valid_times_unix_sec)
+    error_checking.assert_is_numpy_array(valid_times_unix_sec, num_dimensions=1)
+    error_checking.assert_is_greater(len(valid_times_unix_sec), 0)
+    error_checking.assert_is_boolean(check_staleness)
+
+    if check_staleness:
+        stale_flags = find_stale_times_in_target_store(
+            top_directory_name=top_directory_name,
+            valid_times_unix_sec=valid_times_unix_sec, num_classes=num_classes,
+            dilation_distance_metres=dilation_distance_metres,
+            for_fcn_input=for_fcn_input)
+    else:
+        stale_flags = numpy.full(len(valid_times_unix_sec), False, dtype=bool)
+
+    if numpy.any(stale_flags):
+        first_stale_index = numpy.where(stale_flags)[0][0]
+        error_string = (
+            '{0:d} of {1:d} valid times (first: {2:s}) are missing or stale in '
+            'store: "{3:s}"'
+        ).format(
+            numpy.sum(stale_flags), len(valid_times_unix_sec),
+            time_conversion.unix_sec_to_string(
+                valid_times_unix_sec[first_stale_index],
+                TIME_FORMAT_IN_FILE_NAMES),
+            find_dilated_target_store(
+                top_directory_name=top_directory_name,
+                valid_time_unix_sec=valid_times_unix_sec[first_stale_index],
+                num_classes=num_classes,
+                dilation_distance_metres=dilation_distance_metres,
+                for_fcn_input=for_fcn_input, raise_error_if_missing=False)
+        )
+        raise ValueError(error_string)
+
+    store_file_names = numpy.array([
+        find_dilated_target_store(
+            top_directory_name=top_directory_name, valid_time_unix_sec=t,
+            num_classes=num_classes,
+            dilation_distance_metres=dilation_distance_metres,
+            for_fcn_input=for_fcn_input, raise_error_if_missing=False)
+        for t in valid_times_unix_sec
+    ])
+
+    target_matrix = None
+
+    for this_store_file_name in numpy.unique(store_file_names):
+        these_time_indices = numpy.where(
+            store_file_names == this_store_file_name)[0]
+        these_indices_in_store = numpy.array([
+            _time_to_index_in_monthly_store(t)
+            for t in valid_times_unix_sec[these_time_indices]
+        ], dtype=int)
+
+        this_store_matrix = numpy.load(this_store_file_name, mmap_mode='r')
+        if target_matrix is None:
+            target_matrix = numpy.full(
+                (len(valid_times_unix_sec),) + this_store_matrix.shape[1:], 0,
+                dtype=numpy.uint8)
+
+        target_matrix[these_time_indices, ...] = this_store_matrix[
+            these_indices_in_store, ...]
+        del this_store_matrix
+
+    return target_matrix
+
+
+def read_dilated_target_from_store(
+        top_directory_name, valid_time_unix_sec, num_classes,
+        dilation_distance_metres, for_fcn_input=False, check_staleness=True):
+    """Reads dilated target image (at one time step) from monthly store.
+
+    :param top_directory_name: See doc for `read_dilated_targets_from_store`.
+    :param valid_time_unix_sec: Valid time.
+    :param num_classes: See doc for `read_dilated_targets_from_store`.
+    :param dilation_distance_metres: Same.
+    :param for_fcn_input: Same.
+    :param check_staleness: Same.
+    :return: target_matrix: 1-by-M-by-N numpy array of 8-bit unsigned integers
+        (from the list `front_utils.VALID_INTEGER_IDS`).
+    :raises: ValueError: if `check_staleness = True` and the valid time is not
+        in the store or is stale (see `find_stale_times_in_target_store`).
+    """
+
+    return read_dilated_targets_from_store(
+        top_directory_name=top_directory_name,
+        valid_times_unix_sec=numpy.array([valid_time_unix_sec], dtype=int),
+        num_classes=num_classes,
+        dilation_distance_metres=dilation_distance_metres,
+        for_fcn_input=for_fcn_input, check_staleness=check_staleness)
+
+
+def find_columnar_file(
+        top_directory_name, file_type, valid_time_unix_sec,
+        raise_error_if_missing=True):
+    """Finds columnar file with fronts for one month.
+
+    A columnar file contains EITHER polylines or NARR grids, defining warm and
+    cold fronts, at all time steps in one month.  Instead of a pandas DataFrame
+    with one numpy array per cell, each ragged column (e.g., latitudes along
+    each front) is stored as one flat array, along with the index of the first
+    value in each row.  See `write_polylines_to_columnar_file` and
+    `write_narr_grids_to_columnar_file`.
+
+    :param top_directory_name: Name of top-level directory with front files.
+    :param file_type: Type of file (either "polylines" or "narr_grids").
+    :param valid_time_unix_sec: Any valid time in the month.
+    :param raise_error_if_missing: See documentation for
+        `find_file_for_time_period`.
+    :return: columnar_file_name: Path to file.
+    """
+
+    error_checking.assert_is_string(top_directory_name)
+    _check_file_type(file_type)
+    error_checking.assert_is_boolean(raise_error_if_missing)
+
+    if file_type == POLYLINE_FILE_TYPE:
+        this_pathless_file_prefix = PATHLESS_PREFIX_FOR_POLYLINE_FILES
+    else:
+        this_pathless_file_prefix = PATHLESS_PREFIX_FOR_GRIDDED_FILES
+
+    month_string = time_conversion.unix_sec_to_string(
+        valid_time_unix_sec, TIME_FORMAT_MONTH)
+    columnar_file_name = '{0:s}/{1:s}/{2:s}_{1:s}{3:s}'.format(
+        top_directory_name, month_string, this_pathless_file_prefix,
+        COLUMNAR_FILE_EXTENSION)
+
+    if raise_error_if_missing and not os.path.isfile(columnar_file_name):
+        error_string = (
+            'Cannot find file.  Expected at location: "{0:s}"'.format(
+                columnar_file_name))
+        raise ValueError(error_string)
+
+    return columnar_file_name
+
+
+def write_polylines_to_columnar_file(front_table, npz_file_name):
+    """Writes frontal polylines to columnar file.
+
+    F = number of fronts
+    V = total number of vertices in all fronts
+
+    The file contains the following arrays.
+
+    unix_times_sec: length-F numpy array of valid times.
+    front_type_integers: length-F numpy array of front types (integer IDs, from
+        `front_utils.string_id_to_integer`).
+    first_vertex_index_by_front: numpy array (length F + 1) with index of first
+        vertex in each front.
+    latitudes_deg: length-V numpy array of latitudes (deg N).
+    longitudes_deg: length-V numpy array of longitudes (deg E).
+
+    :param front_table: See documentation for `write_polylines_to_file`.
+    :param npz_file_name: Path to output file (see `find_columnar_file`).
+    """
+
+    error_checking.assert_columns_in_dataframe(
+        front_table, REQUIRED_POLYLINE_COLUMNS)
+
+    latitudes_deg, first_vertex_index_by_front = _ragged_column_to_flat(
+        array_by_row=front_table[front_utils.LATITUDES_COLUMN].values,
+        dtype=float)
+    longitudes_deg, _ = _ragged_column_to_flat(
+        array_by_row=front_table[front_utils.LONGITUDES_COLUMN].values,
+        dtype=float)
+
+    front_type_integers = numpy.array([
+        front_utils.string_id_to_integer(s)
+        for s in front_table[front_utils.FRONT_TYPE_COLUMN].values
+    ], dtype=int)
+
+    file_system_utils.mkdir_recursive_if_necessary(file_name=npz_file_name)
+    numpy.savez(npz_file_name, **{
+        TIMES_KEY: front_table[front_utils.TIME_COLUMN].values.astype(int),
+        FRONT_TYPES_KEY: front_type_integers,
+        FIRST_VERTEX_INDICES_KEY: first_vertex_index_by_front,
+        front_utils.LATITUDES_COLUMN: latitudes_deg,
+        front_utils.LONGITUDES_COLUMN: longitudes_deg
+    })
+
+
+def write_narr_grids_to_columnar_file(frontal_grid_table, npz_file_name):
+    """Writes NARR grids (with frontal points) to columnar file.
+
+    T = number of time steps
+    W = total number of warm-frontal points at all time steps
+    C = total number of cold-frontal points at all time steps
+
+    The file contains the following arrays.
+
+    unix_times_sec: length-T numpy array of valid times.
+    first_warm_point_index_by_time: numpy array (length T + 1) with index of
+        first warm-frontal point at each time step.
+    warm_front_row_indices: length-W numpy array of row indices.
+    warm_front_column_indices: length-W numpy array of column indices.
+    first_cold_point_index_by_time: Same as above, except for cold fronts.
+    cold_front_row_indices: length-C numpy array of row indices.
+    cold_front_column_indices: length-C numpy array of column indices.
+
+    :param frontal_grid_table: See documentation for
+        `write_narr_grids_to_file`.
+    :param npz_file_name: Path to output file (see `find_columnar_file`).
+    """
+
+    error_checking.assert_columns_in_dataframe(
+        frontal_grid_table, REQUIRED_GRID_COLUMNS)
+
+    output_dict = {
+        TIMES_KEY: frontal_grid_table[front_utils.TIME_COLUMN].values.astype(
+            int)
+    }
+
+    for this_row_name, this_column_name, this_first_index_key in [
+            (front_utils.WARM_FRONT_ROW_INDICES_COLUMN,
+             front_utils.WARM_FRONT_COLUMN_INDICES_COLUMN,
+             FIRST_WARM_POINT_INDICES_KEY),
+            (front_utils.COLD_FRONT_ROW_INDICES_COLUMN,
+             front_utils.COLD_FRONT_COLUMN_INDICES_COLUMN,
+             FIRST_COLD_POINT_INDICES_KEY)
+    ]:
+        output_dict[this_row_name], output_dict[this_first_index_key] = (
+            _ragged_column_to_flat(
+                array_by_row=frontal_grid_table[this_row_name].values,
+                dtype=numpy.int32)
+        )
+        output_dict[this_column_name], _ = _ragged_column_to_flat(
+            array_by_row=frontal_grid_table[this_column_name].values,
+            dtype=numpy.int32)
+
+    file_system_utils.mkdir_recursive_if_necessary(file_name=npz_file_name)
+    numpy.savez(npz_file_name, **output_dict)
+
+
+def read_polylines_from_columnar_files(
+        top_directory_name, first_time_unix_sec, last_time_unix_sec,
+        front_type_strings=None, valid_times_unix_sec=None):
+    """Reads frontal polylines for a time period.
+
+    Fronts are read from one columnar file per month (see
+    `find_columnar_file`).  If the columnar file for a month is missing, fronts
+    are read from files with one time step each (see `find_file_for_one_time`).
+    Filters on valid time and front type are applied to the flat arrays, before
+    the ragged columns are rebuilt, so that vertices are never copied for
+    fronts that are not kept.
+
+    :param top_directory_name: Name of top-level directory with front files.
+    :param first_time_unix_sec: Start of time period.
+    :param last_time_unix_sec: End of time period.
+    :param front_type_strings: 1-D list of front types to keep (each must be
+        accepted by `front_utils.check_front_type`).  If None, will keep all
+        front types.
+    :param valid_times_unix_sec: 1-D numpy array of valid times to keep.  If
+        None, will keep all times in the period.  If specified, only months
+        containing at least one of these times are read, and only these time
+        steps are read from files with one time step each (an error is raised
+        if any of these files is missing).
+    :return: front_table: See documentation for `write_polylines_to_file`.
+    """
+
+    error_checking.assert_is_integer(first_time_unix_sec)
+    error_checking.assert_is_integer(last_time_unix_sec)
+    error_checking.assert_is_geq(last_time_unix_sec, first_time_unix_sec)
+
+    if front_type_strings is None:
+        front_type_strings = VALID_FRONT_TYPE_STRINGS
+    front_type_integers = numpy.array(
+        [front_utils.string_id_to_integer(s) for s in front_type_strings],
+        dtype=int)
+
+    month_start_times_unix_sec = _get_month_start_times(
+        first_time_unix_sec=first_time_unix_sec,
+        last_time_unix_sec=last_time_unix_sec)
+
+    if valid_times_unix_sec is not None:
+        error_checking.assert_is_integer_numpy_array(valid_times_unix_sec)
+        error_checking.assert_is_numpy_array(
+            valid_times_unix_sec, num_dimensions=1)
+
+        valid_month_strings = [
+            time_conversion.unix_sec_to_string(t, TIME_FORMAT_MONTH)
+            for t in valid_times_unix_sec
+        ]
+        month_start_times_unix_sec = numpy.array([
+            t for t in month_start_times_unix_sec
+            if time_conversion.unix_sec_to_string(t, TIME_FORMAT_MONTH) in
+            valid_month_strings
+        ], dtype=int)
+
+    list_of_front_tables = []
+
+    for this_month_start_unix_sec in month_start_times_unix_sec:
+        this_file_name = find_columnar_file(
+            top_directory_name=top_directory_name,
+            file_type=POLYLINE_FILE_TYPE,
+            valid_time_unix_sec=this_month_start_unix_sec,
+            raise_error_if_missing=False)
+
+        if not os.path.isfile(this_file_name):
+            this_front_table = _read_one_month_from_pickle_files(
+                top_directory_name=top_directory_name,
+                file_type=POLYLINE_FILE_TYPE,
+                month_start_time_unix_sec=this_month_start_unix_sec,
+                first_time_unix_sec=first_time_unix_sec,
+                last_time_unix_sec=last_time_unix_sec,
+                valid_times_unix_sec=valid_times_unix_sec)
+
+            if this_front_table is not None:
+                these_integer_ids = numpy.array([
+                    front_utils.string_id_to_integer(s) for s in
+                    this_front_table[front_utils.FRONT_TYPE_COLUMN].values
+                ], dtype=int)
+                list_of_front_tables.append(this_front_table.iloc[
+                    numpy.in1d(these_integer_ids, front_type_integers)
+                ][REQUIRED_POLYLINE_COLUMNS])
+
+            continue
+
+        print 'Reading data from: "{0:s}"...'.format(this_file_name)
+        this_npz_dict = numpy.load(this_file_name)
+
+        these_times_unix_sec = this_npz_dict[TIMES_KEY]
+        these_keep_flags = numpy.logical_and(
+            numpy.logical_and(these_times_unix_sec >= first_time_unix_sec,
+                              these_times_unix_sec <= last_time_unix_sec),
+            numpy.in1d(this_npz_dict[FRONT_TYPES_KEY], front_type_integers)
+        )
+        if valid_times_unix_sec is not None:
+            these_keep_flags = numpy.logical_and(
+                these_keep_flags,
+                numpy.in1d(these_times_unix_sec, valid_times_unix_sec))
+
+        these_front_indices = numpy.where(these_keep_flags)[0]
+
+        these_first_vertex_indices = this_npz_dict[FIRST_VERTEX_INDICES_KEY]
+        these_front_types = numpy.where(
+            this_npz_dict[FRONT_TYPES_KEY][these_front_indices] ==
+            front_utils.WARM_FRONT_INTEGER_ID,
+            front_utils.WARM_FRONT_STRING_ID, front_utils.COLD_FRONT_STRING_ID
+        ).tolist()
+
+        this_front_dict = {
+            front_utils.FRONT_TYPE_COLUMN: these_front_types,
+            front_utils.TIME_COLUMN: these_times_unix_sec[these_front_indices],
+            front_utils.LATITUDES_COLUMN: _flat_to_ragged_column(
+                flat_array=this_npz_dict[front_utils.LATITUDES_COLUMN],
+                first_index_by_row=these_first_vertex_indices,
+                row_indices=these_front_indices),
+            front_utils.LONGITUDES_COLUMN: _flat_to_ragged_column(
+                flat_array=this_npz_dict[front_utils.LONGITUDES_COLUMN],
+                first_index_by_row=these_first_vertex_indices,
+                row_indices=these_front_indices)
+        }
+
+        list_of_front_tables.append(
+            pandas.DataFrame.from_dict(this_front_dict)[
+                REQUIRED_POLYLINE_COLUMNS]
+        )
+
+    if len(list_of_front_tables) == 0:
+        return pandas.DataFrame(columns=REQUIRED_POLYLINE_COLUMNS)
+
+    return pandas.concat(list_of_front_tables, axis=0, ignore_index=True)
+
+
+def read_narr_grids_from_columnar_files(
+        top_directory_name, first_time_unix_sec, last_time_unix_sec,
+        front_type_strings=None):
+    """Reads NARR grids (with frontal points) for a time period.
+
+    Grids are read from one columnar file per month, with the same fallback and
+    filtering as in `read_polylines_from_columnar_files`.  If a front type is
+    not kept, its grid points are left empty at every time step.
+
+    :param top_directory_name: See doc for
+        `read_polylines_from_columnar_files`.
+    :param first_time_unix_sec: Same.
+    :param last_time_unix_sec: Same.
+    :param front_type_strings: Same.
+    :return: frontal_grid_table: See documentation for
+        `write_narr_grids_to_file`.
+    """
+
+    error_checking.assert_is_integer(first_time_unix_sec)
+    error_checking.assert_is_integer(last_time_unix_sec)
+    error_checking.assert_is_geq(last_time_unix_sec, first_time_unix_sec)
+
+    if front_type_strings is None:
+        front_type_strings = VALID_FRONT_TYPE_STRINGS
+    for this_front_type_string in front_type_strings:
+        front_utils.check_front_type(this_front_type_string)
+
+    row_column_names_and_first_index_keys = []
+    if front_utils.WARM_FRONT_STRING_ID in front_type_strings:
+        row_column_names_and_first_index_keys.append(
+            (front_utils.WARM_FRONT_ROW_INDICES_COLUMN,
+             front_utils.WARM_FRONT_COLUMN_INDICES_COLUMN,
+             FIRST_WARM_POINT_INDICES_KEY)
+        )
+    if front_utils.COLD_FRONT_STRING_ID in front_type_strings:
+        row_column_names_and_first_index_keys.append(
+            (front_utils.COLD_FRONT_ROW_INDICES_COLUMN,
+             front_utils.COLD_FRONT_COLUMN_INDICES_COLUMN,
+             FIRST_COLD_POINT_INDICES_KEY)
+        )
+
+    list_of_frontal_grid_tables = []
+    month_start_times_unix_sec = _get_month_start_times(
+        first_time_unix_sec=first_time_unix_sec,
+        last_time_unix_sec=last_time_unix_sec)
+
+    for this_month_start_unix_sec in month_start_times_unix_sec:
+        this_file_name = find_columnar_file(
+            top_directory_name=top_directory_name,
+            file_type=GRIDDED_FILE_TYPE,
+            valid_time_unix_sec=this_month_start_unix_sec,
+            raise_error_if_missing=False)
+
+        if os.path.isfile(this_file_name):
+            print 'Reading data from: "{0:s}"...'.format(this_file_name)
+            this_npz_dict = numpy.load(this_file_name)
+
+            these_times_unix_sec = this_npz_dict[TIMES_KEY]
+            these_time_indices = numpy.where(numpy.logical_and(
+                these_times_unix_sec >= first_time_unix_sec,
+                these_times_unix_sec <= last_time_unix_sec
+            ))[0]
+
+            this_frontal_grid_dict = {
+                front_utils.TIME_COLUMN:
+                    these_times_unix_sec[these_time_indices]
+            }
+
+            for this_row_name, this_column_name, this_first_index_key in (
+                    row_column_names_and_first_index_keys):
+                for this_name in [this_row_name, this_column_name]:
+                    this_frontal_grid_dict[this_name] = _flat_to_ragged_column(
+                        flat_array=this_npz_dict[this_name],
+                        first_index_by_row=this_npz_dict[this_first_index_key],
+                        row_indices=these_time_indices)
+        else:
+            this_frontal_grid_table = _read_one_month_from_pickle_files(
+                top_directory_name=top_directory_name,
+                file_type=GRIDDED_FILE_TYPE,
+                month_start_time_unix_sec=this_month_start_unix_sec,
+                first_time_unix_sec=first_time_unix_sec,
+                last_time_unix_sec=last_time_unix_sec)
+            if this_frontal_grid_table is None:
+                continue
+
+            this_frontal_grid_dict = {
+                front_utils.TIME_COLUMN:
+                    this_frontal_grid_table[front_utils.TIME_COLUMN].values
+            }
+
+            for this_row_name, this_column_name, _ in (
+                    row_column_names_and_first_index_keys):
+                for this_name in [this_row_name, this_column_name]:
+                    this_frontal_grid_dict[this_name] = list(
+                        this_frontal_grid_table[this_name].values)
+
+        this_num_times = len(this_frontal_grid_dict[front_utils.TIME_COLUMN])
+        for this_name in REQUIRED_GRID_COLUMNS:
+            if this_name not in this_frontal_grid_dict:
+                this_frontal_grid_dict[this_name] = [
+                    numpy.array([], dtype=int)
+                ] * this_num_times
+
+        list_of_frontal_grid_tables.append(
+            pandas.DataFrame.from_dict(this_frontal_grid_dict)[
+                REQUIRED_GRID_COLUMNS]
+        )
+
+    if len(list_of_frontal_grid_tables) == 0:
+        return pandas.DataFrame(columns=REQUIRED_GRID_COLUMNS)
+
+    return pandas.concat(
+        list_of_frontal_grid_tables, axis=0, ignore_index=True)
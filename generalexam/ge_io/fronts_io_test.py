@@ -1,7 +1,13 @@
 """Unit tests for fronts_io.py."""
 
+import os
+import shutil
+import tempfile
 import unittest
+import numpy
+import pandas
 from generalexam.ge_io import fronts_io
+from generalexam.ge_utils import front_utils
 
 DIRECTORY_NAME = 'front_data'
 VALID_TIME_UNIX_SEC = 1519419600  # 2100 UTC 23 Feb 2018
@@ -15,6 +21,241 @@ GRIDDED_FILE_NAME_TIME_PERIOD = (
 POLYLINE_FILE_NAME_ONE_TIME = 'front_data/201802/front_locations_2018022321.p'
 GRIDDED_FILE_NAME_ONE_TIME = 'front_data/201802/narr_frontal_grids_2018022321.p'
 
+NUM_CLASSES = 2
+DILATION_DISTANCE_METRES = 50000.
+TARGET_STORE_FILE_NAME = (
+    'front_data/201802/dilated_targets_2classes_050000m_201802.npy')
+TARGET_STORE_FILE_NAME_FCN = (
+    'front_data/201802/dilated_targets_2classes_050000m_fcn_201802.npy')
+TARGET_STORE_INDEX_FILE_NAME = (
+    'front_data/201802/dilated_targets_2classes_050000m_201802_index.npz')
+
+# Only the extension (not the directory name) should be changed.
+TARGET_STORE_FILE_NAME_NPY_DIR = (
+    'stores.npy/201802/dilated_targets_2classes_050000m_201802.npy')
+TARGET_STORE_INDEX_FILE_NAME_NPY_DIR = (
+    'stores.npy/201802/dilated_targets_2classes_050000m_201802_index.npz')
+
+# 2100 UTC 23 Feb is the 7th time step on the 22nd day after 0000 UTC 1 Feb.
+INDEX_IN_MONTHLY_STORE = 22 * 8 + 7
+
+POLYLINE_COLUMNAR_FILE_NAME = 'front_data/201802/front_locations_201802.npz'
+GRIDDED_COLUMNAR_FILE_NAME = 'front_data/201802/narr_frontal_grids_201802.npz'
+
+# The following constants are used to test _ragged_column_to_flat and
+# _flat_to_ragged_column.
+ARRAY_BY_ROW = [
+    numpy.array([3, 1, 4]), numpy.array([], dtype=int), numpy.array([1, 5]),
+    numpy.array([9])
+]
+FLAT_ARRAY = numpy.array([3, 1, 4, 1, 5, 9])
+FIRST_INDEX_BY_ROW = numpy.array([0, 3, 3, 5, 6])
+ROW_INDICES_TO_KEEP = numpy.array([3, 0])
+
+# The following constants are used to test _get_month_start_times.
+FIRST_TIME_MULTI_MONTH_UNIX_SEC = 1517011200  # 0000 UTC 27 Jan 2018
+LAST_TIME_MULTI_MONTH_UNIX_SEC = 1522540800  # 0000 UTC 1 Apr 2018
+MONTH_START_TIMES_UNIX_SEC = numpy.array(
+    [1514764800, 1517443200, 1519862400, 1522540800])
+MONTH_START_TIMES_ONE_MONTH_UNIX_SEC = numpy.array([1517443200])
+
+# The following constants are used to test write_polylines_to_columnar_file,
+# read_polylines_from_columnar_files, write_narr_grids_to_columnar_file, and
+# read_narr_grids_from_columnar_files.
+ROUND_TRIP_TIMES_UNIX_SEC = numpy.array(
+    [1517432400, 1517443200, 1517454000, 1517464800])
+FIRST_ROUND_TRIP_TIME_UNIX_SEC = 1517432400  # 2100 UTC 31 Jan 2018
+LAST_ROUND_TRIP_TIME_UNIX_SEC = 1517454000  # 0300 UTC 1 Feb 2018
+
+THIS_DICT = {
+    front_utils.TIME_COLUMN: ROUND_TRIP_TIMES_UNIX_SEC[[0, 0, 1, 2, 3]],
+    front_utils.FRONT_TYPE_COLUMN: [
+        front_utils.WARM_FRONT_STRING_ID, front_utils.COLD_FRONT_STRING_ID,
+        front_utils.COLD_FRONT_STRING_ID, front_utils.WARM_FRONT_STRING_ID,
+        front_utils.COLD_FRONT_STRING_ID
+    ],
+    front_utils.LATITUDES_COLUMN: [
+        numpy.array([40., 41.]), numpy.array([30., 31., 32.]),
+        numpy.array([50.]), numpy.array([45., 46.]), numpy.array([35., 36.])
+    ],
+    front_utils.LONGITUDES_COLUMN: [
+        numpy.array([250., 251.]), numpy.array([260., 261., 262.]),
+        numpy.array([270.]), numpy.array([255., 256.]),
+        numpy.array([265., 266.])
+    ]
+}
+POLYLINE_TABLE_TO_WRITE = pandas.DataFrame.from_dict(THIS_DICT)
+
+# Only cold fronts in the period FIRST_ROUND_TRIP_TIME_UNIX_SEC...
+# LAST_ROUND_TRIP_TIME_UNIX_SEC (which spans two months) are kept.
+POLYLINE_ROWS_KEPT = numpy.array([1, 2], dtype=int)
+POLYLINE_FRONT_TYPES_TO_KEEP = [front_utils.COLD_FRONT_STRING_ID]
+
+# When specific times are requested, only fronts at those times are kept.
+POLYLINE_TIMES_TO_KEEP_UNIX_SEC = ROUND_TRIP_TIMES_UNIX_SEC[[0, 2]]
+POLYLINE_ROWS_KEPT_AT_TIMES = numpy.array([0, 1, 3], dtype=int)
+MISSING_POLYLINE_TIME_UNIX_SEC = 1517421600  # 1800 UTC 31 Jan 2018
+
+THIS_DICT = {
+    front_utils.TIME_COLUMN: ROUND_TRIP_TIMES_UNIX_SEC,
+    front_utils.WARM_FRONT_ROW_INDICES_COLUMN: [
+        numpy.array([10, 11]), numpy.array([], dtype=int), numpy.array([20]),
+        numpy.array([30, 31, 32])
+    ],
+    front_utils.WARM_FRONT_COLUMN_INDICES_COLUMN: [
+        numpy.array([12, 13]), numpy.array([], dtype=int), numpy.array([22]),
+        numpy.array([33, 34, 35])
+    ],
+    front_utils.COLD_FRONT_ROW_INDICES_COLUMN: [
+        numpy.array([100]), numpy.array([110, 111]), numpy.array([120]),
+        numpy.array([], dtype=int)
+    ],
+    front_utils.COLD_FRONT_COLUMN_INDICES_COLUMN: [
+        numpy.array([101]), numpy.array([112, 113]), numpy.array([121]),
+        numpy.array([], dtype=int)
+    ]
+}
+GRID_TABLE_TO_WRITE = pandas.DataFrame.from_dict(THIS_DICT)
+
+# Only warm fronts in the period FIRST_ROUND_TRIP_TIME_UNIX_SEC...
+# LAST_ROUND_TRIP_TIME_UNIX_SEC are kept, so cold-front points are empty.
+GRID_ROWS_KEPT = numpy.array([0, 1, 2], dtype=int)
+GRID_FRONT_TYPES_TO_KEEP = [front_utils.WARM_FRONT_STRING_ID]
+
+THIS_DICT = {
+    front_utils.TIME_COLUMN: ROUND_TRIP_TIMES_UNIX_SEC[GRID_ROWS_KEPT],
+    front_utils.WARM_FRONT_ROW_INDICES_COLUMN: [
+        numpy.array([10, 11]), numpy.array([], dtype=int), numpy.array([20])
+    ],
+    front_utils.WARM_FRONT_COLUMN_INDICES_COLUMN: [
+        numpy.array([12, 13]), numpy.array([], dtype=int), numpy.array([22])
+    ],
+    front_utils.COLD_FRONT_ROW_INDICES_COLUMN: [
+        numpy.array([], dtype=int)
+    ] * len(GRID_ROWS_KEPT),
+    front_utils.COLD_FRONT_COLUMN_INDICES_COLUMN: [
+        numpy.array([], dtype=int)
+    ] * len(GRID_ROWS_KEPT)
+}
+GRID_TABLE_AFTER_READING = pandas.DataFrame.from_dict(THIS_DICT)
+
+GRID_COLUMNS_TO_COMPARE = [
+    front_utils.TIME_COLUMN, front_utils.WARM_FRONT_ROW_INDICES_COLUMN,
+    front_utils.WARM_FRONT_COLUMN_INDICES_COLUMN,
+    front_utils.COLD_FRONT_ROW_INDICES_COLUMN,
+    front_utils.COLD_FRONT_COLUMN_INDICES_COLUMN
+]
+POLYLINE_COLUMNS_TO_COMPARE = [
+    front_utils.TIME_COLUMN, front_utils.FRONT_TYPE_COLUMN,
+    front_utils.LATITUDES_COLUMN, front_utils.LONGITUDES_COLUMN
+]
+
+# The following constants are used to test write_dilated_targets_to_store,
+# read_dilated_targets_from_store, read_dilated_target_from_store, and
+# find_stale_times_in_target_store.  Neither monthly store is full: the January
+# store contains one time step and the February store contains three.
+TARGET_MATRIX_TO_STORE = numpy.array([
+    [[0, 1, 0, 0], [0, 1, 1, 0], [0, 0, 0, 0]],
+    [[1, 1, 1, 1], [0, 0, 0, 0], [0, 0, 0, 0]],
+    [[0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0]],
+    [[0, 0, 0, 1], [0, 0, 1, 1], [0, 1, 1, 1]]
+], dtype=int)
+
+# The last time step is written to an existing store in a second call.
+NUM_TIMES_IN_FIRST_WRITE = 3
+STORE_TIMES_TO_READ_UNIX_SEC = ROUND_TRIP_TIMES_UNIX_SEC[[3, 0, 2]]
+STORE_ROWS_TO_READ = numpy.array([3, 0, 2], dtype=int)
+TIME_NOT_IN_STORE_UNIX_SEC = MISSING_POLYLINE_TIME_UNIX_SEC
+
+# The gridded file for the second time step is modified after the targets are
+# written, and the gridded file for the third time step is deleted.  Targets
+# are kept for deleted gridded files, since they cannot be regenerated.
+MODIFIED_SOURCE_INDEX = 1
+DELETED_SOURCE_INDEX = 2
+STALE_TIME_FLAGS = numpy.array([False, True, False, True], dtype=bool)
+
+
+def _write_one_columnar_file_per_month(
+        input_table, top_directory_name, file_type):
+    """Writes table to columnar files (one per month).
+
+    :param input_table: pandas DataFrame with fronts (see documentation for
+        `fronts_io.write_polylines_to_file` or
+        `fronts_io.write_narr_grids_to_file`).
+    :param top_directory_name: Name of top-level directory for columnar files.
+    :param file_type: Type of file (see `fronts_io.find_columnar_file`).
+    """
+
+    file_names = numpy.array([
+        fronts_io.find_columnar_file(
+            top_directory_name=top_directory_name, file_type=file_type,
+            valid_time_unix_sec=t, raise_error_if_missing=False)
+        for t in input_table[front_utils.TIME_COLUMN].values
+    ])
+
+    for this_file_name in numpy.unique(file_names):
+        this_table = input_table.loc[
+            file_names == this_file_name].reset_index(drop=True)
+
+        if file_type == fronts_io.POLYLINE_FILE_TYPE:
+            fronts_io.write_polylines_to_columnar_file(
+                front_table=this_table, npz_file_name=this_file_name)
+        else:
+            fronts_io.write_narr_grids_to_columnar_file(
+                frontal_grid_table=this_table, npz_file_name=this_file_name)
+
+
+def _write_one_gridded_file_per_time(input_table, top_directory_name):
+    """Writes table to gridded files (one per time step).
+
+    :param input_table: pandas DataFrame with NARR grids (see documentation for
+        `fronts_io.write_narr_grids_to_file`).
+    :param top_directory_name: Name of top-level directory for gridded files.
+    :return: gridded_file_names: 1-D list of paths to gridded files (one per
+        row in `input_table`).
+    """
+
+    gridded_file_names = []
+
+    for this_time_unix_sec in input_table[front_utils.TIME_COLUMN].values:
+        this_file_name = fronts_io.find_file_for_one_time(
+            top_directory_name=top_directory_name,
+            file_type=fronts_io.GRIDDED_FILE_TYPE,
+            valid_time_unix_sec=this_time_unix_sec,
+            raise_error_if_missing=False)
+
+        fronts_io.write_narr_grids_to_file(
+            frontal_grid_table=input_table.loc[
+                input_table[front_utils.TIME_COLUMN] == this_time_unix_sec
+            ].reset_index(drop=True),
+            pickle_file_name=this_file_name)
+        gridded_file_names.append(this_file_name)
+
+    return gridded_file_names
+
+
+def _compare_front_tables(first_table, second_table, column_names):
+    """Determines whether or not two tables with fronts are equal.
+
+    :param first_table: pandas DataFrame.
+    :param second_table: pandas DataFrame.
+    :param column_names: 1-D list of columns to compare.  Each may contain
+        scalars or numpy arrays.
+    :return: are_tables_equal: Boolean flag.
+    """
+
+    if len(first_table.index) != len(second_table.index):
+        return False
+
+    for this_column_name in column_names:
+        for i in range(len(first_table.index)):
+            if not numpy.array_equal(
+                    first_table[this_column_name].values[i],
+                    second_table[this_column_name].values[i]):
+                return False
+
+    return True
+
 
 class FrontsIoTests(unittest.TestCase):
     """Each method is a unit test for fronts_io.py."""
@@ -74,6 +315,393 @@ class FrontsIoTests(unittest.TestCase):
             raise_error_if_missing=False)
         self.assertTrue(this_file_name == GRIDDED_FILE_NAME_ONE_TIME)
 
+    def test_parse_file_name_for_one_time_grids(self):
+        """Ensures correct output from parse_file_name_for_one_time.
+
+        In this case, parsing name of file with NARR grids.
+        """
+
+        this_directory_name, this_file_type, this_time_unix_sec = (
+            fronts_io.parse_file_name_for_one_time(GRIDDED_FILE_NAME_ONE_TIME)
+        )
+
+        self.assertTrue(this_directory_name == DIRECTORY_NAME)
+        self.assertTrue(this_file_type == fronts_io.GRIDDED_FILE_TYPE)
+        self.assertTrue(this_time_unix_sec == VALID_TIME_UNIX_SEC)
+
+    def test_parse_file_name_for_one_time_period(self):
+        """Ensures that parse_file_name_for_one_time errors out.
+
+        In this case, the file contains a time period rather than one time.
+        """
+
+        with self.assertRaises(ValueError):
+            fronts_io.parse_file_name_for_one_time(
+                GRIDDED_FILE_NAME_TIME_PERIOD)
+
+    def test_find_dilated_target_store_full_grid(self):
+        """Ensures correct output from find_dilated_target_store.
+
+        In this case, target images cover the full NARR grid.
+        """
+
+        this_file_name = fronts_io.find_dilated_target_store(
+            top_directory_name=DIRECTORY_NAME,
+            valid_time_unix_sec=VALID_TIME_UNIX_SEC, num_classes=NUM_CLASSES,
+            dilation_distance_metres=DILATION_DISTANCE_METRES,
+            for_fcn_input=False, raise_error_if_missing=False)
+        self.assertTrue(this_file_name == TARGET_STORE_FILE_NAME)
+
+    def test_find_dilated_target_store_fcn(self):
+        """Ensures correct output from find_dilated_target_store.
+
+        In this case, target images are subset for FCN input.
+        """
+
+        this_file_name = fronts_io.find_dilated_target_store(
+            top_directory_name=DIRECTORY_NAME,
+            valid_time_unix_sec=VALID_TIME_UNIX_SEC, num_classes=NUM_CLASSES,
+            dilation_distance_metres=DILATION_DISTANCE_METRES,
+            for_fcn_input=True, raise_error_if_missing=False)
+        self.assertTrue(this_file_name == TARGET_STORE_FILE_NAME_FCN)
+
+    def test_target_store_to_index_file(self):
+        """Ensures correct output from _target_store_to_index_file."""
+
+        self.assertTrue(
+            fronts_io._target_store_to_index_file(TARGET_STORE_FILE_NAME) ==
+            TARGET_STORE_INDEX_FILE_NAME
+        )
+
+    def test_target_store_to_index_file_npy_dir(self):
+        """Ensures correct output from _target_store_to_index_file.
+
+        In this case, the directory name also contains ".npy".
+        """
+
+        self.assertTrue(
+            fronts_io._target_store_to_index_file(
+                TARGET_STORE_FILE_NAME_NPY_DIR) ==
+            TARGET_STORE_INDEX_FILE_NAME_NPY_DIR
+        )
+
+    def test_time_to_index_in_monthly_store(self):
+        """Ensures correct output from _time_to_index_in_monthly_store."""
+
+        self.assertTrue(
+            fronts_io._time_to_index_in_monthly_store(VALID_TIME_UNIX_SEC) ==
+            INDEX_IN_MONTHLY_STORE
+        )
+
+    def test_find_columnar_file_polylines(self):
+        """Ensures correct output from find_columnar_file.
+
+        In this case, file type is polylines.
+        """
+
+        this_file_name = fronts_io.find_columnar_file(
+            top_directory_name=DIRECTORY_NAME,
+            file_type=fronts_io.POLYLINE_FILE_TYPE,
+            valid_time_unix_sec=VALID_TIME_UNIX_SEC,
+            raise_error_if_missing=False)
+        self.assertTrue(this_file_name == POLYLINE_COLUMNAR_FILE_NAME)
+
+    def test_find_columnar_file_grids(self):
+        """Ensures correct output from find_columnar_file.
+
+        In this case, file type is NARR grids.
+        """
+
+        this_file_name = fronts_io.find_columnar_file(
+            top_directory_name=DIRECTORY_NAME,
+            file_type=fronts_io.GRIDDED_FILE_TYPE,
+            valid_time_unix_sec=VALID_TIME_UNIX_SEC,
+            raise_error_if_missing=False)
+        self.assertTrue(this_file_name == GRIDDED_COLUMNAR_FILE_NAME)
+
+    def test_ragged_column_to_flat(self):
+        """Ensures correct output from _ragged_column_to_flat."""
+
+        this_flat_array, these_first_indices = fronts_io._ragged_column_to_flat(
+            array_by_row=ARRAY_BY_ROW, dtype=int)
+
+        self.assertTrue(numpy.array_equal(this_flat_array, FLAT_ARRAY))
+        self.assertTrue(numpy.array_equal(
+            these_first_indices, FIRST_INDEX_BY_ROW))
+
+    def test_flat_to_ragged_column(self):
+        """Ensures correct output from _flat_to_ragged_column."""
+
+        this_array_by_row = fronts_io._flat_to_ragged_column(
+            flat_array=FLAT_ARRAY, first_index_by_row=FIRST_INDEX_BY_ROW,
+            row_indices=ROW_INDICES_TO_KEEP)
+
+        self.assertTrue(len(this_array_by_row) == len(ROW_INDICES_TO_KEEP))
+        for i in range(len(ROW_INDICES_TO_KEEP)):
+            self.assertTrue(numpy.array_equal(
+                this_array_by_row[i], ARRAY_BY_ROW[ROW_INDICES_TO_KEEP[i]]
+            ))
+
+    def test_get_month_start_times_multi_month(self):
+        """Ensures correct output from _get_month_start_times.
+
+        In this case, the time period spans several months.
+        """
+
+        these_times_unix_sec = fronts_io._get_month_start_times(
+            first_time_unix_sec=FIRST_TIME_MULTI_MONTH_UNIX_SEC,
+            last_time_unix_sec=LAST_TIME_MULTI_MONTH_UNIX_SEC)
+        self.assertTrue(numpy.array_equal(
+            these_times_unix_sec, MONTH_START_TIMES_UNIX_SEC))
+
+    def test_get_month_start_times_one_month(self):
+        """Ensures correct output from _get_month_start_times.
+
+        In this case, the time period is within one month.
+        """
+
+        these_times_unix_sec = fronts_io._get_month_start_times(
+            first_time_unix_sec=START_TIME_UNIX_SEC,
+            last_time_unix_sec=END_TIME_UNIX_SEC)
+        self.assertTrue(numpy.array_equal(
+            these_times_unix_sec, MONTH_START_TIMES_ONE_MONTH_UNIX_SEC))
+
+    def test_polyline_columnar_files_round_trip(self):
+        """Ensures that polylines survive columnar files.
+
+        In this case, polylines are written by
+        `write_polylines_to_columnar_file` and read (with filters on time and
+        front type) by `read_polylines_from_columnar_files`.
+        """
+
+        this_directory_name = tempfile.mkdtemp()
+
+        try:
+            _write_one_columnar_file_per_month(
+                input_table=POLYLINE_TABLE_TO_WRITE,
+                top_directory_name=this_directory_name,
+                file_type=fronts_io.POLYLINE_FILE_TYPE)
+
+            this_front_table = fronts_io.read_polylines_from_columnar_files(
+                top_directory_name=this_directory_name,
+                first_time_unix_sec=FIRST_ROUND_TRIP_TIME_UNIX_SEC,
+                last_time_unix_sec=LAST_ROUND_TRIP_TIME_UNIX_SEC,
+                front_type_strings=POLYLINE_FRONT_TYPES_TO_KEEP)
+        finally:
+            shutil.rmtree(this_directory_name)
+
+        this_expected_table = POLYLINE_TABLE_TO_WRITE.iloc[
+            POLYLINE_ROWS_KEPT].reset_index(drop=True)
+        self.assertTrue(_compare_front_tables(
+            this_front_table, this_expected_table,
+            POLYLINE_COLUMNS_TO_COMPARE))
+
+    def test_polyline_columnar_files_valid_times(self):
+        """Ensures correct output from read_polylines_from_columnar_files.
+
+        In this case, specific valid times are requested.  Polylines for the
+        first month are in files with one time step each, and polylines for the
+        second month are in a columnar file.
+        """
+
+        this_directory_name = tempfile.mkdtemp()
+
+        try:
+            for this_time_unix_sec in ROUND_TRIP_TIMES_UNIX_SEC:
+                if this_time_unix_sec >= MONTH_START_TIMES_UNIX_SEC[1]:
+                    continue
+
+                this_file_name = fronts_io.find_file_for_one_time(
+                    top_directory_name=this_directory_name,
+                    file_type=fronts_io.POLYLINE_FILE_TYPE,
+                    valid_time_unix_sec=this_time_unix_sec,
+                    raise_error_if_missing=False)
+
+                fronts_io.write_polylines_to_file(
+                    front_table=POLYLINE_TABLE_TO_WRITE.loc[
+                        POLYLINE_TABLE_TO_WRITE[front_utils.TIME_COLUMN] ==
+                        this_time_unix_sec
+                    ].reset_index(drop=True),
+                    pickle_file_name=this_file_name)
+
+            _write_one_columnar_file_per_month(
+                input_table=POLYLINE_TABLE_TO_WRITE.loc[
+                    POLYLINE_TABLE_TO_WRITE[front_utils.TIME_COLUMN] >=
+                    MONTH_START_TIMES_UNIX_SEC[1]
+                ].reset_index(drop=True),
+                top_directory_name=this_directory_name,
+                file_type=fronts_io.POLYLINE_FILE_TYPE)
+
+            this_front_table = fronts_io.read_polylines_from_columnar_files(
+                top_directory_name=this_directory_name,
+                first_time_unix_sec=FIRST_ROUND_TRIP_TIME_UNIX_SEC,
+                last_time_unix_sec=LAST_ROUND_TRIP_TIME_UNIX_SEC,
+                valid_times_unix_sec=POLYLINE_TIMES_TO_KEEP_UNIX_SEC)
+
+            # A requested time without a file must not be skipped silently.
+            these_times_unix_sec = numpy.concatenate((
+                numpy.array([MISSING_POLYLINE_TIME_UNIX_SEC]),
+                POLYLINE_TIMES_TO_KEEP_UNIX_SEC
+            ))
+
+            with self.assertRaises(ValueError):
+                fronts_io.read_polylines_from_columnar_files(
+                    top_directory_name=this_directory_name,
+                    first_time_unix_sec=MISSING_POLYLINE_TIME_UNIX_SEC,
+                    last_time_unix_sec=LAST_ROUND_TRIP_TIME_UNIX_SEC,
+                    valid_times_unix_sec=these_times_unix_sec)
+        finally:
+            shutil.rmtree(this_directory_name)
+
+        this_expected_table = POLYLINE_TABLE_TO_WRITE.iloc[
+            POLYLINE_ROWS_KEPT_AT_TIMES].reset_index(drop=True)
+        self.assertTrue(_compare_front_tables(
+            this_front_table, this_expected_table,
+            POLYLINE_COLUMNS_TO_COMPARE))
+
+    def test_grid_columnar_files_round_trip(self):
+        """Ensures that NARR grids survive columnar files.
+
+        In this case, grids are written by `write_narr_grids_to_columnar_file`
+        and read (with filters on time and front type) by
+        `read_narr_grids_from_columnar_files`.
+        """
+
+        this_directory_name = tempfile.mkdtemp()
+
+        try:
+            _write_one_columnar_file_per_month(
+                input_table=GRID_TABLE_TO_WRITE,
+                top_directory_name=this_directory_name,
+                file_type=fronts_io.GRIDDED_FILE_TYPE)
+
+            this_frontal_grid_table = (
+                fronts_io.read_narr_grids_from_columnar_files(
+                    top_directory_name=this_directory_name,
+                    first_time_unix_sec=FIRST_ROUND_TRIP_TIME_UNIX_SEC,
+                    last_time_unix_sec=LAST_ROUND_TRIP_TIME_UNIX_SEC,
+                    front_type_strings=GRID_FRONT_TYPES_TO_KEEP)
+            )
+        finally:
+            shutil.rmtree(this_directory_name)
+
+        self.assertTrue(_compare_front_tables(
+            this_frontal_grid_table, GRID_TABLE_AFTER_READING,
+            GRID_COLUMNS_TO_COMPARE))
+
+    def test_target_store_round_trip(self):
+        """Ensures that dilated targets survive monthly stores.
+
+        In this case, targets are written by `write_dilated_targets_to_store`
+        (in two calls, the second of which adds to existing stores) and read by
+        `read_dilated_targets_from_store` and `read_dilated_target_from_store`.
+        """
+
+        this_directory_name = tempfile.mkdtemp()
+
+        try:
+            _write_one_gridded_file_per_time(
+                input_table=GRID_TABLE_TO_WRITE,
+                top_directory_name=this_directory_name)
+
+            for these_indices in [
+                    numpy.linspace(0, NUM_TIMES_IN_FIRST_WRITE - 1,
+                                   num=NUM_TIMES_IN_FIRST_WRITE, dtype=int),
+                    numpy.array([NUM_TIMES_IN_FIRST_WRITE], dtype=int)
+            ]:
+                fronts_io.write_dilated_targets_to_store(
+                    top_directory_name=this_directory_name,
+                    target_matrix=TARGET_MATRIX_TO_STORE[these_indices, ...],
+                    valid_times_unix_sec=ROUND_TRIP_TIMES_UNIX_SEC[
+                        these_indices],
+                    num_classes=NUM_CLASSES,
+                    dilation_distance_metres=DILATION_DISTANCE_METRES)
+
+            this_target_matrix = fronts_io.read_dilated_targets_from_store(
+                top_directory_name=this_directory_name,
+                valid_times_unix_sec=STORE_TIMES_TO_READ_UNIX_SEC,
+                num_classes=NUM_CLASSES,
+                dilation_distance_metres=DILATION_DISTANCE_METRES)
+
+            this_target_matrix_one_time = (
+                fronts_io.read_dilated_target_from_store(
+                    top_directory_name=this_directory_name,
+                    valid_time_unix_sec=STORE_TIMES_TO_READ_UNIX_SEC[0],
+                    num_classes=NUM_CLASSES,
+                    dilation_distance_metres=DILATION_DISTANCE_METRES)
+            )
+
+            # A time step that was never written must not be read as zeros.
+            with self.assertRaises(ValueError):
+                fronts_io.read_dilated_target_from_store(
+                    top_directory_name=this_directory_name,
+                    valid_time_unix_sec=TIME_NOT_IN_STORE_UNIX_SEC,
+                    num_classes=NUM_CLASSES,
+                    dilation_distance_metres=DILATION_DISTANCE_METRES)
+        finally:
+            shutil.rmtree(this_directory_name)
+
+        self.assertTrue(this_target_matrix.dtype == numpy.uint8)
+        self.assertTrue(numpy.array_equal(
+            this_target_matrix,
+            TARGET_MATRIX_TO_STORE[STORE_ROWS_TO_READ, ...]))
+
+        self.assertTrue(this_target_matrix_one_time.dtype == numpy.uint8)
+        self.assertTrue(numpy.array_equal(
+            this_target_matrix_one_time,
+            TARGET_MATRIX_TO_STORE[STORE_ROWS_TO_READ[[0]], ...]))
+
+    def test_find_stale_times_in_target_store(self):
+        """Ensures correct output from find_stale_times_in_target_store.
+
+        In this case, one time step was never written to the store, one gridded
+        file was modified after the targets were written, and one gridded file
+        was deleted.
+        """
+
+        this_directory_name = tempfile.mkdtemp()
+
+        try:
+            these_gridded_file_names = _write_one_gridded_file_per_time(
+                input_table=GRID_TABLE_TO_WRITE,
+                top_directory_name=this_directory_name)
+
+            fronts_io.write_dilated_targets_to_store(
+                top_directory_name=this_directory_name,
+                target_matrix=TARGET_MATRIX_TO_STORE[
+                    :NUM_TIMES_IN_FIRST_WRITE, ...],
+                valid_times_unix_sec=ROUND_TRIP_TIMES_UNIX_SEC[
+                    :NUM_TIMES_IN_FIRST_WRITE],
+                num_classes=NUM_CLASSES,
+                dilation_distance_metres=DILATION_DISTANCE_METRES)
+
+            this_file_name = these_gridded_file_names[MODIFIED_SOURCE_INDEX]
+            this_mtime_unix_sec = os.path.getmtime(this_file_name) + 100
+            os.utime(this_file_name, (this_mtime_unix_sec, this_mtime_unix_sec))
+            os.remove(these_gridded_file_names[DELETED_SOURCE_INDEX])
+
+            these_stale_flags = fronts_io.find_stale_times_in_target_store(
+                top_directory_name=this_directory_name,
+                valid_times_unix_sec=ROUND_TRIP_TIMES_UNIX_SEC,
+                num_classes=NUM_CLASSES,
+                dilation_distance_metres=DILATION_DISTANCE_METRES)
+
+            # Callers that have already checked staleness may skip the check.
+            this_target_matrix = fronts_io.read_dilated_target_from_store(
+                top_directory_name=this_directory_name,
+                valid_time_unix_sec=ROUND_TRIP_TIMES_UNIX_SEC[
+                    MODIFIED_SOURCE_INDEX],
+                num_classes=NUM_CLASSES,
+                dilation_distance_metres=DILATION_DISTANCE_METRES,
+                check_staleness=False)
+        finally:
+            shutil.rmtree(this_directory_name)
+
+        self.assertTrue(numpy.array_equal(these_stale_flags, STALE_TIME_FLAGS))
+        self.assertTrue(numpy.array_equal(
+            this_target_matrix,
+            TARGET_MATRIX_TO_STORE[[MODIFIED_SOURCE_INDEX], ...]))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -7,6 +7,7 @@ other words, all "forecasts" are zero-hour forecasts (analyses).
 """
 
 import os.path
+import collections
 import numpy
 from gewittergefahr.gg_io import netcdf_io
 from gewittergefahr.gg_io import downloads
@@ -20,6 +21,7 @@ NARR_ZERO_TIME_UNIX_SEC = time_conversion.string_to_unix_sec(
     '1800-01-01-00', '%Y-%m-%d-%H')
 
 TIME_FORMAT_MONTH = '%Y%m'
+TIME_FORMAT_FOR_MESSAGES = '%Y-%m-%d-%H'
 NETCDF_FILE_EXTENSION = '.nc'
 
 ONLINE_SURFACE_DIR_NAME = 'ftp://ftp.cdc.noaa.gov/Datasets/NARR/monolevel'
@@ -40,6 +42,8 @@ VALID_FIELD_NAMES_NETCDF = [
 PRESSURE_KEY = 'level'
 TIME_KEY = 'time'
 
+DEFAULT_MAX_NUM_OPEN_FILES = 4
+
 
 def _remove_sentinel_values(data_matrix):
     """Removes sentinel values from field.
@@ -126,6 +130,33 @@ def _std_to_netcdf_field_name(field_name):
     ]
 
 
+def _find_times_in_file(all_times_narr_hours, desired_times_narr_hours):
+    """Finds desired times in NetCDF file.
+
+    T = number of times in file
+    D = number of desired times
+
+    :param all_times_narr_hours: length-T numpy array of NARR times in file.
+    :param desired_times_narr_hours: length-D numpy array of desired NARR times.
+    :return: time_indices: length-D numpy array of indices into
+        `all_times_narr_hours`.  If the [i]th desired time is missing,
+        time_indices[i] is meaningless.
+    :return: missing_flags: length-D numpy array of Boolean flags, indicating
+        which desired times are missing from the file.
+    """
+
+    sort_indices = numpy.argsort(all_times_narr_hours)
+    sorted_indices = numpy.searchsorted(
+        all_times_narr_hours[sort_indices], desired_times_narr_hours)
+    sorted_indices[sorted_indices >= len(all_times_narr_hours)] = 0
+
+    time_indices = sort_indices[sorted_indices]
+    missing_flags = (
+        all_times_narr_hours[time_indices] != desired_times_narr_hours)
+
+    return time_indices, missing_flags
+
+
 def _get_pathless_file_name(field_name, month_string, is_surface=False):
     """Returns pathless name for NetCDF file.
 
@@ -242,28 +273,102 @@ def download_file(
         raise_error_if_fails=raise_error_if_fails)
 
 
-def read_file(netcdf_file_name, field_name, valid_time_unix_sec,
-              pressure_level_mb=None):
-    """Reads data from NetCDF file.
+class NetcdfHandleCache(object):
+    """Cache of open NetCDF files, with least-recently-used eviction.
 
-    This method will extract one field at one pressure level (or surface) at one
-    time.
+    Along with each open file, the cache stores its time and pressure
+    coordinates, so that these are read only once per file.
+    """
+
+    def __init__(self, max_num_open_files=DEFAULT_MAX_NUM_OPEN_FILES):
+        """Creates new instance.
+
+        :param max_num_open_files: Max number of files open at once.  When
+            another file is opened, the least recently used one is closed.
+        """
+
+        error_checking.assert_is_integer(max_num_open_files)
+        error_checking.assert_is_greater(max_num_open_files, 0)
 
+        self.max_num_open_files = max_num_open_files
+        self.file_dict = collections.OrderedDict()
+
+    def get_file(self, netcdf_file_name):
+        """Returns open NetCDF file, opening it if necessary.
+
+        T = number of times in file
+        P = number of pressure levels in file
+
+        :param netcdf_file_name: Path to NetCDF file.
+        :return: dataset_object: Instance of `netCDF4.Dataset`.
+        :return: all_times_narr_hours: length-T numpy array of NARR times.
+        :return: all_pressure_levels_mb: length-P numpy array of pressure levels
+            (millibars).  If the file contains surface data, this is None.
+        """
+
+        try:
+            this_entry = self.file_dict.pop(netcdf_file_name)
+        except KeyError:
+            if len(self.file_dict) >= self.max_num_open_files:
+                _, this_oldest_entry = self.file_dict.popitem(last=False)
+                this_oldest_entry[0].close()
+
+            dataset_object = netcdf_io.open_netcdf(
+                netcdf_file_name=netcdf_file_name, raise_error_if_fails=True)
+
+            all_times_narr_hours = numpy.round(
+                dataset_object.variables[TIME_KEY]
+            ).astype(int)
+
+            if PRESSURE_KEY in dataset_object.variables:
+                all_pressure_levels_mb = numpy.round(
+                    dataset_object.variables[PRESSURE_KEY]
+                ).astype(int)
+            else:
+                all_pressure_levels_mb = None
+
+            this_entry = (
+                dataset_object, all_times_narr_hours, all_pressure_levels_mb)
+
+        self.file_dict[netcdf_file_name] = this_entry
+        return this_entry
+
+    def close_all(self):
+        """Closes all open files."""
+
+        for this_entry in self.file_dict.values():
+            this_entry[0].close()
+
+        self.file_dict.clear()
+
+
+def read_file_for_many_times(
+        netcdf_file_name, field_name, valid_times_unix_sec,
+        pressure_level_mb=None, handle_cache_object=None):
+    """Reads data from NetCDF file at many times.
+
+    This method will extract one field at one pressure level (or surface) at
+    many times.  All times are read in one slice, from the first to last
+    desired time in the file.
+
+    T = number of times to read
     M = number of rows in grid
     N = number of columns in grid
 
     :param netcdf_file_name: Path to input file.
     :param field_name: Field to extract (must be accepted by
         `processed_narr_io.check_field_name`).
-    :param valid_time_unix_sec: Valid time.
+    :param valid_times_unix_sec: length-T numpy array of valid times.
     :param pressure_level_mb: [used only if file contains isobaric data]
         Pressure level to extract (millibars).
-    :return: data_matrix: M-by-N numpy array with values of the given field at
-        the given pressure level (or surface).
+    :param handle_cache_object: Instance of `NetcdfHandleCache`.  If None, the
+        file will be opened and closed by this method.
+    :return: data_matrix: T-by-M-by-N numpy array with values of the given field
+        at the given pressure level (or surface).
+    :raises: ValueError: if any desired time is not in the file.
     """
 
     field_name_orig = _std_to_netcdf_field_name(field_name)
-    valid_time_narr_hours = _unix_to_narr_time(valid_time_unix_sec)
 
     if pressure_level_mb is None:
 
@@ -275,35 +380,84 @@ def read_file(netcdf_file_name, field_name, valid_time_unix_sec,
     else:
         error_checking.assert_is_integer(pressure_level_mb)
 
-    dataset_object = netcdf_io.open_netcdf(
-        netcdf_file_name=netcdf_file_name, raise_error_if_fails=True)
+    error_checking.assert_is_integer_numpy_array(valid_times_unix_sec)
+    error_checking.assert_is_numpy_array(valid_times_unix_sec, num_dimensions=1)
 
-    is_surface = PRESSURE_KEY not in dataset_object.variables
+    if handle_cache_object is None:
+        this_cache_object = NetcdfHandleCache(max_num_open_files=1)
+    else:
+        this_cache_object = handle_cache_object
 
-    all_times_narr_hours = numpy.round(
-        dataset_object.variables[TIME_KEY]
-    ).astype(int)
+    dataset_object, all_times_narr_hours, all_pressure_levels_mb = (
+        this_cache_object.get_file(netcdf_file_name)
+    )
 
-    time_index = numpy.where(
-        all_times_narr_hours == valid_time_narr_hours
-    )[0][0]
+    time_indices, missing_time_flags = _find_times_in_file(
+        all_times_narr_hours=all_times_narr_hours,
+        desired_times_narr_hours=_unix_to_narr_time(valid_times_unix_sec))
 
-    if is_surface:
-        field_matrix = numpy.array(
-            dataset_object.variables[field_name_orig][time_index, ...]
+    if numpy.any(missing_time_flags):
+        if handle_cache_object is None:
+            this_cache_object.close_all()
+
+        missing_time_strings = [
+            time_conversion.unix_sec_to_string(t, TIME_FORMAT_FOR_MESSAGES)
+            for t in valid_times_unix_sec[missing_time_flags]
+        ]
+        error_string = (
+            'Cannot find the following times in file "{0:s}":\n{1:s}'
+        ).format(netcdf_file_name, str(missing_time_strings))
+        raise ValueError(error_string)
+
+    first_time_index = numpy.min(time_indices)
+    last_time_index = numpy.max(time_indices)
+
+    if all_pressure_levels_mb is None:
+        data_matrix = numpy.array(
+            dataset_object.variables[field_name_orig][
+                first_time_index:(last_time_index + 1), ...]
         )
     else:
-        all_pressure_levels_mb = numpy.round(
-            dataset_object.variables[PRESSURE_KEY]
-        ).astype(int)
-
         pressure_index = numpy.where(
             all_pressure_levels_mb == pressure_level_mb
         )[0][0]
 
-        field_matrix = numpy.array(
+        data_matrix = numpy.array(
             dataset_object.variables[field_name_orig][
-                time_index, pressure_index, ...]
+                first_time_index:(last_time_index + 1), pressure_index, ...]
         )
 
-    return _remove_sentinel_values(field_matrix)
+    if handle_cache_object is None:
+        this_cache_object.close_all()
+
+    data_matrix = data_matrix[time_indices - first_time_index, ...]
+    return _remove_sentinel_values(data_matrix)
+
+
+def read_file(netcdf_file_name, field_name, valid_time_unix_sec,
+              pressure_level_mb=None, handle_cache_object=None):
+    """Reads data from NetCDF file.
+
+    This method will extract one field at one pressure level (or surface) at one
+    time.
+
+    M = number of rows in grid
+    N = number of columns in grid
+
+    :param netcdf_file_name: Path to input file.
+    :param field_name: Field to extract (must be accepted by
+        `processed_narr_io.check_field_name`).
+    :param valid_time_unix_sec: Valid time.
+    :param pressure_level_mb: [used only if file contains isobaric data]
+        Pressure level to extract (millibars).
+    :param handle_cache_object: See doc for `read_file_for_many_times`.
+    :return: data_matrix: M-by-N numpy array with values of the given field at
+        the given pressure level (or surface).
+    """
+
+    return read_file_for_many_times(
+        netcdf_file_name=netcdf_file_name, field_name=field_name,
+        valid_times_unix_sec=numpy.array([valid_time_unix_sec], dtype=int),
+        pressure_level_mb=pressure_level_mb,
+        handle_cache_object=handle_cache_object
+    )[0, ...]
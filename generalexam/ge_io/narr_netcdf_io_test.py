@@ -1,6 +1,7 @@
 """Unit tests for narr_netcdf_io.py."""
 
 import unittest
+import numpy
 from generalexam.ge_io import narr_netcdf_io
 from generalexam.ge_io import processed_narr_io
 
@@ -19,6 +20,11 @@ PATHLESS_FILE_NAME_SURFACE = 'shum.2m.2018.nc'
 FILE_NAME_ISOBARIC = 'narr_netcdf/shum.201802.nc'
 FILE_NAME_SURFACE = 'narr_netcdf/shum.2m.2018.nc'
 
+ALL_TIMES_NARR_HOURS = numpy.array([9, 0, 3, 6, 12], dtype=int)
+DESIRED_TIMES_NARR_HOURS = numpy.array([6, 15, 0, 12, 4], dtype=int)
+TIME_INDICES_IN_FILE = numpy.array([3, -1, 1, 4, -1], dtype=int)
+TIME_MISSING_FLAGS = numpy.array([0, 1, 0, 0, 1], dtype=bool)
+
 
 class NarrNetcdfIoTests(unittest.TestCase):
     """Each method is a unit test for narr_netcdf_io.py."""
@@ -35,6 +41,23 @@ class NarrNetcdfIoTests(unittest.TestCase):
         this_time_narr_hours = narr_netcdf_io._unix_to_narr_time(UNIX_TIME_SEC)
         self.assertTrue(this_time_narr_hours == NARR_TIME_HOURS)
 
+    def test_find_times_in_file(self):
+        """Ensures correct output from _find_times_in_file."""
+
+        these_time_indices, these_missing_flags = (
+            narr_netcdf_io._find_times_in_file(
+                all_times_narr_hours=ALL_TIMES_NARR_HOURS,
+                desired_times_narr_hours=DESIRED_TIMES_NARR_HOURS)
+        )
+
+        self.assertTrue(numpy.array_equal(
+            these_missing_flags, TIME_MISSING_FLAGS))
+
+        these_found_flags = numpy.invert(TIME_MISSING_FLAGS)
+        self.assertTrue(numpy.array_equal(
+            these_time_indices[these_found_flags],
+            TIME_INDICES_IN_FILE[these_found_flags]))
+
     def test_check_field_name_netcdf_valid(self):
         """Ensures correct output from _check_field_name_netcdf.
 
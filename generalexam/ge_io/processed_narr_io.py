@@ -11,6 +11,15 @@ from gewittergefahr.gg_utils import error_checking
 TIME_FORMAT_MONTH = '%Y%m'
 TIME_FORMAT_IN_FILE_NAMES = '%Y%m%d%H'
 
+PICKLE_FILE_EXTENSION = '.p'
+TEMP_FILE_SUFFIX = '.tmp'
+STORE_FILE_EXTENSION = '.npy'
+STORE_TIME_INDEX_SUFFIX = '_valid_times'
+
+TIME_INTERVAL_SEC = 10800
+NUM_TIMES_PER_MONTHLY_STORE = 31 * 8
+MB_TO_PASCALS = 100
+
 TEMPERATURE_NAME = 'temperature_kelvins'
 HEIGHT_NAME = 'height_m_asl'
 VERTICAL_VELOCITY_NAME = 'w_wind_pascals_s01'
@@ -106,6 +115,109 @@ def _check_model_fields(
             [num_times, num_grid_rows, num_grid_columns]))
 
 
+def _field_name_unitless_to_units(field_name_unitless):
+    """Adds units to field name.
+
+    This is the inverse of `_remove_units_from_field_name`.
+
+    :param field_name_unitless: Field name in GewitterGefahr format, but without
+        units.
+    :return: field_name: Field name in GewitterGefahr format.
+    :raises: ValueError: if field name is unrecognized.
+    """
+
+    if field_name_unitless not in FIELD_NAMES_UNITLESS:
+        error_string = (
+            '\n\n' + str(FIELD_NAMES_UNITLESS) +
+            '\n\nValid field names (listed above) do not include "' +
+            field_name_unitless + '".')
+        raise ValueError(error_string)
+
+    return FIELD_NAMES[FIELD_NAMES_UNITLESS.index(field_name_unitless)]
+
+
+def _store_file_to_time_index_file(store_file_name):
+    """Returns name of time index that accompanies monthly store.
+
+    :param store_file_name: Path to monthly store (see
+        `find_monthly_store_file`).
+    :return: time_index_file_name: Path to file with valid times in the store.
+    """
+
+    return '{0:s}{1:s}{2:s}'.format(
+        os.path.splitext(store_file_name)[0], STORE_TIME_INDEX_SUFFIX,
+        STORE_FILE_EXTENSION)
+
+
+def _time_to_index_in_monthly_store(valid_time_unix_sec):
+    """Returns index of valid time in monthly store.
+
+    :param valid_time_unix_sec: Valid time.
+    :return: time_index: Array index along the first axis of the monthly store.
+    :raises: ValueError: if valid time is not a multiple of 3 hours.
+    """
+
+    if numpy.mod(valid_time_unix_sec, TIME_INTERVAL_SEC) != 0:
+        error_string = (
+            'Valid time ({0:d}) is not a multiple of {1:d} seconds.'
+        ).format(valid_time_unix_sec, TIME_INTERVAL_SEC)
+        raise ValueError(error_string)
+
+    month_start_time_unix_sec = time_conversion.string_to_unix_sec(
+        time_conversion.unix_sec_to_string(
+            valid_time_unix_sec, TIME_FORMAT_MONTH),
+        TIME_FORMAT_MONTH)
+
+    return int(
+        (valid_time_unix_sec - month_start_time_unix_sec) / TIME_INTERVAL_SEC
+    )
+
+
+def _read_time_index(store_file_name):
+    """Reads valid times in monthly store.
+
+    :param store_file_name: Path to monthly store (see
+        `find_monthly_store_file`).
+    :return: valid_times_unix_sec: 1-D numpy array of valid times in the store.
+        If the store does not exist, this is an empty array.
+    """
+
+    time_index_file_name = _store_file_to_time_index_file(store_file_name)
+    if not (os.path.isfile(store_file_name) and
+            os.path.isfile(time_index_file_name)):
+        return numpy.array([], dtype=int)
+
+    return numpy.load(time_index_file_name)
+
+
+def _parse_file_name_for_one_time(narr_file_name):
+    """Parses metadata from name of file with one time step.
+
+    This is the inverse of `find_file_for_one_time`.
+
+    :param narr_file_name: Path to file (see `find_file_for_one_time`).
+    :return: top_directory_name: See doc for `find_file_for_one_time`.
+    :return: field_name: Same.
+    :return: pressure_level_mb: Same.
+    :return: valid_time_unix_sec: Same.
+    """
+
+    pathless_file_name = os.path.split(narr_file_name)[-1]
+    extensionless_file_name = os.path.splitext(pathless_file_name)[0]
+    field_name_unitless, pressure_level_string, valid_time_string = (
+        extensionless_file_name.rsplit('_', 2)
+    )
+
+    top_directory_name = os.path.split(os.path.split(narr_file_name)[0])[0]
+    field_name = _field_name_unitless_to_units(field_name_unitless)
+    pressure_level_mb = int(pressure_level_string.replace('mb', ''))
+    valid_time_unix_sec = time_conversion.string_to_unix_sec(
+        valid_time_string, TIME_FORMAT_IN_FILE_NAMES)
+
+    return (top_directory_name, field_name, pressure_level_mb,
+            valid_time_unix_sec)
+
+
 def check_field_name(field_name, require_standard=False):
     """Ensures that name of model field is recognized.
 
@@ -172,6 +284,9 @@ def write_fields_to_file(
         valid_times_unix_sec):
     """Writes fields (at one or more time steps) to Pickle file.
 
+    Data are written to a temporary file, which is then renamed.  Thus, if the
+    output file exists, it is complete.
+
     :param pickle_file_name: Path to output file.
     :param field_matrix: See documentation for `_check_model_fields`.
     :param field_name: See documentation for `_check_model_fields`.
@@ -185,17 +300,25 @@ def write_fields_to_file(
         valid_times_unix_sec=valid_times_unix_sec)
 
     file_system_utils.mkdir_recursive_if_necessary(file_name=pickle_file_name)
-    pickle_file_handle = open(pickle_file_name, 'wb')
+    temp_file_name = pickle_file_name + TEMP_FILE_SUFFIX
+
+    pickle_file_handle = open(temp_file_name, 'wb')
     pickle.dump(field_matrix, pickle_file_handle)
     pickle.dump(field_name, pickle_file_handle)
     pickle.dump(pressure_level_pascals, pickle_file_handle)
     pickle.dump(valid_times_unix_sec, pickle_file_handle)
     pickle_file_handle.close()
 
+    os.rename(temp_file_name, pickle_file_name)
+
 
 def read_fields_from_file(pickle_file_name):
     """Reads fields (at one or more time steps) from Pickle file.
 
+    If the Pickle file does not exist but its name was created by
+    `find_file_for_one_time`, the field will be read from the monthly store
+    instead (see `read_field_from_monthly_store`).
+
     :param pickle_file_name: Path to input file.
     :return: field_matrix: See documentation for `_check_model_fields`.
     :return: field_name: See documentation for `_check_model_fields`.
@@ -203,6 +326,20 @@ def read_fields_from_file(pickle_file_name):
     :return: valid_times_unix_sec: See documentation for `_check_model_fields`.
     """
 
+    if not os.path.isfile(pickle_file_name):
+        try:
+            (top_directory_name, field_name, pressure_level_mb,
+             valid_time_unix_sec
+            ) = _parse_file_name_for_one_time(pickle_file_name)
+        except ValueError:
+            error_string = 'Cannot find file: "{0:s}"'.format(pickle_file_name)
+            raise ValueError(error_string)
+
+        return read_field_from_monthly_store(
+            top_directory_name=top_directory_name, field_name=field_name,
+            pressure_level_mb=pressure_level_mb,
+            valid_time_unix_sec=valid_time_unix_sec)
+
     pickle_file_handle = open(pickle_file_name, 'rb')
     field_matrix = pickle.load(pickle_file_handle)
     field_name = pickle.load(pickle_file_handle)
@@ -270,6 +407,10 @@ def find_file_for_one_time(
     Specifically, this file should contain the grid for one variable, at one
     pressure level, at one time step.
 
+    If the Pickle file does not exist but the time step is in the monthly store
+    (see `find_monthly_store_file`), the file is not considered missing, since
+    `read_fields_from_file` will read from the store instead.
+
     :param top_directory_name: Name of top-level directory with processed NARR
         files.
     :param field_name: Field name in GewitterGefahr format.
@@ -298,9 +439,184 @@ def find_file_for_one_time(
             valid_time_unix_sec, TIME_FORMAT_IN_FILE_NAMES))
 
     if raise_error_if_missing and not os.path.isfile(narr_file_name):
+        store_file_name = find_monthly_store_file(
+            top_directory_name=top_directory_name, field_name=field_name,
+            pressure_level_mb=pressure_level_mb,
+            valid_time_unix_sec=valid_time_unix_sec,
+            raise_error_if_missing=False)
+
+        if valid_time_unix_sec not in _read_time_index(store_file_name):
+            error_string = (
+                'Cannot find file.  Expected at location: "{0:s}"'.format(
+                    narr_file_name))
+            raise ValueError(error_string)
+
+    return narr_file_name
+
+
+def find_monthly_store_file(
+        top_directory_name, field_name, pressure_level_mb, valid_time_unix_sec,
+        raise_error_if_missing=True):
+    """Finds monthly store with NARR data.
+
+    The monthly store is a binary file (numpy format) with one float32 grid for
+    each 3-hour time step in the month, for one variable at one pressure level.
+    It is accompanied by a time index, listing the time steps that have been
+    written.  Unlike Pickle files, the store can be memory-mapped, so that one
+    time step can be read without reading (or copying) the whole file.
+
+    :param top_directory_name: See doc for `find_file_for_one_time`.
+    :param field_name: Same.
+    :param pressure_level_mb: Same.
+    :param valid_time_unix_sec: Any valid time in the month.
+    :param raise_error_if_missing: Boolean flag.  If store is missing and
+        raise_error_if_missing = True, this method will error out.  If store is
+        missing and raise_error_if_missing = False, this method will return the
+        *expected* path to the store.
+    :return: store_file_name: Path to store.
+    """
+
+    error_checking.assert_is_string(top_directory_name)
+    check_field_name(field_name, require_standard=False)
+    error_checking.assert_is_integer(pressure_level_mb)
+    error_checking.assert_is_greater(pressure_level_mb, 0)
+    error_checking.assert_is_boolean(raise_error_if_missing)
+
+    month_string = time_conversion.unix_sec_to_string(
+        valid_time_unix_sec, TIME_FORMAT_MONTH)
+
+    store_file_name = '{0:s}/{1:s}/{2:s}_{3:04d}mb_{1:s}{4:s}'.format(
+        top_directory_name, month_string,
+        _remove_units_from_field_name(field_name), pressure_level_mb,
+        STORE_FILE_EXTENSION)
+
+    if raise_error_if_missing and not os.path.isfile(store_file_name):
         error_string = (
             'Cannot find file.  Expected at location: "{0:s}"'.format(
-                narr_file_name))
+                store_file_name))
         raise ValueError(error_string)
 
-    return narr_file_name
+    return store_file_name
+
+
+def write_fields_to_monthly_store(
+        top_directory_name, field_matrix, field_name, pressure_level_pascals,
+        valid_times_unix_sec):
+    """Writes fields (at one or more time steps) to monthly stores.
+
+    If the store for a given month does not yet exist, it is created.  Time
+    steps already in the store are overwritten.
+
+    :param top_directory_name: See doc for `find_monthly_store_file`.
+    :param field_matrix: See doc for `_check_model_fields`.
+    :param field_name: Same.
+    :param pressure_level_pascals: Same.
+    :param valid_times_unix_sec: Same.
+    """
+
+    _check_model_fields(
+        field_matrix=field_matrix, field_name=field_name,
+        pressure_level_pascals=pressure_level_pascals,
+        valid_times_unix_sec=valid_times_unix_sec)
+
+    pressure_level_mb = int(numpy.round(
+        float(pressure_level_pascals) / MB_TO_PASCALS
+    ))
+
+    store_file_names = numpy.array([
+        find_monthly_store_file(
+            top_directory_name=top_directory_name, field_name=field_name,
+            pressure_level_mb=pressure_level_mb, valid_time_unix_sec=t,
+            raise_error_if_missing=False)
+        for t in valid_times_unix_sec
+    ])
+
+    for this_store_file_name in numpy.unique(store_file_names):
+        these_time_indices = numpy.where(
+            store_file_names == this_store_file_name)[0]
+        these_valid_times_unix_sec = valid_times_unix_sec[these_time_indices]
+        these_indices_in_store = numpy.array([
+            _time_to_index_in_monthly_store(t)
+            for t in these_valid_times_unix_sec
+        ], dtype=int)
+
+        these_old_times_unix_sec = _read_time_index(this_store_file_name)
+
+        if len(these_old_times_unix_sec) == 0:
+            file_system_utils.mkdir_recursive_if_necessary(
+                file_name=this_store_file_name)
+
+            this_store_matrix = numpy.lib.format.open_memmap(
+                this_store_file_name, mode='w+', dtype=numpy.float32,
+                shape=(NUM_TIMES_PER_MONTHLY_STORE,) + field_matrix.shape[1:])
+        else:
+            this_store_matrix = numpy.load(this_store_file_name, mmap_mode='r+')
+
+        this_store_matrix[these_indices_in_store, ...] = field_matrix[
+            these_time_indices, ...]
+        this_store_matrix.flush()
+        del this_store_matrix
+
+        # The time index is written last, so that it never lists time steps
+        # whose data have not been written.  It is written to a temporary file
+        # and then renamed, so that readers never see a partial index.
+        this_index_file_name = _store_file_to_time_index_file(
+            this_store_file_name)
+        this_temp_file_name = this_index_file_name + TEMP_FILE_SUFFIX
+
+        this_file_handle = open(this_temp_file_name, 'wb')
+        numpy.save(
+            this_file_handle,
+            numpy.union1d(these_old_times_unix_sec, these_valid_times_unix_sec)
+        )
+        this_file_handle.close()
+
+        os.rename(this_temp_file_name, this_index_file_name)
+
+
+def read_field_from_monthly_store(
+        top_directory_name, field_name, pressure_level_mb, valid_time_unix_sec):
+    """Reads field (at one time step) from monthly store.
+
+    The store is memory-mapped (copy-on-write), so only the requested time step
+    is read from disk and it is not copied.  Changes to the output array are
+    not written back to the store.
+
+    :param top_directory_name: See doc for `find_monthly_store_file`.
+    :param field_name: Same.
+    :param pressure_level_mb: Same.
+    :param valid_time_unix_sec: Valid time.
+    :return: field_matrix: See doc for `read_fields_from_file`.  This is a
+        1-by-M-by-N array of 32-bit floats.
+    :return: field_name: Same.
+    :return: pressure_level_pascals: Same.
+    :return: valid_times_unix_sec: Same.
+    :raises: ValueError: if the valid time is not in the store.
+    """
+
+    store_file_name = find_monthly_store_file(
+        top_directory_name=top_directory_name, field_name=field_name,
+        pressure_level_mb=pressure_level_mb,
+        valid_time_unix_sec=valid_time_unix_sec, raise_error_if_missing=True)
+
+    if valid_time_unix_sec not in _read_time_index(store_file_name):
+        error_string = 'Cannot find valid time {0:s} in store: "{1:s}"'.format(
+            time_conversion.unix_sec_to_string(
+                valid_time_unix_sec, TIME_FORMAT_IN_FILE_NAMES),
+            store_file_name)
+        raise ValueError(error_string)
+
+    time_index = _time_to_index_in_monthly_store(valid_time_unix_sec)
+    field_matrix = numpy.load(store_file_name, mmap_mode='c')[
+        time_index:(time_index + 1), ...]
+
+    pressure_level_pascals = pressure_level_mb * MB_TO_PASCALS
+    valid_times_unix_sec = numpy.array([valid_time_unix_sec], dtype=int)
+
+    _check_model_fields(
+        field_matrix=field_matrix, field_name=field_name,
+        pressure_level_pascals=pressure_level_pascals,
+        valid_times_unix_sec=valid_times_unix_sec)
+
+    return (field_matrix, field_name, pressure_level_pascals,
+            valid_times_unix_sec)
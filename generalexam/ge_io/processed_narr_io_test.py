@@ -17,6 +17,20 @@ PROCESSED_FILE_NAME_TIME_PERIOD = (
     'processed_narr_data/u_wind_grid_relative_1000mb_2018022312-2018022406.p')
 PROCESSED_FILE_NAME_ONE_TIME = (
     'processed_narr_data/201802/u_wind_grid_relative_1000mb_2018022321.p')
+MONTHLY_STORE_FILE_NAME = (
+    'processed_narr_data/201802/u_wind_grid_relative_1000mb_201802.npy')
+TIME_INDEX_FILE_NAME = (
+    'processed_narr_data/201802/'
+    'u_wind_grid_relative_1000mb_201802_valid_times.npy')
+
+# Only the extension (not the directory name) should be changed.
+MONTHLY_STORE_FILE_NAME_NPY_DIR = (
+    'stores.npy/201802/u_wind_grid_relative_1000mb_201802.npy')
+TIME_INDEX_FILE_NAME_NPY_DIR = (
+    'stores.npy/201802/u_wind_grid_relative_1000mb_201802_valid_times.npy')
+
+# 2100 UTC 23 Feb is the 7th time step on the 22nd day after 0000 UTC 1 Feb.
+INDEX_IN_MONTHLY_STORE = 22 * 8 + 7
 
 
 class ProcessedNarrIoTests(unittest.TestCase):
@@ -185,6 +199,60 @@ class ProcessedNarrIoTests(unittest.TestCase):
 
         self.assertTrue(this_file_name == PROCESSED_FILE_NAME_ONE_TIME)
 
+    def test_parse_file_name_for_one_time(self):
+        """Ensures correct output from _parse_file_name_for_one_time."""
+
+        (this_directory_name, this_field_name, this_pressure_level_mb,
+         this_time_unix_sec
+        ) = processed_narr_io._parse_file_name_for_one_time(
+            PROCESSED_FILE_NAME_ONE_TIME)
+
+        self.assertTrue(this_directory_name == DIRECTORY_NAME)
+        self.assertTrue(this_field_name == FIELD_NAME_IN_FILES)
+        self.assertTrue(this_pressure_level_mb == PRESSURE_LEVEL_MB)
+        self.assertTrue(this_time_unix_sec == VALID_TIME_UNIX_SEC)
+
+    def test_find_monthly_store_file(self):
+        """Ensures correct output from find_monthly_store_file."""
+
+        this_file_name = processed_narr_io.find_monthly_store_file(
+            top_directory_name=DIRECTORY_NAME, field_name=FIELD_NAME_IN_FILES,
+            pressure_level_mb=PRESSURE_LEVEL_MB,
+            valid_time_unix_sec=VALID_TIME_UNIX_SEC,
+            raise_error_if_missing=False)
+
+        self.assertTrue(this_file_name == MONTHLY_STORE_FILE_NAME)
+
+    def test_store_file_to_time_index_file(self):
+        """Ensures correct output from _store_file_to_time_index_file."""
+
+        self.assertTrue(
+            processed_narr_io._store_file_to_time_index_file(
+                MONTHLY_STORE_FILE_NAME) ==
+            TIME_INDEX_FILE_NAME
+        )
+
+    def test_store_file_to_time_index_file_npy_dir(self):
+        """Ensures correct output from _store_file_to_time_index_file.
+
+        In this case, the directory name also contains ".npy".
+        """
+
+        self.assertTrue(
+            processed_narr_io._store_file_to_time_index_file(
+                MONTHLY_STORE_FILE_NAME_NPY_DIR) ==
+            TIME_INDEX_FILE_NAME_NPY_DIR
+        )
+
+    def test_time_to_index_in_monthly_store(self):
+        """Ensures correct output from _time_to_index_in_monthly_store."""
+
+        self.assertTrue(
+            processed_narr_io._time_to_index_in_monthly_store(
+                VALID_TIME_UNIX_SEC) ==
+            INDEX_IN_MONTHLY_STORE
+        )
+
 
 if __name__ == '__main__':
     unittest.main()
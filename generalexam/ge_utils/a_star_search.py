@@ -10,6 +10,7 @@ r = row coordinate (integer)
 c = column coordinate (integer)
 """
 
+import math
 import numpy
 from gewittergefahr.gg_utils import error_checking
 from astar import AStar
@@ -17,6 +18,13 @@ from astar import AStar
 NUM_GRID_ROWS_KEY = 'num_grid_rows'
 NUM_GRID_COLUMNS_KEY = 'num_grid_columns'
 
+# Neighbour offsets are in row-major order, which is the order in which
+# neighbours were returned by the original linear scan.  Keeping this order
+# ensures that ties in A-star are broken the same way.
+NEIGHBOUR_COLUMN_ROW_OFFSETS = [
+    (-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)
+]
+
 
 class GridSearch(AStar):
     """Allows A-star to search through a physical grid.
@@ -48,25 +56,42 @@ class GridSearch(AStar):
         setattr(self, NUM_GRID_ROWS_KEY, binary_region_matrix.shape[0])
         setattr(self, NUM_GRID_COLUMNS_KEY, binary_region_matrix.shape[1])
 
-        # self.num_grid_rows = binary_region_matrix.shape[0]
-        # self.num_grid_columns = binary_region_matrix.shape[1]
-        self.row_indices_in_region, self.column_indices_in_region = numpy.where(
+        row_indices_in_region, column_indices_in_region = numpy.where(
             binary_region_matrix == 1)
 
+        # Each node in the region is stored as a (column, row) tuple of Python
+        # integers, so that membership can be checked in constant time.
+        self.nodes_in_region = set(zip(
+            column_indices_in_region.tolist(), row_indices_in_region.tolist()
+        ))
+        self.heuristic_cost_dict = {}
+
     def heuristic_cost_estimate(self, first_node_object, second_node_object):
         """Returns heuristic cost estimate for path between two nodes.
 
+        Values are cached, since A-star asks for the cost from the same node to
+        the goal many times.
+
         :param first_node_object: (column, row) tuple.
         :param second_node_object: (column, row) tuple.
         :return: heuristic_cost: Euclidean distance (number of grid lengths
             along straight line between nodes 1 and 2).
         """
 
+        this_key = (first_node_object, second_node_object)
+
+        try:
+            return self.heuristic_cost_dict[this_key]
+        except KeyError:
+            pass
+
         (first_column, first_row) = first_node_object
         (second_column, second_row) = second_node_object
 
-        return numpy.sqrt((first_row - second_row) ** 2 +
-                          (first_column - second_column) ** 2)
+        heuristic_cost = math.sqrt((first_row - second_row) ** 2 +
+                                   (first_column - second_column) ** 2)
+        self.heuristic_cost_dict[this_key] = heuristic_cost
+        return heuristic_cost
 
     def distance_between(self, first_node_object, second_node_object):
         """Returns distance between two neighbours.
@@ -85,8 +110,8 @@ class GridSearch(AStar):
         (first_column, first_row) = first_node_object
         (second_column, second_row) = second_node_object
 
-        return numpy.sqrt((first_row - second_row) ** 2 +
-                          (first_column - second_column) ** 2)
+        return math.sqrt((first_row - second_row) ** 2 +
+                         (first_column - second_column) ** 2)
 
     def neighbors(self, node_object):
         """Returns neighbours of node.
@@ -97,24 +122,15 @@ class GridSearch(AStar):
         """
 
         (node_column, node_row) = node_object
-        row_flags = numpy.logical_and(
-            self.row_indices_in_region >= node_row - 1,
-            self.row_indices_in_region <= node_row + 1)
-        column_flags = numpy.logical_and(
-            self.column_indices_in_region >= node_column - 1,
-            self.column_indices_in_region <= node_column + 1)
-
-        neighbour_indices = numpy.where(
-            numpy.logical_and(row_flags, column_flags))[0]
-        neighbour_indices = neighbour_indices.tolist()
-
-        node_index = numpy.where(numpy.logical_and(
-            self.row_indices_in_region == node_row,
-            self.column_indices_in_region == node_column))[0][0]
-        neighbour_indices.remove(node_index)
-
-        return [(self.column_indices_in_region[i],
-                 self.row_indices_in_region[i]) for i in neighbour_indices]
+        list_of_node_objects = []
+
+        for this_column_offset, this_row_offset in NEIGHBOUR_COLUMN_ROW_OFFSETS:
+            this_node_object = (node_column + this_column_offset,
+                                node_row + this_row_offset)
+            if this_node_object in self.nodes_in_region:
+                list_of_node_objects.append(this_node_object)
+
+        return list_of_node_objects
 
 
 def run_a_star(
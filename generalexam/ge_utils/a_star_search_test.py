@@ -24,10 +24,23 @@ END_COLUMN = 6
 EXPECTED_VISITED_ROWS = numpy.array([0, 1, 2, 1, 0, 1, 0], dtype=int)
 EXPECTED_VISITED_COLUMNS = numpy.array([0, 1, 2, 3, 4, 5, 6], dtype=int)
 
+NODE_FOR_NEIGHBOURS = (1, 1)
+EXPECTED_NEIGHBOURS = [(0, 0), (0, 1), (1, 2), (2, 2)]
+
 
 class AStarSearchTests(unittest.TestCase):
     """Each method is a unit test for a_star_search.py."""
 
+    def test_neighbors(self):
+        """Ensures correct output from GridSearch.neighbors."""
+
+        this_grid_search_object = a_star_search.GridSearch(
+            binary_region_matrix=BINARY_REGION_MATRIX_WITH_PATH)
+        these_neighbours = this_grid_search_object.neighbors(
+            NODE_FOR_NEIGHBOURS)
+
+        self.assertTrue(these_neighbours == EXPECTED_NEIGHBOURS)
+
     def test_run_a_star_path_exists(self):
         """Ensures correct output from run_a_star.
 
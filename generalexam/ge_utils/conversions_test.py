@@ -23,6 +23,18 @@ WET_BULB_TEMP_MATRIX_KELVINS = numpy.array(
      [-46.125458, 27.675687, numpy.nan]]
 ) + conversions.ZERO_CELSIUS_IN_KELVINS
 
+# The first two parcels are at 1000 mb, which is a special case when lifting
+# saturated parcels.  Expected values are from SHARPpy's `thermo.wetbulb`.
+DEWPOINTS_1000MB_KELVINS = numpy.array(
+    [10., -12., -30.]) + conversions.ZERO_CELSIUS_IN_KELVINS
+TEMPERATURES_1000MB_KELVINS = numpy.array(
+    [20., -5., -20.]) + conversions.ZERO_CELSIUS_IN_KELVINS
+PRESSURES_1000MB_PASCALS = numpy.array([100000, 100000, 50000], dtype=float)
+WET_BULB_TEMPS_1000MB_KELVINS = numpy.array(
+    [14.110277, -6.761772, -21.943403]) + conversions.ZERO_CELSIUS_IN_KELVINS
+
+DEWPOINTS_ALL_NAN_KELVINS = numpy.full(3, numpy.nan)
+
 
 class ConversionsTests(unittest.TestCase):
     """Each method is a unit test for conversions.py."""
@@ -41,6 +53,38 @@ class ConversionsTests(unittest.TestCase):
             this_wet_bulb_temp_matrix_kelvins, WET_BULB_TEMP_MATRIX_KELVINS,
             atol=TOLERANCE, equal_nan=True))
 
+    def test_dewpoint_to_wet_bulb_temperature_1000mb(self):
+        """Ensures correct output from dewpoint_to_wet_bulb_temperature.
+
+        In this case, some parcels are at 1000 mb.
+        """
+
+        these_wet_bulb_temps_kelvins = (
+            conversions.dewpoint_to_wet_bulb_temperature(
+                dewpoints_kelvins=DEWPOINTS_1000MB_KELVINS,
+                temperatures_kelvins=TEMPERATURES_1000MB_KELVINS,
+                total_pressures_pascals=PRESSURES_1000MB_PASCALS)
+        )
+
+        self.assertTrue(numpy.allclose(
+            these_wet_bulb_temps_kelvins, WET_BULB_TEMPS_1000MB_KELVINS,
+            atol=TOLERANCE))
+
+    def test_dewpoint_to_wet_bulb_temperature_all_nan(self):
+        """Ensures correct output from dewpoint_to_wet_bulb_temperature.
+
+        In this case, all dewpoints are NaN.
+        """
+
+        these_wet_bulb_temps_kelvins = (
+            conversions.dewpoint_to_wet_bulb_temperature(
+                dewpoints_kelvins=DEWPOINTS_ALL_NAN_KELVINS,
+                temperatures_kelvins=TEMPERATURES_1000MB_KELVINS,
+                total_pressures_pascals=PRESSURES_1000MB_PASCALS)
+        )
+
+        self.assertTrue(numpy.all(numpy.isnan(these_wet_bulb_temps_kelvins)))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -7,13 +7,14 @@ import numpy
 import pandas
 import cv2
 import shapely.geometry
-from scipy.ndimage.morphology import binary_closing
+from scipy.ndimage.morphology import binary_closing, distance_transform_edt
 from skimage.measure import label as label_image
 from gewittergefahr.gg_utils import grids
 from gewittergefahr.gg_utils import nwp_model_utils
 from gewittergefahr.gg_utils import polygons
 from gewittergefahr.gg_utils import time_conversion
 from gewittergefahr.gg_utils import error_checking
+from generalexam.ge_utils import utils
 
 TOLERANCE_DEG = 1e-3
 TIME_FORMAT_FOR_LOG_MESSAGES = '%Y-%m-%d-%H'
@@ -34,6 +35,21 @@ ROW_INDICES_BY_REGION_KEY = 'row_indices_by_region'
 COLUMN_INDICES_BY_REGION_KEY = 'column_indices_by_region'
 FRONT_TYPE_BY_REGION_KEY = 'front_type_by_region'
 
+IMAGE_INDEX_BY_REGION_KEY = 'image_index_by_region'
+INTEGER_ID_BY_REGION_KEY = 'integer_id_by_region'
+FIRST_POINT_INDEX_BY_REGION_KEY = 'first_point_index_by_region'
+ROW_INDICES_KEY = 'row_indices'
+COLUMN_INDICES_KEY = 'column_indices'
+
+PROJECTION_OBJECT_KEY = 'projection_object'
+GRID_POINT_X_COORDS_KEY = 'grid_point_x_coords_metres'
+GRID_POINT_Y_COORDS_KEY = 'grid_point_y_coords_metres'
+NUM_GRID_ROWS_KEY = 'num_grid_rows'
+NUM_GRID_COLUMNS_KEY = 'num_grid_columns'
+
+# Filled on the first call to `get_narr_geometry`.
+NARR_GEOMETRY_DICT = {}
+
 NO_FRONT_INTEGER_ID = 0
 ANY_FRONT_INTEGER_ID = 1
 WARM_FRONT_INTEGER_ID = 1
@@ -82,7 +98,7 @@ def _check_frontal_image(image_matrix, assert_binary=False):
     """
 
     error_checking.assert_is_numpy_array(image_matrix, num_dimensions=2)
-    error_checking.assert_is_integer_numpy_array(image_matrix)
+    utils.assert_is_integer_numpy_array(image_matrix)
     error_checking.assert_is_geq_numpy_array(
         image_matrix, numpy.min(VALID_INTEGER_IDS))
 
@@ -171,6 +187,88 @@ def _grid_cell_to_polygon(
         exterior_y_coords=vertex_y_coords_metres)
 
 
+def _get_cells_containing_points(column_coords, row_coords):
+    """Finds grid cells containing each point.
+
+    Coordinates are in units of grid cells, shifted so that cell [i, j] covers
+    the closed square [j, j + 1] x [i, i + 1].  Thus, a point on the edge
+    between two cells is contained by both, and a point on a corner is
+    contained by all four.
+
+    Q = number of points
+    P = number of (point, cell) pairs
+
+    :param column_coords: length-Q numpy array of column coordinates.
+    :param row_coords: length-Q numpy array of row coordinates.
+    :return: rows: length-P numpy array with row indices (integers) of cells.
+    :return: columns: Same as above, except for columns.
+    """
+
+    floor_columns = numpy.floor(column_coords).astype(int)
+    floor_rows = numpy.floor(row_coords).astype(int)
+    on_column_edge_flags = column_coords == floor_columns
+    on_row_edge_flags = row_coords == floor_rows
+
+    rows = numpy.concatenate((
+        floor_rows, floor_rows - 1, floor_rows, floor_rows - 1))
+    columns = numpy.concatenate((
+        floor_columns, floor_columns, floor_columns - 1, floor_columns - 1))
+    valid_flags = numpy.concatenate((
+        numpy.full(len(column_coords), True, dtype=bool), on_row_edge_flags,
+        on_column_edge_flags,
+        numpy.logical_and(on_row_edge_flags, on_column_edge_flags)
+    ))
+
+    return rows[valid_flags], columns[valid_flags]
+
+
+def _get_edge_crossings(start_coords, end_coords):
+    """Finds points where each line segment crosses an edge between grid cells.
+
+    This method handles one coordinate (row or column) at a time.  Coordinates
+    are in units of grid cells, as in `_get_cells_containing_points`, so edges
+    are at integer values.
+
+    S = number of line segments
+    X = number of edge crossings
+
+    :param start_coords: length-S numpy array with coordinate at start of each
+        segment.
+    :param end_coords: length-S numpy array with coordinate at end of each
+        segment.
+    :return: segment_indices: length-X numpy array of segment indices.
+    :return: fractional_distances: length-X numpy array of fractional distances
+        along segment (from 0 at start to 1 at end).
+    :return: crossing_coords: length-X numpy array with coordinate (an integer
+        value) at each crossing.
+    """
+
+    first_edges = numpy.ceil(numpy.minimum(start_coords, end_coords))
+    last_edges = numpy.floor(numpy.maximum(start_coords, end_coords))
+
+    # Segments with constant coordinate do not cross edges, even if they lie
+    # along one.
+    num_crossings_by_segment = numpy.maximum(
+        last_edges - first_edges + 1, 0).astype(int)
+    num_crossings_by_segment[start_coords == end_coords] = 0
+
+    segment_indices = numpy.repeat(
+        numpy.arange(len(start_coords), dtype=int), num_crossings_by_segment)
+    first_crossing_indices = numpy.cumsum(num_crossings_by_segment) - (
+        num_crossings_by_segment)
+    crossing_coords = first_edges[segment_indices] + (
+        numpy.arange(len(segment_indices), dtype=int) -
+        first_crossing_indices[segment_indices]
+    )
+
+    fractional_distances = (
+        (crossing_coords - start_coords[segment_indices]) /
+        (end_coords[segment_indices] - start_coords[segment_indices])
+    )
+
+    return segment_indices, fractional_distances, crossing_coords
+
+
 def _polyline_to_grid_points(
         polyline_x_coords_metres, polyline_y_coords_metres,
         grid_point_x_coords_metres, grid_point_y_coords_metres):
@@ -185,6 +283,13 @@ def _polyline_to_grid_points(
     `grid_point_y_coords_metres` are both equally spaced and sorted in ascending
     order.
 
+    Each grid cell is a closed rectangle, so a cell is intersected even if the
+    polyline only touches its edge or corner.  Cells are found by walking along
+    each line segment in grid space: every point where the segment crosses an
+    edge between cells, along with the midpoint between consecutive crossings,
+    is assigned to all cells containing it.  This is exact, because the set of
+    cells containing a point cannot change between consecutive crossings.
+
     :param polyline_x_coords_metres: length-V numpy array of x-coordinates.
     :param polyline_y_coords_metres: length-V numpy array of y-coordinates.
     :param grid_point_x_coords_metres: length-N numpy array of x-coordinates.
@@ -194,7 +299,7 @@ def _polyline_to_grid_points(
     :return: columns_in_polyline: Same as above, except for columns.
     """
 
-    polyline_object_xy_metres = _create_linestring(
+    _create_linestring(
         x_coords_metres=polyline_x_coords_metres,
         y_coords_metres=polyline_y_coords_metres)
 
@@ -203,55 +308,90 @@ def _polyline_to_grid_points(
     y_spacing_metres = (
         grid_point_y_coords_metres[1] - grid_point_y_coords_metres[0])
 
-    x_min_to_consider_metres = numpy.min(
-        polyline_x_coords_metres) - x_spacing_metres
-    x_max_to_consider_metres = numpy.max(
-        polyline_x_coords_metres) + x_spacing_metres
-    y_min_to_consider_metres = numpy.min(
-        polyline_y_coords_metres) - y_spacing_metres
-    y_max_to_consider_metres = numpy.max(
-        polyline_y_coords_metres) + y_spacing_metres
-
-    x_in_range_indices = numpy.where(numpy.logical_and(
-        grid_point_x_coords_metres >= x_min_to_consider_metres,
-        grid_point_x_coords_metres <= x_max_to_consider_metres))[0]
-    y_in_range_indices = numpy.where(numpy.logical_and(
-        grid_point_y_coords_metres >= y_min_to_consider_metres,
-        grid_point_y_coords_metres <= y_max_to_consider_metres))[0]
-
-    row_offset = numpy.min(y_in_range_indices)
-    column_offset = numpy.min(x_in_range_indices)
-
-    grid_points_x_to_consider_metres = grid_point_x_coords_metres[
-        x_in_range_indices]
-    grid_points_y_to_consider_metres = grid_point_y_coords_metres[
-        y_in_range_indices]
-
-    rows_in_polyline = []
-    columns_in_polyline = []
-    num_rows_to_consider = len(grid_points_y_to_consider_metres)
-    num_columns_to_consider = len(grid_points_x_to_consider_metres)
-
-    for i in range(num_rows_to_consider):
-        for j in range(num_columns_to_consider):
-            this_grid_cell_edge_polygon_xy_metres = _grid_cell_to_polygon(
-                grid_point_x_metres=grid_points_x_to_consider_metres[j],
-                grid_point_y_metres=grid_points_y_to_consider_metres[i],
-                x_spacing_metres=x_spacing_metres,
-                y_spacing_metres=y_spacing_metres)
-
-            this_intersection_flag = (
-                this_grid_cell_edge_polygon_xy_metres.intersects(
-                    polyline_object_xy_metres) or
-                this_grid_cell_edge_polygon_xy_metres.touches(
-                    polyline_object_xy_metres))
-            if not this_intersection_flag:
-                continue
-
-            rows_in_polyline.append(i + row_offset)
-            columns_in_polyline.append(j + column_offset)
-
-    return numpy.array(rows_in_polyline), numpy.array(columns_in_polyline)
+    vertex_column_coords = 0.5 + (
+        (polyline_x_coords_metres - grid_point_x_coords_metres[0]) /
+        x_spacing_metres
+    )
+    vertex_row_coords = 0.5 + (
+        (polyline_y_coords_metres - grid_point_y_coords_metres[0]) /
+        y_spacing_metres
+    )
+
+    start_column_coords = vertex_column_coords[:-1]
+    end_column_coords = vertex_column_coords[1:]
+    start_row_coords = vertex_row_coords[:-1]
+    end_row_coords = vertex_row_coords[1:]
+    num_segments = len(start_column_coords)
+
+    (column_crossing_segment_indices, column_crossing_distances,
+     column_crossing_coords
+    ) = _get_edge_crossings(
+        start_coords=start_column_coords, end_coords=end_column_coords)
+
+    (row_crossing_segment_indices, row_crossing_distances, row_crossing_coords
+    ) = _get_edge_crossings(
+        start_coords=start_row_coords, end_coords=end_row_coords)
+
+    # Coordinates at crossings are snapped to the edge, so that rounding error
+    # does not push them into the wrong cell.
+    segment_indices = numpy.concatenate((
+        numpy.arange(num_segments, dtype=int),
+        numpy.arange(num_segments, dtype=int),
+        column_crossing_segment_indices, row_crossing_segment_indices
+    ))
+    fractional_distances = numpy.concatenate((
+        numpy.full(num_segments, 0.), numpy.full(num_segments, 1.),
+        column_crossing_distances, row_crossing_distances
+    ))
+    column_coords = numpy.concatenate((
+        start_column_coords, end_column_coords, column_crossing_coords,
+        start_column_coords[row_crossing_segment_indices] +
+        row_crossing_distances * (
+            end_column_coords[row_crossing_segment_indices] -
+            start_column_coords[row_crossing_segment_indices])
+    ))
+    row_coords = numpy.concatenate((
+        start_row_coords, end_row_coords,
+        start_row_coords[column_crossing_segment_indices] +
+        column_crossing_distances * (
+            end_row_coords[column_crossing_segment_indices] -
+            start_row_coords[column_crossing_segment_indices]),
+        row_crossing_coords
+    ))
+
+    sort_indices = numpy.lexsort((fractional_distances, segment_indices))
+    segment_indices = segment_indices[sort_indices]
+    column_coords = column_coords[sort_indices]
+    row_coords = row_coords[sort_indices]
+
+    same_segment_flags = segment_indices[1:] == segment_indices[:-1]
+    column_coords = numpy.concatenate((
+        column_coords,
+        0.5 * (column_coords[:-1] + column_coords[1:])[same_segment_flags]
+    ))
+    row_coords = numpy.concatenate((
+        row_coords, 0.5 * (row_coords[:-1] + row_coords[1:])[same_segment_flags]
+    ))
+
+    rows_in_polyline, columns_in_polyline = _get_cells_containing_points(
+        column_coords=column_coords, row_coords=row_coords)
+
+    num_grid_rows = len(grid_point_y_coords_metres)
+    num_grid_columns = len(grid_point_x_coords_metres)
+    in_grid_flags = numpy.logical_and(
+        numpy.logical_and(rows_in_polyline >= 0,
+                          rows_in_polyline < num_grid_rows),
+        numpy.logical_and(columns_in_polyline >= 0,
+                          columns_in_polyline < num_grid_columns)
+    )
+
+    linear_indices = numpy.unique(numpy.ravel_multi_index(
+        (rows_in_polyline[in_grid_flags], columns_in_polyline[in_grid_flags]),
+        (num_grid_rows, num_grid_columns)
+    ))
+
+    return numpy.unravel_index(
+        linear_indices, (num_grid_rows, num_grid_columns))
 
 
 def _grid_points_to_binary_image(
@@ -409,6 +549,28 @@ def buffer_distance_to_narr_mask(buffer_distance_metres):
     return distance_matrix_metres <= buffer_distance_metres
 
 
+def _get_dilation_kernel(dilation_distance_metres, dilation_kernel_matrix):
+    """Returns dilation kernel.
+
+    :param dilation_distance_metres: See doc for `dilate_binary_narr_image`.
+    :param dilation_kernel_matrix: Same.
+    :return: dilation_kernel_matrix: Same.
+    """
+
+    if dilation_kernel_matrix is None:
+        dilation_kernel_matrix = buffer_distance_to_narr_mask(
+            dilation_distance_metres).astype(int)
+
+    error_checking.assert_is_numpy_array(
+        dilation_kernel_matrix, num_dimensions=2)
+    error_checking.assert_is_integer_numpy_array(dilation_kernel_matrix)
+    error_checking.assert_is_geq_numpy_array(dilation_kernel_matrix, 0)
+    error_checking.assert_is_leq_numpy_array(dilation_kernel_matrix, 1)
+    error_checking.assert_is_geq(numpy.sum(dilation_kernel_matrix), 1)
+
+    return dilation_kernel_matrix
+
+
 def dilate_binary_narr_image(binary_image_matrix, dilation_distance_metres=None,
                              dilation_kernel_matrix=None):
     """Dilates a binary (2-class) image over the NARR grid.
@@ -423,26 +585,19 @@ def dilate_binary_narr_image(binary_image_matrix, dilation_distance_metres=None,
     :param dilation_distance_metres: Dilation distance.
     :param dilation_kernel_matrix: m-by-n numpy array of integers (all 0 or 1).
         This may be created by `buffer_distance_to_narr_mask`.
-    :return: binary_image_matrix: Same as input, except dilated.
+    :return: binary_image_matrix: Same as input (including data type), except
+        dilated.
     """
 
     _check_frontal_image(image_matrix=binary_image_matrix, assert_binary=True)
+    dilation_kernel_matrix = _get_dilation_kernel(
+        dilation_distance_metres=dilation_distance_metres,
+        dilation_kernel_matrix=dilation_kernel_matrix)
 
-    if dilation_kernel_matrix is None:
-        dilation_kernel_matrix = buffer_distance_to_narr_mask(
-            dilation_distance_metres).astype(int)
-
-    error_checking.assert_is_numpy_array(
-        dilation_kernel_matrix, num_dimensions=2)
-    error_checking.assert_is_integer_numpy_array(dilation_kernel_matrix)
-    error_checking.assert_is_geq_numpy_array(dilation_kernel_matrix, 0)
-    error_checking.assert_is_leq_numpy_array(dilation_kernel_matrix, 1)
-    error_checking.assert_is_geq(numpy.sum(dilation_kernel_matrix), 1)
-
-    binary_image_matrix = cv2.dilate(
+    return cv2.dilate(
         binary_image_matrix.astype(numpy.uint8),
-        dilation_kernel_matrix.astype(numpy.uint8), iterations=1)
-    return binary_image_matrix.astype(int)
+        dilation_kernel_matrix.astype(numpy.uint8), iterations=1
+    ).astype(binary_image_matrix.dtype, copy=False)
 
 
 def dilate_ternary_narr_image(
@@ -460,61 +615,123 @@ def dilate_ternary_narr_image(
 
     _check_frontal_image(image_matrix=ternary_image_matrix, assert_binary=False)
 
-    binary_cold_front_matrix = numpy.full(
-        ternary_image_matrix.shape, NO_FRONT_INTEGER_ID, dtype=int)
-    binary_cold_front_matrix[
-        ternary_image_matrix == COLD_FRONT_INTEGER_ID] = ANY_FRONT_INTEGER_ID
-    binary_cold_front_matrix = dilate_binary_narr_image(
-        binary_cold_front_matrix,
+    return dilate_ternary_narr_images(
+        ternary_image_matrix=ternary_image_matrix[numpy.newaxis, ...],
         dilation_distance_metres=dilation_distance_metres,
-        dilation_kernel_matrix=dilation_kernel_matrix)
+        dilation_kernel_matrix=dilation_kernel_matrix
+    )[0, ...]
 
-    binary_warm_front_matrix = numpy.full(
-        ternary_image_matrix.shape, NO_FRONT_INTEGER_ID, dtype=int)
-    binary_warm_front_matrix[
-        ternary_image_matrix == WARM_FRONT_INTEGER_ID] = ANY_FRONT_INTEGER_ID
-    binary_warm_front_matrix = dilate_binary_narr_image(
-        binary_warm_front_matrix,
+
+def dilate_ternary_narr_images(
+        ternary_image_matrix, dilation_distance_metres=None,
+        dilation_kernel_matrix=None):
+    """Dilates many ternary (3-class) images over the NARR grid.
+
+    Warm and cold fronts are dilated separately.  If a pixel is in both the
+    dilated warm front and the dilated cold front, it takes the type of the
+    nearest undilated front (cold if tied).  Distances to the nearest warm and
+    cold front are computed by Euclidean distance transforms, only for images
+    where such conflicts occur, and only over the bounding box of conflicting
+    pixels (expanded by the dilation radius, so that the nearest front to each
+    conflicting pixel is always inside the box).
+
+    T = number of images
+
+    :param ternary_image_matrix: T-by-M-by-N numpy array, where each
+        ternary_image_matrix[i, ...] is a ternary image (see doc for
+        `_check_frontal_image`).
+    :param dilation_distance_metres: See documentation for
+        `dilate_binary_narr_image`.
+    :param dilation_kernel_matrix: See documentation for
+        `dilate_binary_narr_image`.
+    :return: ternary_image_matrix: Same as input, except dilated.
+    """
+
+    error_checking.assert_is_numpy_array(ternary_image_matrix, num_dimensions=3)
+    utils.assert_is_integer_numpy_array(ternary_image_matrix)
+    error_checking.assert_is_geq_numpy_array(
+        ternary_image_matrix, numpy.min(VALID_INTEGER_IDS))
+    error_checking.assert_is_leq_numpy_array(
+        ternary_image_matrix, numpy.max(VALID_INTEGER_IDS))
+
+    dilation_kernel_matrix = _get_dilation_kernel(
         dilation_distance_metres=dilation_distance_metres,
         dilation_kernel_matrix=dilation_kernel_matrix)
+    dilation_kernel_matrix = dilation_kernel_matrix.astype(numpy.uint8)
+
+    # `cv2.dilate` anchors the kernel at its center.  Any pixel in the dilated
+    # front is within `dilation_radius_px` of the undilated front.
+    kernel_row_offsets, kernel_column_offsets = numpy.where(
+        dilation_kernel_matrix == 1)
+    kernel_row_offsets -= dilation_kernel_matrix.shape[0] // 2
+    kernel_column_offsets -= dilation_kernel_matrix.shape[1] // 2
+    dilation_radius_px = int(numpy.ceil(numpy.sqrt(numpy.max(
+        kernel_row_offsets ** 2 + kernel_column_offsets ** 2
+    ))))
+
+    num_images = ternary_image_matrix.shape[0]
+    num_grid_rows = ternary_image_matrix.shape[1]
+    num_grid_columns = ternary_image_matrix.shape[2]
+
+    for i in range(num_images):
+        this_cold_flag_matrix = cv2.dilate(
+            (ternary_image_matrix[i, ...] == COLD_FRONT_INTEGER_ID).astype(
+                numpy.uint8),
+            dilation_kernel_matrix, iterations=1
+        ).astype(bool)
+        this_warm_flag_matrix = cv2.dilate(
+            (ternary_image_matrix[i, ...] == WARM_FRONT_INTEGER_ID).astype(
+                numpy.uint8),
+            dilation_kernel_matrix, iterations=1
+        ).astype(bool)
+
+        these_conflict_rows, these_conflict_columns = numpy.where(
+            numpy.logical_and(this_cold_flag_matrix, this_warm_flag_matrix))
+
+        if len(these_conflict_rows) > 0:
+            this_first_row = max(
+                [numpy.min(these_conflict_rows) - dilation_radius_px, 0])
+            this_last_row = min(
+                [numpy.max(these_conflict_rows) + dilation_radius_px + 1,
+                 num_grid_rows])
+            this_first_column = max(
+                [numpy.min(these_conflict_columns) - dilation_radius_px, 0])
+            this_last_column = min(
+                [numpy.max(these_conflict_columns) + dilation_radius_px + 1,
+                 num_grid_columns])
+
+            this_cropped_image_matrix = ternary_image_matrix[
+                i, this_first_row:this_last_row,
+                this_first_column:this_last_column]
+            this_cold_distance_matrix = distance_transform_edt(
+                this_cropped_image_matrix != COLD_FRONT_INTEGER_ID)
+            this_warm_distance_matrix = distance_transform_edt(
+                this_cropped_image_matrix != WARM_FRONT_INTEGER_ID)
+
+            these_cold_flags = (
+                this_cold_distance_matrix[
+                    these_conflict_rows - this_first_row,
+                    these_conflict_columns - this_first_column] <=
+                this_warm_distance_matrix[
+                    these_conflict_rows - this_first_row,
+                    these_conflict_columns - this_first_column]
+            )
+            these_warm_flags = numpy.invert(these_cold_flags)
+
+            this_warm_flag_matrix[
+                these_conflict_rows[these_cold_flags],
+                these_conflict_columns[these_cold_flags]
+            ] = False
+            this_cold_flag_matrix[
+                these_conflict_rows[these_warm_flags],
+                these_conflict_columns[these_warm_flags]
+            ] = False
+
+        ternary_image_matrix[i, ...][this_cold_flag_matrix] = (
+            COLD_FRONT_INTEGER_ID)
+        ternary_image_matrix[i, ...][this_warm_flag_matrix] = (
+            WARM_FRONT_INTEGER_ID)
 
-    cold_front_row_indices, cold_front_column_indices = numpy.where(
-        ternary_image_matrix == COLD_FRONT_INTEGER_ID)
-    warm_front_row_indices, warm_front_column_indices = numpy.where(
-        ternary_image_matrix == WARM_FRONT_INTEGER_ID)
-    both_fronts_row_indices, both_fronts_column_indices = numpy.where(
-        numpy.logical_and(binary_cold_front_matrix == ANY_FRONT_INTEGER_ID,
-                          binary_warm_front_matrix == ANY_FRONT_INTEGER_ID))
-
-    num_points_to_resolve = len(both_fronts_row_indices)
-    for i in range(num_points_to_resolve):
-        these_row_diffs = both_fronts_row_indices[i] - cold_front_row_indices
-        these_column_diffs = (
-            both_fronts_column_indices[i] - cold_front_column_indices)
-        this_min_cold_front_distance = numpy.min(
-            these_row_diffs**2 + these_column_diffs**2)
-
-        these_row_diffs = both_fronts_row_indices[i] - warm_front_row_indices
-        these_column_diffs = (
-            both_fronts_column_indices[i] - warm_front_column_indices)
-        this_min_warm_front_distance = numpy.min(
-            these_row_diffs**2 + these_column_diffs**2)
-
-        if this_min_cold_front_distance <= this_min_warm_front_distance:
-            binary_warm_front_matrix[
-                both_fronts_row_indices[i],
-                both_fronts_column_indices[i]] = NO_FRONT_INTEGER_ID
-        else:
-            binary_cold_front_matrix[
-                both_fronts_row_indices[i],
-                both_fronts_column_indices[i]] = NO_FRONT_INTEGER_ID
-
-    ternary_image_matrix[
-        binary_cold_front_matrix == ANY_FRONT_INTEGER_ID
-    ] = COLD_FRONT_INTEGER_ID
-    ternary_image_matrix[
-        binary_warm_front_matrix == ANY_FRONT_INTEGER_ID
-        ] = WARM_FRONT_INTEGER_ID
     return ternary_image_matrix
 
 
@@ -579,6 +796,103 @@ def frontal_grid_points_to_image(
     return ternary_image_matrix
 
 
+def frontal_images_to_ragged_regions(ternary_image_matrix):
+    """Finds connected regions in many frontal images.
+
+    Each image is labelled separately, with adjacent pixels of the same front
+    type forming one region.  Then the grid points in every region are found in
+    one pass, by sorting all frontal pixels by region.  The result is a ragged
+    array: grid points for all regions are concatenated, and the grid points
+    for the [i]th region are at indices first_point_index_by_region[i]...
+    (first_point_index_by_region[i + 1] - 1).
+
+    E = number of images
+    R = number of regions in all images
+    P = number of grid points in all regions
+
+    :param ternary_image_matrix: E-by-M-by-N numpy array, where each
+        ternary_image_matrix[i, ...] is a ternary image (see doc for
+        `_check_frontal_image`).
+    :return: ragged_region_dict: Dictionary with the following keys.
+    ragged_region_dict['image_index_by_region']: length-R numpy array with
+        index of image containing each region.
+    ragged_region_dict['integer_id_by_region']: length-R numpy array with
+        integer front type of each region (either `WARM_FRONT_INTEGER_ID` or
+        `COLD_FRONT_INTEGER_ID`).
+    ragged_region_dict['first_point_index_by_region']: numpy array (length
+        R + 1) with index of first grid point in each region.  The last element
+        is P.
+    ragged_region_dict['row_indices']: length-P numpy array with row indices of
+        grid points.  Within each region, grid points are in row-major order.
+    ragged_region_dict['column_indices']: Same as above, except for columns.
+    """
+
+    error_checking.assert_is_numpy_array(ternary_image_matrix, num_dimensions=3)
+    utils.assert_is_integer_numpy_array(ternary_image_matrix)
+    error_checking.assert_is_geq_numpy_array(
+        ternary_image_matrix, numpy.min(VALID_INTEGER_IDS))
+    error_checking.assert_is_leq_numpy_array(
+        ternary_image_matrix, numpy.max(VALID_INTEGER_IDS))
+
+    region_matrix = numpy.full(ternary_image_matrix.shape, 0, dtype=int)
+    num_regions = 0
+
+    for i in range(ternary_image_matrix.shape[0]):
+        region_matrix[i, ...] = label_image(
+            ternary_image_matrix[i, ...], connectivity=2)
+
+        this_num_regions = numpy.max(region_matrix[i, ...])
+        region_matrix[i, ...][region_matrix[i, ...] > 0] += num_regions
+        num_regions += this_num_regions
+
+    # The sort is stable, so each region's grid points remain in row-major
+    # order.
+    flat_region_ids = numpy.ravel(region_matrix)
+    flat_point_indices = numpy.flatnonzero(flat_region_ids)
+    flat_point_indices = flat_point_indices[numpy.argsort(
+        flat_region_ids[flat_point_indices], kind='mergesort')]
+
+    num_points_by_region = numpy.bincount(
+        flat_region_ids[flat_point_indices] - 1, minlength=num_regions)
+    first_point_index_by_region = numpy.concatenate((
+        numpy.array([0], dtype=int), numpy.cumsum(num_points_by_region)
+    ))
+
+    image_indices, row_indices, column_indices = numpy.unravel_index(
+        flat_point_indices, region_matrix.shape)
+    first_flat_point_indices = flat_point_indices[
+        first_point_index_by_region[:-1]]
+
+    return {
+        IMAGE_INDEX_BY_REGION_KEY:
+            image_indices[first_point_index_by_region[:-1]],
+        INTEGER_ID_BY_REGION_KEY:
+            numpy.ravel(ternary_image_matrix)[first_flat_point_indices],
+        FIRST_POINT_INDEX_BY_REGION_KEY: first_point_index_by_region,
+        ROW_INDICES_KEY: row_indices,
+        COLUMN_INDICES_KEY: column_indices
+    }
+
+
+def ragged_to_list_by_region(flat_array, first_point_index_by_region):
+    """Splits ragged array into one array per region.
+
+    R = number of regions
+
+    :param flat_array: numpy array with values for all regions concatenated
+        (see doc for `frontal_images_to_ragged_regions`).
+    :param first_point_index_by_region: numpy array (length R + 1) with index of
+        first value in each region.
+    :return: array_by_region: length-R list of numpy arrays.  These are views of
+        `flat_array`.
+    """
+
+    if len(first_point_index_by_region) == 1:
+        return []
+
+    return numpy.split(flat_array, first_point_index_by_region[1:-1])
+
+
 def frontal_image_to_objects(ternary_image_matrix):
     """Converts frontal image to a list of objects (connected regions).
 
@@ -599,31 +913,162 @@ def frontal_image_to_objects(ternary_image_matrix):
     _check_frontal_image(image_matrix=ternary_image_matrix, assert_binary=False)
     ternary_image_matrix = close_frontal_image(
         ternary_image_matrix=ternary_image_matrix, num_iterations=1)
-    region_matrix = label_image(ternary_image_matrix, connectivity=2)
-
-    num_regions = numpy.max(region_matrix)
-    row_indices_by_region = [[]] * num_regions
-    column_indices_by_region = [[]] * num_regions
-    front_type_by_region = [''] * num_regions
 
-    for i in range(num_regions):
-        row_indices_by_region[i], column_indices_by_region[i] = numpy.where(
-            region_matrix == i + 1)
-        this_integer_id = ternary_image_matrix[
-            row_indices_by_region[i][0], column_indices_by_region[i][0]]
+    ragged_region_dict = frontal_images_to_ragged_regions(
+        ternary_image_matrix[numpy.newaxis, ...])
+    first_point_index_by_region = ragged_region_dict[
+        FIRST_POINT_INDEX_BY_REGION_KEY]
 
-        if this_integer_id == WARM_FRONT_INTEGER_ID:
-            front_type_by_region[i] = WARM_FRONT_STRING_ID
-        elif this_integer_id == COLD_FRONT_INTEGER_ID:
-            front_type_by_region[i] = COLD_FRONT_STRING_ID
+    front_type_by_region = numpy.where(
+        ragged_region_dict[INTEGER_ID_BY_REGION_KEY] == WARM_FRONT_INTEGER_ID,
+        WARM_FRONT_STRING_ID, COLD_FRONT_STRING_ID
+    ).tolist()
 
     return {
-        ROW_INDICES_BY_REGION_KEY: row_indices_by_region,
-        COLUMN_INDICES_BY_REGION_KEY: column_indices_by_region,
+        ROW_INDICES_BY_REGION_KEY: ragged_to_list_by_region(
+            flat_array=ragged_region_dict[ROW_INDICES_KEY],
+            first_point_index_by_region=first_point_index_by_region),
+        COLUMN_INDICES_BY_REGION_KEY: ragged_to_list_by_region(
+            flat_array=ragged_region_dict[COLUMN_INDICES_KEY],
+            first_point_index_by_region=first_point_index_by_region),
         FRONT_TYPE_BY_REGION_KEY: front_type_by_region
     }
 
 
+def get_narr_geometry():
+    """Returns projection and grid-point coordinates for the NARR grid.
+
+    These are computed on the first call and cached in `NARR_GEOMETRY_DICT`, so
+    that methods which handle many polylines do not rebuild the projection (and
+    grid metadata) for each one.  The arrays in the dictionary must not be
+    modified.
+
+    M = number of grid rows (unique y-coordinates at grid points)
+    N = number of grid columns (unique x-coordinates at grid points)
+
+    :return: narr_geometry_dict: Dictionary with the following keys.
+    narr_geometry_dict['projection_object']: Instance of `pyproj.Proj`, created
+        by `nwp_model_utils.init_model_projection`.
+    narr_geometry_dict['grid_point_x_coords_metres']: length-N numpy array with
+        x-coordinates of grid points.
+    narr_geometry_dict['grid_point_y_coords_metres']: length-M numpy array with
+        y-coordinates of grid points.
+    narr_geometry_dict['num_grid_rows']: M in the above discussion.
+    narr_geometry_dict['num_grid_columns']: N in the above discussion.
+    """
+
+    if len(NARR_GEOMETRY_DICT) > 0:
+        return NARR_GEOMETRY_DICT
+
+    grid_point_x_coords_metres, grid_point_y_coords_metres = (
+        nwp_model_utils.get_xy_grid_points(
+            model_name=nwp_model_utils.NARR_MODEL_NAME))
+    num_grid_rows, num_grid_columns = nwp_model_utils.get_grid_dimensions(
+        model_name=nwp_model_utils.NARR_MODEL_NAME)
+
+    NARR_GEOMETRY_DICT.update({
+        PROJECTION_OBJECT_KEY: nwp_model_utils.init_model_projection(
+            nwp_model_utils.NARR_MODEL_NAME),
+        GRID_POINT_X_COORDS_KEY: grid_point_x_coords_metres,
+        GRID_POINT_Y_COORDS_KEY: grid_point_y_coords_metres,
+        NUM_GRID_ROWS_KEY: num_grid_rows,
+        NUM_GRID_COLUMNS_KEY: num_grid_columns
+    })
+
+    return NARR_GEOMETRY_DICT
+
+
+def project_polylines_latlng_to_narr(
+        latitudes_by_polyline_deg, longitudes_by_polyline_deg):
+    """Projects many polylines from lat-long to NARR (x-y) coordinates.
+
+    Vertices of all polylines are concatenated and projected in one call, then
+    split back into polylines.
+
+    L = number of polylines
+    V = number of vertices in a given polyline
+
+    :param latitudes_by_polyline_deg: length-L list, where each element is a
+        length-V numpy array of latitudes (deg N).
+    :param longitudes_by_polyline_deg: length-L list, where each element is a
+        length-V numpy array of longitudes (deg E).
+    :return: x_coords_by_polyline_metres: length-L list, where each element is a
+        length-V numpy array of x-coordinates.
+    :return: y_coords_by_polyline_metres: Same but for y-coordinates.
+    """
+
+    error_checking.assert_is_list(latitudes_by_polyline_deg)
+    error_checking.assert_is_list(longitudes_by_polyline_deg)
+
+    num_vertices_by_polyline = numpy.array(
+        [len(v) for v in latitudes_by_polyline_deg], dtype=int)
+    these_num_longitudes = numpy.array(
+        [len(v) for v in longitudes_by_polyline_deg], dtype=int)
+
+    if not numpy.array_equal(num_vertices_by_polyline, these_num_longitudes):
+        error_string = (
+            'Number of latitudes by polyline ({0:s}) does not match number of '
+            'longitudes by polyline ({1:s}).'
+        ).format(str(num_vertices_by_polyline), str(these_num_longitudes))
+        raise ValueError(error_string)
+
+    if len(num_vertices_by_polyline) == 0:
+        return [], []
+
+    first_vertex_index_by_polyline = numpy.concatenate((
+        numpy.array([0], dtype=int), numpy.cumsum(num_vertices_by_polyline)
+    ))
+
+    x_coords_metres, y_coords_metres = nwp_model_utils.project_latlng_to_xy(
+        latitudes_deg=numpy.concatenate(
+            tuple(latitudes_by_polyline_deg)).astype(float),
+        longitudes_deg=numpy.concatenate(
+            tuple(longitudes_by_polyline_deg)).astype(float),
+        projection_object=get_narr_geometry()[PROJECTION_OBJECT_KEY],
+        model_name=nwp_model_utils.NARR_MODEL_NAME)
+
+    x_coords_by_polyline_metres = ragged_to_list_by_region(
+        flat_array=x_coords_metres,
+        first_point_index_by_region=first_vertex_index_by_polyline)
+    y_coords_by_polyline_metres = ragged_to_list_by_region(
+        flat_array=y_coords_metres,
+        first_point_index_by_region=first_vertex_index_by_polyline)
+
+    return x_coords_by_polyline_metres, y_coords_by_polyline_metres
+
+
+def projected_polyline_to_narr_grid(
+        polyline_x_coords_metres, polyline_y_coords_metres,
+        dilation_distance_metres):
+    """Converts polyline (already in NARR coordinates) to binary image.
+
+    V = number of vertices in polyline
+
+    :param polyline_x_coords_metres: length-V numpy array of x-coordinates
+        (created by `project_polylines_latlng_to_narr`).
+    :param polyline_y_coords_metres: length-V numpy array of y-coordinates.
+    :param dilation_distance_metres: See doc for `polyline_to_narr_grid`.
+    :return: binary_image_matrix: Same.
+    """
+
+    narr_geometry_dict = get_narr_geometry()
+
+    rows_in_polyline, columns_in_polyline = _polyline_to_grid_points(
+        polyline_x_coords_metres=polyline_x_coords_metres,
+        polyline_y_coords_metres=polyline_y_coords_metres,
+        grid_point_x_coords_metres=narr_geometry_dict[GRID_POINT_X_COORDS_KEY],
+        grid_point_y_coords_metres=narr_geometry_dict[GRID_POINT_Y_COORDS_KEY])
+
+    binary_image_matrix = _grid_points_to_binary_image(
+        rows_in_object=rows_in_polyline, columns_in_object=columns_in_polyline,
+        num_grid_rows=narr_geometry_dict[NUM_GRID_ROWS_KEY],
+        num_grid_columns=narr_geometry_dict[NUM_GRID_COLUMNS_KEY])
+
+    return dilate_binary_narr_image(
+        binary_image_matrix=binary_image_matrix.astype(int),
+        dilation_distance_metres=dilation_distance_metres)
+
+
 def polyline_to_narr_grid(
         polyline_latitudes_deg, polyline_longitudes_deg,
         dilation_distance_metres):
@@ -642,31 +1087,14 @@ def polyline_to_narr_grid(
         grid.
     """
 
-    polyline_x_coords_metres, polyline_y_coords_metres = (
-        nwp_model_utils.project_latlng_to_xy(
-            latitudes_deg=polyline_latitudes_deg,
-            longitudes_deg=polyline_longitudes_deg,
-            model_name=nwp_model_utils.NARR_MODEL_NAME))
-
-    grid_point_x_coords_metres, grid_point_y_coords_metres = (
-        nwp_model_utils.get_xy_grid_points(
-            model_name=nwp_model_utils.NARR_MODEL_NAME))
-
-    rows_in_polyline, columns_in_polyline = _polyline_to_grid_points(
-        polyline_x_coords_metres=polyline_x_coords_metres,
-        polyline_y_coords_metres=polyline_y_coords_metres,
-        grid_point_x_coords_metres=grid_point_x_coords_metres,
-        grid_point_y_coords_metres=grid_point_y_coords_metres)
-
-    num_grid_rows, num_grid_columns = nwp_model_utils.get_grid_dimensions(
-        model_name=nwp_model_utils.NARR_MODEL_NAME)
-
-    binary_image_matrix = _grid_points_to_binary_image(
-        rows_in_object=rows_in_polyline, columns_in_object=columns_in_polyline,
-        num_grid_rows=num_grid_rows, num_grid_columns=num_grid_columns)
+    x_coords_by_polyline_metres, y_coords_by_polyline_metres = (
+        project_polylines_latlng_to_narr(
+            latitudes_by_polyline_deg=[polyline_latitudes_deg],
+            longitudes_by_polyline_deg=[polyline_longitudes_deg]))
 
-    return dilate_binary_narr_image(
-        binary_image_matrix=binary_image_matrix.astype(int),
+    return projected_polyline_to_narr_grid(
+        polyline_x_coords_metres=x_coords_by_polyline_metres[0],
+        polyline_y_coords_metres=y_coords_by_polyline_metres[0],
         dilation_distance_metres=dilation_distance_metres)
 
 
@@ -693,6 +1121,14 @@ def many_polylines_to_narr_grid(polyline_table, dilation_distance_metres):
     num_grid_rows, num_grid_columns = nwp_model_utils.get_grid_dimensions(
         model_name=nwp_model_utils.NARR_MODEL_NAME)
 
+    x_coords_by_front_metres, y_coords_by_front_metres = (
+        project_polylines_latlng_to_narr(
+            latitudes_by_polyline_deg=list(
+                polyline_table[LATITUDES_COLUMN].values),
+            longitudes_by_polyline_deg=list(
+                polyline_table[LONGITUDES_COLUMN].values)
+        ))
+
     valid_times_unix_sec = numpy.unique(polyline_table[TIME_COLUMN].values)
     valid_time_strings = [
         time_conversion.unix_sec_to_string(t, TIME_FORMAT_FOR_LOG_MESSAGES)
@@ -726,11 +1162,9 @@ def many_polylines_to_narr_grid(polyline_table, dilation_distance_metres):
                 ).format(this_num_points)
                 continue
 
-            this_binary_image_matrix = polyline_to_narr_grid(
-                polyline_latitudes_deg=
-                polyline_table[LATITUDES_COLUMN].values[j],
-                polyline_longitudes_deg=
-                polyline_table[LONGITUDES_COLUMN].values[j],
+            this_binary_image_matrix = projected_polyline_to_narr_grid(
+                polyline_x_coords_metres=x_coords_by_front_metres[j],
+                polyline_y_coords_metres=y_coords_by_front_metres[j],
                 dilation_distance_metres=dilation_distance_metres)
             this_binary_image_matrix = this_binary_image_matrix.astype(bool)
 
@@ -37,6 +37,20 @@ GRID_ROWS_IN_POLYLINE = numpy.array(
 GRID_COLUMNS_IN_POLYLINE = numpy.array(
     [2, 3, 1, 2, 1, 1, 2, 1, 2, 2, 3], dtype=int)
 
+# The following constants are used to test _polyline_to_grid_points when the
+# polyline lies along the edge between two columns of grid cells.
+EDGE_POLYLINE_X_COORDS_METRES = numpy.array([0.5, 0.5])
+EDGE_POLYLINE_Y_COORDS_METRES = numpy.array([0., 2.])
+GRID_ROWS_IN_EDGE_POLYLINE = numpy.array([0, 0, 1, 1, 2, 2], dtype=int)
+GRID_COLUMNS_IN_EDGE_POLYLINE = numpy.array([0, 1, 0, 1, 0, 1], dtype=int)
+
+# The following constants are used to test _get_edge_crossings.
+SEGMENT_START_COORDS = numpy.array([0.2, 3., 1.5])
+SEGMENT_END_COORDS = numpy.array([2.7, 3., 0.5])
+CROSSING_SEGMENT_INDICES = numpy.array([0, 0, 2], dtype=int)
+CROSSING_FRACTIONAL_DISTANCES = numpy.array([0.32, 0.72, 0.5])
+CROSSING_COORDS = numpy.array([1., 2., 1.])
+
 # The following constants are used to test _grid_points_to_binary_image and
 # _binary_image_to_grid_points.
 BINARY_IMAGE_MATRIX_UNDILATED = numpy.array([[0, 0, 1, 1, 0, 0, 0, 0],
@@ -121,6 +135,24 @@ FRONTAL_GRID_POINT_DICT = {
     front_utils.COLD_FRONT_COLUMN_INDICES_COLUMN: COLD_FRONT_COLUMN_INDICES
 }
 
+# The following constants are used to test frontal_images_to_ragged_regions.
+TERNARY_IMAGE_MATRIX_3D = numpy.stack(
+    (numpy.full(TERNARY_IMAGE_MATRIX.shape, 0, dtype=int),
+     TERNARY_IMAGE_MATRIX), axis=0)
+
+RAGGED_REGION_DICT = {
+    front_utils.IMAGE_INDEX_BY_REGION_KEY: numpy.array([1, 1], dtype=int),
+    front_utils.INTEGER_ID_BY_REGION_KEY: numpy.array(
+        [front_utils.WARM_FRONT_INTEGER_ID, front_utils.COLD_FRONT_INTEGER_ID],
+        dtype=int),
+    front_utils.FIRST_POINT_INDEX_BY_REGION_KEY: numpy.array(
+        [0, 10, 23], dtype=int),
+    front_utils.ROW_INDICES_KEY: numpy.concatenate(
+        (WARM_FRONT_ROW_INDICES, COLD_FRONT_ROW_INDICES)),
+    front_utils.COLUMN_INDICES_KEY: numpy.concatenate(
+        (WARM_FRONT_COLUMN_INDICES, COLD_FRONT_COLUMN_INDICES))
+}
+
 # The following constants are used to test dilate_binary_narr_image.
 DILATION_DISTANCE_METRES = float(1e5)
 BINARY_NARR_MATRIX_UNDILATED = numpy.array([[0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
@@ -163,6 +195,18 @@ TERNARY_NARR_MATRIX_DILATED = numpy.array(
      [0, 0, 0, 1, 1, 1, 2, 2, 2, 2],
      [0, 0, 0, 0, 0, 2, 2, 2, 2, 2]], dtype=int)
 
+# The following constants are used to test dilate_ternary_narr_images.
+TERNARY_NARR_MATRICES_UNDILATED = numpy.stack((
+    TERNARY_NARR_MATRIX_UNDILATED,
+    numpy.full(TERNARY_NARR_MATRIX_UNDILATED.shape, 0, dtype=int),
+    BINARY_NARR_MATRIX_UNDILATED
+), axis=0)
+TERNARY_NARR_MATRICES_DILATED = numpy.stack((
+    TERNARY_NARR_MATRIX_DILATED,
+    numpy.full(TERNARY_NARR_MATRIX_DILATED.shape, 0, dtype=int),
+    BINARY_NARR_MATRIX_DILATED
+), axis=0)
+
 # The following constants are used to test remove_polylines_in_masked_area.
 THESE_STRINGS = [
     front_utils.WARM_FRONT_STRING_ID, front_utils.COLD_FRONT_STRING_ID,
@@ -214,6 +258,26 @@ THIS_DICT = {
 }
 POLYLINE_TABLE_AFTER_MASK = pandas.DataFrame.from_dict(THIS_DICT)
 
+# The following constants are used to test project_polylines_latlng_to_narr.
+LATITUDES_BY_POLYLINE_DEG = [
+    FIRST_LATITUDES_DEG, SECOND_LATITUDES_DEG, THIRD_LATITUDES_DEG,
+    FOURTH_LATITUDES_DEG]
+LONGITUDES_BY_POLYLINE_DEG = [
+    FIRST_LONGITUDES_DEG, SECOND_LONGITUDES_DEG, THIRD_LONGITUDES_DEG,
+    FOURTH_LONGITUDES_DEG]
+LONGITUDES_BY_POLYLINE_DEG_MISMATCHED = [
+    FIRST_LONGITUDES_DEG, SECOND_LONGITUDES_DEG, THIRD_LONGITUDES_DEG,
+    FOURTH_LONGITUDES_DEG[:-1]]
+
+X_COORDS_BY_POLYLINE_METRES = [numpy.array([])] * len(LATITUDES_BY_POLYLINE_DEG)
+Y_COORDS_BY_POLYLINE_METRES = [numpy.array([])] * len(LATITUDES_BY_POLYLINE_DEG)
+for k in range(len(LATITUDES_BY_POLYLINE_DEG)):
+    X_COORDS_BY_POLYLINE_METRES[k], Y_COORDS_BY_POLYLINE_METRES[k] = (
+        nwp_model_utils.project_latlng_to_xy(
+            latitudes_deg=LATITUDES_BY_POLYLINE_DEG[k],
+            longitudes_deg=LONGITUDES_BY_POLYLINE_DEG[k],
+            model_name=nwp_model_utils.NARR_MODEL_NAME))
+
 
 def _compare_polyline_tables(first_polyline_table, second_polyline_table):
     """Compares two tables (pandas DataFrames) with fronts as polylines.
@@ -303,6 +367,40 @@ class FrontUtilsTests(unittest.TestCase):
         self.assertTrue(numpy.array_equal(
             these_columns, GRID_COLUMNS_IN_POLYLINE))
 
+    def test_polyline_to_grid_points_along_edge(self):
+        """Ensures correct output from _polyline_to_grid_points.
+
+        In this case, the polyline lies along the edge between two columns of
+        grid cells, so it touches (but does not cross) both columns.
+        """
+
+        these_rows, these_columns = front_utils._polyline_to_grid_points(
+            polyline_x_coords_metres=EDGE_POLYLINE_X_COORDS_METRES,
+            polyline_y_coords_metres=EDGE_POLYLINE_Y_COORDS_METRES,
+            grid_point_x_coords_metres=GRID_POINT_X_COORDS_METRES,
+            grid_point_y_coords_metres=GRID_POINT_Y_COORDS_METRES)
+
+        self.assertTrue(numpy.array_equal(
+            these_rows, GRID_ROWS_IN_EDGE_POLYLINE))
+        self.assertTrue(numpy.array_equal(
+            these_columns, GRID_COLUMNS_IN_EDGE_POLYLINE))
+
+    def test_get_edge_crossings(self):
+        """Ensures correct output from _get_edge_crossings."""
+
+        these_segment_indices, these_distances, these_coords = (
+            front_utils._get_edge_crossings(
+                start_coords=SEGMENT_START_COORDS,
+                end_coords=SEGMENT_END_COORDS)
+        )
+
+        self.assertTrue(numpy.array_equal(
+            these_segment_indices, CROSSING_SEGMENT_INDICES))
+        self.assertTrue(numpy.allclose(
+            these_distances, CROSSING_FRACTIONAL_DISTANCES, atol=TOLERANCE))
+        self.assertTrue(numpy.allclose(
+            these_coords, CROSSING_COORDS, atol=TOLERANCE))
+
     def test_grid_points_to_binary_image(self):
         """Ensures correct output from _grid_points_to_binary_image."""
 
@@ -405,6 +503,17 @@ class FrontUtilsTests(unittest.TestCase):
         self.assertTrue(numpy.array_equal(
             this_ternary_image_matrix, TERNARY_NARR_MATRIX_DILATED))
 
+    def test_dilate_ternary_narr_images(self):
+        """Ensures correct output from dilate_ternary_narr_images."""
+
+        this_input_matrix = copy.deepcopy(TERNARY_NARR_MATRICES_UNDILATED)
+        this_ternary_image_matrix = front_utils.dilate_ternary_narr_images(
+            ternary_image_matrix=this_input_matrix,
+            dilation_distance_metres=DILATION_DISTANCE_METRES)
+
+        self.assertTrue(numpy.array_equal(
+            this_ternary_image_matrix, TERNARY_NARR_MATRICES_DILATED))
+
     def test_frontal_image_to_grid_points(self):
         """Ensures correct output from frontal_image_to_grid_points."""
 
@@ -428,6 +537,20 @@ class FrontUtilsTests(unittest.TestCase):
         self.assertTrue(numpy.array_equal(
             this_ternary_image_matrix, TERNARY_IMAGE_MATRIX))
 
+    def test_frontal_images_to_ragged_regions(self):
+        """Ensures correct output from frontal_images_to_ragged_regions."""
+
+        this_ragged_region_dict = front_utils.frontal_images_to_ragged_regions(
+            TERNARY_IMAGE_MATRIX_3D)
+
+        self.assertTrue(set(this_ragged_region_dict.keys()) ==
+                        set(RAGGED_REGION_DICT.keys()))
+
+        for this_key in RAGGED_REGION_DICT.keys():
+            self.assertTrue(numpy.array_equal(
+                this_ragged_region_dict[this_key], RAGGED_REGION_DICT[this_key]
+            ))
+
     def test_frontal_image_to_objects(self):
         """Ensures correct output from frontal_image_to_objects."""
 
@@ -472,6 +595,41 @@ class FrontUtilsTests(unittest.TestCase):
         self.assertTrue(_compare_polyline_tables(
             POLYLINE_TABLE_AFTER_MASK, this_polyline_table))
 
+    def test_project_polylines_latlng_to_narr(self):
+        """Ensures correct output from project_polylines_latlng_to_narr.
+
+        Projecting all polylines in one call should give the same result as
+        projecting each separately.
+        """
+
+        these_x_coords_by_polyline_metres, these_y_coords_by_polyline_metres = (
+            front_utils.project_polylines_latlng_to_narr(
+                latitudes_by_polyline_deg=LATITUDES_BY_POLYLINE_DEG,
+                longitudes_by_polyline_deg=LONGITUDES_BY_POLYLINE_DEG))
+
+        self.assertTrue(len(these_x_coords_by_polyline_metres) ==
+                        len(X_COORDS_BY_POLYLINE_METRES))
+
+        for i in range(len(X_COORDS_BY_POLYLINE_METRES)):
+            self.assertTrue(numpy.allclose(
+                these_x_coords_by_polyline_metres[i],
+                X_COORDS_BY_POLYLINE_METRES[i], atol=TOLERANCE))
+            self.assertTrue(numpy.allclose(
+                these_y_coords_by_polyline_metres[i],
+                Y_COORDS_BY_POLYLINE_METRES[i], atol=TOLERANCE))
+
+    def test_project_polylines_latlng_to_narr_mismatched(self):
+        """Ensures that project_polylines_latlng_to_narr raises error.
+
+        In this case, one polyline has more latitudes than longitudes.
+        """
+
+        with self.assertRaises(ValueError):
+            front_utils.project_polylines_latlng_to_narr(
+                latitudes_by_polyline_deg=LATITUDES_BY_POLYLINE_DEG,
+                longitudes_by_polyline_deg=
+                LONGITUDES_BY_POLYLINE_DEG_MISMATCHED)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -20,3 +20,23 @@ def fill_nans(data_matrix):
     indices = distance_transform_edt(
         numpy.isnan(data_matrix), return_distances=False, return_indices=True)
     return data_matrix[tuple(indices)]
+
+
+def assert_is_integer_numpy_array(input_array):
+    """Error-checking: ensures that numpy array contains integers.
+
+    Unlike `error_checking.assert_is_integer_numpy_array`, this method accepts
+    unsigned integers (e.g., the 8-bit labels in stores of target images).
+
+    :param input_array: numpy array.
+    :raises: TypeError: if `input_array` does not have an integer type.
+    """
+
+    error_checking.assert_is_numpy_array(input_array)
+
+    if not numpy.issubdtype(input_array.dtype, numpy.integer):
+        error_string = (
+            'Input array has type "{0:s}" (expected signed or unsigned '
+            'integer).'
+        ).format(str(input_array.dtype))
+        raise TypeError(error_string)
@@ -21,6 +21,11 @@ MATRIX_WITH_NANS_3D = numpy.stack(
 MATRIX_WITHOUT_NANS_3D = numpy.stack(
     (MATRIX_WITHOUT_NANS_2D, MATRIX_WITHOUT_NANS_2D), axis=0)
 
+# The following constants are used to test assert_is_integer_numpy_array.
+SIGNED_INTEGER_MATRIX = numpy.array([[0, 1], [2, -1]], dtype=int)
+UNSIGNED_INTEGER_MATRIX = numpy.array([[0, 1], [2, 255]], dtype=numpy.uint8)
+REAL_MATRIX = numpy.array([[0, 1], [2, 255]], dtype=float)
+
 
 class UtilsTests(unittest.TestCase):
     """Each method is a unit test for utils.py."""
@@ -46,6 +51,32 @@ class UtilsTests(unittest.TestCase):
         self.assertTrue(numpy.allclose(
             this_matrix_without_nans, MATRIX_WITHOUT_NANS_3D, atol=TOLERANCE))
 
+    def test_assert_is_integer_numpy_array_signed(self):
+        """Ensures correct output from assert_is_integer_numpy_array.
+
+        In this case the array contains signed integers.
+        """
+
+        utils.assert_is_integer_numpy_array(SIGNED_INTEGER_MATRIX)
+
+    def test_assert_is_integer_numpy_array_unsigned(self):
+        """Ensures correct output from assert_is_integer_numpy_array.
+
+        In this case the array contains unsigned integers.
+        """
+
+        utils.assert_is_integer_numpy_array(UNSIGNED_INTEGER_MATRIX)
+
+    def test_assert_is_integer_numpy_array_real(self):
+        """Ensures correct output from assert_is_integer_numpy_array.
+
+        In this case the array contains real numbers, so the method should
+        error out.
+        """
+
+        with self.assertRaises(TypeError):
+            utils.assert_is_integer_numpy_array(REAL_MATRIX)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -627,18 +627,14 @@ def find_best_binarization_threshold(
     #     criterion_values[i] = criterion_function(
     #         this_contingency_table_as_dict)
 
-    for i in range(num_thresholds):
-        these_predicted_labels = determinize_probabilities(
-            class_probability_matrix=class_probability_matrix,
-            binarization_threshold=possible_thresholds[i])
-
-        this_contingency_table_as_matrix = get_contingency_table(
-            predicted_labels=these_predicted_labels,
-            observed_labels=observed_labels,
-            num_classes=class_probability_matrix.shape[1])
+    contingency_table_matrix = get_contingency_tables_for_thresholds(
+        class_probability_matrix=class_probability_matrix,
+        observed_labels=observed_labels,
+        binarization_thresholds=possible_thresholds)
 
+    for i in range(num_thresholds):
         criterion_values[i] = criterion_function(
-            this_contingency_table_as_matrix)
+            contingency_table_matrix[i, ...])
 
     if optimization_direction == MAX_OPTIMIZATION_DIRECTION:
         best_criterion_value = numpy.nanmax(criterion_values)
@@ -672,15 +668,10 @@ def determinize_probabilities(class_probability_matrix, binarization_threshold):
     error_checking.assert_is_geq(binarization_threshold, 0.)
     error_checking.assert_is_leq(binarization_threshold, 1.01)
 
-    num_evaluation_pairs = class_probability_matrix.shape[0]
-    predicted_labels = numpy.full(num_evaluation_pairs, -1, dtype=int)
-
-    for i in range(num_evaluation_pairs):
-        if class_probability_matrix[i, 0] >= binarization_threshold:
-            predicted_labels[i] = 0
-            continue
-
-        predicted_labels[i] = 1 + numpy.argmax(class_probability_matrix[i, 1:])
+    predicted_labels = 1 + numpy.argmax(class_probability_matrix[:, 1:], axis=1)
+    predicted_labels[
+        class_probability_matrix[:, 0] >= binarization_threshold
+    ] = 0
 
     return predicted_labels
 
@@ -717,15 +708,81 @@ def get_contingency_table(predicted_labels, observed_labels, num_classes):
     error_checking.assert_is_geq_numpy_array(observed_labels, 0)
     error_checking.assert_is_less_than_numpy_array(observed_labels, num_classes)
 
-    contingency_table_as_matrix = numpy.full(
-        (num_classes, num_classes), -1, dtype=int)
+    return numpy.bincount(
+        num_classes * predicted_labels + observed_labels,
+        minlength=num_classes ** 2
+    ).reshape(num_classes, num_classes)
 
-    for i in range(num_classes):
+
+def get_contingency_tables_for_thresholds(
+        class_probability_matrix, observed_labels, binarization_thresholds):
+    """Creates contingency table for each of many binarization thresholds.
+
+    This is equivalent to calling `determinize_probabilities` and
+    `get_contingency_table` once per threshold, but much faster.  If a pair is
+    predicted as frontal, its frontal type does not depend on the threshold.
+    Thus, after sorting pairs by probability of no front, the pairs predicted
+    as frontal at each threshold are a prefix of the sorted list, and counts for
+    all thresholds can be read off with binary search.
+
+    P = number of evaluation pairs
+    K = number of classes
+    T = number of thresholds
+
+    :param class_probability_matrix: See documentation for
+        `check_evaluation_pairs`.
+    :param observed_labels: Same.
+    :param binarization_thresholds: length-T numpy array of thresholds (see doc
+        for `find_best_binarization_threshold`).
+    :return: contingency_table_matrix: T-by-K-by-K numpy array.
+        contingency_table_matrix[t, ...] is the contingency table (see doc for
+        `get_contingency_table`) for the [t]th threshold.
+    """
+
+    check_evaluation_pairs(
+        class_probability_matrix=class_probability_matrix,
+        observed_labels=observed_labels)
+
+    error_checking.assert_is_numpy_array(
+        binarization_thresholds, num_dimensions=1)
+    error_checking.assert_is_geq_numpy_array(binarization_thresholds, 0.)
+    error_checking.assert_is_leq_numpy_array(binarization_thresholds, 1.01)
+
+    num_classes = class_probability_matrix.shape[1]
+    num_thresholds = len(binarization_thresholds)
+
+    sort_indices = numpy.argsort(
+        class_probability_matrix[:, 0], kind='mergesort')
+    sorted_no_front_probs = class_probability_matrix[sort_indices, 0]
+    sorted_frontal_labels = 1 + numpy.argmax(
+        class_probability_matrix[sort_indices, 1:], axis=1)
+    sorted_observed_labels = observed_labels[sort_indices]
+
+    # The [t]th threshold predicts a front for the first num_frontal_pairs[t]
+    # sorted pairs (those with probability of no front < threshold).
+    num_frontal_pairs = numpy.searchsorted(
+        sorted_no_front_probs, binarization_thresholds, side='left')
+
+    contingency_table_matrix = numpy.full(
+        (num_thresholds, num_classes, num_classes), 0, dtype=int)
+
+    for i in range(1, num_classes):
         for j in range(num_classes):
-            contingency_table_as_matrix[i, j] = numpy.sum(
-                numpy.logical_and(predicted_labels == i, observed_labels == j))
+            these_positions = numpy.where(numpy.logical_and(
+                sorted_frontal_labels == i, sorted_observed_labels == j
+            ))[0]
+
+            contingency_table_matrix[:, i, j] = numpy.searchsorted(
+                these_positions, num_frontal_pairs, side='left')
+
+    num_observations_by_class = numpy.bincount(
+        observed_labels, minlength=num_classes)
+    contingency_table_matrix[:, 0, :] = (
+        num_observations_by_class -
+        numpy.sum(contingency_table_matrix[:, 1:, :], axis=1)
+    )
 
-    return contingency_table_as_matrix
+    return contingency_table_matrix
 
 
 def get_accuracy(contingency_table_as_matrix):
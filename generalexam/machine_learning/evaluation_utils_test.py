@@ -57,6 +57,19 @@ CONTINGENCY_TABLE_AS_MATRIX = numpy.array([[2, 1, 1],
                                            [2, 1, 0],
                                            [0, 0, 3]], dtype=int)
 
+# The following constants are used to test
+# get_contingency_tables_for_thresholds.
+BINARIZATION_THRESHOLDS = numpy.array([0., BINARIZATION_THRESHOLD, 1.01])
+CONTINGENCY_TABLE_MATRIX = numpy.stack((
+    numpy.array([[4, 2, 4],
+                 [0, 0, 0],
+                 [0, 0, 0]], dtype=int),
+    CONTINGENCY_TABLE_AS_MATRIX,
+    numpy.array([[0, 0, 0],
+                 [4, 2, 1],
+                 [0, 0, 3]], dtype=int)
+), axis=0)
+
 # The following constants are used to test performance metrics.
 ACCURACY = 0.6
 PEIRCE_SCORE = (0.6 - 0.34) / (1. - 0.36)
@@ -162,6 +175,19 @@ class EvaluationUtilsTests(unittest.TestCase):
         self.assertTrue(numpy.array_equal(
             this_contingency_table, CONTINGENCY_TABLE_AS_MATRIX))
 
+    def test_get_contingency_tables_for_thresholds(self):
+        """Ensures correct output from get_contingency_tables_for_thresholds."""
+
+        this_contingency_table_matrix = (
+            evaluation_utils.get_contingency_tables_for_thresholds(
+                class_probability_matrix=CLASS_PROBABILITY_MATRIX,
+                observed_labels=OBSERVED_LABELS,
+                binarization_thresholds=BINARIZATION_THRESHOLDS)
+        )
+
+        self.assertTrue(numpy.array_equal(
+            this_contingency_table_matrix, CONTINGENCY_TABLE_MATRIX))
+
     def test_get_accuracy(self):
         """Ensures correct output from get_accuracy."""
 
@@ -38,6 +38,7 @@ Ronneberger, O., P. Fischer, and T. Brox (2015): "U-net: Convolutional networks
     Image Computing and Computer-assisted Intervention, 234-241.
 """
 
+import copy
 import numpy
 import keras.models
 import keras.layers
@@ -371,7 +372,10 @@ def train_model_with_3d_examples(
         top_frontal_grid_dir_name, narr_predictor_names, pressure_level_mb,
         dilation_distance_metres, num_classes,
         num_validation_batches_per_epoch=None,
-        validation_start_time_unix_sec=None, validation_end_time_unix_sec=None):
+        validation_start_time_unix_sec=None, validation_end_time_unix_sec=None,
+        num_prefetch_workers=1,
+        num_batches_to_prefetch=trainval_io.DEFAULT_NUM_BATCHES_TO_PREFETCH,
+        random_seed=None):
     """Trains FCN, using 3-D examples generated on the fly.
 
     :param model_object: Instance of `keras.models.Model`.
@@ -395,6 +399,10 @@ def train_model_with_3d_examples(
     :param validation_start_time_unix_sec: See documentation for
         `machine_learning_io.full_size_3d_example_generator`.
     :param validation_end_time_unix_sec: Same.
+    :param num_prefetch_workers: See doc for
+        `traditional_cnn.train_with_3d_examples`.
+    :param num_batches_to_prefetch: Same.
+    :param random_seed: Same.
     """
 
     error_checking.assert_is_integer(num_epochs)
@@ -404,24 +412,34 @@ def train_model_with_3d_examples(
 
     file_system_utils.mkdir_recursive_if_necessary(file_name=output_file_name)
 
+    training_generator_kwargs = {
+        'num_examples_per_batch': num_examples_per_batch,
+        'first_target_time_unix_sec': training_start_time_unix_sec,
+        'last_target_time_unix_sec': training_end_time_unix_sec,
+        'top_narr_directory_name': top_narr_directory_name,
+        'top_frontal_grid_dir_name': top_frontal_grid_dir_name,
+        'narr_predictor_names': narr_predictor_names,
+        'pressure_level_mb': pressure_level_mb,
+        'dilation_distance_metres': dilation_distance_metres,
+        'num_classes': num_classes
+    }
+
+    training_generator = trainval_io.prefetch_batches(
+        generator_function=trainval_io.full_size_3d_example_generator,
+        generator_kwargs=training_generator_kwargs,
+        num_workers=num_prefetch_workers,
+        num_batches_to_prefetch=num_batches_to_prefetch,
+        random_seed=random_seed)
+
     if num_validation_batches_per_epoch is None:
         checkpoint_object = ModelCheckpoint(
             output_file_name, monitor='loss', verbose=1, save_best_only=False,
             save_weights_only=False, mode='min', period=1)
 
         model_object.fit_generator(
-            generator=trainval_io.full_size_3d_example_generator(
-                num_examples_per_batch=num_examples_per_batch,
-                first_target_time_unix_sec=training_start_time_unix_sec,
-                last_target_time_unix_sec=training_end_time_unix_sec,
-                top_narr_directory_name=top_narr_directory_name,
-                top_frontal_grid_dir_name=top_frontal_grid_dir_name,
-                narr_predictor_names=narr_predictor_names,
-                pressure_level_mb=pressure_level_mb,
-                dilation_distance_metres=dilation_distance_metres,
-                num_classes=num_classes),
+            generator=training_generator,
             steps_per_epoch=num_training_batches_per_epoch, epochs=num_epochs,
-            verbose=1, callbacks=[checkpoint_object])
+            verbose=1, callbacks=[checkpoint_object], workers=0)
 
     else:
         error_checking.assert_is_integer(num_validation_batches_per_epoch)
@@ -431,30 +449,29 @@ def train_model_with_3d_examples(
             output_file_name, monitor='val_loss', verbose=1,
             save_best_only=True, save_weights_only=False, mode='min', period=1)
 
+        validation_generator_kwargs = copy.deepcopy(training_generator_kwargs)
+        validation_generator_kwargs.update({
+            'first_target_time_unix_sec': validation_start_time_unix_sec,
+            'last_target_time_unix_sec': validation_end_time_unix_sec
+        })
+
+        if random_seed is None:
+            validation_random_seed = None
+        else:
+            validation_random_seed = random_seed + num_prefetch_workers
+
+        validation_generator = trainval_io.prefetch_batches(
+            generator_function=trainval_io.full_size_3d_example_generator,
+            generator_kwargs=validation_generator_kwargs,
+            num_workers=num_prefetch_workers,
+            num_batches_to_prefetch=num_batches_to_prefetch,
+            random_seed=validation_random_seed)
+
         model_object.fit_generator(
-            generator=trainval_io.full_size_3d_example_generator(
-                num_examples_per_batch=num_examples_per_batch,
-                first_target_time_unix_sec=training_start_time_unix_sec,
-                last_target_time_unix_sec=training_end_time_unix_sec,
-                top_narr_directory_name=top_narr_directory_name,
-                top_frontal_grid_dir_name=top_frontal_grid_dir_name,
-                narr_predictor_names=narr_predictor_names,
-                pressure_level_mb=pressure_level_mb,
-                dilation_distance_metres=dilation_distance_metres,
-                num_classes=num_classes),
+            generator=training_generator,
             steps_per_epoch=num_training_batches_per_epoch, epochs=num_epochs,
-            verbose=1, callbacks=[checkpoint_object],
-            validation_data=
-            trainval_io.full_size_3d_example_generator(
-                num_examples_per_batch=num_examples_per_batch,
-                first_target_time_unix_sec=validation_start_time_unix_sec,
-                last_target_time_unix_sec=validation_end_time_unix_sec,
-                top_narr_directory_name=top_narr_directory_name,
-                top_frontal_grid_dir_name=top_frontal_grid_dir_name,
-                narr_predictor_names=narr_predictor_names,
-                pressure_level_mb=pressure_level_mb,
-                dilation_distance_metres=dilation_distance_metres,
-                num_classes=num_classes),
+            verbose=1, callbacks=[checkpoint_object], workers=0,
+            validation_data=validation_generator,
             validation_steps=num_validation_batches_per_epoch)
 
 
@@ -12,7 +12,6 @@ N = number of pixel columns in each image
 C = number of channels (predictor variables) in each image
 """
 
-import copy
 import pickle
 import os.path
 import numpy
@@ -120,7 +119,7 @@ def _check_target_matrix(target_matrix, assert_binary=False, num_dimensions=3):
         (either 3 or 1).
     """
 
-    error_checking.assert_is_integer_numpy_array(target_matrix)
+    utils.assert_is_integer_numpy_array(target_matrix)
     error_checking.assert_is_numpy_array(
         target_matrix, num_dimensions=num_dimensions)
 
@@ -212,6 +211,89 @@ def _check_downsizing_args(
     return num_rows_in_subgrid, num_columns_in_subgrid
 
 
+def pad_predictor_images(
+        predictor_matrix, num_rows_in_half_window, num_columns_in_half_window):
+    """Pads the original images so that any window fits inside.
+
+    Each spatial grid (i.e., each example, time step, and channel) is padded
+    with `num_rows_in_half_window` rows at the top and bottom and
+    `num_columns_in_half_window` columns at the left and right.  Edge padding is
+    used (i.e., values from the edge of the original image are repeated).
+
+    M = number of pixel rows in each original image
+    N = number of pixel columns in each original image
+
+    :param predictor_matrix: numpy array of predictor images.  Dimensions may be
+        E x M x N, E x M x N x C, or E x M x N x T x C.
+    :param num_rows_in_half_window: See doc for `_downsize_predictor_images`.
+    :param num_columns_in_half_window: Same.
+    :return: padded_predictor_matrix: Padded version of input.  Dimensions may
+        be E x (M + 2 * num_rows_in_half_window) x
+        (N + 2 * num_columns_in_half_window), and so on.
+    """
+
+    pad_width_input_arg = (
+        (0, 0), (num_rows_in_half_window, num_rows_in_half_window),
+        (num_columns_in_half_window, num_columns_in_half_window))
+
+    num_dimensions = len(predictor_matrix.shape)
+    for _ in range(3, num_dimensions):
+        pad_width_input_arg += ((0, 0), )
+
+    return numpy.pad(
+        predictor_matrix, pad_width=pad_width_input_arg, mode='edge')
+
+
+def extract_windows_from_padded_images(
+        padded_predictor_matrix, example_indices, center_rows, center_columns,
+        num_rows_in_half_window, num_columns_in_half_window):
+    """Extracts many windows from padded images in one vectorized operation.
+
+    S = number of windows to extract
+    m = number of pixel rows in each window = 2 * num_rows_in_half_window + 1
+    n = number of pixel columns in each window =
+        2 * num_columns_in_half_window + 1
+
+    :param padded_predictor_matrix: numpy array created by
+        `pad_predictor_images`.
+    :param example_indices: length-S numpy array of example indices.  The [k]th
+        window will be taken from the [i]th example, where
+        i = example_indices[k].
+    :param center_rows: length-S numpy array of center rows (in the *original*,
+        unpadded, image).
+    :param center_columns: length-S numpy array of center columns (in the
+        original image).
+    :param num_rows_in_half_window: See doc for `_downsize_predictor_images`.
+    :param num_columns_in_half_window: Same.
+    :return: downsized_predictor_matrix: numpy array of windows.  Dimensions may
+        be S x m x n, S x m x n x C, or S x m x n x T x C.
+    """
+
+    # Because of padding, row i in the original image is row
+    # (i + num_rows_in_half_window) in the padded image, so the window centered
+    # at row i starts at row i in the padded image.  Same goes for columns.
+    row_offsets = numpy.linspace(
+        0, 2 * num_rows_in_half_window, num=2 * num_rows_in_half_window + 1,
+        dtype=int)
+    column_offsets = numpy.linspace(
+        0, 2 * num_columns_in_half_window,
+        num=2 * num_columns_in_half_window + 1, dtype=int)
+
+    row_index_matrix = (
+        numpy.reshape(center_rows, (-1, 1, 1)).astype(int) +
+        numpy.reshape(row_offsets, (1, -1, 1))
+    )
+    column_index_matrix = (
+        numpy.reshape(center_columns, (-1, 1, 1)).astype(int) +
+        numpy.reshape(column_offsets, (1, 1, -1))
+    )
+    example_index_matrix = numpy.reshape(example_indices, (-1, 1, 1)).astype(
+        int)
+
+    return padded_predictor_matrix[
+        example_index_matrix, row_index_matrix, column_index_matrix, ...]
+
+
 def _downsize_predictor_images(
         predictor_matrix, center_row, center_column, num_rows_in_half_window,
         num_columns_in_half_window):
@@ -247,60 +329,22 @@ def _downsize_predictor_images(
         dimensions is the same as the original image.
     """
 
-    num_rows_orig = predictor_matrix.shape[1]
-    num_columns_orig = predictor_matrix.shape[2]
-
-    first_row = center_row - num_rows_in_half_window
-    last_row = center_row + num_rows_in_half_window
-    first_column = center_column - num_columns_in_half_window
-    last_column = center_column + num_columns_in_half_window
-
-    if first_row < 0:
-        num_padding_rows_at_top = 0 - first_row
-        first_row = 0
-    else:
-        num_padding_rows_at_top = 0
-
-    if last_row > num_rows_orig - 1:
-        num_padding_rows_at_bottom = last_row - (num_rows_orig - 1)
-        last_row = num_rows_orig - 1
-    else:
-        num_padding_rows_at_bottom = 0
-
-    if first_column < 0:
-        num_padding_columns_at_left = 0 - first_column
-        first_column = 0
-    else:
-        num_padding_columns_at_left = 0
-
-    if last_column > num_columns_orig - 1:
-        num_padding_columns_at_right = last_column - (
-            num_columns_orig - 1)
-        last_column = num_columns_orig - 1
-    else:
-        num_padding_columns_at_right = 0
-
-    selected_rows = numpy.linspace(
-        first_row, last_row, num=last_row - first_row + 1, dtype=int)
-    selected_columns = numpy.linspace(
-        first_column, last_column, num=last_column - first_column + 1,
-        dtype=int)
-
-    downsized_predictor_matrix = numpy.take(
-        predictor_matrix, selected_rows, axis=1)
-    downsized_predictor_matrix = numpy.take(
-        downsized_predictor_matrix, selected_columns, axis=2)
-
-    pad_width_input_arg = (
-        (0, 0), (num_padding_rows_at_top, num_padding_rows_at_bottom),
-        (num_padding_columns_at_left, num_padding_columns_at_right))
+    num_examples = predictor_matrix.shape[0]
+    example_indices = numpy.linspace(
+        0, num_examples - 1, num=num_examples, dtype=int)
 
-    num_dimensions = len(predictor_matrix.shape)
-    for _ in range(3, num_dimensions):
-        pad_width_input_arg += ((0, 0), )
+    padded_predictor_matrix = pad_predictor_images(
+        predictor_matrix=predictor_matrix,
+        num_rows_in_half_window=num_rows_in_half_window,
+        num_columns_in_half_window=num_columns_in_half_window)
 
-    return numpy.pad(
-        downsized_predictor_matrix, pad_width=pad_width_input_arg, mode='edge')
+    return extract_windows_from_padded_images(
+        padded_predictor_matrix=padded_predictor_matrix,
+        example_indices=example_indices,
+        center_rows=numpy.full(num_examples, center_row, dtype=int),
+        center_columns=numpy.full(num_examples, center_column, dtype=int),
+        num_rows_in_half_window=num_rows_in_half_window,
+        num_columns_in_half_window=num_columns_in_half_window)
 
 
 def _class_fractions_to_num_points(class_fractions, num_points_total):
@@ -407,9 +451,128 @@ def get_class_weight_dict(class_frequencies):
     return class_weight_dict
 
 
-def normalize_predictors(
+def _get_normalization_params(
+        predictor_matrix, normalization_type_string, percentile_offset,
+        per_example):
+    """Computes normalization parameters for each predictor variable.
+
+    :param predictor_matrix: See doc for `normalize_predictors`.
+    :param normalization_type_string: Same.
+    :param percentile_offset: Same.
+    :param per_example: Boolean flag.  If True, will compute parameters for each
+        example separately.  If False, will compute parameters over all
+        examples.
+    :return: first_param_matrix: E-by-C numpy array (or 1-by-C if
+        per_example = False) with values of first normalization parameter
+        (either [q]th percentile or mean).
+    :return: second_param_matrix: Same but for second normalization parameter
+        (either [100 - q]th percentile or standard deviation).
+    """
+
+    num_predictors = predictor_matrix.shape[-1]
+    if per_example:
+        num_examples = predictor_matrix.shape[0]
+    else:
+        num_examples = 1
+
+    # Reduce over all spatial (and temporal) dimensions at once, for all
+    # examples and channels.
+    predictor_matrix = numpy.reshape(
+        predictor_matrix, (num_examples, -1, num_predictors))
+    found_nan = numpy.any(numpy.isnan(predictor_matrix))
+
+    if normalization_type_string == MINMAX_STRING:
+        error_checking.assert_is_geq(percentile_offset, 0.)
+        error_checking.assert_is_less_than(percentile_offset, 50.)
+
+        if found_nan:
+            percentile_function = numpy.nanpercentile
+        else:
+            percentile_function = numpy.percentile
+
+        percentile_matrix = percentile_function(
+            predictor_matrix, [percentile_offset, 100. - percentile_offset],
+            axis=1
+        ).astype(float)
+
+        return percentile_matrix[0, ...], percentile_matrix[1, ...]
+
+    if found_nan:
+        mean_value_matrix = numpy.nanmean(
+            predictor_matrix, axis=1, dtype=numpy.float64)
+        standard_deviation_matrix = numpy.nanstd(
+            predictor_matrix, axis=1, dtype=numpy.float64, ddof=1)
+    else:
+        mean_value_matrix = numpy.mean(
+            predictor_matrix, axis=1, dtype=numpy.float64)
+        standard_deviation_matrix = numpy.std(
+            predictor_matrix, axis=1, dtype=numpy.float64, ddof=1)
+
+    return mean_value_matrix, standard_deviation_matrix
+
+
+def _expand_normalization_params(param_matrix, num_dimensions):
+    """Expands normalization parameters to broadcast against predictor matrix.
+
+    :param param_matrix: E-by-C numpy array of normalization parameters.
+    :param num_dimensions: Number of dimensions in predictor matrix.
+    :return: param_matrix: numpy array with dimensions
+        E x 1 x ... x 1 x C, with `num_dimensions` total dimensions.
+    """
+
+    return numpy.reshape(
+        param_matrix,
+        (param_matrix.shape[0],) + (1,) * (num_dimensions - 2) +
+        (param_matrix.shape[1],)
+    )
+
+
+def get_normalization_climatology(
         predictor_matrix, normalization_type_string=MINMAX_STRING,
         percentile_offset=1.):
+    """Computes normalization parameters over all examples.
+
+    These "climatological" parameters can be passed to `normalize_predictors`,
+    which then skips the per-example statistics.
+
+    :param predictor_matrix: See doc for `normalize_predictors`.  This should be
+        a representative sample of the training data.
+    :param normalization_type_string: Same.
+    :param percentile_offset: Same.
+    :return: climatology_dict: Dictionary with the same keys as the output
+        `normalization_dict` from `normalize_predictors`, except that each value
+        is a length-C numpy array (or None).
+    """
+
+    _check_predictor_matrix(
+        predictor_matrix, allow_nan=True, min_num_dimensions=4,
+        max_num_dimensions=5)
+    _check_normalization_type(normalization_type_string)
+
+    first_param_values, second_param_values = _get_normalization_params(
+        predictor_matrix=predictor_matrix,
+        normalization_type_string=normalization_type_string,
+        percentile_offset=percentile_offset, per_example=False)
+
+    if normalization_type_string == MINMAX_STRING:
+        return {
+            MIN_VALUE_MATRIX_KEY: first_param_values[0, ...],
+            MAX_VALUE_MATRIX_KEY: second_param_values[0, ...],
+            MEAN_VALUE_MATRIX_KEY: None,
+            STDEV_MATRIX_KEY: None
+        }
+
+    return {
+        MIN_VALUE_MATRIX_KEY: None,
+        MAX_VALUE_MATRIX_KEY: None,
+        MEAN_VALUE_MATRIX_KEY: first_param_values[0, ...],
+        STDEV_MATRIX_KEY: second_param_values[0, ...]
+    }
+
+
+def normalize_predictors(
+        predictor_matrix, normalization_type_string=MINMAX_STRING,
+        percentile_offset=1., climatology_dict=None):
     """Normalizes predictor variables.
 
     If normalization_type_string = "z_score", each variable is normalized with
@@ -426,10 +589,17 @@ def normalize_predictors(
     normalized_value = (unnormalized_value - min_value) /
                        (max_value - min_value)
 
+    Normalization is done in place, so a float32 input stays float32.
+
     :param predictor_matrix: numpy array of predictor images.  Dimensions may be
         E x M x N x C or E x M x N x T x C.
     :param normalization_type_string: See general discussion above.
     :param percentile_offset: See general discussion above.
+    :param climatology_dict: Dictionary created by
+        `get_normalization_climatology`.  If this is specified, the same
+        parameters (from `climatology_dict`) will be used for every example,
+        rather than computing parameters over each example, and
+        `normalization_type_string` and `percentile_offset` will be ignored.
     :return: predictor_matrix: Normalized version of input (same dimensions).
     :return: normalization_dict: Dictionary with the following keys.
     normalization_dict['min_value_matrix']: E-by-C numpy array of minimum values
@@ -446,58 +616,71 @@ def normalize_predictors(
     _check_predictor_matrix(
         predictor_matrix, allow_nan=True, min_num_dimensions=4,
         max_num_dimensions=5)
-    _check_normalization_type(normalization_type_string)
+
+    if not numpy.issubdtype(predictor_matrix.dtype, numpy.floating):
+        predictor_matrix = predictor_matrix.astype(numpy.float32)
 
     num_examples = predictor_matrix.shape[0]
     num_predictors = predictor_matrix.shape[-1]
 
-    min_value_matrix = None
-    max_value_matrix = None
-    mean_value_matrix = None
-    standard_deviation_matrix = None
+    if climatology_dict is None:
+        _check_normalization_type(normalization_type_string)
 
-    if normalization_type_string == MINMAX_STRING:
-        error_checking.assert_is_geq(percentile_offset, 0.)
-        error_checking.assert_is_less_than(percentile_offset, 50.)
+        first_param_matrix, second_param_matrix = _get_normalization_params(
+            predictor_matrix=predictor_matrix,
+            normalization_type_string=normalization_type_string,
+            percentile_offset=percentile_offset, per_example=True)
+    else:
+        if climatology_dict[MIN_VALUE_MATRIX_KEY] is None:
+            normalization_type_string = Z_SCORE_STRING + ''
+            first_param_values = climatology_dict[MEAN_VALUE_MATRIX_KEY]
+            second_param_values = climatology_dict[STDEV_MATRIX_KEY]
+        else:
+            normalization_type_string = MINMAX_STRING + ''
+            first_param_values = climatology_dict[MIN_VALUE_MATRIX_KEY]
+            second_param_values = climatology_dict[MAX_VALUE_MATRIX_KEY]
 
-        min_value_matrix = numpy.full((num_examples, num_predictors), numpy.nan)
-        max_value_matrix = numpy.full((num_examples, num_predictors), numpy.nan)
+        these_expected_dim = numpy.array([num_predictors], dtype=int)
+        error_checking.assert_is_numpy_array_without_nan(first_param_values)
+        error_checking.assert_is_numpy_array(
+            first_param_values, exact_dimensions=these_expected_dim)
+        error_checking.assert_is_numpy_array_without_nan(second_param_values)
+        error_checking.assert_is_numpy_array(
+            second_param_values, exact_dimensions=these_expected_dim)
 
-        for i in range(num_examples):
-            for m in range(num_predictors):
-                min_value_matrix[i, m] = numpy.nanpercentile(
-                    predictor_matrix[i, ..., m], percentile_offset)
-                max_value_matrix[i, m] = numpy.nanpercentile(
-                    predictor_matrix[i, ..., m], 100. - percentile_offset)
+        first_param_matrix = numpy.tile(
+            numpy.reshape(first_param_values, (1, num_predictors)),
+            (num_examples, 1)
+        ).astype(float)
+        second_param_matrix = numpy.tile(
+            numpy.reshape(second_param_values, (1, num_predictors)),
+            (num_examples, 1)
+        ).astype(float)
 
-                predictor_matrix[i, ..., m] = (
-                    (predictor_matrix[i, ..., m] - min_value_matrix[i, m]) /
-                    (max_value_matrix[i, m] - min_value_matrix[i, m])
-                )
+    num_dimensions = len(predictor_matrix.shape)
+    predictor_matrix -= _expand_normalization_params(
+        first_param_matrix, num_dimensions)
+
+    if normalization_type_string == MINMAX_STRING:
+        predictor_matrix /= _expand_normalization_params(
+            second_param_matrix - first_param_matrix, num_dimensions)
+
+        normalization_dict = {
+            MIN_VALUE_MATRIX_KEY: first_param_matrix,
+            MAX_VALUE_MATRIX_KEY: second_param_matrix,
+            MEAN_VALUE_MATRIX_KEY: None,
+            STDEV_MATRIX_KEY: None
+        }
     else:
-        mean_value_matrix = numpy.full(
-            (num_examples, num_predictors), numpy.nan)
-        standard_deviation_matrix = numpy.full(
-            (num_examples, num_predictors), numpy.nan)
-
-        for i in range(num_examples):
-            for m in range(num_predictors):
-                mean_value_matrix[i, m] = numpy.nanmean(
-                    predictor_matrix[i, ..., m])
-                standard_deviation_matrix[i, m] = numpy.nanstd(
-                    predictor_matrix[i, ..., m], ddof=1)
-
-                predictor_matrix[i, ..., m] = (
-                    (predictor_matrix[i, ..., m] - mean_value_matrix[i, m]) /
-                    standard_deviation_matrix[i, m]
-                )
-
-    normalization_dict = {
-        MIN_VALUE_MATRIX_KEY: min_value_matrix,
-        MAX_VALUE_MATRIX_KEY: max_value_matrix,
-        MEAN_VALUE_MATRIX_KEY: mean_value_matrix,
-        STDEV_MATRIX_KEY: standard_deviation_matrix
-    }
+        predictor_matrix /= _expand_normalization_params(
+            second_param_matrix, num_dimensions)
+
+        normalization_dict = {
+            MIN_VALUE_MATRIX_KEY: None,
+            MAX_VALUE_MATRIX_KEY: None,
+            MEAN_VALUE_MATRIX_KEY: first_param_matrix,
+            STDEV_MATRIX_KEY: second_param_matrix
+        }
 
     return predictor_matrix, normalization_dict
 
@@ -516,6 +699,7 @@ def denormalize_predictors(predictor_matrix, normalization_dict):
 
     num_examples = predictor_matrix.shape[0]
     num_predictors = predictor_matrix.shape[-1]
+    num_dimensions = len(predictor_matrix.shape)
     expected_param_dimensions = numpy.array(
         [num_examples, num_predictors], dtype=int)
 
@@ -536,13 +720,10 @@ def denormalize_predictors(predictor_matrix, normalization_dict):
         error_checking.assert_is_numpy_array(
             max_value_matrix, exact_dimensions=expected_param_dimensions)
 
-        for i in range(num_examples):
-            for m in range(num_predictors):
-                predictor_matrix[i, ..., m] = (
-                    min_value_matrix[i, m] +
-                    predictor_matrix[i, ..., m] *
-                    (max_value_matrix[i, m] - min_value_matrix[i, m])
-                )
+        predictor_matrix *= _expand_normalization_params(
+            max_value_matrix - min_value_matrix, num_dimensions)
+        predictor_matrix += _expand_normalization_params(
+            min_value_matrix, num_dimensions)
     else:
         mean_value_matrix = normalization_dict[MEAN_VALUE_MATRIX_KEY]
         standard_deviation_matrix = normalization_dict[STDEV_MATRIX_KEY]
@@ -557,13 +738,10 @@ def denormalize_predictors(predictor_matrix, normalization_dict):
             standard_deviation_matrix,
             exact_dimensions=expected_param_dimensions)
 
-        for i in range(num_examples):
-            for m in range(num_predictors):
-                predictor_matrix[i, ..., m] = (
-                    mean_value_matrix[i, m] +
-                    predictor_matrix[i, ..., m] *
-                    standard_deviation_matrix[i, m]
-                )
+        predictor_matrix *= _expand_normalization_params(
+            standard_deviation_matrix, num_dimensions)
+        predictor_matrix += _expand_normalization_params(
+            mean_value_matrix, num_dimensions)
 
     return predictor_matrix
 
@@ -804,12 +982,17 @@ def front_table_to_images(
     E = number of examples = number of time steps.  For target variable, each
     example is one time step.
 
+    All images are allocated at once, after which all warm-front points and
+    then all cold-front points are written in one operation each.  Thus, if a
+    point is in both a warm and cold front, it becomes a cold front.
+
     :param frontal_grid_table: E-row pandas DataFrame with columns documented in
         `fronts_io.write_narr_grids_to_file`.
     :param num_rows_per_image: Number of pixel rows in each image (M).
     :param num_columns_per_image: Number of pixel columns in each image (N).
-    :return: frontal_grid_matrix: E-by-M-by-N numpy array with 3 possible
-        entries (see documentation for `_check_target_matrix`).
+    :return: frontal_grid_matrix: E-by-M-by-N numpy array of 8-bit unsigned
+        integers, with 3 possible entries (see documentation for
+        `_check_target_matrix`).
     """
 
     error_checking.assert_is_integer(num_rows_per_image)
@@ -819,37 +1002,38 @@ def front_table_to_images(
 
     if frontal_grid_table.empty:
         return numpy.full(
-            (1, num_rows_per_image, num_columns_per_image), 0, dtype=int)
+            (1, num_rows_per_image, num_columns_per_image),
+            front_utils.NO_FRONT_INTEGER_ID, dtype=numpy.uint8)
 
     num_times = len(frontal_grid_table.index)
-    frontal_grid_matrix = None
-
-    for i in range(num_times):
-        this_frontal_grid_dict = {
-            front_utils.WARM_FRONT_ROW_INDICES_COLUMN: frontal_grid_table[
-                front_utils.WARM_FRONT_ROW_INDICES_COLUMN].values[i],
-            front_utils.WARM_FRONT_COLUMN_INDICES_COLUMN: frontal_grid_table[
-                front_utils.WARM_FRONT_COLUMN_INDICES_COLUMN].values[i],
-            front_utils.COLD_FRONT_ROW_INDICES_COLUMN: frontal_grid_table[
-                front_utils.COLD_FRONT_ROW_INDICES_COLUMN].values[i],
-            front_utils.COLD_FRONT_COLUMN_INDICES_COLUMN: frontal_grid_table[
-                front_utils.COLD_FRONT_COLUMN_INDICES_COLUMN].values[i]
-        }
+    frontal_grid_matrix = numpy.full(
+        (num_times, num_rows_per_image, num_columns_per_image),
+        front_utils.NO_FRONT_INTEGER_ID, dtype=numpy.uint8)
+
+    row_column_names_and_ids = [
+        (front_utils.WARM_FRONT_ROW_INDICES_COLUMN,
+         front_utils.WARM_FRONT_COLUMN_INDICES_COLUMN,
+         front_utils.WARM_FRONT_INTEGER_ID),
+        (front_utils.COLD_FRONT_ROW_INDICES_COLUMN,
+         front_utils.COLD_FRONT_COLUMN_INDICES_COLUMN,
+         front_utils.COLD_FRONT_INTEGER_ID)
+    ]
 
-        this_frontal_grid_matrix = front_utils.frontal_grid_points_to_image(
-            frontal_grid_point_dict=this_frontal_grid_dict,
-            num_grid_rows=num_rows_per_image,
-            num_grid_columns=num_columns_per_image)
+    for this_row_name, this_column_name, this_integer_id in (
+            row_column_names_and_ids):
+        these_row_index_arrays = frontal_grid_table[this_row_name].values
+        these_column_index_arrays = frontal_grid_table[this_column_name].values
 
-        this_frontal_grid_matrix = numpy.reshape(
-            this_frontal_grid_matrix,
-            (1, num_rows_per_image, num_columns_per_image))
+        these_num_points = numpy.array(
+            [len(r) for r in these_row_index_arrays], dtype=int)
+        these_time_indices = numpy.repeat(
+            numpy.arange(num_times, dtype=int), these_num_points)
 
-        if frontal_grid_matrix is None:
-            frontal_grid_matrix = copy.deepcopy(this_frontal_grid_matrix)
-        else:
-            frontal_grid_matrix = numpy.concatenate(
-                (frontal_grid_matrix, this_frontal_grid_matrix), axis=0)
+        frontal_grid_matrix[
+            these_time_indices,
+            numpy.concatenate(tuple(these_row_index_arrays)).astype(int),
+            numpy.concatenate(tuple(these_column_index_arrays)).astype(int)
+        ] = this_integer_id
 
     return frontal_grid_matrix
 
@@ -895,20 +1079,13 @@ def dilate_ternary_target_images(
     _check_target_matrix(target_matrix, assert_binary=False, num_dimensions=3)
     error_checking.assert_is_boolean(verbose)
 
-    dilation_kernel_matrix = front_utils.buffer_distance_to_narr_mask(
-        dilation_distance_metres).astype(int)
-
-    num_times = target_matrix.shape[0]
-    for i in range(num_times):
-        if verbose:
-            print ('Dilating 3-class target image at {0:d}th of {1:d} time '
-                   'steps...').format(i + 1, num_times)
-
-        target_matrix[i, :, :] = front_utils.dilate_ternary_narr_image(
-            ternary_image_matrix=target_matrix[i, :, :],
-            dilation_kernel_matrix=dilation_kernel_matrix)
+    if verbose:
+        print 'Dilating 3-class target images at {0:d} time steps...'.format(
+            target_matrix.shape[0])
 
-    return target_matrix
+    return front_utils.dilate_ternary_narr_images(
+        ternary_image_matrix=target_matrix,
+        dilation_distance_metres=dilation_distance_metres)
 
 
 def dilate_binary_target_images(
@@ -1054,7 +1231,8 @@ def downsize_grids_around_selected_points(
         messages.
     :param test_mode: Boolean flag.  Always leave this False.
     :return: predictor_matrix: numpy array of predictor images.  Dimensions may
-        be S x m x n, S x m x n x C, or S x m x n x T x C.
+        be S x m x n, S x m x n x C, or S x m x n x T x C.  Data type is the
+        same as the input.
     :return: target_values: length-S numpy array of corresponding labels.
     :return: example_indices: length-S numpy array with example index for each
         small grid.  This can be used to map back to the original examples.
@@ -1065,60 +1243,45 @@ def downsize_grids_around_selected_points(
     :return: center_grid_columns: Same as above, but for columns.
     """
 
-    num_downsized_rows, num_downsized_columns = _check_downsizing_args(
+    _check_downsizing_args(
         predictor_matrix=predictor_matrix, target_matrix=target_matrix,
         num_rows_in_half_window=num_rows_in_half_window,
         num_columns_in_half_window=num_columns_in_half_window,
         test_mode=test_mode)
 
     num_full_examples = predictor_matrix.shape[0]
-    num_downsized_examples = 0
-    for i in range(num_full_examples):
-        num_downsized_examples += len(
-            target_point_dict[ROW_INDICES_BY_TIME_KEY][i])
-
-    new_dimensions = (
-        num_downsized_examples, num_downsized_rows, num_downsized_columns)
-    new_dimensions += predictor_matrix.shape[3:]
-    new_predictor_matrix = numpy.full(new_dimensions, numpy.nan)
-
-    target_values = numpy.full(num_downsized_examples, -1, dtype=int)
-    example_indices = numpy.full(num_downsized_examples, -1, dtype=int)
-    center_grid_rows = numpy.full(num_downsized_examples, -1, dtype=int)
-    center_grid_columns = numpy.full(num_downsized_examples, -1, dtype=int)
-    last_downsized_example_index = -1
-
-    for i in range(num_full_examples):
-        if verbose:
-            print (
-                'Downsizing images around selected points for {0:d}th of {1:d} '
-                'full-size examples...').format(i + 1, num_full_examples)
-
-        these_target_point_rows = target_point_dict[ROW_INDICES_BY_TIME_KEY][i]
-        these_target_point_columns = target_point_dict[
-            COLUMN_INDICES_BY_TIME_KEY][i]
-        this_num_target_points = len(these_target_point_rows)
-
-        for j in range(this_num_target_points):
-            new_predictor_matrix[[last_downsized_example_index + 1], ...] = (
-                _downsize_predictor_images(
-                    predictor_matrix=predictor_matrix[[i], ...],
-                    center_row=these_target_point_rows[j],
-                    center_column=these_target_point_columns[j],
-                    num_rows_in_half_window=num_rows_in_half_window,
-                    num_columns_in_half_window=num_columns_in_half_window))
-
-            target_values[last_downsized_example_index + 1] = target_matrix[
-                i, these_target_point_rows[j], these_target_point_columns[j]]
-            example_indices[last_downsized_example_index + 1] = i
-
-            center_grid_rows[
-                last_downsized_example_index + 1] = these_target_point_rows[j]
-            center_grid_columns[
-                last_downsized_example_index + 1
-            ] = these_target_point_columns[j]
-
-            last_downsized_example_index += 1
+    example_indices = numpy.concatenate([
+        numpy.full(len(target_point_dict[ROW_INDICES_BY_TIME_KEY][i]), i,
+                   dtype=int)
+        for i in range(num_full_examples)
+    ])
+    center_grid_rows = numpy.concatenate(
+        target_point_dict[ROW_INDICES_BY_TIME_KEY][:num_full_examples]
+    ).astype(int)
+    center_grid_columns = numpy.concatenate(
+        target_point_dict[COLUMN_INDICES_BY_TIME_KEY][:num_full_examples]
+    ).astype(int)
+
+    if verbose:
+        print (
+            'Downsizing images around {0:d} selected points in {1:d} full-size '
+            'examples...'
+        ).format(len(example_indices), num_full_examples)
+
+    padded_predictor_matrix = pad_predictor_images(
+        predictor_matrix=predictor_matrix,
+        num_rows_in_half_window=num_rows_in_half_window,
+        num_columns_in_half_window=num_columns_in_half_window)
+
+    new_predictor_matrix = extract_windows_from_padded_images(
+        padded_predictor_matrix=padded_predictor_matrix,
+        example_indices=example_indices, center_rows=center_grid_rows,
+        center_columns=center_grid_columns,
+        num_rows_in_half_window=num_rows_in_half_window,
+        num_columns_in_half_window=num_columns_in_half_window)
+
+    target_values = target_matrix[
+        example_indices, center_grid_rows, center_grid_columns].astype(int)
 
     return (new_predictor_matrix, target_values, example_indices,
             center_grid_rows, center_grid_columns)
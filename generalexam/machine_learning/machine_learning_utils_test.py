@@ -240,6 +240,31 @@ THIS_FIRST_MATRIX_3D = numpy.stack((
 PREDICTOR_MATRIX_4D_Z_NORM = numpy.stack(
     (THIS_FIRST_MATRIX_3D, THIS_FIRST_MATRIX_3D), axis=0)
 
+# The following constants are used to test normalize_predictors with
+# climatology.  These parameters are the same as the per-example parameters for
+# PREDICTOR_MATRIX_4D_DENORM.
+THIS_MEAN = numpy.mean(FIRST_PREDICTOR_MATRIX_2D)
+THIS_STDEV = numpy.std(FIRST_PREDICTOR_MATRIX_2D, ddof=1)
+
+CLIMATOLOGY_DICT_Z = {
+    ml_utils.MIN_VALUE_MATRIX_KEY: None,
+    ml_utils.MAX_VALUE_MATRIX_KEY: None,
+    ml_utils.MEAN_VALUE_MATRIX_KEY: numpy.array([THIS_MEAN, THIS_MEAN]),
+    ml_utils.STDEV_MATRIX_KEY: numpy.array([THIS_STDEV, THIS_STDEV])
+}
+
+# The following constants are used to test get_normalization_climatology.
+THIS_STDEV = numpy.std(
+    numpy.concatenate((FIRST_PREDICTOR_MATRIX_2D, FIRST_PREDICTOR_MATRIX_2D)),
+    ddof=1)
+
+CLIMATOLOGY_DICT_Z_4D = {
+    ml_utils.MIN_VALUE_MATRIX_KEY: None,
+    ml_utils.MAX_VALUE_MATRIX_KEY: None,
+    ml_utils.MEAN_VALUE_MATRIX_KEY: numpy.array([THIS_MEAN, THIS_MEAN]),
+    ml_utils.STDEV_MATRIX_KEY: numpy.array([THIS_STDEV, THIS_STDEV])
+}
+
 ALL_PREDICTORS = numpy.stack(
     (FIRST_PREDICTOR_MATRIX_2D, SECOND_PREDICTOR_MATRIX_2D), axis=-1)
 THIS_MEAN = numpy.nanmean(ALL_PREDICTORS)
@@ -588,6 +613,18 @@ DOWNSIZED_MATRIX_R2_C4 = numpy.array([[5, 7, 7],
                                       [6, 8, 8],
                                       [6, 8, 8]], dtype=numpy.float32)
 
+PADDED_MATRIX_TO_DOWNSIZE_AT_SELECTED_PTS = numpy.array([[1, 1, 3, 5, 7, 7],
+                                                         [1, 1, 3, 5, 7, 7],
+                                                         [2, 2, 4, 6, 8, 8],
+                                                         [2, 2, 4, 6, 8, 8]],
+                                                        dtype=numpy.float32)
+PADDED_MATRIX_TO_DOWNSIZE_AT_SELECTED_PTS = numpy.stack(
+    (PADDED_MATRIX_TO_DOWNSIZE_AT_SELECTED_PTS,), axis=0)
+PADDED_MATRIX_TO_DOWNSIZE_AT_SELECTED_PTS = numpy.stack(
+    (PADDED_MATRIX_TO_DOWNSIZE_AT_SELECTED_PTS,
+     PADDED_MATRIX_TO_DOWNSIZE_AT_SELECTED_PTS,
+     PADDED_MATRIX_TO_DOWNSIZE_AT_SELECTED_PTS), axis=-1)
+
 TARGET_MATRIX_TO_DOWNSIZE_AT_SELECTED_PTS = numpy.array([[0, 0, 1, 1],
                                                          [2, 2, 0, 0]],
                                                         dtype=int)
@@ -1231,6 +1268,41 @@ class MachineLearningUtilsTests(unittest.TestCase):
             equal_nan=True
         ))
 
+    def test_get_normalization_climatology_z(self):
+        """Ensures correct output from get_normalization_climatology.
+
+        In this case, normalization method is z-score.
+        """
+
+        this_climatology_dict = ml_utils.get_normalization_climatology(
+            predictor_matrix=PREDICTOR_MATRIX_4D_DENORM + 0.,
+            normalization_type_string=ml_utils.Z_SCORE_STRING)
+
+        for this_key in CLIMATOLOGY_DICT_Z_4D:
+            if CLIMATOLOGY_DICT_Z_4D[this_key] is None:
+                self.assertTrue(this_climatology_dict[this_key] is None)
+            else:
+                self.assertTrue(numpy.allclose(
+                    this_climatology_dict[this_key],
+                    CLIMATOLOGY_DICT_Z_4D[this_key], atol=TOLERANCE
+                ))
+
+    def test_normalize_predictors_4d_climatology(self):
+        """Ensures correct output from normalize_predictors.
+
+        In this case, predictor matrix is 4-D (no time dimension) and
+        normalization uses climatological parameters (z-score).
+        """
+
+        this_predictor_matrix, _ = ml_utils.normalize_predictors(
+            predictor_matrix=PREDICTOR_MATRIX_4D_DENORM + 0.,
+            climatology_dict=CLIMATOLOGY_DICT_Z)
+
+        self.assertTrue(numpy.allclose(
+            this_predictor_matrix, PREDICTOR_MATRIX_4D_Z_NORM, atol=TOLERANCE,
+            equal_nan=True
+        ))
+
     def test_denormalize_predictors_4d_minmax(self):
         """Ensures correct output from denormalize_predictors.
 
@@ -1390,6 +1462,7 @@ class MachineLearningUtilsTests(unittest.TestCase):
 
         self.assertTrue(numpy.array_equal(
             this_frontal_grid_matrix, FRONTAL_GRID_MATRIX_TERNARY))
+        self.assertTrue(this_frontal_grid_matrix.dtype == numpy.uint8)
 
     def test_binarize_front_images(self):
         """Ensures correct output from binarize_front_images."""
@@ -1422,6 +1495,28 @@ class MachineLearningUtilsTests(unittest.TestCase):
         self.assertTrue(numpy.array_equal(
             this_dilated_matrix, FRONTAL_GRID_MATRIX_TERNARY_DILATED))
 
+    def test_front_table_to_dilated_binary_images(self):
+        """Ensures that 8-bit images can be dilated and binarized.
+
+        In this case, the output of front_table_to_images (8-bit unsigned
+        integers) is passed to dilate_ternary_target_images and then
+        binarize_front_images.
+        """
+
+        this_frontal_grid_matrix = ml_utils.front_table_to_images(
+            frontal_grid_table=FRONTAL_GRID_TABLE,
+            num_rows_per_image=NUM_GRID_ROWS,
+            num_columns_per_image=NUM_GRID_COLUMNS)
+        this_frontal_grid_matrix = ml_utils.dilate_ternary_target_images(
+            target_matrix=this_frontal_grid_matrix,
+            dilation_distance_metres=DILATION_DISTANCE_METRES, verbose=False)
+        this_frontal_grid_matrix = ml_utils.binarize_front_images(
+            this_frontal_grid_matrix)
+
+        self.assertTrue(numpy.array_equal(
+            this_frontal_grid_matrix, FRONTAL_GRID_MATRIX_BINARY_DILATED))
+        self.assertTrue(this_frontal_grid_matrix.dtype == numpy.uint8)
+
     def test_stack_predictor_variables(self):
         """Ensures correct output from stack_predictor_variables."""
 
@@ -1470,6 +1565,19 @@ class MachineLearningUtilsTests(unittest.TestCase):
         self.assertTrue(numpy.allclose(
             this_matrix, FCN_INPUT_MATRIX_5D, atol=TOLERANCE))
 
+    def test_pad_predictor_images(self):
+        """Ensures correct output from pad_predictor_images."""
+
+        this_matrix = ml_utils.pad_predictor_images(
+            predictor_matrix=PREDICTOR_MATRIX_TO_DOWNSIZE_AT_SELECTED_PTS,
+            num_rows_in_half_window=NUM_ROWS_IN_HALF_GRID_AROUND_SELECTED_PTS,
+            num_columns_in_half_window=
+            NUM_COLUMNS_IN_HALF_GRID_AROUND_SELECTED_PTS)
+
+        self.assertTrue(numpy.allclose(
+            this_matrix, PADDED_MATRIX_TO_DOWNSIZE_AT_SELECTED_PTS,
+            atol=TOLERANCE))
+
     def test_downsize_grids_around_selected_points(self):
         """Ensures correct output from downsize_grids_around_selected_points."""
 
@@ -34,7 +34,6 @@ there are M*N target variables (the label at each pixel).
 import numpy
 from gewittergefahr.gg_utils import error_checking
 from generalexam.ge_io import processed_narr_io
-from generalexam.ge_io import fronts_io
 from generalexam.machine_learning import training_validation_io as trainval_io
 from generalexam.machine_learning import machine_learning_utils as ml_utils
 
@@ -129,34 +128,15 @@ def create_downsized_3d_examples(
 
             tuple_of_full_predictor_matrices += (this_field_predictor_matrix,)
 
-        print 'Reading data from: "{0:s}"...'.format(frontal_grid_file_name)
-        frontal_grid_table = fronts_io.read_narr_grids_from_file(
-            frontal_grid_file_name)
-
         full_predictor_matrix = ml_utils.stack_predictor_variables(
             tuple_of_full_predictor_matrices)
         full_predictor_matrix, _ = ml_utils.normalize_predictors(
             predictor_matrix=full_predictor_matrix)
 
-        full_target_matrix = ml_utils.front_table_to_images(
-            frontal_grid_table=frontal_grid_table,
-            num_rows_per_image=full_predictor_matrix.shape[1],
-            num_columns_per_image=full_predictor_matrix.shape[2])
-
-        if num_classes == 2:
-            full_target_matrix = ml_utils.binarize_front_images(
-                full_target_matrix)
-
-        if num_classes == 2:
-            full_target_matrix = ml_utils.dilate_binary_target_images(
-                target_matrix=full_target_matrix,
-                dilation_distance_metres=dilation_distance_metres,
-                verbose=False)
-        else:
-            full_target_matrix = ml_utils.dilate_ternary_target_images(
-                target_matrix=full_target_matrix,
-                dilation_distance_metres=dilation_distance_metres,
-                verbose=False)
+        full_target_matrix = trainval_io.read_target_matrix(
+            frontal_grid_file_name=frontal_grid_file_name,
+            num_classes=num_classes,
+            dilation_distance_metres=dilation_distance_metres)
 
     print 'Creating {0:d} downsized 3-D examples...'.format(
         len(center_row_indices))
@@ -278,32 +258,13 @@ def create_downsized_4d_examples(
         full_predictor_matrix = ml_utils.stack_time_steps(
             tuple_of_4d_predictor_matrices)
 
-        print 'Reading data from: "{0:s}"...'.format(frontal_grid_file_name)
-        frontal_grid_table = fronts_io.read_narr_grids_from_file(
-            frontal_grid_file_name)
-
         full_predictor_matrix, _ = ml_utils.normalize_predictors(
             predictor_matrix=full_predictor_matrix)
 
-        full_target_matrix = ml_utils.front_table_to_images(
-            frontal_grid_table=frontal_grid_table,
-            num_rows_per_image=full_predictor_matrix.shape[1],
-            num_columns_per_image=full_predictor_matrix.shape[2])
-
-        if num_classes == 2:
-            full_target_matrix = ml_utils.binarize_front_images(
-                full_target_matrix)
-
-        if num_classes == 2:
-            full_target_matrix = ml_utils.dilate_binary_target_images(
-                target_matrix=full_target_matrix,
-                dilation_distance_metres=dilation_distance_metres,
-                verbose=False)
-        else:
-            full_target_matrix = ml_utils.dilate_ternary_target_images(
-                target_matrix=full_target_matrix,
-                dilation_distance_metres=dilation_distance_metres,
-                verbose=False)
+        full_target_matrix = trainval_io.read_target_matrix(
+            frontal_grid_file_name=frontal_grid_file_name,
+            num_classes=num_classes,
+            dilation_distance_metres=dilation_distance_metres)
 
     print 'Creating {0:d} downsized 4-D examples...'.format(
         len(center_row_indices))
@@ -376,10 +337,6 @@ def create_full_size_3d_example(
 
         tuple_of_predictor_matrices += (this_field_predictor_matrix,)
 
-    print 'Reading data from: "{0:s}"...'.format(frontal_grid_file_name)
-    frontal_grid_table = fronts_io.read_narr_grids_from_file(
-        frontal_grid_file_name)
-
     print 'Processing full-size 3-D machine-learning example...'
 
     predictor_matrix = ml_utils.stack_predictor_variables(
@@ -387,27 +344,11 @@ def create_full_size_3d_example(
     predictor_matrix, _ = ml_utils.normalize_predictors(
         predictor_matrix=predictor_matrix)
 
-    target_matrix = ml_utils.front_table_to_images(
-        frontal_grid_table=frontal_grid_table,
-        num_rows_per_image=predictor_matrix.shape[1],
-        num_columns_per_image=predictor_matrix.shape[2])
-
-    if num_classes == 2:
-        target_matrix = ml_utils.binarize_front_images(target_matrix)
-
     predictor_matrix = ml_utils.subset_narr_grid_for_fcn_input(predictor_matrix)
-    target_matrix = ml_utils.subset_narr_grid_for_fcn_input(target_matrix)
-
-    if num_classes == 2:
-        target_matrix = ml_utils.dilate_binary_target_images(
-            target_matrix=target_matrix,
-            dilation_distance_metres=dilation_distance_metres,
-            verbose=False)
-    else:
-        target_matrix = ml_utils.dilate_ternary_target_images(
-            target_matrix=target_matrix,
-            dilation_distance_metres=dilation_distance_metres,
-            verbose=False)
+    target_matrix = trainval_io.read_target_matrix(
+        frontal_grid_file_name=frontal_grid_file_name, num_classes=num_classes,
+        dilation_distance_metres=dilation_distance_metres,
+        subset_for_fcn_input=True)
 
     predictor_matrix = predictor_matrix.astype('float32')
     print 'Fraction of pixels with a front = {0:.4f}'.format(
@@ -484,35 +425,15 @@ def create_full_size_4d_example(
 
     predictor_matrix = ml_utils.stack_time_steps(tuple_of_4d_predictor_matrices)
 
-    print 'Reading data from: "{0:s}"...'.format(frontal_grid_file_name)
-    frontal_grid_table = fronts_io.read_narr_grids_from_file(
-        frontal_grid_file_name)
-
     print 'Processing full-size 4-D machine-learning example...'
     predictor_matrix, _ = ml_utils.normalize_predictors(
         predictor_matrix=predictor_matrix)
 
-    target_matrix = ml_utils.front_table_to_images(
-        frontal_grid_table=frontal_grid_table,
-        num_rows_per_image=predictor_matrix.shape[1],
-        num_columns_per_image=predictor_matrix.shape[2])
-
-    if num_classes == 2:
-        target_matrix = ml_utils.binarize_front_images(target_matrix)
-
     predictor_matrix = ml_utils.subset_narr_grid_for_fcn_input(predictor_matrix)
-    target_matrix = ml_utils.subset_narr_grid_for_fcn_input(target_matrix)
-
-    if num_classes == 2:
-        target_matrix = ml_utils.dilate_binary_target_images(
-            target_matrix=target_matrix,
-            dilation_distance_metres=dilation_distance_metres,
-            verbose=False)
-    else:
-        target_matrix = ml_utils.dilate_ternary_target_images(
-            target_matrix=target_matrix,
-            dilation_distance_metres=dilation_distance_metres,
-            verbose=False)
+    target_matrix = trainval_io.read_target_matrix(
+        frontal_grid_file_name=frontal_grid_file_name, num_classes=num_classes,
+        dilation_distance_metres=dilation_distance_metres,
+        subset_for_fcn_input=True)
 
     predictor_matrix = predictor_matrix.astype('float32')
     print 'Fraction of pixels with a front = {0:.4f}'.format(
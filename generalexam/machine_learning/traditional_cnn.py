@@ -32,9 +32,15 @@ Target variable = label at one pixel.  For a downsized example, there is only
 one target variable (the label at the center pixel).
 """
 
+import copy
+import Queue
 import pickle
 import os.path
+import threading
 import numpy
+import keras.layers
+import keras.models
+import keras.backend as K
 from keras.models import load_model
 from keras.callbacks import ModelCheckpoint
 from gewittergefahr.gg_utils import nwp_model_utils
@@ -102,6 +108,233 @@ LIST_OF_METRIC_FUNCTIONS = [
 NUM_ROWS_IN_NARR, NUM_COLUMNS_IN_NARR = nwp_model_utils.get_grid_dimensions(
     model_name=nwp_model_utils.NARR_MODEL_NAME)
 
+DEFAULT_NUM_EXAMPLES_PER_INFERENCE_BATCH = 2048
+
+POOLING_LAYER_TYPE_STRINGS = ['MaxPooling2D', 'AveragePooling2D']
+ELEMENTWISE_LAYER_TYPE_STRINGS = [
+    'Activation', 'LeakyReLU', 'ELU', 'ReLU', 'ThresholdedReLU', 'Softmax',
+    'BatchNormalization'
+]
+INFERENCE_NO_OP_LAYER_TYPE_STRINGS = [
+    'Dropout', 'SpatialDropout2D', 'GaussianDropout', 'GaussianNoise'
+]
+
+
+def _dilated_pooling(input_tensor, pool_size, dilation_rate, do_max_pooling):
+    """Pools with a stride of 1 and dilated window.
+
+    This is equivalent to `keras.layers.MaxPooling2D` or
+    `keras.layers.AveragePooling2D` with strides of 1, except that the pixels in
+    each window are `dilation_rate` apart.
+
+    :param input_tensor: E-by-M-by-N-by-C tensor.
+    :param pool_size: length-2 tuple with number of rows and columns in each
+        pooling window.
+    :param dilation_rate: length-2 tuple with row and column spacing between
+        pixels in each pooling window.
+    :param do_max_pooling: Boolean flag.  If True, will do max-pooling.  If
+        False, will do average-pooling.
+    :return: output_tensor: E-by-m-by-n-by-C tensor, where
+        m = M - (pool_size[0] - 1) * dilation_rate[0] and
+        n = N - (pool_size[1] - 1) * dilation_rate[1].
+    """
+
+    num_rows_to_cut = (pool_size[0] - 1) * dilation_rate[0]
+    num_columns_to_cut = (pool_size[1] - 1) * dilation_rate[1]
+    output_tensor = None
+
+    for i in range(pool_size[0]):
+        this_first_row = i * dilation_rate[0]
+        this_last_row = this_first_row - num_rows_to_cut
+        if this_last_row == 0:
+            this_last_row = None
+
+        for j in range(pool_size[1]):
+            this_first_column = j * dilation_rate[1]
+            this_last_column = this_first_column - num_columns_to_cut
+            if this_last_column == 0:
+                this_last_column = None
+
+            this_tensor = input_tensor[
+                :, this_first_row:this_last_row,
+                this_first_column:this_last_column, :
+            ]
+
+            if output_tensor is None:
+                output_tensor = this_tensor
+            elif do_max_pooling:
+                output_tensor = K.maximum(output_tensor, this_tensor)
+            else:
+                output_tensor = output_tensor + this_tensor
+
+    if not do_max_pooling:
+        output_tensor = output_tensor / float(pool_size[0] * pool_size[1])
+
+    return output_tensor
+
+
+def _is_fully_convolutional(model_object):
+    """Determines whether or not model is fully convolutional.
+
+    :param model_object: Instance of `keras.models.Model`.
+    :return: is_fully_convolutional: Boolean flag.  If True, the model was
+        created by `convert_to_fully_convolutional` (it accepts grids of any
+        size).
+    """
+
+    return model_object.input_shape[1] is None
+
+
+def _create_empty_predictions(num_classes):
+    """Creates output matrices for a full grid with every grid cell masked out.
+
+    :param num_classes: Number of classes.
+    :return: class_probability_matrix: See output doc for
+        `apply_model_to_3d_example`.  All values are NaN.
+    :return: target_matrix: Same.  All values are -1.
+    """
+
+    class_probability_matrix = numpy.full(
+        (1, NUM_ROWS_IN_NARR, NUM_COLUMNS_IN_NARR, num_classes), numpy.nan)
+    target_matrix = numpy.full(
+        (1, NUM_ROWS_IN_NARR, NUM_COLUMNS_IN_NARR), -1, dtype=int)
+
+    return class_probability_matrix, target_matrix
+
+
+def _apply_model_to_full_grid(
+        model_object, full_predictor_matrix, full_target_matrix,
+        narr_mask_matrix, num_rows_in_half_grid, num_columns_in_half_grid,
+        num_classes, num_examples_per_batch):
+    """Applies trained CNN to each unmasked grid cell in a full-size example.
+
+    Downsized examples (one centered at each unmasked grid cell) are created
+    lazily, `num_examples_per_batch` at a time, in a background thread.  Thus,
+    creating the next batch overlaps with `model_object.predict` on the current
+    batch, and at most two batches are held in memory at once.  If
+    `model_object.predict` fails, the background thread is stopped before the
+    error is raised.
+
+    If the model is fully convolutional (see `convert_to_fully_convolutional`),
+    it is applied to the whole padded grid in one forward pass instead.
+
+    P = number of rows in full NARR grid
+    Q = number of columns in full NARR grid
+
+    :param model_object: Trained instance of `keras.models.Sequential`.
+    :param full_predictor_matrix: 1-by-P-by-Q-by-C or 1-by-P-by-Q-by-T-by-C
+        numpy array of predictor values.
+    :param full_target_matrix: 1-by-P-by-Q numpy array of target values.
+    :param narr_mask_matrix: See doc for `apply_model_to_3d_example`.
+    :param num_rows_in_half_grid: Same.
+    :param num_columns_in_half_grid: Same.
+    :param num_classes: Same.
+    :param num_examples_per_batch: Same.
+    :return: class_probability_matrix: Same.
+    :return: target_matrix: Same.
+    """
+
+    error_checking.assert_is_integer(num_examples_per_batch)
+    error_checking.assert_is_geq(num_examples_per_batch, 1)
+
+    class_probability_matrix, target_matrix = _create_empty_predictions(
+        num_classes)
+
+    row_indices, column_indices = numpy.where(narr_mask_matrix == 1)
+    target_matrix[0, row_indices, column_indices] = full_target_matrix[
+        0, row_indices, column_indices]
+
+    num_points = len(row_indices)
+    if num_points == 0:
+        return class_probability_matrix, target_matrix
+
+    first_indices_by_batch = numpy.array(
+        range(0, num_points, num_examples_per_batch), dtype=int)
+    num_batches = len(first_indices_by_batch)
+
+    padded_predictor_matrix = ml_utils.pad_predictor_images(
+        predictor_matrix=full_predictor_matrix,
+        num_rows_in_half_window=num_rows_in_half_grid,
+        num_columns_in_half_window=num_columns_in_half_grid)
+
+    if _is_fully_convolutional(model_object):
+        print 'Applying fully convolutional CNN to full grid...'
+
+        this_probability_matrix = model_object.predict(
+            padded_predictor_matrix.astype('float32'), batch_size=1
+        )[:, :NUM_ROWS_IN_NARR, :NUM_COLUMNS_IN_NARR, :]
+
+        class_probability_matrix[
+            0, row_indices, column_indices, ...
+        ] = this_probability_matrix[0, row_indices, column_indices, ...]
+
+        return class_probability_matrix, target_matrix
+
+    # Holds at most one batch that has been created but not yet used.
+    batch_queue = Queue.Queue(maxsize=1)
+    stop_event = threading.Event()
+
+    def _create_batches():
+        """Creates downsized examples for each batch and adds to queue."""
+
+        try:
+            for this_first_index in first_indices_by_batch:
+                if stop_event.is_set():
+                    return
+
+                this_last_index = min(
+                    [this_first_index + num_examples_per_batch, num_points])
+                these_rows = row_indices[this_first_index:this_last_index]
+                these_columns = column_indices[
+                    this_first_index:this_last_index]
+
+                this_predictor_matrix = (
+                    ml_utils.extract_windows_from_padded_images(
+                        padded_predictor_matrix=padded_predictor_matrix,
+                        example_indices=numpy.full(
+                            len(these_rows), 0, dtype=int),
+                        center_rows=these_rows, center_columns=these_columns,
+                        num_rows_in_half_window=num_rows_in_half_grid,
+                        num_columns_in_half_window=num_columns_in_half_grid)
+                ).astype('float32')
+
+                batch_queue.put((these_rows, these_columns,
+                                 this_predictor_matrix))
+        except Exception as this_exception:
+            batch_queue.put(this_exception)
+
+    creation_thread = threading.Thread(target=_create_batches)
+    creation_thread.daemon = True
+    creation_thread.start()
+
+    try:
+        for i in range(num_batches):
+            print 'Applying CNN to {0:d}th of {1:d} batches...'.format(
+                i + 1, num_batches)
+
+            this_batch = batch_queue.get()
+            if isinstance(this_batch, Exception):
+                raise this_batch
+
+            these_rows, these_columns, this_predictor_matrix = this_batch
+            class_probability_matrix[
+                0, these_rows, these_columns, ...
+            ] = model_object.predict(
+                this_predictor_matrix, batch_size=num_examples_per_batch)
+    finally:
+
+        # If the thread is blocked on `put`, removing the waiting batch lets it
+        # finish.  It will then see the stop event and create no more batches.
+        stop_event.set()
+        try:
+            batch_queue.get_nowait()
+        except Queue.Empty:
+            pass
+
+        creation_thread.join()
+
+    return class_probability_matrix, target_matrix
+
 
 def get_flattening_layer(model_object):
     """Finds flattening layer in CNN.
@@ -131,6 +364,157 @@ def get_flattening_layer(model_object):
     return layer_names[flattening_indices[0]]
 
 
+def convert_to_fully_convolutional(model_object):
+    """Converts patch CNN to equivalent fully convolutional model.
+
+    The patch CNN (traditional CNN) outputs one set of class probabilities for
+    each downsized example (the center pixel).  The fully convolutional model
+    outputs one set of class probabilities for each pixel in a full grid, which
+    makes full-grid prediction much cheaper, since convolutions are not
+    repeated for overlapping windows.
+
+    Layers before the flattening layer (see `get_flattening_layer`) are copied
+    with a stride of 1, and the dilation rate of each later conv or pooling
+    layer is multiplied by the stride of each earlier layer.  The dense layers
+    after the flattening layer are converted to conv layers.  The first dense
+    layer covers the whole feature map that went into the flattening layer;
+    each subsequent dense layer becomes a 1-by-1 convolution.  Dropout layers
+    are removed, since they do nothing at inference time.
+
+    Input to the fully convolutional model should be an edge-padded full grid
+    (see `apply_model_to_3d_example`).  The [i, j]th pixel of the output
+    corresponds to the downsized example centered at the [i, j]th pixel of the
+    unpadded grid.
+
+    :param model_object: Trained CNN (instance of `keras.models.Model` or
+        `keras.models.Sequential`), with 2-D convolution only.
+    :return: fully_conv_model_object: Fully convolutional version of
+        `model_object` (instance of `keras.models.Model`).
+    :raises: TypeError: if `model_object` contains a layer that cannot be
+        converted.
+    """
+
+    flattening_layer_name = get_flattening_layer(model_object)
+
+    input_dimensions = model_object.input_shape
+    if len(input_dimensions) != 4:
+        error_string = (
+            'Only models with 2-D convolution can be converted.  This model has'
+            ' input dimensions {0:s}.'
+        ).format(str(input_dimensions))
+
+        raise TypeError(error_string)
+
+    input_layer_object = keras.layers.Input(
+        shape=(None, None, input_dimensions[-1]))
+    current_layer_object = input_layer_object
+
+    row_dilation_rate = 1
+    column_dilation_rate = 1
+    flattened_dimensions = None
+    found_first_dense_layer = False
+
+    for this_orig_layer_object in model_object.layers:
+        this_type_string = type(this_orig_layer_object).__name__
+        if this_type_string == 'InputLayer':
+            continue
+        if this_type_string in INFERENCE_NO_OP_LAYER_TYPE_STRINGS:
+            continue
+
+        if this_orig_layer_object.name == flattening_layer_name:
+            flattened_dimensions = this_orig_layer_object.input_shape[1:]
+            continue
+
+        this_config_dict = this_orig_layer_object.get_config()
+        these_weight_matrices = this_orig_layer_object.get_weights()
+        is_before_flattening = flattened_dimensions is None
+
+        if this_type_string == 'Conv2D' and is_before_flattening:
+            if this_config_dict['padding'] != 'valid':
+                error_string = (
+                    'Conv layer "{0:s}" has "{1:s}" padding.  Only "valid" '
+                    'padding can be converted.'
+                ).format(this_orig_layer_object.name,
+                         this_config_dict['padding'])
+
+                raise TypeError(error_string)
+
+            these_strides = this_config_dict['strides']
+            this_config_dict['dilation_rate'] = (
+                this_config_dict['dilation_rate'][0] * row_dilation_rate,
+                this_config_dict['dilation_rate'][1] * column_dilation_rate
+            )
+            this_config_dict['strides'] = (1, 1)
+            row_dilation_rate *= these_strides[0]
+            column_dilation_rate *= these_strides[1]
+
+            this_new_layer_object = keras.layers.Conv2D.from_config(
+                this_config_dict)
+
+        elif (this_type_string in POOLING_LAYER_TYPE_STRINGS and
+              is_before_flattening):
+            if this_config_dict['padding'] != 'valid':
+                error_string = (
+                    'Pooling layer "{0:s}" has "{1:s}" padding.  Only "valid" '
+                    'padding can be converted.'
+                ).format(this_orig_layer_object.name,
+                         this_config_dict['padding'])
+
+                raise TypeError(error_string)
+
+            these_strides = this_config_dict['strides']
+            this_new_layer_object = keras.layers.Lambda(
+                _dilated_pooling, arguments={
+                    'pool_size': tuple(this_config_dict['pool_size']),
+                    'dilation_rate': (row_dilation_rate, column_dilation_rate),
+                    'do_max_pooling': this_type_string == 'MaxPooling2D'
+                })
+
+            row_dilation_rate *= these_strides[0]
+            column_dilation_rate *= these_strides[1]
+
+        elif this_type_string in ELEMENTWISE_LAYER_TYPE_STRINGS:
+            this_new_layer_object = type(this_orig_layer_object).from_config(
+                this_config_dict)
+
+        elif this_type_string == 'Dense' and not is_before_flattening:
+            if found_first_dense_layer:
+                these_kernel_dimensions = (1, 1)
+                this_dilation_rate = (1, 1)
+            else:
+                these_kernel_dimensions = tuple(flattened_dimensions[:2])
+                this_dilation_rate = (row_dilation_rate, column_dilation_rate)
+                found_first_dense_layer = True
+
+            these_weight_matrices[0] = numpy.reshape(
+                these_weight_matrices[0],
+                these_kernel_dimensions + (-1, this_config_dict['units'])
+            )
+
+            this_new_layer_object = keras.layers.Conv2D(
+                filters=this_config_dict['units'],
+                kernel_size=these_kernel_dimensions, strides=(1, 1),
+                padding='valid', data_format='channels_last',
+                dilation_rate=this_dilation_rate,
+                activation=this_config_dict['activation'],
+                use_bias=this_config_dict['use_bias'])
+
+        else:
+            error_string = (
+                'Layer "{0:s}" (type "{1:s}") cannot be converted to a fully '
+                'convolutional layer.'
+            ).format(this_orig_layer_object.name, this_type_string)
+
+            raise TypeError(error_string)
+
+        current_layer_object = this_new_layer_object(current_layer_object)
+        if len(these_weight_matrices) > 0:
+            this_new_layer_object.set_weights(these_weight_matrices)
+
+    return keras.models.Model(
+        inputs=input_layer_object, outputs=current_layer_object)
+
+
 def find_metafile(model_file_name, raise_error_if_missing=True):
     """Finds metafile (should be written by `write_model_metadata`).
 
@@ -274,7 +658,9 @@ def train_with_3d_examples(
         class_fractions, num_rows_in_half_grid, num_columns_in_half_grid,
         weight_loss_function=True, num_validation_batches_per_epoch=None,
         validation_start_time_unix_sec=None, validation_end_time_unix_sec=None,
-        narr_mask_matrix=None):
+        narr_mask_matrix=None, num_prefetch_workers=1,
+        num_batches_to_prefetch=trainval_io.DEFAULT_NUM_BATCHES_TO_PREFETCH,
+        random_seed=None):
     """Trains CNN, using 3-D examples created on the fly.
 
     :param model_object: Instance of `keras.models.Sequential`.
@@ -305,6 +691,12 @@ def train_with_3d_examples(
         `training_validation_io.downsized_3d_example_generator`.
     :param validation_end_time_unix_sec: Same.
     :param narr_mask_matrix: Same.
+    :param num_prefetch_workers: Number of background workers creating training
+        batches (and, separately, validation batches).  See doc for
+        `training_validation_io.prefetch_batches`.
+    :param num_batches_to_prefetch: See doc for
+        `training_validation_io.prefetch_batches`.
+    :param random_seed: Same.
     """
 
     error_checking.assert_is_integer(num_epochs)
@@ -319,29 +711,39 @@ def train_with_3d_examples(
     else:
         class_weight_dict = None
 
+    training_generator_kwargs = {
+        'num_examples_per_batch': num_examples_per_batch,
+        'num_examples_per_target_time': num_examples_per_target_time,
+        'first_target_time_unix_sec': training_start_time_unix_sec,
+        'last_target_time_unix_sec': training_end_time_unix_sec,
+        'top_narr_directory_name': top_narr_directory_name,
+        'top_frontal_grid_dir_name': top_frontal_grid_dir_name,
+        'narr_predictor_names': narr_predictor_names,
+        'pressure_level_mb': pressure_level_mb,
+        'dilation_distance_metres': dilation_distance_metres,
+        'class_fractions': class_fractions,
+        'num_rows_in_half_grid': num_rows_in_half_grid,
+        'num_columns_in_half_grid': num_columns_in_half_grid,
+        'narr_mask_matrix': narr_mask_matrix
+    }
+
+    training_generator = trainval_io.prefetch_batches(
+        generator_function=trainval_io.downsized_3d_example_generator,
+        generator_kwargs=training_generator_kwargs,
+        num_workers=num_prefetch_workers,
+        num_batches_to_prefetch=num_batches_to_prefetch,
+        random_seed=random_seed)
+
     if num_validation_batches_per_epoch is None:
         checkpoint_object = ModelCheckpoint(
             output_file_name, monitor='loss', verbose=1, save_best_only=False,
             save_weights_only=False, mode='min', period=1)
 
         model_object.fit_generator(
-            generator=trainval_io.downsized_3d_example_generator(
-                num_examples_per_batch=num_examples_per_batch,
-                num_examples_per_target_time=num_examples_per_target_time,
-                first_target_time_unix_sec=training_start_time_unix_sec,
-                last_target_time_unix_sec=training_end_time_unix_sec,
-                top_narr_directory_name=top_narr_directory_name,
-                top_frontal_grid_dir_name=top_frontal_grid_dir_name,
-                narr_predictor_names=narr_predictor_names,
-                pressure_level_mb=pressure_level_mb,
-                dilation_distance_metres=dilation_distance_metres,
-                class_fractions=class_fractions,
-                num_rows_in_half_grid=num_rows_in_half_grid,
-                num_columns_in_half_grid=num_columns_in_half_grid,
-                narr_mask_matrix=narr_mask_matrix),
+            generator=training_generator,
             steps_per_epoch=num_training_batches_per_epoch, epochs=num_epochs,
             verbose=1, class_weight=class_weight_dict,
-            callbacks=[checkpoint_object])
+            callbacks=[checkpoint_object], workers=0)
 
     else:
         error_checking.assert_is_integer(num_validation_batches_per_epoch)
@@ -351,39 +753,30 @@ def train_with_3d_examples(
             output_file_name, monitor='val_loss', verbose=1,
             save_best_only=True, save_weights_only=False, mode='min', period=1)
 
+        validation_generator_kwargs = copy.deepcopy(training_generator_kwargs)
+        validation_generator_kwargs.update({
+            'first_target_time_unix_sec': validation_start_time_unix_sec,
+            'last_target_time_unix_sec': validation_end_time_unix_sec
+        })
+
+        if random_seed is None:
+            validation_random_seed = None
+        else:
+            validation_random_seed = random_seed + num_prefetch_workers
+
+        validation_generator = trainval_io.prefetch_batches(
+            generator_function=trainval_io.downsized_3d_example_generator,
+            generator_kwargs=validation_generator_kwargs,
+            num_workers=num_prefetch_workers,
+            num_batches_to_prefetch=num_batches_to_prefetch,
+            random_seed=validation_random_seed)
+
         model_object.fit_generator(
-            generator=trainval_io.downsized_3d_example_generator(
-                num_examples_per_batch=num_examples_per_batch,
-                num_examples_per_target_time=num_examples_per_target_time,
-                first_target_time_unix_sec=training_start_time_unix_sec,
-                last_target_time_unix_sec=training_end_time_unix_sec,
-                top_narr_directory_name=top_narr_directory_name,
-                top_frontal_grid_dir_name=top_frontal_grid_dir_name,
-                narr_predictor_names=narr_predictor_names,
-                pressure_level_mb=pressure_level_mb,
-                dilation_distance_metres=dilation_distance_metres,
-                class_fractions=class_fractions,
-                num_rows_in_half_grid=num_rows_in_half_grid,
-                num_columns_in_half_grid=num_columns_in_half_grid,
-                narr_mask_matrix=narr_mask_matrix),
+            generator=training_generator,
             steps_per_epoch=num_training_batches_per_epoch, epochs=num_epochs,
             verbose=1, class_weight=class_weight_dict,
-            callbacks=[checkpoint_object],
-            validation_data=
-            trainval_io.downsized_3d_example_generator(
-                num_examples_per_batch=num_examples_per_batch,
-                num_examples_per_target_time=num_examples_per_target_time,
-                first_target_time_unix_sec=validation_start_time_unix_sec,
-                last_target_time_unix_sec=validation_end_time_unix_sec,
-                top_narr_directory_name=top_narr_directory_name,
-                top_frontal_grid_dir_name=top_frontal_grid_dir_name,
-                narr_predictor_names=narr_predictor_names,
-                pressure_level_mb=pressure_level_mb,
-                dilation_distance_metres=dilation_distance_metres,
-                class_fractions=class_fractions,
-                num_rows_in_half_grid=num_rows_in_half_grid,
-                num_columns_in_half_grid=num_columns_in_half_grid,
-                narr_mask_matrix=narr_mask_matrix),
+            callbacks=[checkpoint_object], workers=0,
+            validation_data=validation_generator,
             validation_steps=num_validation_batches_per_epoch)
 
 
@@ -610,10 +1003,13 @@ def apply_model_to_3d_example(
         top_frontal_grid_dir_name, narr_predictor_names, pressure_level_mb,
         dilation_distance_metres, num_rows_in_half_grid,
         num_columns_in_half_grid, num_classes,
-        isotonic_model_object_by_class=None, narr_mask_matrix=None):
+        isotonic_model_object_by_class=None, narr_mask_matrix=None,
+        num_examples_per_batch=DEFAULT_NUM_EXAMPLES_PER_INFERENCE_BATCH):
     """Applies trained CNN to a 3-D example.
 
-    :param model_object: Trained instance of `keras.models.Sequential`.
+    :param model_object: Trained instance of `keras.models.Sequential`.  This
+        may also be the output of `convert_to_fully_convolutional`, in which
+        case predictions for the whole grid are made in one forward pass.
     :param target_time_unix_sec: See doc for
         `testing_io.create_downsized_3d_examples`.
     :param top_narr_directory_name: Same.
@@ -632,6 +1028,9 @@ def apply_model_to_3d_example(
         narr_mask_matrix[i, j] = 0, the model will not be applied to grid cell
         [i, j].  If `narr_mask_matrix is None`, the model will be applied to all
         grid cells.
+    :param num_examples_per_batch: Number of downsized examples (grid cells)
+        passed to the model at once.  Larger batches are faster but use more
+        memory.
     :return: class_probability_matrix: 1-by-M-by-N-by-K numpy array of predicted
         class probabilities.  If grid cell [i, j] is masked out (due to
         `narr_mask_matrix`), class_probability_matrix[0, i, j, :] = NaN.
@@ -646,59 +1045,36 @@ def apply_model_to_3d_example(
 
     ml_utils.check_narr_mask(narr_mask_matrix)
 
-    class_probability_matrix = numpy.full(
-        (1, NUM_ROWS_IN_NARR, NUM_COLUMNS_IN_NARR, num_classes), numpy.nan)
-    target_matrix = numpy.full(
-        (1, NUM_ROWS_IN_NARR, NUM_COLUMNS_IN_NARR), -1, dtype=int)
-
-    full_predictor_matrix = None
-    full_target_matrix = None
-
-    for i in range(NUM_ROWS_IN_NARR):
-        these_column_indices = numpy.where(narr_mask_matrix[i, :] == 1)[0]
-        if len(these_column_indices) == 0:
-            continue
-
-        these_row_indices = numpy.full(len(these_column_indices), i, dtype=int)
-
-        if full_predictor_matrix is None:
-            (this_downsized_predictor_matrix,
-             target_matrix[:, these_row_indices, these_column_indices],
-             full_predictor_matrix, full_target_matrix
-            ) = testing_io.create_downsized_3d_examples(
-                center_row_indices=these_row_indices,
-                center_column_indices=these_column_indices,
-                num_rows_in_half_grid=num_rows_in_half_grid,
-                num_columns_in_half_grid=num_columns_in_half_grid,
-                target_time_unix_sec=target_time_unix_sec,
-                top_narr_directory_name=top_narr_directory_name,
-                top_frontal_grid_dir_name=top_frontal_grid_dir_name,
-                narr_predictor_names=narr_predictor_names,
-                pressure_level_mb=pressure_level_mb,
-                dilation_distance_metres=dilation_distance_metres,
-                num_classes=num_classes)
-
-        else:
-            (this_downsized_predictor_matrix,
-             target_matrix[:, these_row_indices, these_column_indices]
-            ) = testing_io.create_downsized_3d_examples(
-                center_row_indices=these_row_indices,
-                center_column_indices=these_column_indices,
-                num_rows_in_half_grid=num_rows_in_half_grid,
-                num_columns_in_half_grid=num_columns_in_half_grid,
-                full_predictor_matrix=full_predictor_matrix,
-                full_target_matrix=full_target_matrix, num_classes=num_classes
-            )[:2]
-
-        class_probability_matrix[
-            0, these_row_indices, these_column_indices, ...
-        ] = model_object.predict(
-            this_downsized_predictor_matrix, batch_size=len(these_row_indices))
+    # Create only one downsized example here, just to read the full grids.
+    these_row_indices, these_column_indices = numpy.where(
+        narr_mask_matrix == 1)
+    if len(these_row_indices) == 0:
+        return _create_empty_predictions(num_classes)
+
+    full_predictor_matrix, full_target_matrix = (
+        testing_io.create_downsized_3d_examples(
+            center_row_indices=these_row_indices[:1],
+            center_column_indices=these_column_indices[:1],
+            num_rows_in_half_grid=num_rows_in_half_grid,
+            num_columns_in_half_grid=num_columns_in_half_grid,
+            target_time_unix_sec=target_time_unix_sec,
+            top_narr_directory_name=top_narr_directory_name,
+            top_frontal_grid_dir_name=top_frontal_grid_dir_name,
+            narr_predictor_names=narr_predictor_names,
+            pressure_level_mb=pressure_level_mb,
+            dilation_distance_metres=dilation_distance_metres,
+            num_classes=num_classes)
+    )[2:]
+
+    class_probability_matrix, target_matrix = _apply_model_to_full_grid(
+        model_object=model_object, full_predictor_matrix=full_predictor_matrix,
+        full_target_matrix=full_target_matrix,
+        narr_mask_matrix=narr_mask_matrix,
+        num_rows_in_half_grid=num_rows_in_half_grid,
+        num_columns_in_half_grid=num_columns_in_half_grid,
+        num_classes=num_classes, num_examples_per_batch=num_examples_per_batch)
 
     if isotonic_model_object_by_class is not None:
-        these_row_indices, these_column_indices = numpy.where(
-            narr_mask_matrix == 1)
-
         class_probability_matrix[
             0, these_row_indices, these_column_indices, ...
         ] = isotonic_regression.apply_model_for_each_class(
@@ -717,7 +1093,8 @@ def apply_model_to_4d_example(
         top_frontal_grid_dir_name, narr_predictor_names, pressure_level_mb,
         dilation_distance_metres, num_rows_in_half_grid,
         num_columns_in_half_grid, num_classes,
-        isotonic_model_object_by_class=None, narr_mask_matrix=None):
+        isotonic_model_object_by_class=None, narr_mask_matrix=None,
+        num_examples_per_batch=DEFAULT_NUM_EXAMPLES_PER_INFERENCE_BATCH):
     """Applies trained CNN to a 4-D example.
 
     :param model_object: Trained instance of `keras.models.Sequential`.
@@ -736,6 +1113,7 @@ def apply_model_to_4d_example(
     :param isotonic_model_object_by_class: See doc for
         `apply_model_to_3d_example`.
     :param narr_mask_matrix: Same.
+    :param num_examples_per_batch: Same.
     :return: class_probability_matrix: Same.
     :return: target_matrix: Same.
     """
@@ -746,61 +1124,38 @@ def apply_model_to_4d_example(
 
     ml_utils.check_narr_mask(narr_mask_matrix)
 
-    class_probability_matrix = numpy.full(
-        (1, NUM_ROWS_IN_NARR, NUM_COLUMNS_IN_NARR, num_classes), numpy.nan)
-    target_matrix = numpy.full(
-        (1, NUM_ROWS_IN_NARR, NUM_COLUMNS_IN_NARR), -1, dtype=int)
-
-    full_predictor_matrix = None
-    full_target_matrix = None
-
-    for i in range(NUM_ROWS_IN_NARR):
-        these_column_indices = numpy.where(narr_mask_matrix[i, :] == 1)[0]
-        if len(these_column_indices) == 0:
-            continue
-
-        these_row_indices = numpy.full(len(these_column_indices), i, dtype=int)
-
-        if full_predictor_matrix is None:
-            (this_downsized_predictor_matrix,
-             target_matrix[:, these_row_indices, these_column_indices],
-             full_predictor_matrix, full_target_matrix
-            ) = testing_io.create_downsized_4d_examples(
-                center_row_indices=these_row_indices,
-                center_column_indices=these_column_indices,
-                num_rows_in_half_grid=num_rows_in_half_grid,
-                num_columns_in_half_grid=num_columns_in_half_grid,
-                target_time_unix_sec=target_time_unix_sec,
-                predictor_time_step_offsets=predictor_time_step_offsets,
-                num_lead_time_steps=num_lead_time_steps,
-                top_narr_directory_name=top_narr_directory_name,
-                top_frontal_grid_dir_name=top_frontal_grid_dir_name,
-                narr_predictor_names=narr_predictor_names,
-                pressure_level_mb=pressure_level_mb,
-                dilation_distance_metres=dilation_distance_metres,
-                num_classes=num_classes)
-
-        else:
-            (this_downsized_predictor_matrix,
-             target_matrix[:, these_row_indices, these_column_indices]
-            ) = testing_io.create_downsized_4d_examples(
-                center_row_indices=these_row_indices,
-                center_column_indices=these_column_indices,
-                num_rows_in_half_grid=num_rows_in_half_grid,
-                num_columns_in_half_grid=num_columns_in_half_grid,
-                full_predictor_matrix=full_predictor_matrix,
-                full_target_matrix=full_target_matrix, num_classes=num_classes
-            )[:2]
-
-        class_probability_matrix[
-            0, these_row_indices, these_column_indices, ...
-        ] = model_object.predict(
-            this_downsized_predictor_matrix, batch_size=len(these_row_indices))
+    # Create only one downsized example here, just to read the full grids.
+    these_row_indices, these_column_indices = numpy.where(
+        narr_mask_matrix == 1)
+    if len(these_row_indices) == 0:
+        return _create_empty_predictions(num_classes)
+
+    full_predictor_matrix, full_target_matrix = (
+        testing_io.create_downsized_4d_examples(
+            center_row_indices=these_row_indices[:1],
+            center_column_indices=these_column_indices[:1],
+            num_rows_in_half_grid=num_rows_in_half_grid,
+            num_columns_in_half_grid=num_columns_in_half_grid,
+            target_time_unix_sec=target_time_unix_sec,
+            predictor_time_step_offsets=predictor_time_step_offsets,
+            num_lead_time_steps=num_lead_time_steps,
+            top_narr_directory_name=top_narr_directory_name,
+            top_frontal_grid_dir_name=top_frontal_grid_dir_name,
+            narr_predictor_names=narr_predictor_names,
+            pressure_level_mb=pressure_level_mb,
+            dilation_distance_metres=dilation_distance_metres,
+            num_classes=num_classes)
+    )[2:]
+
+    class_probability_matrix, target_matrix = _apply_model_to_full_grid(
+        model_object=model_object, full_predictor_matrix=full_predictor_matrix,
+        full_target_matrix=full_target_matrix,
+        narr_mask_matrix=narr_mask_matrix,
+        num_rows_in_half_grid=num_rows_in_half_grid,
+        num_columns_in_half_grid=num_columns_in_half_grid,
+        num_classes=num_classes, num_examples_per_batch=num_examples_per_batch)
 
     if isotonic_model_object_by_class is not None:
-        these_row_indices, these_column_indices = numpy.where(
-            narr_mask_matrix == 1)
-
         class_probability_matrix[
             0, these_row_indices, these_column_indices, ...
         ] = isotonic_regression.apply_model_for_each_class(
@@ -1,11 +1,223 @@
 """Unit tests for traditional_cnn.py."""
 
 import unittest
+import threading
+import numpy
+import keras.layers
+import keras.models
+import keras.backend as K
 from generalexam.machine_learning import traditional_cnn
+from generalexam.machine_learning import testing_io
 
 MODEL_FILE_NAME = 'foo/bar/model.h5'
 MODEL_METAFILE_NAME = 'foo/bar/model_metadata.p'
 
+TOLERANCE = 1e-6
+
+# The following constants are used to test _dilated_pooling.
+POOL_SIZE = (2, 2)
+POOLING_DILATION_RATE = (2, 1)
+
+POOLING_INPUT_MATRIX = numpy.array([[1, 2, 3, 4],
+                                    [5, 6, 7, 8],
+                                    [9, 10, 11, 12],
+                                    [13, 14, 15, 16]], dtype=float)
+POOLING_INPUT_MATRIX = numpy.expand_dims(POOLING_INPUT_MATRIX, axis=0)
+POOLING_INPUT_MATRIX = numpy.expand_dims(POOLING_INPUT_MATRIX, axis=-1)
+
+MAX_POOLED_MATRIX = numpy.array([[10, 11, 12],
+                                 [14, 15, 16]], dtype=float)
+MAX_POOLED_MATRIX = numpy.expand_dims(MAX_POOLED_MATRIX, axis=0)
+MAX_POOLED_MATRIX = numpy.expand_dims(MAX_POOLED_MATRIX, axis=-1)
+
+AVERAGE_POOLED_MATRIX = numpy.array([[5.5, 6.5, 7.5],
+                                     [9.5, 10.5, 11.5]])
+AVERAGE_POOLED_MATRIX = numpy.expand_dims(AVERAGE_POOLED_MATRIX, axis=0)
+AVERAGE_POOLED_MATRIX = numpy.expand_dims(AVERAGE_POOLED_MATRIX, axis=-1)
+
+# The following constants are used to test convert_to_fully_convolutional.
+NUM_ROWS_IN_HALF_GRID = 4
+NUM_COLUMNS_IN_HALF_GRID = 6
+NUM_PREDICTORS = 2
+NUM_CLASSES = 3
+NUM_SAMPLED_PIXELS = 20
+NUM_EXAMPLES_PER_BATCH = 8
+PROBABILITY_TOLERANCE = 1e-5
+
+numpy.random.seed(6695)
+
+FULL_PREDICTOR_MATRIX = numpy.random.normal(
+    size=(1, traditional_cnn.NUM_ROWS_IN_NARR,
+          traditional_cnn.NUM_COLUMNS_IN_NARR, NUM_PREDICTORS))
+FULL_TARGET_MATRIX = numpy.random.randint(
+    low=0, high=NUM_CLASSES,
+    size=(1, traditional_cnn.NUM_ROWS_IN_NARR,
+          traditional_cnn.NUM_COLUMNS_IN_NARR))
+
+SAMPLED_ROW_INDICES = numpy.random.randint(
+    low=0, high=traditional_cnn.NUM_ROWS_IN_NARR, size=NUM_SAMPLED_PIXELS)
+SAMPLED_COLUMN_INDICES = numpy.random.randint(
+    low=0, high=traditional_cnn.NUM_COLUMNS_IN_NARR, size=NUM_SAMPLED_PIXELS)
+
+# Includes pixels at the edge of the grid, where windows are edge-padded.
+SAMPLED_ROW_INDICES[:2] = numpy.array(
+    [0, traditional_cnn.NUM_ROWS_IN_NARR - 1], dtype=int)
+SAMPLED_COLUMN_INDICES[:2] = numpy.array(
+    [0, traditional_cnn.NUM_COLUMNS_IN_NARR - 1], dtype=int)
+
+SAMPLED_NARR_MASK_MATRIX = numpy.full(
+    (traditional_cnn.NUM_ROWS_IN_NARR, traditional_cnn.NUM_COLUMNS_IN_NARR), 0,
+    dtype=int)
+SAMPLED_NARR_MASK_MATRIX[SAMPLED_ROW_INDICES, SAMPLED_COLUMN_INDICES] = 1
+
+# The following constants are used to test _apply_model_to_full_grid.
+FIRST_ROW_IN_SMALL_GRID = traditional_cnn.NUM_ROWS_IN_NARR - 5
+FIRST_COLUMN_IN_SMALL_GRID = 0
+NUM_ROWS_IN_SMALL_GRID = 5
+NUM_COLUMNS_IN_SMALL_GRID = 7
+
+SMALL_NARR_MASK_MATRIX = numpy.full(
+    (traditional_cnn.NUM_ROWS_IN_NARR, traditional_cnn.NUM_COLUMNS_IN_NARR), 0,
+    dtype=int)
+SMALL_NARR_MASK_MATRIX[
+    FIRST_ROW_IN_SMALL_GRID:(FIRST_ROW_IN_SMALL_GRID + NUM_ROWS_IN_SMALL_GRID),
+    FIRST_COLUMN_IN_SMALL_GRID:
+    (FIRST_COLUMN_IN_SMALL_GRID + NUM_COLUMNS_IN_SMALL_GRID)
+] = 1
+SMALL_NARR_MASK_MATRIX[-2, 3] = 0
+
+FULLY_MASKED_NARR_MASK_MATRIX = numpy.full(
+    (traditional_cnn.NUM_ROWS_IN_NARR, traditional_cnn.NUM_COLUMNS_IN_NARR), 0,
+    dtype=int)
+
+MODEL_WEIGHT_MATRIX = numpy.random.normal(
+    size=(2 * NUM_ROWS_IN_HALF_GRID + 1, 2 * NUM_COLUMNS_IN_HALF_GRID + 1,
+          NUM_PREDICTORS, NUM_CLASSES))
+BATCH_INDEX_FOR_FAILURE = 1
+
+
+class _FakePatchModel(object):
+    """Imitates a trained patch CNN without Keras.
+
+    Each set of class probabilities is a softmax over a fixed linear function of
+    the downsized example.
+    """
+
+    def __init__(self, weight_matrix, batch_index_for_failure=None):
+        """Creates new fake model.
+
+        :param weight_matrix: m-by-n-by-C-by-K numpy array of weights.
+        :param batch_index_for_failure: If `predict` is called for the [k]th
+            time, where k = `batch_index_for_failure`, it will raise a
+            ValueError.  If None, `predict` will never fail.
+        """
+
+        self.weight_matrix = weight_matrix
+        self.batch_index_for_failure = batch_index_for_failure
+        self.num_batches_done = 0
+        self.input_shape = (None,) + weight_matrix.shape[:-1]
+
+    def predict(self, predictor_matrix, batch_size):
+        """Predicts class probabilities for each downsized example.
+
+        :param predictor_matrix: E-by-m-by-n-by-C numpy array of predictors.
+        :param batch_size: Batch size (unused).
+        :return: class_probability_matrix: E-by-K numpy array of class
+            probabilities.
+        :raises: ValueError: if this is the batch chosen for failure.
+        """
+
+        if self.num_batches_done == self.batch_index_for_failure:
+            raise ValueError('Fake model failed on purpose.')
+
+        self.num_batches_done += 1
+
+        these_activations = numpy.tensordot(
+            predictor_matrix, self.weight_matrix, axes=3)
+        these_activations = numpy.exp(
+            these_activations -
+            numpy.max(these_activations, axis=1, keepdims=True))
+        return these_activations / numpy.sum(
+            these_activations, axis=1, keepdims=True)
+
+
+def _apply_model_row_by_row(model_object, narr_mask_matrix):
+    """Applies patch CNN to full grid, one row of downsized examples at a time.
+
+    This is the old method used by `apply_model_to_3d_example`, which creates
+    each row of downsized examples with
+    `testing_io.create_downsized_3d_examples` and runs the model on the main
+    thread.
+
+    :param model_object: See doc for
+        `traditional_cnn._apply_model_to_full_grid`.
+    :param narr_mask_matrix: Same.
+    :return: class_probability_matrix: Same.
+    :return: target_matrix: Same.
+    """
+
+    class_probability_matrix = numpy.full(
+        (1, traditional_cnn.NUM_ROWS_IN_NARR,
+         traditional_cnn.NUM_COLUMNS_IN_NARR, NUM_CLASSES), numpy.nan)
+    target_matrix = numpy.full(
+        (1, traditional_cnn.NUM_ROWS_IN_NARR,
+         traditional_cnn.NUM_COLUMNS_IN_NARR), -1, dtype=int)
+
+    for i in range(traditional_cnn.NUM_ROWS_IN_NARR):
+        these_column_indices = numpy.where(narr_mask_matrix[i, :] == 1)[0]
+        if len(these_column_indices) == 0:
+            continue
+
+        these_row_indices = numpy.full(len(these_column_indices), i, dtype=int)
+
+        (this_downsized_predictor_matrix,
+         target_matrix[:, these_row_indices, these_column_indices]
+        ) = testing_io.create_downsized_3d_examples(
+            center_row_indices=these_row_indices,
+            center_column_indices=these_column_indices,
+            num_rows_in_half_grid=NUM_ROWS_IN_HALF_GRID,
+            num_columns_in_half_grid=NUM_COLUMNS_IN_HALF_GRID,
+            full_predictor_matrix=FULL_PREDICTOR_MATRIX,
+            full_target_matrix=FULL_TARGET_MATRIX, num_classes=NUM_CLASSES
+        )[:2]
+
+        class_probability_matrix[
+            0, these_row_indices, these_column_indices, ...
+        ] = model_object.predict(
+            this_downsized_predictor_matrix, batch_size=len(these_row_indices))
+
+    return class_probability_matrix, target_matrix
+
+
+def _create_small_cnn():
+    """Creates small patch CNN with random weights.
+
+    The CNN has a strided conv layer, a pooling layer, a dropout layer, and two
+    dense layers, so that every type of conversion in
+    `convert_to_fully_convolutional` is exercised.
+
+    :return: model_object: Instance of `keras.models.Sequential`.
+    """
+
+    model_object = keras.models.Sequential()
+    model_object.add(keras.layers.Conv2D(
+        filters=4, kernel_size=(3, 3), strides=(1, 1), padding='valid',
+        activation='relu',
+        input_shape=(2 * NUM_ROWS_IN_HALF_GRID + 1,
+                     2 * NUM_COLUMNS_IN_HALF_GRID + 1, NUM_PREDICTORS)
+    ))
+    model_object.add(keras.layers.MaxPooling2D(
+        pool_size=(2, 2), strides=(2, 2), padding='valid'))
+    model_object.add(keras.layers.Conv2D(
+        filters=6, kernel_size=(2, 2), strides=(1, 2), padding='valid'))
+    model_object.add(keras.layers.LeakyReLU(alpha=0.2))
+    model_object.add(keras.layers.Flatten())
+    model_object.add(keras.layers.Dense(8, activation='relu'))
+    model_object.add(keras.layers.Dropout(rate=0.5))
+    model_object.add(keras.layers.Dense(NUM_CLASSES, activation='softmax'))
+
+    return model_object
+
 
 class TraditionalCnnTests(unittest.TestCase):
     """Each method is a unit test for traditional_cnn.py."""
@@ -17,6 +229,178 @@ class TraditionalCnnTests(unittest.TestCase):
             model_file_name=MODEL_FILE_NAME, raise_error_if_missing=False)
         self.assertTrue(this_file_name == MODEL_METAFILE_NAME)
 
+    def test_dilated_pooling_max(self):
+        """Ensures correct output from _dilated_pooling.
+
+        In this case, doing max-pooling.
+        """
+
+        this_pooled_matrix = K.eval(traditional_cnn._dilated_pooling(
+            input_tensor=K.constant(POOLING_INPUT_MATRIX),
+            pool_size=POOL_SIZE, dilation_rate=POOLING_DILATION_RATE,
+            do_max_pooling=True))
+
+        self.assertTrue(numpy.allclose(
+            this_pooled_matrix, MAX_POOLED_MATRIX, atol=TOLERANCE))
+
+    def test_dilated_pooling_average(self):
+        """Ensures correct output from _dilated_pooling.
+
+        In this case, doing average-pooling.
+        """
+
+        this_pooled_matrix = K.eval(traditional_cnn._dilated_pooling(
+            input_tensor=K.constant(POOLING_INPUT_MATRIX),
+            pool_size=POOL_SIZE, dilation_rate=POOLING_DILATION_RATE,
+            do_max_pooling=False))
+
+        self.assertTrue(numpy.allclose(
+            this_pooled_matrix, AVERAGE_POOLED_MATRIX, atol=TOLERANCE))
+
+    def test_convert_to_fully_convolutional(self):
+        """Ensures correct output from convert_to_fully_convolutional.
+
+        The fully convolutional model, applied to the full grid in one forward
+        pass, must give the same probabilities as the patch CNN applied to one
+        downsized example at each sampled pixel.
+        """
+
+        this_model_object = _create_small_cnn()
+        this_fully_conv_model_object = (
+            traditional_cnn.convert_to_fully_convolutional(this_model_object)
+        )
+        self.assertTrue(traditional_cnn._is_fully_convolutional(
+            this_fully_conv_model_object))
+
+        these_patch_probs, these_patch_targets = (
+            traditional_cnn._apply_model_to_full_grid(
+                model_object=this_model_object,
+                full_predictor_matrix=FULL_PREDICTOR_MATRIX,
+                full_target_matrix=FULL_TARGET_MATRIX,
+                narr_mask_matrix=SAMPLED_NARR_MASK_MATRIX,
+                num_rows_in_half_grid=NUM_ROWS_IN_HALF_GRID,
+                num_columns_in_half_grid=NUM_COLUMNS_IN_HALF_GRID,
+                num_classes=NUM_CLASSES,
+                num_examples_per_batch=NUM_EXAMPLES_PER_BATCH)
+        )
+
+        these_full_grid_probs, these_full_grid_targets = (
+            traditional_cnn._apply_model_to_full_grid(
+                model_object=this_fully_conv_model_object,
+                full_predictor_matrix=FULL_PREDICTOR_MATRIX,
+                full_target_matrix=FULL_TARGET_MATRIX,
+                narr_mask_matrix=SAMPLED_NARR_MASK_MATRIX,
+                num_rows_in_half_grid=NUM_ROWS_IN_HALF_GRID,
+                num_columns_in_half_grid=NUM_COLUMNS_IN_HALF_GRID,
+                num_classes=NUM_CLASSES,
+                num_examples_per_batch=NUM_EXAMPLES_PER_BATCH)
+        )
+
+        self.assertTrue(numpy.array_equal(
+            these_patch_targets, these_full_grid_targets))
+        self.assertTrue(numpy.allclose(
+            these_patch_probs, these_full_grid_probs,
+            atol=PROBABILITY_TOLERANCE, equal_nan=True))
+        self.assertFalse(numpy.any(numpy.isnan(
+            these_full_grid_probs[
+                0, SAMPLED_ROW_INDICES, SAMPLED_COLUMN_INDICES, ...]
+        )))
+
+    def test_apply_model_to_full_grid_small(self):
+        """Ensures correct output from _apply_model_to_full_grid.
+
+        In this case, only a small part of the grid (touching the edge) is
+        unmasked.  Results must match the old row-by-row method.
+        """
+
+        these_expected_probs, these_expected_targets = _apply_model_row_by_row(
+            model_object=_FakePatchModel(MODEL_WEIGHT_MATRIX),
+            narr_mask_matrix=SMALL_NARR_MASK_MATRIX)
+
+        these_probs, these_targets = traditional_cnn._apply_model_to_full_grid(
+            model_object=_FakePatchModel(MODEL_WEIGHT_MATRIX),
+            full_predictor_matrix=FULL_PREDICTOR_MATRIX,
+            full_target_matrix=FULL_TARGET_MATRIX,
+            narr_mask_matrix=SMALL_NARR_MASK_MATRIX,
+            num_rows_in_half_grid=NUM_ROWS_IN_HALF_GRID,
+            num_columns_in_half_grid=NUM_COLUMNS_IN_HALF_GRID,
+            num_classes=NUM_CLASSES,
+            num_examples_per_batch=NUM_EXAMPLES_PER_BATCH)
+
+        self.assertTrue(numpy.array_equal(
+            these_targets, these_expected_targets))
+        self.assertTrue(numpy.allclose(
+            these_probs, these_expected_probs, atol=PROBABILITY_TOLERANCE,
+            equal_nan=True))
+
+    def test_apply_model_to_full_grid_fully_masked(self):
+        """Ensures correct output from _apply_model_to_full_grid.
+
+        In this case, the whole grid is masked out.
+        """
+
+        these_expected_probs, these_expected_targets = _apply_model_row_by_row(
+            model_object=_FakePatchModel(MODEL_WEIGHT_MATRIX),
+            narr_mask_matrix=FULLY_MASKED_NARR_MASK_MATRIX)
+
+        these_probs, these_targets = traditional_cnn._apply_model_to_full_grid(
+            model_object=_FakePatchModel(MODEL_WEIGHT_MATRIX),
+            full_predictor_matrix=FULL_PREDICTOR_MATRIX,
+            full_target_matrix=FULL_TARGET_MATRIX,
+            narr_mask_matrix=FULLY_MASKED_NARR_MASK_MATRIX,
+            num_rows_in_half_grid=NUM_ROWS_IN_HALF_GRID,
+            num_columns_in_half_grid=NUM_COLUMNS_IN_HALF_GRID,
+            num_classes=NUM_CLASSES,
+            num_examples_per_batch=NUM_EXAMPLES_PER_BATCH)
+
+        self.assertTrue(numpy.array_equal(
+            these_targets, these_expected_targets))
+        self.assertTrue(numpy.all(numpy.isnan(these_probs)))
+        self.assertTrue(numpy.all(numpy.isnan(these_expected_probs)))
+
+    def test_apply_model_to_3d_example_fully_masked(self):
+        """Ensures correct output from apply_model_to_3d_example.
+
+        In this case, the whole grid is masked out, so no files should be read.
+        """
+
+        these_probs, these_targets = traditional_cnn.apply_model_to_3d_example(
+            model_object=_FakePatchModel(MODEL_WEIGHT_MATRIX),
+            target_time_unix_sec=0, top_narr_directory_name='foo',
+            top_frontal_grid_dir_name='bar', narr_predictor_names=['moo'],
+            pressure_level_mb=1000, dilation_distance_metres=50000.,
+            num_rows_in_half_grid=NUM_ROWS_IN_HALF_GRID,
+            num_columns_in_half_grid=NUM_COLUMNS_IN_HALF_GRID,
+            num_classes=NUM_CLASSES,
+            narr_mask_matrix=FULLY_MASKED_NARR_MASK_MATRIX)
+
+        self.assertTrue(numpy.all(these_targets == -1))
+        self.assertTrue(numpy.all(numpy.isnan(these_probs)))
+
+    def test_apply_model_to_full_grid_failure(self):
+        """Ensures that _apply_model_to_full_grid cleans up after failure.
+
+        In this case, the model fails while there are batches left to create.
+        The error must be raised, and the background thread must not be left
+        blocked on the queue.
+        """
+
+        this_num_threads = threading.active_count()
+
+        with self.assertRaises(ValueError):
+            traditional_cnn._apply_model_to_full_grid(
+                model_object=_FakePatchModel(
+                    MODEL_WEIGHT_MATRIX,
+                    batch_index_for_failure=BATCH_INDEX_FOR_FAILURE),
+                full_predictor_matrix=FULL_PREDICTOR_MATRIX,
+                full_target_matrix=FULL_TARGET_MATRIX,
+                narr_mask_matrix=SMALL_NARR_MASK_MATRIX,
+                num_rows_in_half_grid=NUM_ROWS_IN_HALF_GRID,
+                num_columns_in_half_grid=NUM_COLUMNS_IN_HALF_GRID,
+                num_classes=NUM_CLASSES, num_examples_per_batch=1)
+
+        self.assertTrue(threading.active_count() == this_num_threads)
+
 
 if __name__ == '__main__':
     unittest.main()
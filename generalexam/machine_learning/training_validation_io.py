@@ -33,7 +33,12 @@ there are M*N target variables (the label at each pixel).
 
 import copy
 import glob
+import Queue
+import random
 import os.path
+import threading
+import traceback
+import multiprocessing
 from random import shuffle
 import numpy
 import keras
@@ -80,6 +85,14 @@ PREDICTOR_DIMENSION_KEY = 'predictor_variable'
 CHARACTER_DIMENSION_KEY = 'predictor_variable_char'
 CLASS_DIMENSION_KEY = 'class'
 
+NETCDF3_FORMAT_STRING = 'NETCDF3_64BIT_OFFSET'
+NETCDF4_FORMAT_STRING = 'NETCDF4'
+VALID_NETCDF_FORMAT_STRINGS = [NETCDF3_FORMAT_STRING, NETCDF4_FORMAT_STRING]
+DEFAULT_NUM_EXAMPLES_PER_NETCDF_CHUNK = 256
+
+DEFAULT_NUM_BATCHES_TO_PREFETCH = 4
+DEFAULT_POOL_SIZE_IN_BATCHES = 2
+
 FIRST_NORM_PARAM_KEY = 'first_normalization_param_matrix'
 SECOND_NORM_PARAM_KEY = 'second_normalization_param_matrix'
 
@@ -124,6 +137,147 @@ def _file_name_to_batch_number(downsized_3d_file_name):
     return int(extensionless_file_name.split('downsized_3d_examples_batch')[-1])
 
 
+def _fill_batch_queue(
+        batch_queue, generator_function, generator_kwargs, random_seed):
+    """Puts batches from one generator into queue.
+
+    This method is run by each background worker in `prefetch_batches`.  If the
+    generator raises an exception, a `RuntimeError` containing the worker's
+    traceback is put into the queue.  If the generator is exhausted, None is
+    put into the queue.
+
+    :param batch_queue: Instance of `Queue.Queue` or `multiprocessing.Queue`.
+    :param generator_function: See doc for `prefetch_batches`.
+    :param generator_kwargs: Keyword arguments for `generator_function`,
+        including those specific to this worker.
+    :param random_seed: Random seed for this worker (may be None).
+    """
+
+    try:
+        if random_seed is not None:
+            numpy.random.seed(random_seed)
+            random.seed(random_seed)
+
+        for this_batch in generator_function(**generator_kwargs):
+            batch_queue.put(this_batch)
+
+        batch_queue.put(None)
+    except Exception:
+        batch_queue.put(RuntimeError(
+            'Background worker raised an exception.  Traceback from worker:'
+            '\n\n{0:s}'.format(traceback.format_exc())
+        ))
+
+
+def _get_center_crop_indices(num_grid_points, num_half_points):
+    """Returns indices for cropping around center of image.
+
+    :param num_grid_points: Number of grid points (rows or columns) in original
+        image.
+    :param num_half_points: Determines number of grid points to keep.  The
+        cropped image will have 2 * `num_half_points` + 1 grid points, centered
+        at the center of the original image.  If `num_half_points is None`, the
+        image will not be cropped.
+    :return: first_index: Index of first grid point to keep.
+    :return: last_index: Index of last grid point to keep.
+    """
+
+    if num_half_points is None:
+        return 0, num_grid_points - 1
+
+    error_checking.assert_is_integer(num_half_points)
+    error_checking.assert_is_greater(num_half_points, 0)
+
+    center_index = int(numpy.floor(float(num_grid_points) / 2))
+    return center_index - num_half_points, center_index + num_half_points
+
+
+def _indices_to_netcdf_key(indices):
+    """Converts array indices to key for subsetting NetCDF variable.
+
+    A slice is much faster than a list of indices, because it lets the NetCDF
+    library read one contiguous hyperslab.
+
+    :param indices: 1-D numpy array of unique indices, sorted in ascending
+        order.
+    :return: key: If indices are consecutive, this is a slice object.
+        Otherwise, this is just `indices`.
+    """
+
+    if len(indices) > 0 and indices[-1] - indices[0] == len(indices) - 1:
+        return slice(indices[0], indices[-1] + 1)
+
+    return indices
+
+
+def _read_example_hyperslab(
+        netcdf_dataset, example_indices, predictor_indices,
+        num_half_rows_to_keep, num_half_columns_to_keep):
+    """Reads subset of downsized 3-D examples from NetCDF file.
+
+    Only the requested hyperslab (subset of examples, rows, columns, and
+    predictor variables) is read from the file.
+
+    e = number of examples to read
+    c = number of predictor variables to read
+
+    :param netcdf_dataset: Instance of `netCDF4.Dataset`, containing downsized
+        3-D examples.
+    :param example_indices: length-e numpy array with indices of examples to
+        read.
+    :param predictor_indices: length-c numpy array with indices of predictor
+        variables to read.  Output will be in this order.
+    :param num_half_rows_to_keep: See doc for `read_downsized_3d_examples`.
+    :param num_half_columns_to_keep: Same.
+    :return: predictor_matrix: e-by-M-by-N-by-c numpy array of predictor values.
+    :return: target_matrix: e-by-K numpy array of target values.
+    """
+
+    predictor_variable = netcdf_dataset.variables[PREDICTOR_MATRIX_KEY]
+    target_variable = netcdf_dataset.variables[TARGET_MATRIX_KEY]
+
+    first_row_index, last_row_index = _get_center_crop_indices(
+        num_grid_points=predictor_variable.shape[1],
+        num_half_points=num_half_rows_to_keep)
+    first_column_index, last_column_index = _get_center_crop_indices(
+        num_grid_points=predictor_variable.shape[2],
+        num_half_points=num_half_columns_to_keep)
+
+    if len(example_indices) == 0:
+        predictor_matrix = numpy.full(
+            (0, last_row_index - first_row_index + 1,
+             last_column_index - first_column_index + 1,
+             len(predictor_indices)),
+            numpy.nan, dtype='float32')
+        target_matrix = numpy.full(
+            (0, target_variable.shape[1]), 0, dtype='float64')
+
+        return predictor_matrix, target_matrix
+
+    # Each example is read only once, even if it is requested more than once,
+    # and the key is built from unique indices (so that repeated indices are
+    # never mistaken for a contiguous range).
+    unique_example_indices, orig_to_unique_example_indices = numpy.unique(
+        example_indices, return_inverse=True)
+    unique_predictor_indices, orig_to_unique_predictor_indices = numpy.unique(
+        predictor_indices, return_inverse=True)
+
+    example_key = _indices_to_netcdf_key(unique_example_indices)
+    predictor_matrix = numpy.array(predictor_variable[
+        example_key, first_row_index:(last_row_index + 1),
+        first_column_index:(last_column_index + 1),
+        _indices_to_netcdf_key(unique_predictor_indices)
+    ], dtype='float32')
+    target_matrix = numpy.array(
+        target_variable[example_key, ...], dtype='float64')
+
+    predictor_matrix = predictor_matrix[orig_to_unique_example_indices, ...][
+        ..., orig_to_unique_predictor_indices]
+    target_matrix = target_matrix[orig_to_unique_example_indices, ...]
+
+    return predictor_matrix, target_matrix
+
+
 def _decrease_example_size(predictor_matrix, num_half_rows, num_half_columns):
     """Decreases the grid size for each example.
 
@@ -141,39 +295,307 @@ def _decrease_example_size(predictor_matrix, num_half_rows, num_half_columns):
     :return: predictor_matrix: E-by-m-by-n-by-C numpy array of predictor images.
     """
 
-    if num_half_rows is not None:
-        error_checking.assert_is_integer(num_half_rows)
-        error_checking.assert_is_greater(num_half_rows, 0)
+    first_row_index, last_row_index = _get_center_crop_indices(
+        num_grid_points=predictor_matrix.shape[1],
+        num_half_points=num_half_rows)
+    first_column_index, last_column_index = _get_center_crop_indices(
+        num_grid_points=predictor_matrix.shape[2],
+        num_half_points=num_half_columns)
+
+    return predictor_matrix[
+        :, first_row_index:(last_row_index + 1),
+        first_column_index:(last_column_index + 1), ...
+    ]
+
+
+def _read_target_time(
+        narr_file_name_array, frontal_grid_file_name, num_classes,
+        dilation_distance_metres, subset_for_fcn_input):
+    """Reads and processes predictor and target images for one target time.
+
+    :param narr_file_name_array: numpy array of paths to NARR files.  If 1-D
+        (length C), will create one 3-D example.  If 2-D (T x C), will create
+        one 4-D example.
+    :param frontal_grid_file_name: Path to file with frontal grids (readable by
+        `fronts_io.read_narr_grids_from_file`).
+    :param num_classes: Number of classes (2 or 3).
+    :param dilation_distance_metres: See doc for
+        `downsized_3d_example_generator`.
+    :param subset_for_fcn_input: Boolean flag.  If True, will subset both
+        predictor and target images with
+        `machine_learning_utils.subset_narr_grid_for_fcn_input`.
+    :return: predictor_matrix: 1-by-M-by-N-by-C or 1-by-M-by-N-by-T-by-C numpy
+        array of normalized predictor values.
+    :return: target_matrix: 1-by-M-by-N numpy array of dilated target values.
+        Each value is an integer from the list `front_utils.VALID_INTEGER_IDS`.
+    """
+
+    narr_file_name_matrix = numpy.reshape(
+        narr_file_name_array, (-1, narr_file_name_array.shape[-1]))
+    num_predictor_times = narr_file_name_matrix.shape[0]
+    num_predictors = narr_file_name_matrix.shape[1]
+
+    tuple_of_3d_predictor_matrices = ()
 
-        center_row_index = int(
-            numpy.floor(float(predictor_matrix.shape[1]) / 2)
+    for i in range(num_predictor_times):
+        tuple_of_field_predictor_matrices = ()
+
+        for j in range(num_predictors):
+            print 'Reading data from: "{0:s}"...'.format(
+                narr_file_name_matrix[i, j])
+
+            this_field_predictor_matrix = (
+                processed_narr_io.read_fields_from_file(
+                    narr_file_name_matrix[i, j])
+            )[0]
+            this_field_predictor_matrix = (
+                ml_utils.fill_nans_in_predictor_images(
+                    this_field_predictor_matrix)
+            )
+
+            tuple_of_field_predictor_matrices += (this_field_predictor_matrix,)
+
+        tuple_of_3d_predictor_matrices += (
+            ml_utils.stack_predictor_variables(
+                tuple_of_field_predictor_matrices),
         )
-        first_row_index = center_row_index - num_half_rows
-        last_row_index = center_row_index + num_half_rows
-        predictor_matrix = predictor_matrix[
-            :, first_row_index:(last_row_index + 1), ...
-        ]
-
-    if num_half_columns is not None:
-        error_checking.assert_is_integer(num_half_columns)
-        error_checking.assert_is_greater(num_half_columns, 0)
-
-        center_column_index = int(
-            numpy.floor(float(predictor_matrix.shape[2]) / 2)
+
+    if len(narr_file_name_array.shape) == 1:
+        predictor_matrix = tuple_of_3d_predictor_matrices[0]
+    else:
+        predictor_matrix = ml_utils.stack_time_steps(
+            tuple_of_3d_predictor_matrices)
+
+    predictor_matrix, _ = ml_utils.normalize_predictors(
+        predictor_matrix=predictor_matrix)
+
+    if subset_for_fcn_input:
+        predictor_matrix = ml_utils.subset_narr_grid_for_fcn_input(
+            predictor_matrix)
+
+    target_matrix = read_target_matrix(
+        frontal_grid_file_name=frontal_grid_file_name, num_classes=num_classes,
+        dilation_distance_metres=dilation_distance_metres,
+        subset_for_fcn_input=subset_for_fcn_input)
+
+    return predictor_matrix, target_matrix
+
+
+def _refill_example_pool(
+        predictor_pool_matrix, target_pool_matrix, slot_indices, time_index,
+        narr_file_name_matrix, frontal_grid_file_names, num_classes,
+        dilation_distance_metres, subset_for_fcn_input):
+    """Refills slots in example pool, using consecutive target times.
+
+    The example pool is a ring buffer of full-grid examples (one per target
+    time).  It is allocated on the first call and overwritten in place
+    afterwards, so it is never reallocated.
+
+    P = number of slots in pool
+
+    :param predictor_pool_matrix: numpy array (P-by-M-by-N-by-C or
+        P-by-M-by-N-by-T-by-C) of predictor values.  If None, will be allocated
+        with P = length of `slot_indices`.
+    :param target_pool_matrix: P-by-M-by-N numpy array of target values.  If
+        None, will be allocated along with `predictor_pool_matrix`.
+    :param slot_indices: 1-D numpy array of slots to refill.
+    :param time_index: Index of first target time to read.  This is an index
+        into `frontal_grid_file_names`.
+    :param narr_file_name_matrix: numpy array created by
+        `find_input_files_for_3d_examples` or
+        `find_input_files_for_4d_examples`.
+    :param frontal_grid_file_names: 1-D list created by the same method.
+    :param num_classes: See doc for `_read_target_time`.
+    :param dilation_distance_metres: Same.
+    :param subset_for_fcn_input: Same.
+    :return: predictor_pool_matrix: Same as input, but with new values in the
+        given slots.
+    :return: target_pool_matrix: Same.
+    :return: time_index: Index of next target time to read.
+    """
+
+    num_target_times = len(frontal_grid_file_names)
+
+    for this_slot_index in slot_indices:
+        print '\n'
+        this_predictor_matrix, this_target_matrix = _read_target_time(
+            narr_file_name_array=narr_file_name_matrix[time_index, ...],
+            frontal_grid_file_name=frontal_grid_file_names[time_index],
+            num_classes=num_classes,
+            dilation_distance_metres=dilation_distance_metres,
+            subset_for_fcn_input=subset_for_fcn_input)
+
+        time_index += 1
+        if time_index >= num_target_times:
+            time_index = 0
+
+        if predictor_pool_matrix is None:
+            num_slots = len(slot_indices)
+            predictor_pool_matrix = numpy.full(
+                (num_slots,) + this_predictor_matrix.shape[1:], numpy.nan,
+                dtype=numpy.float32)
+            target_pool_matrix = numpy.full(
+                (num_slots,) + this_target_matrix.shape[1:], 0,
+                dtype=this_target_matrix.dtype)
+
+        predictor_pool_matrix[this_slot_index, ...] = this_predictor_matrix[
+            0, ...]
+        target_pool_matrix[this_slot_index, ...] = this_target_matrix[0, ...]
+
+    return predictor_pool_matrix, target_pool_matrix, time_index
+
+
+def _get_consumed_pool_slots(
+        first_slot_index, num_slots, num_examples_drawn,
+        num_examples_per_slot):
+    """Finds consumed slots in ring buffer of full-grid examples.
+
+    Each slot is considered consumed after `num_examples_per_slot` downsized
+    examples have been drawn from the pool on its behalf.  Consumed slots are
+    always the oldest ones in the ring.
+
+    :param first_slot_index: Index of oldest slot in pool.
+    :param num_slots: Number of slots in pool.
+    :param num_examples_drawn: Number of examples drawn since the last refill.
+    :param num_examples_per_slot: Number of examples to draw per slot.
+    :return: consumed_slot_indices: 1-D numpy array of consumed slots, from
+        oldest to newest.
+    :return: first_slot_index: Index of oldest slot after the consumed slots
+        are refilled.
+    :return: num_examples_drawn: Number of examples drawn but not yet
+        accounted for by a consumed slot.
+    """
+
+    num_consumed_slots = min(
+        [num_examples_drawn // num_examples_per_slot, num_slots]
+    )
+    num_examples_drawn -= num_consumed_slots * num_examples_per_slot
+
+    consumed_slot_indices = numpy.mod(
+        first_slot_index + numpy.linspace(
+            0, num_consumed_slots - 1, num=num_consumed_slots, dtype=int),
+        num_slots)
+    first_slot_index = (first_slot_index + num_consumed_slots) % num_slots
+
+    return consumed_slot_indices, first_slot_index, num_examples_drawn
+
+
+def prefetch_batches(
+        generator_function, generator_kwargs, num_workers=1,
+        num_batches_to_prefetch=DEFAULT_NUM_BATCHES_TO_PREFETCH,
+        random_seed=None):
+    """Creates batches in background workers, ahead of time.
+
+    Each worker runs its own copy of the generator, with keyword arguments
+    `worker_index` = k and `num_workers` = W added to `generator_kwargs`.  The
+    generator should use these to split its input (e.g., worker k uses every
+    [W]th target time, starting with the [k]th), so that workers do not create
+    the same examples.
+
+    If `num_workers` = 1 and `random_seed is None`, the worker is a thread.
+    Otherwise, each worker is a process, which avoids contention for the global
+    interpreter lock.  Batches are yielded from the workers in round-robin order
+    (worker 0, 1, ..., W - 1, 0, ...).  When one worker's generator is
+    exhausted, the round-robin continues with the other workers, until all
+    generators are exhausted.
+
+    Each worker has its own queue, holding up to
+    ceil(`num_batches_to_prefetch` / `num_workers`) batches that have been
+    created but not yet used.  Thus, memory use is bounded.
+
+    If `random_seed` is specified, worker k seeds the random-number generators
+    (both `numpy.random` and `random`) with `random_seed` + k.  Since batches
+    are yielded in a fixed order, the sequence of batches is then
+    deterministic.  If `random_seed is None` and the workers are processes,
+    each process is seeded from `os.urandom`, since otherwise all processes
+    would inherit the same random state from the parent.
+
+    :param generator_function: Generator function (e.g.,
+        `downsized_3d_example_generator`).  This must accept the keyword
+        arguments `worker_index` and `num_workers`.  Also, this must not use a
+        Keras model, since Keras models cannot be shared across threads or
+        processes.
+    :param generator_kwargs: Dictionary of keyword arguments for
+        `generator_function`, excluding `worker_index` and `num_workers`.
+    :param num_workers: Number of background workers.
+    :param num_batches_to_prefetch: Max number of batches created ahead of
+        time.
+    :param random_seed: Random seed (integer).  If None, random-number
+        generators will not be seeded.
+    :return: batch: Next batch from `generator_function`.
+    :raises: RuntimeError: if any worker's generator raises an exception.  The
+        error message contains the worker's traceback.
+    """
+
+    error_checking.assert_is_integer(num_workers)
+    error_checking.assert_is_geq(num_workers, 1)
+    error_checking.assert_is_integer(num_batches_to_prefetch)
+    error_checking.assert_is_geq(num_batches_to_prefetch, num_workers)
+    if random_seed is not None:
+        error_checking.assert_is_integer(random_seed)
+
+    num_batches_per_queue = int(numpy.ceil(
+        float(num_batches_to_prefetch) / num_workers
+    ))
+
+    use_threads = num_workers == 1 and random_seed is None
+    system_random_object = random.SystemRandom()
+    batch_queues = []
+
+    for k in range(num_workers):
+        if random_seed is not None:
+            this_random_seed = random_seed + k
+        elif use_threads:
+            this_random_seed = None
+        else:
+            this_random_seed = system_random_object.randint(
+                0, numpy.iinfo(numpy.uint32).max)
+
+        these_generator_kwargs = copy.copy(generator_kwargs)
+        these_generator_kwargs.update({
+            'worker_index': k,
+            'num_workers': num_workers
+        })
+
+        if use_threads:
+            this_queue = Queue.Queue(maxsize=num_batches_per_queue)
+            this_worker_class = threading.Thread
+        else:
+            this_queue = multiprocessing.Queue(maxsize=num_batches_per_queue)
+            this_worker_class = multiprocessing.Process
+
+        this_worker_object = this_worker_class(
+            target=_fill_batch_queue,
+            args=(this_queue, generator_function, these_generator_kwargs,
+                  this_random_seed)
         )
-        first_column_index = center_column_index - num_half_columns
-        last_column_index = center_column_index + num_half_columns
-        predictor_matrix = predictor_matrix[
-            :, :, first_column_index:(last_column_index + 1), ...
-        ]
+        this_worker_object.daemon = True
+        this_worker_object.start()
+
+        batch_queues.append(this_queue)
 
-    return predictor_matrix
+    active_worker_indices = range(num_workers)
+    i = 0
+
+    while len(active_worker_indices) > 0:
+        i = numpy.mod(i, len(active_worker_indices))
+        this_batch = batch_queues[active_worker_indices[i]].get()
+
+        if isinstance(this_batch, Exception):
+            raise this_batch
+        if this_batch is None:
+            del active_worker_indices[i]
+            continue
+
+        yield this_batch
+        i += 1
 
 
 def find_input_files_for_3d_examples(
         first_target_time_unix_sec, last_target_time_unix_sec,
         top_narr_directory_name, top_frontal_grid_dir_name,
-        narr_predictor_names, pressure_level_mb):
+        narr_predictor_names, pressure_level_mb, worker_index=0,
+        num_workers=1):
     """Finds input files for 3-D examples.
 
     These files do not *contain* 3-D examples, but they may be used to *create*
@@ -197,6 +619,11 @@ def find_input_files_for_3d_examples(
         variables.  Each must be accepted by
         `processed_narr_io.check_field_name`.
     :param pressure_level_mb: Pressure level (millibars) for predictors.
+    :param worker_index: Index of background worker (see `prefetch_batches`).
+        This method will keep only every [`num_workers`]th target time,
+        starting with the [`worker_index`]th, so that workers use disjoint
+        sets of target times.
+    :param num_workers: See above.
     :return: narr_file_name_matrix: Q-by-C numpy array of paths to predictor
         files.
     :return: frontal_grid_file_names: length-Q list of paths to target files.
@@ -206,6 +633,7 @@ def find_input_files_for_3d_examples(
         start_time_unix_sec=first_target_time_unix_sec,
         end_time_unix_sec=last_target_time_unix_sec,
         time_interval_sec=NARR_TIME_INTERVAL_SECONDS, include_endpoint=True)
+    target_times_unix_sec = target_times_unix_sec[worker_index::num_workers]
     numpy.random.shuffle(target_times_unix_sec)
 
     num_target_times = len(target_times_unix_sec)
@@ -248,7 +676,8 @@ def find_input_files_for_4d_examples(
         first_target_time_unix_sec, last_target_time_unix_sec,
         num_lead_time_steps, predictor_time_step_offsets,
         top_narr_directory_name, top_frontal_grid_dir_name,
-        narr_predictor_names, pressure_level_mb):
+        narr_predictor_names, pressure_level_mb, worker_index=0,
+        num_workers=1):
     """Finds input files for 4-D examples.
 
     These files do not *contain* 4-D examples, but they may be used to *create*
@@ -269,6 +698,8 @@ def find_input_files_for_4d_examples(
     :param top_frontal_grid_dir_name: Same.
     :param narr_predictor_names: Same.
     :param pressure_level_mb: Same.
+    :param worker_index: Same.
+    :param num_workers: Same.
     :return: narr_file_name_matrix: Q-by-T-by-C numpy array of paths to
         predictor files.
     :return: frontal_grid_file_names: length-Q list of paths to target files.
@@ -286,6 +717,7 @@ def find_input_files_for_4d_examples(
         start_time_unix_sec=first_target_time_unix_sec,
         end_time_unix_sec=last_target_time_unix_sec,
         time_interval_sec=NARR_TIME_INTERVAL_SECONDS, include_endpoint=True)
+    target_times_unix_sec = target_times_unix_sec[worker_index::num_workers]
     numpy.random.shuffle(target_times_unix_sec)
 
     num_target_times = len(target_times_unix_sec)
@@ -332,13 +764,108 @@ def find_input_files_for_4d_examples(
             [frontal_grid_file_names[i] for i in keep_time_indices])
 
 
+def create_target_matrix(
+        frontal_grid_file_name, num_classes, dilation_distance_metres,
+        subset_for_fcn_input=False):
+    """Creates dilated target image for one time step.
+
+    :param frontal_grid_file_name: Path to file with frontal grids (readable by
+        `fronts_io.read_narr_grids_from_file`).
+    :param num_classes: Number of classes (2 or 3).
+    :param dilation_distance_metres: Dilation distance.
+    :param subset_for_fcn_input: Boolean flag.  If True, will subset target
+        image with `machine_learning_utils.subset_narr_grid_for_fcn_input`.
+    :return: target_matrix: 1-by-M-by-N numpy array of dilated target values.
+        Each value is an integer from the list `front_utils.VALID_INTEGER_IDS`.
+    """
+
+    print 'Reading data from: "{0:s}"...'.format(frontal_grid_file_name)
+    frontal_grid_table = fronts_io.read_narr_grids_from_file(
+        frontal_grid_file_name)
+
+    num_grid_rows, num_grid_columns = nwp_model_utils.get_grid_dimensions(
+        model_name=nwp_model_utils.NARR_MODEL_NAME)
+
+    target_matrix = ml_utils.front_table_to_images(
+        frontal_grid_table=frontal_grid_table,
+        num_rows_per_image=num_grid_rows,
+        num_columns_per_image=num_grid_columns)
+
+    if num_classes == 2:
+        target_matrix = ml_utils.binarize_front_images(target_matrix)
+
+    if subset_for_fcn_input:
+        target_matrix = ml_utils.subset_narr_grid_for_fcn_input(target_matrix)
+
+    if num_classes == 2:
+        return ml_utils.dilate_binary_target_images(
+            target_matrix=target_matrix,
+            dilation_distance_metres=dilation_distance_metres, verbose=False)
+
+    return ml_utils.dilate_ternary_target_images(
+        target_matrix=target_matrix,
+        dilation_distance_metres=dilation_distance_metres, verbose=False)
+
+
+def read_target_matrix(
+        frontal_grid_file_name, num_classes, dilation_distance_metres,
+        subset_for_fcn_input=False):
+    """Reads dilated target image for one time step.
+
+    If the time step is in the store with dilated targets (see
+    `fronts_io.find_dilated_target_store`) and is not stale, the target image
+    is read from the store.  Otherwise (including when the file name does not
+    follow the convention of `fronts_io.find_file_for_one_time`, so the store
+    cannot be found), it is created from the frontal grids by
+    `create_target_matrix`.  Staleness is checked only once, here, and errors
+    in reading a fresh store are not caught.
+
+    :param frontal_grid_file_name: See doc for `create_target_matrix`.
+    :param num_classes: Same.
+    :param dilation_distance_metres: Same.
+    :param subset_for_fcn_input: Same.
+    :return: target_matrix: Same.
+    """
+
+    try:
+        top_frontal_grid_dir_name, file_type, valid_time_unix_sec = (
+            fronts_io.parse_file_name_for_one_time(frontal_grid_file_name)
+        )
+        use_store = file_type == fronts_io.GRIDDED_FILE_TYPE
+    except ValueError:
+        use_store = False
+
+    if use_store:
+        use_store = not fronts_io.find_stale_times_in_target_store(
+            top_directory_name=top_frontal_grid_dir_name,
+            valid_times_unix_sec=numpy.array([valid_time_unix_sec], dtype=int),
+            num_classes=num_classes,
+            dilation_distance_metres=dilation_distance_metres,
+            for_fcn_input=subset_for_fcn_input
+        )[0]
+
+    if not use_store:
+        return create_target_matrix(
+            frontal_grid_file_name=frontal_grid_file_name,
+            num_classes=num_classes,
+            dilation_distance_metres=dilation_distance_metres,
+            subset_for_fcn_input=subset_for_fcn_input)
+
+    return fronts_io.read_dilated_target_from_store(
+        top_directory_name=top_frontal_grid_dir_name,
+        valid_time_unix_sec=valid_time_unix_sec, num_classes=num_classes,
+        dilation_distance_metres=dilation_distance_metres,
+        for_fcn_input=subset_for_fcn_input, check_staleness=False)
+
+
 def downsized_3d_example_generator(
         num_examples_per_batch, num_examples_per_target_time,
         first_target_time_unix_sec, last_target_time_unix_sec,
         top_narr_directory_name, top_frontal_grid_dir_name,
         narr_predictor_names, pressure_level_mb, dilation_distance_metres,
         class_fractions, num_rows_in_half_grid, num_columns_in_half_grid,
-        narr_mask_matrix=None):
+        narr_mask_matrix=None, num_times_in_pool=None, worker_index=0,
+        num_workers=1):
     """Generates downsized 3-D examples from raw files.
 
     :param num_examples_per_batch: Number of examples per batch.
@@ -366,6 +893,14 @@ def downsized_3d_example_generator(
         `machine_learning_utils.check_narr_mask`.  If narr_mask_matrix[i, j]
         = 0, cell [i, j] in the full NARR grid will never be used as the center
         of a downsized example.  If you do not want masking, leave this alone.
+    :param num_times_in_pool: Number of target times (full-grid examples) in
+        the pool, from which all downsized examples are drawn.  The pool is a
+        ring buffer: after each batch, only the oldest target times, for which
+        `num_examples_per_target_time` examples have been drawn, are replaced.
+        Default is enough target times for
+        `DEFAULT_POOL_SIZE_IN_BATCHES` batches.
+    :param worker_index: See doc for `find_input_files_for_3d_examples`.
+    :param num_workers: Same.
     :return: predictor_matrix: E-by-M-by-N-by-C numpy array of predictor values.
     :return: target_matrix: E-by-K numpy array of target values.  All values are
         0 or 1, but the array type is "float64".  Columns are mutually exclusive
@@ -392,90 +927,37 @@ def downsized_3d_example_generator(
         top_narr_directory_name=top_narr_directory_name,
         top_frontal_grid_dir_name=top_frontal_grid_dir_name,
         narr_predictor_names=narr_predictor_names,
-        pressure_level_mb=pressure_level_mb)
-
-    num_times = len(frontal_grid_file_names)
-    num_predictors = len(narr_predictor_names)
-    batch_indices = numpy.linspace(
-        0, num_examples_per_batch - 1, num=num_examples_per_batch, dtype=int)
+        pressure_level_mb=pressure_level_mb, worker_index=worker_index,
+        num_workers=num_workers)
 
-    time_index = 0
-    num_times_in_memory = 0
-    num_times_needed_in_memory = int(
+    num_slots_needed = int(
         numpy.ceil(float(num_examples_per_batch) / num_examples_per_target_time)
     )
+    if num_times_in_pool is None:
+        num_times_in_pool = DEFAULT_POOL_SIZE_IN_BATCHES * num_slots_needed
 
-    full_predictor_matrix = None
-    full_target_matrix = None
-
-    while True:
-        while num_times_in_memory < num_times_needed_in_memory:
-            print '\n'
-            tuple_of_predictor_matrices = ()
-
-            for j in range(num_predictors):
-                print 'Reading data from: "{0:s}"...'.format(
-                    narr_file_name_matrix[time_index, j])
-
-                this_field_predictor_matrix = (
-                    processed_narr_io.read_fields_from_file(
-                        narr_file_name_matrix[time_index, j])
-                )[0]
-                this_field_predictor_matrix = (
-                    ml_utils.fill_nans_in_predictor_images(
-                        this_field_predictor_matrix)
-                )
-
-                tuple_of_predictor_matrices += (this_field_predictor_matrix,)
+    error_checking.assert_is_integer(num_times_in_pool)
+    error_checking.assert_is_geq(num_times_in_pool, num_slots_needed)
 
-            print 'Reading data from: "{0:s}"...'.format(
-                frontal_grid_file_names[time_index])
-            this_frontal_grid_table = fronts_io.read_narr_grids_from_file(
-                frontal_grid_file_names[time_index])
-
-            time_index += 1
-            if time_index >= num_times:
-                time_index = 0
-
-            this_full_predictor_matrix = ml_utils.stack_predictor_variables(
-                tuple_of_predictor_matrices)
-            this_full_predictor_matrix, _ = ml_utils.normalize_predictors(
-                predictor_matrix=this_full_predictor_matrix)
-
-            this_full_target_matrix = ml_utils.front_table_to_images(
-                frontal_grid_table=this_frontal_grid_table,
-                num_rows_per_image=this_full_predictor_matrix.shape[1],
-                num_columns_per_image=this_full_predictor_matrix.shape[2])
-
-            if num_classes == 2:
-                this_full_target_matrix = ml_utils.binarize_front_images(
-                    this_full_target_matrix)
-
-            if num_classes == 2:
-                this_full_target_matrix = ml_utils.dilate_binary_target_images(
-                    target_matrix=this_full_target_matrix,
-                    dilation_distance_metres=dilation_distance_metres,
-                    verbose=False)
-            else:
-                this_full_target_matrix = (
-                    ml_utils.dilate_ternary_target_images(
-                        target_matrix=this_full_target_matrix,
-                        dilation_distance_metres=dilation_distance_metres,
-                        verbose=False)
-                )
+    batch_indices = numpy.linspace(
+        0, num_examples_per_batch - 1, num=num_examples_per_batch, dtype=int)
 
-            if full_target_matrix is None or full_target_matrix.size == 0:
-                full_predictor_matrix = copy.deepcopy(
-                    this_full_predictor_matrix)
-                full_target_matrix = copy.deepcopy(this_full_target_matrix)
-            else:
-                full_predictor_matrix = numpy.concatenate(
-                    (full_predictor_matrix, this_full_predictor_matrix), axis=0)
-                full_target_matrix = numpy.concatenate(
-                    (full_target_matrix, this_full_target_matrix), axis=0)
+    full_predictor_matrix, full_target_matrix, time_index = (
+        _refill_example_pool(
+            predictor_pool_matrix=None, target_pool_matrix=None,
+            slot_indices=numpy.linspace(
+                0, num_times_in_pool - 1, num=num_times_in_pool, dtype=int),
+            time_index=0, narr_file_name_matrix=narr_file_name_matrix,
+            frontal_grid_file_names=frontal_grid_file_names,
+            num_classes=num_classes,
+            dilation_distance_metres=dilation_distance_metres,
+            subset_for_fcn_input=False)
+    )
 
-            num_times_in_memory = full_target_matrix.shape[0]
+    first_slot_index = 0
+    num_examples_drawn = 0
 
+    while True:
         print 'Creating downsized 3-D examples...'
         sampled_target_point_dict = ml_utils.sample_target_points(
             target_matrix=full_target_matrix, class_fractions=class_fractions,
@@ -501,9 +983,23 @@ def downsized_3d_example_generator(
         print 'Fraction of examples in each class: {0:s}'.format(
             str(actual_class_fractions))
 
-        full_predictor_matrix = None
-        full_target_matrix = None
-        num_times_in_memory = 0
+        (these_slot_indices, first_slot_index, num_examples_drawn
+        ) = _get_consumed_pool_slots(
+            first_slot_index=first_slot_index, num_slots=num_times_in_pool,
+            num_examples_drawn=num_examples_drawn + num_examples_per_batch,
+            num_examples_per_slot=num_examples_per_target_time)
+
+        full_predictor_matrix, full_target_matrix, time_index = (
+            _refill_example_pool(
+                predictor_pool_matrix=full_predictor_matrix,
+                target_pool_matrix=full_target_matrix,
+                slot_indices=these_slot_indices, time_index=time_index,
+                narr_file_name_matrix=narr_file_name_matrix,
+                frontal_grid_file_names=frontal_grid_file_names,
+                num_classes=num_classes,
+                dilation_distance_metres=dilation_distance_metres,
+                subset_for_fcn_input=False)
+        )
 
         yield (downsized_predictor_matrix, target_matrix)
 
@@ -511,7 +1007,8 @@ def downsized_3d_example_generator(
 def quick_downsized_3d_example_gen(
         num_examples_per_batch, first_target_time_unix_sec,
         last_target_time_unix_sec, top_input_dir_name, narr_predictor_names,
-        num_classes, num_rows_in_half_grid, num_columns_in_half_grid):
+        num_classes, num_rows_in_half_grid, num_columns_in_half_grid,
+        worker_index=0, num_workers=1):
     """Generates downsized 3-D examples from processed files.
 
     These "processed files" are created by `write_downsized_3d_examples`.
@@ -527,6 +1024,11 @@ def quick_downsized_3d_example_gen(
     :param num_classes: Number of target classes (2 or 3).
     :param num_rows_in_half_grid: See doc for `downsized_3d_example_generator`.
     :param num_columns_in_half_grid: Same.
+    :param worker_index: Index of background worker (see `prefetch_batches`).
+        This generator will use only every [`num_workers`]th file, starting
+        with the [`worker_index`]th, so that workers read disjoint sets of
+        files.
+    :param num_workers: See above.
     :return: predictor_matrix: See doc for `downsized_3d_example_generator`.
     :return: target_matrix: Same.
     """
@@ -540,6 +1042,7 @@ def quick_downsized_3d_example_gen(
     example_file_names = find_downsized_3d_example_files(
         top_directory_name=top_input_dir_name, shuffled=True,
         first_batch_number=0, last_batch_number=LARGE_INTEGER)
+    example_file_names = example_file_names[worker_index::num_workers]
     shuffle(example_file_names)
 
     num_files = len(example_file_names)
@@ -613,7 +1116,8 @@ def downsized_4d_example_generator(
         top_narr_directory_name, top_frontal_grid_dir_name,
         narr_predictor_names, pressure_level_mb, dilation_distance_metres,
         class_fractions, num_rows_in_half_grid, num_columns_in_half_grid,
-        narr_mask_matrix=None):
+        narr_mask_matrix=None, num_times_in_pool=None, worker_index=0,
+        num_workers=1):
     """Generates downsized 4-D examples from raw files.
 
     :param num_examples_per_batch: See doc for `downsized_3d_example_generator`.
@@ -632,6 +1136,9 @@ def downsized_4d_example_generator(
     :param num_rows_in_half_grid: Same.
     :param num_columns_in_half_grid: Same.
     :param narr_mask_matrix: Same.
+    :param num_times_in_pool: Same.
+    :param worker_index: Same.
+    :param num_workers: Same.
     :return: predictor_matrix: E-by-M-by-N-by-T-by-C numpy array of predictor
         values.
     :return: target_matrix: See doc for `downsized_3d_example_generator`.
@@ -659,100 +1166,37 @@ def downsized_4d_example_generator(
         top_narr_directory_name=top_narr_directory_name,
         top_frontal_grid_dir_name=top_frontal_grid_dir_name,
         narr_predictor_names=narr_predictor_names,
-        pressure_level_mb=pressure_level_mb)
+        pressure_level_mb=pressure_level_mb, worker_index=worker_index,
+        num_workers=num_workers)
 
-    num_target_times = len(frontal_grid_file_names)
-    num_predictor_times_per_example = len(predictor_time_step_offsets)
-    num_predictors = len(narr_predictor_names)
-    batch_indices = numpy.linspace(
-        0, num_examples_per_batch - 1, num=num_examples_per_batch, dtype=int)
-
-    target_time_index = 0
-    num_times_in_memory = 0
-    num_times_needed_in_memory = int(
+    num_slots_needed = int(
         numpy.ceil(float(num_examples_per_batch) / num_examples_per_target_time)
     )
+    if num_times_in_pool is None:
+        num_times_in_pool = DEFAULT_POOL_SIZE_IN_BATCHES * num_slots_needed
 
-    full_predictor_matrix = None
-    full_target_matrix = None
-
-    while True:
-        while num_times_in_memory < num_times_needed_in_memory:
-            print '\n'
-            tuple_of_4d_predictor_matrices = ()
-
-            for i in range(num_predictor_times_per_example):
-                tuple_of_3d_predictor_matrices = ()
-
-                for j in range(num_predictors):
-                    print 'Reading data from: "{0:s}"...'.format(
-                        narr_file_name_matrix[target_time_index, i, j])
-
-                    this_field_predictor_matrix = (
-                        processed_narr_io.read_fields_from_file(
-                            narr_file_name_matrix[target_time_index, i, j])
-                    )[0]
-                    this_field_predictor_matrix = (
-                        ml_utils.fill_nans_in_predictor_images(
-                            this_field_predictor_matrix)
-                    )
-
-                    tuple_of_3d_predictor_matrices += (
-                        this_field_predictor_matrix,)
-
-                tuple_of_4d_predictor_matrices += (
-                    ml_utils.stack_predictor_variables(
-                        tuple_of_3d_predictor_matrices),
-                )
+    error_checking.assert_is_integer(num_times_in_pool)
+    error_checking.assert_is_geq(num_times_in_pool, num_slots_needed)
 
-            print 'Reading data from: "{0:s}"...'.format(
-                frontal_grid_file_names[target_time_index])
-            this_frontal_grid_table = fronts_io.read_narr_grids_from_file(
-                frontal_grid_file_names[target_time_index])
-
-            target_time_index += 1
-            if target_time_index >= num_target_times:
-                target_time_index = 0
-
-            this_full_predictor_matrix = ml_utils.stack_time_steps(
-                tuple_of_4d_predictor_matrices)
-            this_full_predictor_matrix, _ = ml_utils.normalize_predictors(
-                predictor_matrix=this_full_predictor_matrix)
-
-            this_full_target_matrix = ml_utils.front_table_to_images(
-                frontal_grid_table=this_frontal_grid_table,
-                num_rows_per_image=this_full_predictor_matrix.shape[1],
-                num_columns_per_image=this_full_predictor_matrix.shape[2])
-
-            if num_classes == 2:
-                this_full_target_matrix = ml_utils.binarize_front_images(
-                    this_full_target_matrix)
-
-            if num_classes == 2:
-                this_full_target_matrix = ml_utils.dilate_binary_target_images(
-                    target_matrix=this_full_target_matrix,
-                    dilation_distance_metres=dilation_distance_metres,
-                    verbose=False)
-            else:
-                this_full_target_matrix = (
-                    ml_utils.dilate_ternary_target_images(
-                        target_matrix=this_full_target_matrix,
-                        dilation_distance_metres=dilation_distance_metres,
-                        verbose=False)
-                )
+    batch_indices = numpy.linspace(
+        0, num_examples_per_batch - 1, num=num_examples_per_batch, dtype=int)
 
-            if full_target_matrix is None or full_target_matrix.size == 0:
-                full_predictor_matrix = copy.deepcopy(
-                    this_full_predictor_matrix)
-                full_target_matrix = copy.deepcopy(this_full_target_matrix)
-            else:
-                full_predictor_matrix = numpy.concatenate(
-                    (full_predictor_matrix, this_full_predictor_matrix), axis=0)
-                full_target_matrix = numpy.concatenate(
-                    (full_target_matrix, this_full_target_matrix), axis=0)
+    full_predictor_matrix, full_target_matrix, time_index = (
+        _refill_example_pool(
+            predictor_pool_matrix=None, target_pool_matrix=None,
+            slot_indices=numpy.linspace(
+                0, num_times_in_pool - 1, num=num_times_in_pool, dtype=int),
+            time_index=0, narr_file_name_matrix=narr_file_name_matrix,
+            frontal_grid_file_names=frontal_grid_file_names,
+            num_classes=num_classes,
+            dilation_distance_metres=dilation_distance_metres,
+            subset_for_fcn_input=False)
+    )
 
-            num_times_in_memory = full_target_matrix.shape[0]
+    first_slot_index = 0
+    num_examples_drawn = 0
 
+    while True:
         print 'Creating downsized 4-D examples...'
         sampled_target_point_dict = ml_utils.sample_target_points(
             target_matrix=full_target_matrix, class_fractions=class_fractions,
@@ -778,9 +1222,23 @@ def downsized_4d_example_generator(
         print 'Fraction of examples in each class: {0:s}'.format(
             str(actual_class_fractions))
 
-        full_predictor_matrix = None
-        full_target_matrix = None
-        num_times_in_memory = 0
+        (these_slot_indices, first_slot_index, num_examples_drawn
+        ) = _get_consumed_pool_slots(
+            first_slot_index=first_slot_index, num_slots=num_times_in_pool,
+            num_examples_drawn=num_examples_drawn + num_examples_per_batch,
+            num_examples_per_slot=num_examples_per_target_time)
+
+        full_predictor_matrix, full_target_matrix, time_index = (
+            _refill_example_pool(
+                predictor_pool_matrix=full_predictor_matrix,
+                target_pool_matrix=full_target_matrix,
+                slot_indices=these_slot_indices, time_index=time_index,
+                narr_file_name_matrix=narr_file_name_matrix,
+                frontal_grid_file_names=frontal_grid_file_names,
+                num_classes=num_classes,
+                dilation_distance_metres=dilation_distance_metres,
+                subset_for_fcn_input=False)
+        )
 
         yield (downsized_predictor_matrix, target_matrix)
 
@@ -789,7 +1247,8 @@ def full_size_3d_example_generator(
         num_examples_per_batch, first_target_time_unix_sec,
         last_target_time_unix_sec, top_narr_directory_name,
         top_frontal_grid_dir_name, narr_predictor_names, pressure_level_mb,
-        dilation_distance_metres, num_classes):
+        dilation_distance_metres, num_classes, num_times_in_pool=None,
+        worker_index=0, num_workers=1):
     """Generates full-size 3-D examples from raw files.
 
     :param num_examples_per_batch: See doc for `downsized_3d_example_generator`.
@@ -803,6 +1262,12 @@ def full_size_3d_example_generator(
     :param dilation_distance_metres: See doc for
         `downsized_3d_example_generator`.
     :param num_classes: Same.
+    :param num_times_in_pool: Number of target times (full-size examples) in
+        the pool, from which each batch is drawn randomly without replacement.
+        Only examples in the batch are replaced with new target times.  Default
+        is `DEFAULT_POOL_SIZE_IN_BATCHES` * `num_examples_per_batch`.
+    :param worker_index: See doc for `find_input_files_for_3d_examples`.
+    :param num_workers: Same.
     :return: predictor_matrix: E-by-M-by-N-by-C numpy array of predictor values.
     :return: target_matrix: E-by-M-by-N numpy array of target values.  Each
         value is an integer from the list `front_utils.VALID_INTEGER_IDS`.
@@ -821,90 +1286,31 @@ def full_size_3d_example_generator(
         top_narr_directory_name=top_narr_directory_name,
         top_frontal_grid_dir_name=top_frontal_grid_dir_name,
         narr_predictor_names=narr_predictor_names,
-        pressure_level_mb=pressure_level_mb)
+        pressure_level_mb=pressure_level_mb, worker_index=worker_index,
+        num_workers=num_workers)
 
-    num_target_times = len(frontal_grid_file_names)
-    num_predictors = len(narr_predictor_names)
-    batch_indices = numpy.linspace(
-        0, num_examples_per_batch - 1, num=num_examples_per_batch, dtype=int)
-
-    target_time_index = 0
-    num_examples_in_memory = 0
-
-    predictor_matrix = None
-    target_matrix = None
-
-    while True:
-        while num_examples_in_memory < num_examples_per_batch:
-            print '\n'
-            tuple_of_predictor_matrices = ()
-
-            for j in range(num_predictors):
-                print 'Reading data from: "{0:s}"...'.format(
-                    narr_file_name_matrix[target_time_index, j])
-
-                this_field_predictor_matrix = (
-                    processed_narr_io.read_fields_from_file(
-                        narr_file_name_matrix[target_time_index, j])
-                )[0]
-                this_field_predictor_matrix = (
-                    ml_utils.fill_nans_in_predictor_images(
-                        this_field_predictor_matrix)
-                )
+    if num_times_in_pool is None:
+        num_times_in_pool = (
+            DEFAULT_POOL_SIZE_IN_BATCHES * num_examples_per_batch)
 
-                tuple_of_predictor_matrices += (this_field_predictor_matrix,)
+    error_checking.assert_is_integer(num_times_in_pool)
+    error_checking.assert_is_geq(num_times_in_pool, num_examples_per_batch)
 
-            print 'Reading data from: "{0:s}"...'.format(
-                frontal_grid_file_names[target_time_index])
-            this_frontal_grid_table = fronts_io.read_narr_grids_from_file(
-                frontal_grid_file_names[target_time_index])
-
-            target_time_index += 1
-            if target_time_index >= num_target_times:
-                target_time_index = 0
-
-            this_predictor_matrix = ml_utils.stack_predictor_variables(
-                tuple_of_predictor_matrices)
-            this_predictor_matrix, _ = ml_utils.normalize_predictors(
-                predictor_matrix=this_predictor_matrix)
-
-            this_frontal_grid_matrix = ml_utils.front_table_to_images(
-                frontal_grid_table=this_frontal_grid_table,
-                num_rows_per_image=this_predictor_matrix.shape[1],
-                num_columns_per_image=this_predictor_matrix.shape[2])
-
-            if num_classes == 2:
-                this_frontal_grid_matrix = ml_utils.binarize_front_images(
-                    this_frontal_grid_matrix)
-
-            this_predictor_matrix = ml_utils.subset_narr_grid_for_fcn_input(
-                this_predictor_matrix)
-            this_frontal_grid_matrix = ml_utils.subset_narr_grid_for_fcn_input(
-                this_frontal_grid_matrix)
-
-            if num_classes == 2:
-                this_frontal_grid_matrix = ml_utils.dilate_binary_target_images(
-                    target_matrix=this_frontal_grid_matrix,
-                    dilation_distance_metres=dilation_distance_metres,
-                    verbose=False)
-            else:
-                this_frontal_grid_matrix = (
-                    ml_utils.dilate_ternary_target_images(
-                        target_matrix=this_frontal_grid_matrix,
-                        dilation_distance_metres=dilation_distance_metres,
-                        verbose=False)
-                )
+    all_slot_indices = numpy.linspace(
+        0, num_times_in_pool - 1, num=num_times_in_pool, dtype=int)
 
-            if target_matrix is None or target_matrix.size == 0:
-                predictor_matrix = copy.deepcopy(this_predictor_matrix)
-                target_matrix = copy.deepcopy(this_frontal_grid_matrix)
-            else:
-                predictor_matrix = numpy.concatenate(
-                    (predictor_matrix, this_predictor_matrix), axis=0)
-                target_matrix = numpy.concatenate(
-                    (target_matrix, this_frontal_grid_matrix), axis=0)
+    predictor_matrix, target_matrix, target_time_index = _refill_example_pool(
+        predictor_pool_matrix=None, target_pool_matrix=None,
+        slot_indices=all_slot_indices, time_index=0,
+        narr_file_name_matrix=narr_file_name_matrix,
+        frontal_grid_file_names=frontal_grid_file_names,
+        num_classes=num_classes,
+        dilation_distance_metres=dilation_distance_metres,
+        subset_for_fcn_input=True)
 
-            num_examples_in_memory = target_matrix.shape[0]
+    while True:
+        batch_indices = numpy.random.choice(
+            all_slot_indices, size=num_examples_per_batch, replace=False)
 
         predictor_matrix_to_return = predictor_matrix[
             batch_indices, ...].astype('float32')
@@ -914,11 +1320,22 @@ def full_size_3d_example_generator(
         target_matrix_to_return = keras.utils.to_categorical(
             target_matrix[batch_indices, ...], num_classes)
         target_matrix_to_return = numpy.reshape(
-            target_matrix_to_return, target_matrix.shape + (num_classes,))
+            target_matrix_to_return,
+            (num_examples_per_batch,) + target_matrix.shape[1:] +
+            (num_classes,)
+        )
 
-        predictor_matrix = numpy.delete(predictor_matrix, batch_indices, axis=0)
-        target_matrix = numpy.delete(target_matrix, batch_indices, axis=0)
-        num_examples_in_memory = target_matrix.shape[0]
+        predictor_matrix, target_matrix, target_time_index = (
+            _refill_example_pool(
+                predictor_pool_matrix=predictor_matrix,
+                target_pool_matrix=target_matrix, slot_indices=batch_indices,
+                time_index=target_time_index,
+                narr_file_name_matrix=narr_file_name_matrix,
+                frontal_grid_file_names=frontal_grid_file_names,
+                num_classes=num_classes,
+                dilation_distance_metres=dilation_distance_metres,
+                subset_for_fcn_input=True)
+        )
 
         yield (predictor_matrix_to_return, target_matrix_to_return)
 
@@ -928,7 +1345,8 @@ def full_size_4d_example_generator(
         last_target_time_unix_sec, num_lead_time_steps,
         predictor_time_step_offsets, top_narr_directory_name,
         top_frontal_grid_dir_name, narr_predictor_names, pressure_level_mb,
-        dilation_distance_metres, num_classes):
+        dilation_distance_metres, num_classes, num_times_in_pool=None,
+        worker_index=0, num_workers=1):
     """Generates full-size 4-D examples from raw files.
 
     :param num_examples_per_batch: See doc for `downsized_3d_example_generator`.
@@ -943,6 +1361,9 @@ def full_size_4d_example_generator(
     :param dilation_distance_metres: See doc for
         `downsized_3d_example_generator`.
     :param num_classes: Same.
+    :param num_times_in_pool: See doc for `full_size_3d_example_generator`.
+    :param worker_index: See doc for `find_input_files_for_3d_examples`.
+    :param num_workers: Same.
     :return: predictor_matrix: E-by-M-by-N-by-T-by-C numpy array of predictor
         values.
     :return: target_matrix: See doc for `full_size_3d_example_generator`.
@@ -963,101 +1384,31 @@ def full_size_4d_example_generator(
         top_narr_directory_name=top_narr_directory_name,
         top_frontal_grid_dir_name=top_frontal_grid_dir_name,
         narr_predictor_names=narr_predictor_names,
-        pressure_level_mb=pressure_level_mb)
+        pressure_level_mb=pressure_level_mb, worker_index=worker_index,
+        num_workers=num_workers)
 
-    num_target_times = len(frontal_grid_file_names)
-    num_predictor_times_per_example = len(predictor_time_step_offsets)
-    num_predictors = len(narr_predictor_names)
-    batch_indices = numpy.linspace(
-        0, num_examples_per_batch - 1, num=num_examples_per_batch, dtype=int)
+    if num_times_in_pool is None:
+        num_times_in_pool = (
+            DEFAULT_POOL_SIZE_IN_BATCHES * num_examples_per_batch)
 
-    target_time_index = 0
-    num_examples_in_memory = 0
+    error_checking.assert_is_integer(num_times_in_pool)
+    error_checking.assert_is_geq(num_times_in_pool, num_examples_per_batch)
 
-    predictor_matrix = None
-    target_matrix = None
+    all_slot_indices = numpy.linspace(
+        0, num_times_in_pool - 1, num=num_times_in_pool, dtype=int)
 
-    while True:
-        while num_examples_in_memory < num_examples_per_batch:
-            print '\n'
-            tuple_of_4d_predictor_matrices = ()
-
-            for i in range(num_predictor_times_per_example):
-                tuple_of_3d_predictor_matrices = ()
-
-                for j in range(num_predictors):
-                    print 'Reading data from: "{0:s}"...'.format(
-                        narr_file_name_matrix[target_time_index, i, j])
-
-                    this_field_predictor_matrix = (
-                        processed_narr_io.read_fields_from_file(
-                            narr_file_name_matrix[target_time_index, i, j])
-                    )[0]
-                    this_field_predictor_matrix = (
-                        ml_utils.fill_nans_in_predictor_images(
-                            this_field_predictor_matrix)
-                    )
-
-                    tuple_of_3d_predictor_matrices += (
-                        this_field_predictor_matrix,)
-
-                tuple_of_4d_predictor_matrices += (
-                    ml_utils.stack_predictor_variables(
-                        tuple_of_3d_predictor_matrices),
-                )
-
-            this_predictor_matrix = ml_utils.stack_time_steps(
-                tuple_of_4d_predictor_matrices)
-
-            print 'Reading data from: "{0:s}"...'.format(
-                frontal_grid_file_names[target_time_index])
-            this_frontal_grid_table = fronts_io.read_narr_grids_from_file(
-                frontal_grid_file_names[target_time_index])
-
-            target_time_index += 1
-            if target_time_index >= num_target_times:
-                target_time_index = 0
-
-            this_predictor_matrix, _ = ml_utils.normalize_predictors(
-                predictor_matrix=this_predictor_matrix)
-
-            this_frontal_grid_matrix = ml_utils.front_table_to_images(
-                frontal_grid_table=this_frontal_grid_table,
-                num_rows_per_image=this_predictor_matrix.shape[1],
-                num_columns_per_image=this_predictor_matrix.shape[2])
-
-            if num_classes == 2:
-                this_frontal_grid_matrix = ml_utils.binarize_front_images(
-                    this_frontal_grid_matrix)
-
-            this_predictor_matrix = ml_utils.subset_narr_grid_for_fcn_input(
-                this_predictor_matrix)
-            this_frontal_grid_matrix = ml_utils.subset_narr_grid_for_fcn_input(
-                this_frontal_grid_matrix)
-
-            if num_classes == 2:
-                this_frontal_grid_matrix = ml_utils.dilate_binary_target_images(
-                    target_matrix=this_frontal_grid_matrix,
-                    dilation_distance_metres=dilation_distance_metres,
-                    verbose=False)
-            else:
-                this_frontal_grid_matrix = (
-                    ml_utils.dilate_ternary_target_images(
-                        target_matrix=this_frontal_grid_matrix,
-                        dilation_distance_metres=dilation_distance_metres,
-                        verbose=False)
-                )
+    predictor_matrix, target_matrix, target_time_index = _refill_example_pool(
+        predictor_pool_matrix=None, target_pool_matrix=None,
+        slot_indices=all_slot_indices, time_index=0,
+        narr_file_name_matrix=narr_file_name_matrix,
+        frontal_grid_file_names=frontal_grid_file_names,
+        num_classes=num_classes,
+        dilation_distance_metres=dilation_distance_metres,
+        subset_for_fcn_input=True)
 
-            if target_matrix is None or target_matrix.size == 0:
-                predictor_matrix = copy.deepcopy(this_predictor_matrix)
-                target_matrix = copy.deepcopy(this_frontal_grid_matrix)
-            else:
-                predictor_matrix = numpy.concatenate(
-                    (predictor_matrix, this_predictor_matrix), axis=0)
-                target_matrix = numpy.concatenate(
-                    (target_matrix, this_frontal_grid_matrix), axis=0)
-
-            num_examples_in_memory = target_matrix.shape[0]
+    while True:
+        batch_indices = numpy.random.choice(
+            all_slot_indices, size=num_examples_per_batch, replace=False)
 
         predictor_matrix_to_return = predictor_matrix[
             batch_indices, ...].astype('float32')
@@ -1067,11 +1418,22 @@ def full_size_4d_example_generator(
         target_matrix_to_return = keras.utils.to_categorical(
             target_matrix[batch_indices, ...], num_classes)
         target_matrix_to_return = numpy.reshape(
-            target_matrix_to_return, target_matrix.shape + (num_classes,))
+            target_matrix_to_return,
+            (num_examples_per_batch,) + target_matrix.shape[1:] +
+            (num_classes,)
+        )
 
-        predictor_matrix = numpy.delete(predictor_matrix, batch_indices, axis=0)
-        target_matrix = numpy.delete(target_matrix, batch_indices, axis=0)
-        num_examples_in_memory = target_matrix.shape[0]
+        predictor_matrix, target_matrix, target_time_index = (
+            _refill_example_pool(
+                predictor_pool_matrix=predictor_matrix,
+                target_pool_matrix=target_matrix, slot_indices=batch_indices,
+                time_index=target_time_index,
+                narr_file_name_matrix=narr_file_name_matrix,
+                frontal_grid_file_names=frontal_grid_file_names,
+                num_classes=num_classes,
+                dilation_distance_metres=dilation_distance_metres,
+                subset_for_fcn_input=True)
+        )
 
         yield (predictor_matrix_to_return, target_matrix_to_return)
 
@@ -1161,18 +1523,9 @@ def prep_downsized_3d_examples_to_write(
         predictor_matrix=predictor_matrix,
         normalization_type_string=normalization_type_string)
 
-    print 'Reading data from: "{0:s}"...'.format(frontal_grid_file_name)
-    frontal_grid_table = fronts_io.read_narr_grids_from_file(
-        frontal_grid_file_name)
-
-    target_matrix = ml_utils.front_table_to_images(
-        frontal_grid_table=frontal_grid_table,
-        num_rows_per_image=predictor_matrix.shape[1],
-        num_columns_per_image=predictor_matrix.shape[2])
-
-    target_matrix = ml_utils.dilate_ternary_target_images(
-        target_matrix=target_matrix,
-        dilation_distance_metres=dilation_distance_metres, verbose=False)
+    target_matrix = read_target_matrix(
+        frontal_grid_file_name=frontal_grid_file_name, num_classes=3,
+        dilation_distance_metres=dilation_distance_metres)
 
     sampled_target_point_dict = ml_utils.sample_target_points(
         target_matrix=target_matrix, class_fractions=class_fractions,
@@ -1374,11 +1727,38 @@ def find_downsized_3d_example_files(
     return [downsized_3d_file_names[i] for i in good_indices]
 
 
+def _check_netcdf_format(netcdf_format_string):
+    """Error-checks format of NetCDF file with downsized 3-D examples.
+
+    :param netcdf_format_string: NetCDF format.
+    :raises: ValueError: if
+        `netcdf_format_string not in VALID_NETCDF_FORMAT_STRINGS`.
+    """
+
+    error_checking.assert_is_string(netcdf_format_string)
+    if netcdf_format_string not in VALID_NETCDF_FORMAT_STRINGS:
+        error_string = (
+            '\n{0:s}\nValid NetCDF formats (listed above) do not include '
+            '"{1:s}".'
+        ).format(str(VALID_NETCDF_FORMAT_STRINGS), netcdf_format_string)
+
+        raise ValueError(error_string)
+
+
 def write_downsized_3d_examples(
         netcdf_file_name, example_dict, narr_predictor_names, pressure_level_mb,
-        dilation_distance_metres, narr_mask_matrix=None, append_to_file=False):
+        dilation_distance_metres, narr_mask_matrix=None, append_to_file=False,
+        netcdf_format_string=NETCDF3_FORMAT_STRING,
+        num_examples_per_netcdf_chunk=DEFAULT_NUM_EXAMPLES_PER_NETCDF_CHUNK,
+        compression_level=None, least_significant_digit=None):
     """Writes downsized 3-D examples to NetCDF file.
 
+    The NetCDF4 format (which is HDF5 underneath) supports chunking and
+    compression, so files are much smaller and faster to read in batches.  In
+    this format, target values are stored as 8-bit integers.
+
+    `read_downsized_3d_examples` can read files in either format.
+
     :param netcdf_file_name: Path to output file.
     :param example_dict: Dictionary created by
         `prep_downsized_3d_examples_to_write`.
@@ -1390,6 +1770,21 @@ def write_downsized_3d_examples(
     :param append_to_file: Boolean flag.  If True, this method will append to an
         existing file.  If False, will create a new file, overwriting the
         existing file if necessary.
+    :param netcdf_format_string: [used only if `append_to_file == False`]
+        NetCDF format (must be in list `VALID_NETCDF_FORMAT_STRINGS`).  When
+        appending, the format of the existing file is kept.
+    :param num_examples_per_netcdf_chunk: [used only if NetCDF4]
+        Number of examples per HDF5 chunk.  For the fastest reading, this should
+        divide the number of examples per training batch.
+    :param compression_level: [used only if NetCDF4]
+        Compression level for predictor matrix (integer from 1...9).  If
+        `compression_level is None`, the predictor matrix will not be
+        compressed.  Otherwise, it will be compressed by the shuffle filter and
+        zlib.
+    :param least_significant_digit: Number of decimal places to keep in the
+        predictor matrix (lossy quantization, which makes compression much more
+        effective).  If `least_significant_digit is None`, predictors will not
+        be quantized.
     """
 
     # Check input args.
@@ -1397,6 +1792,20 @@ def write_downsized_3d_examples(
     error_checking.assert_is_greater(pressure_level_mb, 0)
     error_checking.assert_is_geq(dilation_distance_metres, 0.)
     error_checking.assert_is_boolean(append_to_file)
+    _check_netcdf_format(netcdf_format_string)
+
+    if netcdf_format_string == NETCDF4_FORMAT_STRING:
+        error_checking.assert_is_integer(num_examples_per_netcdf_chunk)
+        error_checking.assert_is_greater(num_examples_per_netcdf_chunk, 0)
+
+        if compression_level is not None:
+            error_checking.assert_is_integer(compression_level)
+            error_checking.assert_is_geq(compression_level, 1)
+            error_checking.assert_is_leq(compression_level, 9)
+
+    if least_significant_digit is not None:
+        error_checking.assert_is_integer(least_significant_digit)
+        error_checking.assert_is_geq(least_significant_digit, 0)
 
     num_predictors = example_dict[PREDICTOR_MATRIX_KEY].shape[3]
 
@@ -1415,8 +1824,7 @@ def write_downsized_3d_examples(
 
     # Do other stuff.
     if append_to_file:
-        netcdf_dataset = netCDF4.Dataset(
-            netcdf_file_name, 'a', format='NETCDF3_64BIT_OFFSET')
+        netcdf_dataset = netCDF4.Dataset(netcdf_file_name, 'a')
 
         orig_predictor_names = netCDF4.chartostring(
             netcdf_dataset.variables[PREDICTOR_NAMES_KEY][:]
@@ -1454,7 +1862,7 @@ def write_downsized_3d_examples(
 
     file_system_utils.mkdir_recursive_if_necessary(file_name=netcdf_file_name)
     netcdf_dataset = netCDF4.Dataset(
-        netcdf_file_name, 'w', format='NETCDF3_64BIT_OFFSET')
+        netcdf_file_name, 'w', format=netcdf_format_string)
 
     netcdf_dataset.setncattr(PRESSURE_LEVEL_KEY, int(pressure_level_mb))
     netcdf_dataset.setncattr(DILATION_DISTANCE_KEY, dilation_distance_metres)
@@ -1480,6 +1888,26 @@ def write_downsized_3d_examples(
     netcdf_dataset.createDimension(CHARACTER_DIMENSION_KEY, num_predictor_chars)
     netcdf_dataset.createDimension(CLASS_DIMENSION_KEY, num_classes)
 
+    if netcdf_format_string == NETCDF4_FORMAT_STRING:
+        target_data_type = numpy.int8
+        num_examples_per_chunk = num_examples_per_netcdf_chunk
+
+        predictor_chunk_sizes = (
+            num_examples_per_chunk, num_rows_per_example,
+            num_columns_per_example, num_predictors
+        )
+        target_chunk_sizes = (num_examples_per_chunk, num_classes)
+        predictor_norm_chunk_sizes = (num_examples_per_chunk, num_predictors)
+        scalar_chunk_sizes = (num_examples_per_chunk,)
+    else:
+        target_data_type = numpy.int32
+        compression_level = None
+
+        predictor_chunk_sizes = None
+        target_chunk_sizes = None
+        predictor_norm_chunk_sizes = None
+        scalar_chunk_sizes = None
+
     string_type = 'S{0:d}'.format(num_predictor_chars)
     predictor_names_as_char_array = netCDF4.stringtochar(numpy.array(
         narr_predictor_names, dtype=string_type
@@ -1501,44 +1929,51 @@ def write_downsized_3d_examples(
     netcdf_dataset.createVariable(
         PREDICTOR_MATRIX_KEY, datatype=numpy.float32,
         dimensions=(EXAMPLE_DIMENSION_KEY, EXAMPLE_ROW_DIMENSION_KEY,
-                    EXAMPLE_COLUMN_DIMENSION_KEY, PREDICTOR_DIMENSION_KEY)
+                    EXAMPLE_COLUMN_DIMENSION_KEY, PREDICTOR_DIMENSION_KEY),
+        chunksizes=predictor_chunk_sizes, zlib=compression_level is not None,
+        complevel=compression_level, shuffle=compression_level is not None,
+        least_significant_digit=least_significant_digit
     )
     netcdf_dataset.variables[PREDICTOR_MATRIX_KEY][:] = example_dict[
         PREDICTOR_MATRIX_KEY]
 
     netcdf_dataset.createVariable(
-        TARGET_MATRIX_KEY, datatype=numpy.int32,
-        dimensions=(EXAMPLE_DIMENSION_KEY, CLASS_DIMENSION_KEY)
+        TARGET_MATRIX_KEY, datatype=target_data_type,
+        dimensions=(EXAMPLE_DIMENSION_KEY, CLASS_DIMENSION_KEY),
+        chunksizes=target_chunk_sizes
     )
     netcdf_dataset.variables[TARGET_MATRIX_KEY][:] = example_dict[
         TARGET_MATRIX_KEY]
 
     netcdf_dataset.createVariable(
         TARGET_TIMES_KEY, datatype=numpy.int32,
-        dimensions=EXAMPLE_DIMENSION_KEY)
+        dimensions=EXAMPLE_DIMENSION_KEY, chunksizes=scalar_chunk_sizes)
     netcdf_dataset.variables[TARGET_TIMES_KEY][:] = example_dict[
         TARGET_TIMES_KEY]
 
     netcdf_dataset.createVariable(
-        ROW_INDICES_KEY, datatype=numpy.int32, dimensions=EXAMPLE_DIMENSION_KEY)
+        ROW_INDICES_KEY, datatype=numpy.int32,
+        dimensions=EXAMPLE_DIMENSION_KEY, chunksizes=scalar_chunk_sizes)
     netcdf_dataset.variables[ROW_INDICES_KEY][:] = example_dict[ROW_INDICES_KEY]
 
     netcdf_dataset.createVariable(
         COLUMN_INDICES_KEY, datatype=numpy.int32,
-        dimensions=EXAMPLE_DIMENSION_KEY)
+        dimensions=EXAMPLE_DIMENSION_KEY, chunksizes=scalar_chunk_sizes)
     netcdf_dataset.variables[COLUMN_INDICES_KEY][:] = example_dict[
         COLUMN_INDICES_KEY]
 
     netcdf_dataset.createVariable(
         FIRST_NORM_PARAM_KEY, datatype=numpy.float32,
-        dimensions=(EXAMPLE_DIMENSION_KEY, PREDICTOR_DIMENSION_KEY)
+        dimensions=(EXAMPLE_DIMENSION_KEY, PREDICTOR_DIMENSION_KEY),
+        chunksizes=predictor_norm_chunk_sizes
     )
     netcdf_dataset.variables[FIRST_NORM_PARAM_KEY][:] = example_dict[
         FIRST_NORM_PARAM_KEY]
 
     netcdf_dataset.createVariable(
         SECOND_NORM_PARAM_KEY, datatype=numpy.float32,
-        dimensions=(EXAMPLE_DIMENSION_KEY, PREDICTOR_DIMENSION_KEY)
+        dimensions=(EXAMPLE_DIMENSION_KEY, PREDICTOR_DIMENSION_KEY),
+        chunksizes=predictor_norm_chunk_sizes
     )
     netcdf_dataset.variables[SECOND_NORM_PARAM_KEY][:] = example_dict[
         SECOND_NORM_PARAM_KEY]
@@ -1549,9 +1984,14 @@ def write_downsized_3d_examples(
 def read_downsized_3d_examples(
         netcdf_file_name, metadata_only=False, predictor_names_to_keep=None,
         num_half_rows_to_keep=None, num_half_columns_to_keep=None,
-        first_time_to_keep_unix_sec=None, last_time_to_keep_unix_sec=None):
+        first_time_to_keep_unix_sec=None, last_time_to_keep_unix_sec=None,
+        example_indices_to_keep=None):
     """Reads downsized 3-D examples from NetCDF file.
 
+    Predictor and target values are read only for the requested examples,
+    predictor variables, rows, and columns.  Thus, the rest of the file is never
+    read into memory.
+
     :param netcdf_file_name: Path to input file.
     :param metadata_only: Boolean flag.  If True, will return only metadata
         (everything except predictor and target matrices).
@@ -1568,6 +2008,11 @@ def read_downsized_3d_examples(
         Same but for columns.
     :param first_time_to_keep_unix_sec: Will throw out earlier target times.
     :param last_time_to_keep_unix_sec: Will throw out later target times.
+    :param example_indices_to_keep: 1-D numpy array of examples to keep.  These
+        are indices into the examples remaining after filtering by target time.
+        Examples will be returned in this order.  If
+        `example_indices_to_keep is None`, all remaining examples will be
+        returned.
     :return: example_dict: Dictionary with the following keys.
         `first_normalization_param_matrix` and
         `second_normalization_param_matrix` may not be present (present only in
@@ -1642,23 +2087,17 @@ def read_downsized_3d_examples(
         second_normalization_param_matrix = second_normalization_param_matrix[
             ..., predictor_indices]
 
-    if not metadata_only:
-        predictor_matrix = numpy.array(
-            netcdf_dataset.variables[PREDICTOR_MATRIX_KEY][:])
-        target_matrix = numpy.array(
-            netcdf_dataset.variables[TARGET_MATRIX_KEY][:])
-
-        predictor_matrix = predictor_matrix[..., predictor_indices]
-        predictor_matrix = _decrease_example_size(
-            predictor_matrix=predictor_matrix,
-            num_half_rows=num_half_rows_to_keep,
-            num_half_columns=num_half_columns_to_keep)
-
     indices_to_keep = numpy.where(numpy.logical_and(
         target_times_unix_sec >= first_time_to_keep_unix_sec,
         target_times_unix_sec <= last_time_to_keep_unix_sec
     ))[0]
 
+    if example_indices_to_keep is not None:
+        error_checking.assert_is_integer_numpy_array(example_indices_to_keep)
+        error_checking.assert_is_numpy_array(
+            example_indices_to_keep, num_dimensions=1)
+        indices_to_keep = indices_to_keep[example_indices_to_keep]
+
     example_dict = {
         TARGET_TIMES_KEY: target_times_unix_sec[indices_to_keep],
         ROW_INDICES_KEY: row_indices[indices_to_keep],
@@ -1679,12 +2118,105 @@ def read_downsized_3d_examples(
         })
 
     if not metadata_only:
+        predictor_matrix, target_matrix = _read_example_hyperslab(
+            netcdf_dataset=netcdf_dataset, example_indices=indices_to_keep,
+            predictor_indices=predictor_indices,
+            num_half_rows_to_keep=num_half_rows_to_keep,
+            num_half_columns_to_keep=num_half_columns_to_keep)
+
         example_dict.update({
-            PREDICTOR_MATRIX_KEY:
-                predictor_matrix[indices_to_keep, ...].astype('float32'),
-            TARGET_MATRIX_KEY:
-                target_matrix[indices_to_keep, ...].astype('float64')
+            PREDICTOR_MATRIX_KEY: predictor_matrix,
+            TARGET_MATRIX_KEY: target_matrix
         })
 
     netcdf_dataset.close()
     return example_dict
+
+
+def read_downsized_3d_examples_in_chunks(
+        netcdf_file_name, num_examples_per_chunk, predictor_names_to_keep=None,
+        num_half_rows_to_keep=None, num_half_columns_to_keep=None,
+        first_time_to_keep_unix_sec=None, last_time_to_keep_unix_sec=None):
+    """Reads downsized 3-D examples from NetCDF file, one chunk at a time.
+
+    The file is kept open between chunks, and only one chunk of predictor and
+    target values is in memory at once.
+
+    :param netcdf_file_name: See doc for `read_downsized_3d_examples`.
+    :param num_examples_per_chunk: Number of examples per chunk.  The last chunk
+        may be smaller.
+    :param predictor_names_to_keep: See doc for `read_downsized_3d_examples`.
+    :param num_half_rows_to_keep: Same.
+    :param num_half_columns_to_keep: Same.
+    :param first_time_to_keep_unix_sec: Same.
+    :param last_time_to_keep_unix_sec: Same.
+    :return: example_dict: Dictionary created by `read_downsized_3d_examples`,
+        containing only one chunk of examples.
+    """
+
+    error_checking.assert_is_integer(num_examples_per_chunk)
+    error_checking.assert_is_greater(num_examples_per_chunk, 0)
+
+    example_dict = read_downsized_3d_examples(
+        netcdf_file_name=netcdf_file_name, metadata_only=True,
+        predictor_names_to_keep=predictor_names_to_keep,
+        first_time_to_keep_unix_sec=first_time_to_keep_unix_sec,
+        last_time_to_keep_unix_sec=last_time_to_keep_unix_sec)
+
+    netcdf_dataset = netcdf_io.open_netcdf(netcdf_file_name)
+
+    narr_predictor_names = netCDF4.chartostring(
+        netcdf_dataset.variables[PREDICTOR_NAMES_KEY][:]
+    )
+    narr_predictor_names = [str(s) for s in narr_predictor_names]
+    predictor_indices = numpy.array(
+        [narr_predictor_names.index(p)
+         for p in example_dict[PREDICTOR_NAMES_KEY]],
+        dtype=int)
+
+    if first_time_to_keep_unix_sec is None:
+        first_time_to_keep_unix_sec = 0
+    if last_time_to_keep_unix_sec is None:
+        last_time_to_keep_unix_sec = int(1e11)
+
+    all_target_times_unix_sec = numpy.array(
+        netcdf_dataset.variables[TARGET_TIMES_KEY][:], dtype=int)
+    indices_to_keep = numpy.where(numpy.logical_and(
+        all_target_times_unix_sec >= first_time_to_keep_unix_sec,
+        all_target_times_unix_sec <= last_time_to_keep_unix_sec
+    ))[0]
+
+    num_examples = len(indices_to_keep)
+
+    try:
+        for i in range(0, num_examples, num_examples_per_chunk):
+            these_indices = numpy.linspace(
+                i, min([i + num_examples_per_chunk, num_examples]) - 1,
+                num=min([num_examples_per_chunk, num_examples - i]), dtype=int)
+
+            this_predictor_matrix, this_target_matrix = (
+                _read_example_hyperslab(
+                    netcdf_dataset=netcdf_dataset,
+                    example_indices=indices_to_keep[these_indices],
+                    predictor_indices=predictor_indices,
+                    num_half_rows_to_keep=num_half_rows_to_keep,
+                    num_half_columns_to_keep=num_half_columns_to_keep)
+            )
+
+            this_example_dict = {
+                PREDICTOR_MATRIX_KEY: this_predictor_matrix,
+                TARGET_MATRIX_KEY: this_target_matrix
+            }
+
+            for this_key in example_dict:
+                if this_key in [TARGET_TIMES_KEY, ROW_INDICES_KEY,
+                                COLUMN_INDICES_KEY, FIRST_NORM_PARAM_KEY,
+                                SECOND_NORM_PARAM_KEY]:
+                    this_example_dict[this_key] = example_dict[this_key][
+                        these_indices, ...]
+                else:
+                    this_example_dict[this_key] = example_dict[this_key]
+
+            yield this_example_dict
+    finally:
+        netcdf_dataset.close()
@@ -3,6 +3,7 @@
 import copy
 import unittest
 import numpy
+import netCDF4
 from generalexam.machine_learning import training_validation_io as trainval_io
 
 TOLERANCE = 1e-6
@@ -37,6 +38,42 @@ THIS_MATRIX_EXAMPLE1 = numpy.stack(
 SMALL_PREDICTOR_MATRIX = numpy.stack(
     (THIS_MATRIX_EXAMPLE1, THIS_MATRIX_EXAMPLE1 + 100), axis=0)
 
+# The following constants are used to test _indices_to_netcdf_key.
+CONSECUTIVE_INDICES = numpy.array([3, 4, 5, 6], dtype=int)
+CONSECUTIVE_INDEX_KEY = slice(3, 7)
+NON_CONSECUTIVE_INDICES = numpy.array([3, 4, 6], dtype=int)
+
+# The following constants are used to test _read_example_hyperslab.
+NUM_EXAMPLES_IN_FILE = 6
+HYPERSLAB_PREDICTOR_MATRIX = numpy.stack(
+    [LARGE_PREDICTOR_MATRIX[0, ...] + 1000 * i
+     for i in range(NUM_EXAMPLES_IN_FILE)],
+    axis=0)
+HYPERSLAB_TARGET_MATRIX = numpy.array(
+    [[1, 0, 0], [0, 1, 0], [0, 0, 1], [1, 0, 0], [0, 1, 0], [0, 0, 1]],
+    dtype=float)
+
+# Sorted example indices with a repeat look consecutive (5 - 3 = 3 - 1), but
+# are not.
+REPEATED_EXAMPLE_INDICES = numpy.array([3, 3, 5], dtype=int)
+UNSORTED_EXAMPLE_INDICES = numpy.array([5, 0, 3, 3], dtype=int)
+HYPERSLAB_PREDICTOR_INDICES = numpy.array([2, 0], dtype=int)
+
+# The following constants are used to test _get_consumed_pool_slots.
+NUM_SLOTS_IN_POOL = 5
+NUM_EXAMPLES_PER_SLOT = 12
+FIRST_SLOT_INDEX_BEFORE = 3
+
+NUM_EXAMPLES_DRAWN_BEFORE_SOME = 37
+CONSUMED_SLOT_INDICES_SOME = numpy.array([3, 4, 0], dtype=int)
+FIRST_SLOT_INDEX_AFTER_SOME = 1
+NUM_EXAMPLES_DRAWN_AFTER_SOME = 1
+
+NUM_EXAMPLES_DRAWN_BEFORE_NONE = 8
+CONSUMED_SLOT_INDICES_NONE = numpy.array([], dtype=int)
+FIRST_SLOT_INDEX_AFTER_NONE = 3
+NUM_EXAMPLES_DRAWN_AFTER_NONE = 8
+
 # The following constants are used to test find_downsized_3d_example_file,
 # _file_name_to_target_times, and _file_name_to_batch_number.
 TOP_DIRECTORY_NAME = 'poop'
@@ -48,6 +85,118 @@ BATCH_NUMBER = 1234
 SHUFFLED_FILE_NAME = (
     'poop/batches0001000-0001999/downsized_3d_examples_batch0001234.nc')
 
+# The following constants are used to test prefetch_batches.
+NUM_BATCHES_PER_WORKER = 5
+NUM_VALUES_PER_BATCH = 3
+NUM_PREFETCH_WORKERS = 2
+RANDOM_SEED = 6695
+INPUT_VALUES_TO_SPLIT = numpy.linspace(0, 6, num=7, dtype=int)
+
+
+def _random_generator(
+        num_batches, num_values_per_batch, worker_index=0, num_workers=1):
+    """Generates batches of random numbers (used to test prefetch_batches).
+
+    :param num_batches: Number of batches.
+    :param num_values_per_batch: Number of values per batch.
+    :param worker_index: Index of background worker (not used).
+    :param num_workers: Number of background workers (not used).
+    :return: value_array: 1-D numpy array of random numbers.
+    """
+
+    for _ in range(num_batches):
+        yield numpy.random.uniform(size=num_values_per_batch)
+
+
+def _splitting_generator(input_values, worker_index=0, num_workers=1):
+    """Generates one batch per input value (used to test prefetch_batches).
+
+    This generator uses only every [`num_workers`]th input value, starting with
+    the [`worker_index`]th.
+
+    :param input_values: 1-D numpy array of input values.
+    :param worker_index: Index of background worker.
+    :param num_workers: Number of background workers.
+    :return: value_array: length-2 numpy array, containing the input value and a
+        random number.
+    """
+
+    for this_value in input_values[worker_index::num_workers]:
+        yield numpy.array([this_value, numpy.random.uniform()])
+
+
+def _failing_generator(worker_index=0, num_workers=1):
+    """Raises an error (used to test prefetch_batches).
+
+    :param worker_index: Index of background worker (not used).
+    :param num_workers: Number of background workers (not used).
+    :raises: ValueError: always.
+    """
+
+    raise ValueError('This generator always fails.')
+    yield None
+
+
+def _get_prefetched_batches():
+    """Returns batches expected from prefetch_batches.
+
+    :return: list_of_batches: 1-D list, where each item is a 1-D numpy array.
+    """
+
+    list_of_batches_by_worker = []
+
+    for k in range(NUM_PREFETCH_WORKERS):
+        numpy.random.seed(RANDOM_SEED + k)
+        list_of_batches_by_worker.append(
+            list(_random_generator(
+                num_batches=NUM_BATCHES_PER_WORKER,
+                num_values_per_batch=NUM_VALUES_PER_BATCH))
+        )
+
+    list_of_batches = []
+    for i in range(NUM_BATCHES_PER_WORKER):
+        for k in range(NUM_PREFETCH_WORKERS):
+            list_of_batches.append(list_of_batches_by_worker[k][i])
+
+    return list_of_batches
+
+
+PREFETCHED_BATCHES = _get_prefetched_batches()
+
+
+def _create_netcdf_dataset_for_hyperslab():
+    """Creates in-memory NetCDF dataset with downsized 3-D examples.
+
+    :return: netcdf_dataset: Instance of `netCDF4.Dataset`, containing
+        `HYPERSLAB_PREDICTOR_MATRIX` and `HYPERSLAB_TARGET_MATRIX`.
+    """
+
+    netcdf_dataset = netCDF4.Dataset(
+        'hyperslab_test.nc', mode='w', diskless=True, persist=False)
+
+    netcdf_dataset.createDimension(
+        'example', HYPERSLAB_PREDICTOR_MATRIX.shape[0])
+    netcdf_dataset.createDimension('row', HYPERSLAB_PREDICTOR_MATRIX.shape[1])
+    netcdf_dataset.createDimension(
+        'column', HYPERSLAB_PREDICTOR_MATRIX.shape[2])
+    netcdf_dataset.createDimension(
+        'predictor', HYPERSLAB_PREDICTOR_MATRIX.shape[3])
+    netcdf_dataset.createDimension('class', HYPERSLAB_TARGET_MATRIX.shape[1])
+
+    netcdf_dataset.createVariable(
+        trainval_io.PREDICTOR_MATRIX_KEY, datatype=numpy.float32,
+        dimensions=('example', 'row', 'column', 'predictor'))
+    netcdf_dataset.variables[trainval_io.PREDICTOR_MATRIX_KEY][:] = (
+        HYPERSLAB_PREDICTOR_MATRIX)
+
+    netcdf_dataset.createVariable(
+        trainval_io.TARGET_MATRIX_KEY, datatype=numpy.float64,
+        dimensions=('example', 'class'))
+    netcdf_dataset.variables[trainval_io.TARGET_MATRIX_KEY][:] = (
+        HYPERSLAB_TARGET_MATRIX)
+
+    return netcdf_dataset
+
 
 class TrainingValidationIoTests(unittest.TestCase):
     """Each method is a unit test for training_validation_io.py."""
@@ -63,6 +212,153 @@ class TrainingValidationIoTests(unittest.TestCase):
         self.assertTrue(numpy.allclose(
             this_predictor_matrix, SMALL_PREDICTOR_MATRIX, atol=TOLERANCE))
 
+    def test_decrease_example_size_no_cropping(self):
+        """Ensures correct output from _decrease_example_size.
+
+        In this case, examples are not cropped.
+        """
+
+        this_predictor_matrix = trainval_io._decrease_example_size(
+            predictor_matrix=copy.deepcopy(LARGE_PREDICTOR_MATRIX),
+            num_half_rows=None, num_half_columns=None)
+
+        self.assertTrue(numpy.allclose(
+            this_predictor_matrix, LARGE_PREDICTOR_MATRIX, atol=TOLERANCE))
+
+    def test_indices_to_netcdf_key_consecutive(self):
+        """Ensures correct output from _indices_to_netcdf_key.
+
+        In this case, indices are consecutive.
+        """
+
+        this_key = trainval_io._indices_to_netcdf_key(CONSECUTIVE_INDICES)
+        self.assertTrue(this_key == CONSECUTIVE_INDEX_KEY)
+
+    def test_indices_to_netcdf_key_non_consecutive(self):
+        """Ensures correct output from _indices_to_netcdf_key.
+
+        In this case, indices are not consecutive.
+        """
+
+        this_key = trainval_io._indices_to_netcdf_key(NON_CONSECUTIVE_INDICES)
+        self.assertTrue(numpy.array_equal(this_key, NON_CONSECUTIVE_INDICES))
+
+    def test_read_example_hyperslab_repeated(self):
+        """Ensures correct output from _read_example_hyperslab.
+
+        In this case, example indices are sorted, with one repeat.
+        """
+
+        this_dataset = _create_netcdf_dataset_for_hyperslab()
+        this_predictor_matrix, this_target_matrix = (
+            trainval_io._read_example_hyperslab(
+                netcdf_dataset=this_dataset,
+                example_indices=REPEATED_EXAMPLE_INDICES,
+                predictor_indices=HYPERSLAB_PREDICTOR_INDICES,
+                num_half_rows_to_keep=None, num_half_columns_to_keep=None)
+        )
+        this_dataset.close()
+
+        self.assertTrue(numpy.allclose(
+            this_predictor_matrix,
+            HYPERSLAB_PREDICTOR_MATRIX[REPEATED_EXAMPLE_INDICES, ...][
+                ..., HYPERSLAB_PREDICTOR_INDICES],
+            atol=TOLERANCE))
+        self.assertTrue(numpy.allclose(
+            this_target_matrix,
+            HYPERSLAB_TARGET_MATRIX[REPEATED_EXAMPLE_INDICES, ...],
+            atol=TOLERANCE))
+
+    def test_read_example_hyperslab_unsorted(self):
+        """Ensures correct output from _read_example_hyperslab.
+
+        In this case, example indices are unsorted, with one repeat.
+        """
+
+        this_dataset = _create_netcdf_dataset_for_hyperslab()
+        this_predictor_matrix, this_target_matrix = (
+            trainval_io._read_example_hyperslab(
+                netcdf_dataset=this_dataset,
+                example_indices=UNSORTED_EXAMPLE_INDICES,
+                predictor_indices=HYPERSLAB_PREDICTOR_INDICES,
+                num_half_rows_to_keep=None, num_half_columns_to_keep=None)
+        )
+        this_dataset.close()
+
+        self.assertTrue(numpy.allclose(
+            this_predictor_matrix,
+            HYPERSLAB_PREDICTOR_MATRIX[UNSORTED_EXAMPLE_INDICES, ...][
+                ..., HYPERSLAB_PREDICTOR_INDICES],
+            atol=TOLERANCE))
+        self.assertTrue(numpy.allclose(
+            this_target_matrix,
+            HYPERSLAB_TARGET_MATRIX[UNSORTED_EXAMPLE_INDICES, ...],
+            atol=TOLERANCE))
+
+    def test_check_netcdf_format_netcdf3(self):
+        """Ensures correct output from _check_netcdf_format.
+
+        In this case, format is NetCDF3 (good).
+        """
+
+        trainval_io._check_netcdf_format(trainval_io.NETCDF3_FORMAT_STRING)
+
+    def test_check_netcdf_format_netcdf4(self):
+        """Ensures correct output from _check_netcdf_format.
+
+        In this case, format is NetCDF4 (good).
+        """
+
+        trainval_io._check_netcdf_format(trainval_io.NETCDF4_FORMAT_STRING)
+
+    def test_check_netcdf_format_invalid(self):
+        """Ensures correct output from _check_netcdf_format.
+
+        In this case, format is unrecognized (bad).
+        """
+
+        with self.assertRaises(ValueError):
+            trainval_io._check_netcdf_format('NETCDF4_CLASSIC')
+
+    def test_get_consumed_pool_slots_some(self):
+        """Ensures correct output from _get_consumed_pool_slots.
+
+        In this case, enough examples have been drawn to consume some slots,
+        including one at the start of the ring.
+        """
+
+        (these_slot_indices, this_first_slot_index, this_num_examples_drawn
+        ) = trainval_io._get_consumed_pool_slots(
+            first_slot_index=FIRST_SLOT_INDEX_BEFORE,
+            num_slots=NUM_SLOTS_IN_POOL,
+            num_examples_drawn=NUM_EXAMPLES_DRAWN_BEFORE_SOME,
+            num_examples_per_slot=NUM_EXAMPLES_PER_SLOT)
+
+        self.assertTrue(numpy.array_equal(
+            these_slot_indices, CONSUMED_SLOT_INDICES_SOME))
+        self.assertTrue(this_first_slot_index == FIRST_SLOT_INDEX_AFTER_SOME)
+        self.assertTrue(
+            this_num_examples_drawn == NUM_EXAMPLES_DRAWN_AFTER_SOME)
+
+    def test_get_consumed_pool_slots_none(self):
+        """Ensures correct output from _get_consumed_pool_slots.
+
+        In this case, not enough examples have been drawn to consume any slot.
+        """
+
+        (these_slot_indices, this_first_slot_index, this_num_examples_drawn
+        ) = trainval_io._get_consumed_pool_slots(
+            first_slot_index=FIRST_SLOT_INDEX_BEFORE,
+            num_slots=NUM_SLOTS_IN_POOL,
+            num_examples_drawn=NUM_EXAMPLES_DRAWN_BEFORE_NONE,
+            num_examples_per_slot=NUM_EXAMPLES_PER_SLOT)
+
+        self.assertTrue(numpy.array_equal(
+            these_slot_indices, CONSUMED_SLOT_INDICES_NONE))
+        self.assertTrue(this_first_slot_index == FIRST_SLOT_INDEX_AFTER_NONE)
+        self.assertTrue(
+            this_num_examples_drawn == NUM_EXAMPLES_DRAWN_AFTER_NONE)
+
     def test_find_downsized_3d_example_file_non_shuffled(self):
         """Ensures correct output from find_downsized_3d_example_file.
 
@@ -131,6 +427,76 @@ class TrainingValidationIoTests(unittest.TestCase):
             SHUFFLED_FILE_NAME)
         self.assertTrue(this_batch_number == BATCH_NUMBER)
 
+    def test_prefetch_batches(self):
+        """Ensures correct output from prefetch_batches."""
+
+        these_batches = list(trainval_io.prefetch_batches(
+            generator_function=_random_generator,
+            generator_kwargs={
+                'num_batches': NUM_BATCHES_PER_WORKER,
+                'num_values_per_batch': NUM_VALUES_PER_BATCH
+            },
+            num_workers=NUM_PREFETCH_WORKERS, random_seed=RANDOM_SEED))
+
+        self.assertTrue(len(these_batches) == len(PREFETCHED_BATCHES))
+        for i in range(len(these_batches)):
+            self.assertTrue(numpy.allclose(
+                these_batches[i], PREFETCHED_BATCHES[i], atol=TOLERANCE))
+
+    def test_prefetch_batches_no_seed(self):
+        """Ensures correct output from prefetch_batches.
+
+        In this case there is no random seed, so each worker process must seed
+        itself.  Otherwise, all workers would create the same batches.
+        """
+
+        these_batches = list(trainval_io.prefetch_batches(
+            generator_function=_random_generator,
+            generator_kwargs={
+                'num_batches': NUM_BATCHES_PER_WORKER,
+                'num_values_per_batch': NUM_VALUES_PER_BATCH
+            },
+            num_workers=NUM_PREFETCH_WORKERS, random_seed=None))
+
+        self.assertTrue(
+            len(these_batches) ==
+            NUM_BATCHES_PER_WORKER * NUM_PREFETCH_WORKERS)
+
+        for i in range(len(these_batches)):
+            for j in range(i):
+                self.assertFalse(numpy.allclose(
+                    these_batches[i], these_batches[j], atol=TOLERANCE))
+
+    def test_prefetch_batches_split(self):
+        """Ensures correct output from prefetch_batches.
+
+        In this case the input values are split among workers, and the workers
+        create different numbers of batches.  Each input value should be used
+        exactly once, and batches from all workers should be yielded.
+        """
+
+        these_batches = list(trainval_io.prefetch_batches(
+            generator_function=_splitting_generator,
+            generator_kwargs={'input_values': INPUT_VALUES_TO_SPLIT},
+            num_workers=NUM_PREFETCH_WORKERS, random_seed=None))
+
+        these_input_values = numpy.array(
+            [b[0] for b in these_batches], dtype=int)
+        self.assertTrue(numpy.array_equal(
+            numpy.sort(these_input_values), INPUT_VALUES_TO_SPLIT))
+
+        these_random_values = numpy.array([b[1] for b in these_batches])
+        self.assertTrue(
+            len(numpy.unique(these_random_values)) == len(these_batches))
+
+    def test_prefetch_batches_error(self):
+        """Ensures that prefetch_batches re-raises error from worker."""
+
+        with self.assertRaises(RuntimeError):
+            list(trainval_io.prefetch_batches(
+                generator_function=_failing_generator, generator_kwargs={},
+                num_workers=NUM_PREFETCH_WORKERS, random_seed=RANDOM_SEED))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -57,47 +57,32 @@ MODEL_METADATA_KEYS = [
 ]
 
 
-def _trainval_generator(
+def _image_generator(
         top_input_dir_name, first_time_unix_sec, last_time_unix_sec,
         narr_predictor_names, num_half_rows, num_half_columns,
-        num_examples_per_batch, cnn_model_object, cnn_feature_layer_name):
-    """Generates training or validation examples for upconvnet on the fly.
+        num_examples_per_batch, worker_index=0, num_workers=1):
+    """Generates images (downsized 3-D examples) for upconvnet.
 
-    :param top_input_dir_name: Name of top-level directory with downsized 3-D
-        examples (two spatial dimensions).  Files therein will be found by
-        `training_validation_io.find_downsized_3d_example_file` (with
-        `shuffled = True`) and read by
-        `training_validation_io.read_downsized_3d_examples`.
-    :param first_time_unix_sec: First valid time.  Only examples with valid time
-        in `first_time_unix_sec`...`last_time_unix_sec` will be kept.
-    :param last_time_unix_sec: See above.
-    :param narr_predictor_names: See doc for
-        `training_validation_io.read_downsized_3d_examples`.
-    :param num_half_rows: See doc for
-        `training_validation_io.read_downsized_3d_examples`.
+    This generator does not use a Keras model, so it can be run in background
+    workers (see `training_validation_io.prefetch_batches`).
+
+    :param top_input_dir_name: See doc for `_trainval_generator`.
+    :param first_time_unix_sec: Same.
+    :param last_time_unix_sec: Same.
+    :param narr_predictor_names: Same.
+    :param num_half_rows: Same.
     :param num_half_columns: Same.
-    :param num_examples_per_batch: Number of examples in each batch.
-    :param cnn_model_object: Trained CNN model (instance of
-        `keras.models.Model`).  This will be used to turn images stored in
-        `top_input_dir_name` into scalar features.
-    :param cnn_feature_layer_name: The "scalar features" will be the set of
-        activations from this layer.
-    :return: feature_matrix: E-by-Z numpy array of scalar features.  These are
-        the "predictors" for the upconv network.
-    :return: target_matrix: E-by-M-by-N-by-C numpy array of target images.
-        These are the predictors for the CNN and the targets for the upconv
-        network.
+    :param num_examples_per_batch: Same.
+    :param worker_index: See doc for
+        `training_validation_io.quick_downsized_3d_example_gen`.
+    :param num_workers: Same.
+    :return: image_matrix: E-by-M-by-N-by-C numpy array of images.
     """
 
-    error_checking.assert_is_integer(num_examples_per_batch)
-    error_checking.assert_is_geq(num_examples_per_batch, 10)
-
-    partial_cnn_model_object = cnn.model_to_feature_generator(
-        model_object=cnn_model_object, output_layer_name=cnn_feature_layer_name)
-
     example_file_names = trainval_io.find_downsized_3d_example_files(
         top_directory_name=top_input_dir_name, shuffled=True,
         first_batch_number=0, last_batch_number=LARGE_INTEGER)
+    example_file_names = example_file_names[worker_index::num_workers]
     shuffle(example_file_names)
 
     num_files = len(example_file_names)
@@ -105,7 +90,6 @@ def _trainval_generator(
     batch_indices = numpy.linspace(
         0, num_examples_per_batch - 1, num=num_examples_per_batch, dtype=int)
 
-    num_predictors = len(narr_predictor_names)
     num_examples_in_memory = 0
     full_target_matrix = None
 
@@ -144,7 +128,80 @@ def _trainval_generator(
 
             num_examples_in_memory = full_target_matrix.shape[0]
 
-        target_matrix = full_target_matrix[batch_indices, ...].astype('float32')
+        image_matrix = full_target_matrix[batch_indices, ...].astype('float32')
+
+        num_examples_in_memory = 0
+        full_target_matrix = None
+
+        yield image_matrix
+
+
+def _trainval_generator(
+        top_input_dir_name, first_time_unix_sec, last_time_unix_sec,
+        narr_predictor_names, num_half_rows, num_half_columns,
+        num_examples_per_batch, cnn_model_object, cnn_feature_layer_name,
+        num_prefetch_workers=1,
+        num_batches_to_prefetch=trainval_io.DEFAULT_NUM_BATCHES_TO_PREFETCH,
+        random_seed=None):
+    """Generates training or validation examples for upconvnet on the fly.
+
+    Images are read in background workers (see `_image_generator`), while
+    scalar features are computed by the CNN in the calling thread.
+
+    :param top_input_dir_name: Name of top-level directory with downsized 3-D
+        examples (two spatial dimensions).  Files therein will be found by
+        `training_validation_io.find_downsized_3d_example_file` (with
+        `shuffled = True`) and read by
+        `training_validation_io.read_downsized_3d_examples`.
+    :param first_time_unix_sec: First valid time.  Only examples with valid time
+        in `first_time_unix_sec`...`last_time_unix_sec` will be kept.
+    :param last_time_unix_sec: See above.
+    :param narr_predictor_names: See doc for
+        `training_validation_io.read_downsized_3d_examples`.
+    :param num_half_rows: See doc for
+        `training_validation_io.read_downsized_3d_examples`.
+    :param num_half_columns: Same.
+    :param num_examples_per_batch: Number of examples in each batch.
+    :param cnn_model_object: Trained CNN model (instance of
+        `keras.models.Model`).  This will be used to turn images stored in
+        `top_input_dir_name` into scalar features.
+    :param cnn_feature_layer_name: The "scalar features" will be the set of
+        activations from this layer.
+    :param num_prefetch_workers: See doc for
+        `training_validation_io.prefetch_batches`.
+    :param num_batches_to_prefetch: Same.
+    :param random_seed: Same.
+    :return: feature_matrix: E-by-Z numpy array of scalar features.  These are
+        the "predictors" for the upconv network.
+    :return: target_matrix: E-by-M-by-N-by-C numpy array of target images.
+        These are the predictors for the CNN and the targets for the upconv
+        network.
+    """
+
+    error_checking.assert_is_integer(num_examples_per_batch)
+    error_checking.assert_is_geq(num_examples_per_batch, 10)
+
+    partial_cnn_model_object = cnn.model_to_feature_generator(
+        model_object=cnn_model_object, output_layer_name=cnn_feature_layer_name)
+
+    image_generator = trainval_io.prefetch_batches(
+        generator_function=_image_generator,
+        generator_kwargs={
+            'top_input_dir_name': top_input_dir_name,
+            'first_time_unix_sec': first_time_unix_sec,
+            'last_time_unix_sec': last_time_unix_sec,
+            'narr_predictor_names': narr_predictor_names,
+            'num_half_rows': num_half_rows,
+            'num_half_columns': num_half_columns,
+            'num_examples_per_batch': num_examples_per_batch
+        },
+        num_workers=num_prefetch_workers,
+        num_batches_to_prefetch=num_batches_to_prefetch,
+        random_seed=random_seed)
+
+    num_predictors = len(narr_predictor_names)
+
+    for target_matrix in image_generator:
         feature_matrix = partial_cnn_model_object.predict(
             target_matrix, batch_size=num_examples_per_batch)
 
@@ -155,9 +212,6 @@ def _trainval_generator(
                     numpy.mean(target_matrix[i, ..., m])
                 )
 
-        num_examples_in_memory = 0
-        full_target_matrix = None
-
         yield (feature_matrix, target_matrix)
 
 
@@ -341,7 +395,10 @@ def train_upconvnet(
         cnn_metadata_dict, num_examples_per_batch, num_epochs,
         num_training_batches_per_epoch, output_model_file_name,
         num_validation_batches_per_epoch=None, top_validation_dir_name=None,
-        first_validation_time_unix_sec=None, last_validation_time_unix_sec=None):
+        first_validation_time_unix_sec=None, last_validation_time_unix_sec=None,
+        num_prefetch_workers=1,
+        num_batches_to_prefetch=trainval_io.DEFAULT_NUM_BATCHES_TO_PREFETCH,
+        random_seed=None):
     """Trains upconvnet.
 
     :param ucn_model_object: Untrained instance of `keras.models.Model`,
@@ -379,6 +436,12 @@ def train_upconvnet(
         [used only if `num_validation_batches_per_epoch is not None`]
         Determines validation period.  See doc for input `last_time_unix_sec`
         to method `training_generator`.
+    :param num_prefetch_workers: Number of background workers reading training
+        images (and, separately, validation images).  See doc for
+        `training_validation_io.prefetch_batches`.
+    :param num_batches_to_prefetch: See doc for
+        `training_validation_io.prefetch_batches`.
+    :param random_seed: Same.
     """
 
     file_system_utils.mkdir_recursive_if_necessary(
@@ -407,7 +470,10 @@ def train_upconvnet(
             traditional_cnn.NUM_COLUMNS_IN_HALF_GRID_KEY],
         num_examples_per_batch=num_examples_per_batch,
         cnn_model_object=cnn_model_object,
-        cnn_feature_layer_name=cnn_feature_layer_name)
+        cnn_feature_layer_name=cnn_feature_layer_name,
+        num_prefetch_workers=num_prefetch_workers,
+        num_batches_to_prefetch=num_batches_to_prefetch,
+        random_seed=random_seed)
 
     if num_validation_batches_per_epoch is None:
         ucn_model_object.fit_generator(
@@ -423,6 +489,11 @@ def train_upconvnet(
 
     list_of_callback_objects.append(early_stopping_object)
 
+    if random_seed is None:
+        validation_random_seed = None
+    else:
+        validation_random_seed = random_seed + num_prefetch_workers
+
     validation_generator = _trainval_generator(
         top_input_dir_name=top_validation_dir_name,
         first_time_unix_sec=first_validation_time_unix_sec,
@@ -435,7 +506,10 @@ def train_upconvnet(
             traditional_cnn.NUM_COLUMNS_IN_HALF_GRID_KEY],
         num_examples_per_batch=num_examples_per_batch,
         cnn_model_object=cnn_model_object,
-        cnn_feature_layer_name=cnn_feature_layer_name)
+        cnn_feature_layer_name=cnn_feature_layer_name,
+        num_prefetch_workers=num_prefetch_workers,
+        num_batches_to_prefetch=num_batches_to_prefetch,
+        random_seed=validation_random_seed)
 
     ucn_model_object.fit_generator(
         generator=training_generator,
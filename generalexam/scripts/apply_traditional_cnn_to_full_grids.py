@@ -24,6 +24,8 @@ LAST_TIME_ARG_NAME = 'last_time_string'
 RANDOMIZE_TIMES_ARG_NAME = 'randomize_times'
 NUM_TIMES_ARG_NAME = 'num_times'
 USE_ISOTONIC_ARG_NAME = 'use_isotonic_regression'
+NUM_EXAMPLES_PER_BATCH_ARG_NAME = 'num_examples_per_batch'
+FULLY_CONV_ARG_NAME = 'convert_to_fully_conv'
 NARR_DIRECTORY_ARG_NAME = 'input_narr_dir_name'
 FRONTAL_GRID_DIR_ARG_NAME = 'input_frontal_grid_dir_name'
 OUTPUT_DIR_ARG_NAME = 'output_prediction_dir_name'
@@ -53,6 +55,16 @@ USE_ISOTONIC_HELP_STRING = (
     'contain calibrated probabilities.  If 0, each prediction grid will contain'
     ' raw probabilities.')
 
+NUM_EXAMPLES_PER_BATCH_HELP_STRING = (
+    'Number of downsized examples (grid cells) passed to the CNN at once.  '
+    'Larger batches are faster but use more memory.')
+
+FULLY_CONV_HELP_STRING = (
+    'Boolean flag.  If 1, the CNN will be converted to an equivalent fully '
+    'convolutional model, which is applied to each full grid in one forward '
+    'pass (much faster).  This works only for 3-D examples (no time dimension)'
+    ' and is ignored otherwise.')
+
 NARR_DIRECTORY_HELP_STRING = (
     'Name of top-level NARR directory (predictors will be read from here).  '
     'Files therein will be found by `processed_narr_io.find_file_for_one_time` '
@@ -97,6 +109,15 @@ INPUT_ARG_PARSER.add_argument(
     '--' + USE_ISOTONIC_ARG_NAME, type=int, required=False, default=0,
     help=USE_ISOTONIC_HELP_STRING)
 
+INPUT_ARG_PARSER.add_argument(
+    '--' + NUM_EXAMPLES_PER_BATCH_ARG_NAME, type=int, required=False,
+    default=traditional_cnn.DEFAULT_NUM_EXAMPLES_PER_INFERENCE_BATCH,
+    help=NUM_EXAMPLES_PER_BATCH_HELP_STRING)
+
+INPUT_ARG_PARSER.add_argument(
+    '--' + FULLY_CONV_ARG_NAME, type=int, required=False, default=0,
+    help=FULLY_CONV_HELP_STRING)
+
 INPUT_ARG_PARSER.add_argument(
     '--' + NARR_DIRECTORY_ARG_NAME, type=str, required=False,
     default=TOP_NARR_DIR_NAME_DEFAULT, help=NARR_DIRECTORY_HELP_STRING)
@@ -112,7 +133,8 @@ INPUT_ARG_PARSER.add_argument(
 
 
 def _run(model_file_name, first_time_string, last_time_string, randomize_times,
-         num_target_times, use_isotonic_regression, top_narr_directory_name,
+         num_target_times, use_isotonic_regression, num_examples_per_batch,
+         convert_to_fully_conv, top_narr_directory_name,
          top_frontal_grid_dir_name, output_dir_name):
     """Applies traditional CNN to full grids.
 
@@ -124,6 +146,8 @@ def _run(model_file_name, first_time_string, last_time_string, randomize_times,
     :param randomize_times: Same.
     :param num_target_times: Same.
     :param use_isotonic_regression: Same.
+    :param num_examples_per_batch: Same.
+    :param convert_to_fully_conv: Same.
     :param top_narr_directory_name: Same.
     :param top_frontal_grid_dir_name: Same.
     :param output_dir_name: Same.
@@ -172,6 +196,11 @@ def _run(model_file_name, first_time_string, last_time_string, randomize_times,
     else:
         num_dimensions = 4
 
+    if convert_to_fully_conv and num_dimensions == 3:
+        print 'Converting model to fully convolutional...'
+        model_object = traditional_cnn.convert_to_fully_convolutional(
+            model_object)
+
     num_classes = len(model_metadata_dict[traditional_cnn.CLASS_FRACTIONS_KEY])
     num_target_times = len(target_times_unix_sec)
     print SEPARATOR_STRING
@@ -197,7 +226,8 @@ def _run(model_file_name, first_time_string, last_time_string, randomize_times,
                 num_classes=num_classes,
                 isotonic_model_object_by_class=isotonic_model_object_by_class,
                 narr_mask_matrix=model_metadata_dict[
-                    traditional_cnn.NARR_MASK_MATRIX_KEY])
+                    traditional_cnn.NARR_MASK_MATRIX_KEY],
+                num_examples_per_batch=num_examples_per_batch)
         else:
             (this_class_probability_matrix, this_target_matrix
             ) = traditional_cnn.apply_model_to_4d_example(
@@ -222,7 +252,8 @@ def _run(model_file_name, first_time_string, last_time_string, randomize_times,
                 num_classes=num_classes,
                 isotonic_model_object_by_class=isotonic_model_object_by_class,
                 narr_mask_matrix=model_metadata_dict[
-                    traditional_cnn.NARR_MASK_MATRIX_KEY])
+                    traditional_cnn.NARR_MASK_MATRIX_KEY],
+                num_examples_per_batch=num_examples_per_batch)
 
         this_target_matrix[this_target_matrix == -1] = 0
         print MINOR_SEPARATOR_STRING
@@ -260,6 +291,10 @@ if __name__ == '__main__':
         num_target_times=getattr(INPUT_ARG_OBJECT, NUM_TIMES_ARG_NAME),
         use_isotonic_regression=bool(getattr(
             INPUT_ARG_OBJECT, USE_ISOTONIC_ARG_NAME)),
+        num_examples_per_batch=getattr(
+            INPUT_ARG_OBJECT, NUM_EXAMPLES_PER_BATCH_ARG_NAME),
+        convert_to_fully_conv=bool(getattr(
+            INPUT_ARG_OBJECT, FULLY_CONV_ARG_NAME)),
         top_narr_directory_name=getattr(
             INPUT_ARG_OBJECT, NARR_DIRECTORY_ARG_NAME),
         top_frontal_grid_dir_name=getattr(
@@ -3,12 +3,12 @@
 import random
 import os.path
 import argparse
+import warnings
+from functools import partial
 import numpy
-import pandas
 from keras import backend as K
 from gewittergefahr.gg_utils import time_conversion
 from gewittergefahr.gg_utils import time_periods
-from gewittergefahr.gg_utils import nwp_model_utils
 from generalexam.ge_io import fronts_io
 from generalexam.ge_utils import front_utils
 from generalexam.machine_learning import machine_learning_utils as ml_utils
@@ -34,6 +34,7 @@ BINARIZATION_THRESHOLD_ARG_NAME = 'binarization_threshold'
 MIN_AREA_ARG_NAME = 'min_object_area_metres2'
 MIN_LENGTH_ARG_NAME = 'min_endpoint_length_metres'
 FRONT_LINE_DIR_ARG_NAME = 'input_front_line_dir_name'
+NUM_PROCESSES_ARG_NAME = 'num_processes'
 OUTPUT_FILE_ARG_NAME = 'output_file_name'
 
 PREDICTION_DIR_HELP_STRING = (
@@ -64,8 +65,11 @@ MIN_LENGTH_HELP_STRING = (
 
 FRONT_LINE_DIR_HELP_STRING = (
     'Name of top-level directory with actual fronts (polylines).  Files therein'
-    ' will be found by `fronts_io.find_file_for_one_time` and read by '
-    '`fronts_io.read_polylines_from_file`.')
+    ' will be read by `fronts_io.read_polylines_from_columnar_files`.')
+
+NUM_PROCESSES_HELP_STRING = (
+    'Number of processes.  Time steps will be converted to objects in '
+    'parallel.')
 
 OUTPUT_FILE_HELP_STRING = (
     'Path to output file.  Actual and predicted fronts (polylines) will be '
@@ -107,41 +111,81 @@ INPUT_ARG_PARSER.add_argument(
     '--' + FRONT_LINE_DIR_ARG_NAME, type=str, required=False,
     default=TOP_FRONT_LINE_DIR_NAME_DEFAULT, help=FRONT_LINE_DIR_HELP_STRING)
 
+INPUT_ARG_PARSER.add_argument(
+    '--' + NUM_PROCESSES_ARG_NAME, type=int, required=False, default=1,
+    help=NUM_PROCESSES_HELP_STRING)
+
 INPUT_ARG_PARSER.add_argument(
     '--' + OUTPUT_FILE_ARG_NAME, type=str, required=True,
     help=OUTPUT_FILE_HELP_STRING)
 
 
-def _read_actual_polylines(
-        top_input_dir_name, unix_times_sec, narr_mask_matrix):
-    """Reads actual fronts (polylines) for each time step.
+def _read_predicted_labels(prediction_file_name, binarization_threshold):
+    """Reads gridded CNN predictions and determinizes them.
 
-    :param top_input_dir_name: See documentation at top of file.
-    :param unix_times_sec: 1-D numpy array of valid times.
-    :param narr_mask_matrix: See doc for
-        `front_utils.remove_polylines_in_masked_area`.
-    :return: polyline_table: See doc for `fronts_io.write_polylines_to_file`.
+    :param prediction_file_name: Path to input file (will be read by
+        `machine_learning_utils.read_gridded_predictions`).
+    :param binarization_threshold: See documentation at top of file.
+    :return: predicted_label_matrix: See doc for
+        `object_based_evaluation.determinize_probabilities`.
     """
 
-    list_of_polyline_tables = []
-    for this_time_unix_sec in unix_times_sec:
-        this_file_name = fronts_io.find_file_for_one_time(
-            top_directory_name=top_input_dir_name,
-            file_type=fronts_io.POLYLINE_FILE_TYPE,
-            valid_time_unix_sec=this_time_unix_sec)
+    class_probability_matrix = ml_utils.read_gridded_predictions(
+        prediction_file_name
+    )[ml_utils.PROBABILITY_MATRIX_KEY]
 
-        print 'Reading data from: "{0:s}"...'.format(this_file_name)
-        list_of_polyline_tables.append(
-            fronts_io.read_polylines_from_file(this_file_name)
+    # TODO(thunderhoser): This should be a separate method.
+    class_probability_matrix[..., front_utils.NO_FRONT_INTEGER_ID][
+        numpy.isnan(
+            class_probability_matrix[..., front_utils.NO_FRONT_INTEGER_ID]
         )
-        if len(list_of_polyline_tables) == 1:
-            continue
+    ] = 1.
+    class_probability_matrix[numpy.isnan(class_probability_matrix)] = 0.
+
+    return object_eval.determinize_probabilities(
+        class_probability_matrix=class_probability_matrix,
+        binarization_threshold=binarization_threshold)
 
-        list_of_polyline_tables[-1] = list_of_polyline_tables[-1].align(
-            list_of_polyline_tables[0], axis=1)[0]
 
-    polyline_table = pandas.concat(
-        list_of_polyline_tables, axis=0, ignore_index=True)
+def _read_actual_polylines(top_input_dir_name, unix_times_sec):
+    """Reads actual fronts (polylines) for each time step.
+
+    Only months containing the given times are read.  If a month has no
+    columnar file, only the given times are read from files with one time step
+    each, and an error is raised if any of these files is missing.
+
+    :param top_input_dir_name: See documentation at top of file.
+    :param unix_times_sec: 1-D numpy array of valid times.
+    :return: polyline_table: See doc for `fronts_io.write_polylines_to_file`.
+    """
+
+    polyline_table = fronts_io.read_polylines_from_columnar_files(
+        top_directory_name=top_input_dir_name,
+        first_time_unix_sec=int(numpy.min(unix_times_sec)),
+        last_time_unix_sec=int(numpy.max(unix_times_sec)),
+        valid_times_unix_sec=unix_times_sec)
+
+    # Columnar files do not record time steps with no fronts, so a missing time
+    # may be real (no fronts) or a gap in the data.  In the latter case, every
+    # predicted object at that time would count as a false positive.
+    missing_times_unix_sec = unix_times_sec[numpy.invert(numpy.in1d(
+        unix_times_sec, polyline_table[front_utils.TIME_COLUMN].values
+    ))]
+
+    if len(missing_times_unix_sec) > 0:
+        missing_time_strings = [
+            time_conversion.unix_sec_to_string(t, INPUT_TIME_FORMAT)
+            for t in missing_times_unix_sec
+        ]
+
+        warning_string = (
+            'POTENTIAL ERROR: Cannot find actual fronts at {0:d} of {1:d} times'
+            ' (listed below).  If data are missing for these times, every '
+            'predicted object at these times will count as a false positive.'
+            '\n{2:s}'
+        ).format(len(missing_times_unix_sec), len(unix_times_sec),
+                 str(missing_time_strings))
+        warnings.warn(warning_string)
 
     # print 'Removing fronts in masked area...'
     # return front_utils.remove_polylines_in_masked_area(
@@ -152,7 +196,8 @@ def _read_actual_polylines(
 
 def _run(input_prediction_dir_name, first_time_string, last_time_string,
          num_times, binarization_threshold, min_object_area_metres2,
-         min_endpoint_length_metres, top_front_line_dir_name, output_file_name):
+         min_endpoint_length_metres, top_front_line_dir_name, num_processes,
+         output_file_name):
     """Converts gridded CNN predictions to objects.
 
     This is effectively the main method.
@@ -165,14 +210,10 @@ def _run(input_prediction_dir_name, first_time_string, last_time_string,
     :param min_object_area_metres2: Same.
     :param min_endpoint_length_metres: Same.
     :param top_front_line_dir_name: Same.
+    :param num_processes: Same.
     :param output_file_name: Same.
     """
 
-    grid_spacing_metres = nwp_model_utils.get_xy_grid_spacing(
-        model_name=nwp_model_utils.NARR_MODEL_NAME)[0]
-    num_grid_rows, num_grid_columns = nwp_model_utils.get_grid_dimensions(
-        model_name=nwp_model_utils.NARR_MODEL_NAME)
-
     first_time_unix_sec = time_conversion.string_to_unix_sec(
         first_time_string, INPUT_TIME_FORMAT)
     last_time_unix_sec = time_conversion.string_to_unix_sec(
@@ -185,12 +226,10 @@ def _run(input_prediction_dir_name, first_time_string, last_time_string,
     numpy.random.shuffle(possible_times_unix_sec)
 
     unix_times_sec = []
-    list_of_predicted_region_tables = []
-    num_times_done = 0
-    narr_mask_matrix = None
+    prediction_file_names = []
 
     for i in range(len(possible_times_unix_sec)):
-        if num_times_done == num_times:
+        if len(unix_times_sec) == num_times:
             break
 
         this_prediction_file_name = ml_utils.find_gridded_prediction_file(
@@ -201,90 +240,30 @@ def _run(input_prediction_dir_name, first_time_string, last_time_string,
         if not os.path.isfile(this_prediction_file_name):
             continue
 
-        num_times_done += 1
         unix_times_sec.append(possible_times_unix_sec[i])
+        prediction_file_names.append(this_prediction_file_name)
 
-        print 'Reading data from: "{0:s}"...'.format(this_prediction_file_name)
-        this_prediction_dict = ml_utils.read_gridded_predictions(
-            this_prediction_file_name)
-
-        class_probability_matrix = this_prediction_dict[
-            ml_utils.PROBABILITY_MATRIX_KEY]
-
-        if narr_mask_matrix is None:
-            narr_mask_matrix = numpy.invert(numpy.isnan(
-                class_probability_matrix[0, ..., 0]
-            )).astype(int)
-
-        # TODO(thunderhoser): This should be a separate method.
-        class_probability_matrix[..., front_utils.NO_FRONT_INTEGER_ID][
-            numpy.isnan(
-                class_probability_matrix[..., front_utils.NO_FRONT_INTEGER_ID]
-            )
-        ] = 1.
-        class_probability_matrix[numpy.isnan(class_probability_matrix)] = 0.
-
-        print 'Determinizing probabilities...'
-        this_predicted_label_matrix = object_eval.determinize_probabilities(
-            class_probability_matrix=this_prediction_dict[
-                ml_utils.PROBABILITY_MATRIX_KEY],
-            binarization_threshold=binarization_threshold)
-
-        print 'Converting image to frontal regions...'
-        list_of_predicted_region_tables.append(
-            object_eval.images_to_regions(
-                predicted_label_matrix=this_predicted_label_matrix,
-                image_times_unix_sec=possible_times_unix_sec[[i]])
-        )
-
-        print 'Throwing out frontal regions with area < {0:f} km^2...'.format(
-            METRES2_TO_KM2 * min_object_area_metres2)
-        list_of_predicted_region_tables[
-            -1
-        ] = object_eval.discard_regions_with_small_area(
-            predicted_region_table=list_of_predicted_region_tables[-1],
-            x_grid_spacing_metres=grid_spacing_metres,
-            y_grid_spacing_metres=grid_spacing_metres,
-            min_area_metres2=min_object_area_metres2)
-
-        print 'Skeletonizing frontal regions...'
-        list_of_predicted_region_tables[
-            -1
-        ] = object_eval.skeletonize_frontal_regions(
-            predicted_region_table=list_of_predicted_region_tables[-1],
-            num_grid_rows=num_grid_rows, num_grid_columns=num_grid_columns)
-
-        list_of_predicted_region_tables[-1] = object_eval.find_main_skeletons(
-            predicted_region_table=list_of_predicted_region_tables[-1],
-            image_times_unix_sec=possible_times_unix_sec[[i]],
-            num_grid_rows=num_grid_rows, num_grid_columns=num_grid_columns,
-            x_grid_spacing_metres=grid_spacing_metres,
-            y_grid_spacing_metres=grid_spacing_metres,
-            min_endpoint_length_metres=min_endpoint_length_metres)
-
-        if num_times_done != num_times:
-            print '\n'
-
-        if len(list_of_predicted_region_tables) == 1:
-            continue
-
-        list_of_predicted_region_tables[-1] = (
-            list_of_predicted_region_tables[-1].align(
-                list_of_predicted_region_tables[0], axis=1)[0]
-        )
+    unix_times_sec = numpy.array(unix_times_sec, dtype=int)
 
+    print (
+        'Converting predictions at {0:d} times to objects (skeleton lines with '
+        'area >= {1:f} km^2 before skeletonization)...'
+    ).format(len(unix_times_sec), METRES2_TO_KM2 * min_object_area_metres2)
+
+    predicted_region_table = object_eval.gridded_predictions_to_objects(
+        prediction_file_names=prediction_file_names,
+        valid_times_unix_sec=unix_times_sec,
+        read_label_matrix_function=partial(
+            _read_predicted_labels,
+            binarization_threshold=binarization_threshold),
+        min_object_area_metres2=min_object_area_metres2,
+        min_endpoint_length_metres=min_endpoint_length_metres,
+        num_processes=num_processes)
     print SEPARATOR_STRING
 
-    unix_times_sec = numpy.array(unix_times_sec, dtype=int)
-    predicted_region_table = pandas.concat(
-        list_of_predicted_region_tables, axis=0, ignore_index=True)
-    predicted_region_table = object_eval.convert_regions_rowcol_to_narr_xy(
-        predicted_region_table=predicted_region_table,
-        are_predictions_from_fcn=False)
-
     actual_polyline_table = _read_actual_polylines(
         top_input_dir_name=top_front_line_dir_name,
-        unix_times_sec=unix_times_sec, narr_mask_matrix=narr_mask_matrix)
+        unix_times_sec=unix_times_sec)
     print SEPARATOR_STRING
 
     actual_polyline_table = object_eval.project_polylines_latlng_to_narr(
@@ -313,4 +292,5 @@ if __name__ == '__main__':
         min_endpoint_length_metres=getattr(INPUT_ARG_OBJECT, MIN_LENGTH_ARG_NAME),
         top_front_line_dir_name=getattr(
             INPUT_ARG_OBJECT, FRONT_LINE_DIR_ARG_NAME),
+        num_processes=getattr(INPUT_ARG_OBJECT, NUM_PROCESSES_ARG_NAME),
         output_file_name=getattr(INPUT_ARG_OBJECT, OUTPUT_FILE_ARG_NAME))
@@ -0,0 +1,133 @@
+"""Converts front files with one time step each to monthly columnar files.
+
+Input files (one per time step) contain either polylines or NARR grids, written
+by `fronts_io.write_polylines_to_file` or `fronts_io.write_narr_grids_to_file`.
+Output files (one per month) are written by
+`fronts_io.write_polylines_to_columnar_file` or
+`fronts_io.write_narr_grids_to_columnar_file`, to the same top-level directory.
+Once the columnar files exist, `fronts_io.read_polylines_from_columnar_files`
+and `fronts_io.read_narr_grids_from_columnar_files` can read one year of fronts
+with one file per month, rather than one file per time step.
+"""
+
+import argparse
+import numpy
+from gewittergefahr.gg_utils import time_conversion
+from generalexam.ge_io import fronts_io
+from generalexam.ge_utils import front_utils
+
+SEPARATOR_STRING = '\n\n' + '*' * 50 + '\n\n'
+
+INPUT_TIME_FORMAT = '%Y%m%d%H'
+DAYS_TO_SECONDS = 86400
+
+FRONT_DIR_ARG_NAME = 'top_front_dir_name'
+FILE_TYPE_ARG_NAME = 'file_type'
+FIRST_TIME_ARG_NAME = 'first_time_string'
+LAST_TIME_ARG_NAME = 'last_time_string'
+
+FRONT_DIR_HELP_STRING = (
+    'Name of top-level directory with front files.  Input files therein will be'
+    ' found by `fronts_io.find_file_for_one_time`, and output files will be '
+    'written to locations determined by `fronts_io.find_columnar_file`.')
+
+FILE_TYPE_HELP_STRING = (
+    'Type of front files (either "{0:s}" or "{1:s}").'
+).format(fronts_io.POLYLINE_FILE_TYPE, fronts_io.GRIDDED_FILE_TYPE)
+
+TIME_HELP_STRING = (
+    'Valid time (format "yyyymmddHH").  Will convert all months that overlap '
+    'the period `{0:s}`...`{1:s}`.  Missing time steps are skipped.'
+).format(FIRST_TIME_ARG_NAME, LAST_TIME_ARG_NAME)
+
+INPUT_ARG_PARSER = argparse.ArgumentParser()
+INPUT_ARG_PARSER.add_argument(
+    '--' + FRONT_DIR_ARG_NAME, type=str, required=True,
+    help=FRONT_DIR_HELP_STRING)
+
+INPUT_ARG_PARSER.add_argument(
+    '--' + FILE_TYPE_ARG_NAME, type=str, required=True,
+    help=FILE_TYPE_HELP_STRING)
+
+INPUT_ARG_PARSER.add_argument(
+    '--' + FIRST_TIME_ARG_NAME, type=str, required=True, help=TIME_HELP_STRING)
+
+INPUT_ARG_PARSER.add_argument(
+    '--' + LAST_TIME_ARG_NAME, type=str, required=True, help=TIME_HELP_STRING)
+
+
+def _run(top_front_dir_name, file_type, first_time_string, last_time_string):
+    """Converts front files with one time step each to monthly columnar files.
+
+    This is effectively the main method.
+
+    :param top_front_dir_name: See documentation at top of file.
+    :param file_type: Same.
+    :param first_time_string: Same.
+    :param last_time_string: Same.
+    """
+
+    first_time_unix_sec = time_conversion.string_to_unix_sec(
+        first_time_string, INPUT_TIME_FORMAT)
+    last_time_unix_sec = time_conversion.string_to_unix_sec(
+        last_time_string, INPUT_TIME_FORMAT)
+
+    first_month_string = time_conversion.unix_sec_to_string(
+        first_time_unix_sec, fronts_io.TIME_FORMAT_MONTH)
+    this_month_start_unix_sec = time_conversion.string_to_unix_sec(
+        first_month_string, fronts_io.TIME_FORMAT_MONTH)
+
+    while this_month_start_unix_sec <= last_time_unix_sec:
+        this_next_month_string = time_conversion.unix_sec_to_string(
+            this_month_start_unix_sec + 32 * DAYS_TO_SECONDS,
+            fronts_io.TIME_FORMAT_MONTH)
+        this_next_month_start_unix_sec = time_conversion.string_to_unix_sec(
+            this_next_month_string, fronts_io.TIME_FORMAT_MONTH)
+
+        # Reading a month with no columnar file falls back to the files with
+        # one time step each.
+        this_columnar_file_name = fronts_io.find_columnar_file(
+            top_directory_name=top_front_dir_name, file_type=file_type,
+            valid_time_unix_sec=this_month_start_unix_sec,
+            raise_error_if_missing=False)
+
+        if file_type == fronts_io.POLYLINE_FILE_TYPE:
+            this_front_table = fronts_io.read_polylines_from_columnar_files(
+                top_directory_name=top_front_dir_name,
+                first_time_unix_sec=this_month_start_unix_sec,
+                last_time_unix_sec=this_next_month_start_unix_sec - 1)
+        else:
+            this_front_table = fronts_io.read_narr_grids_from_columnar_files(
+                top_directory_name=top_front_dir_name,
+                first_time_unix_sec=this_month_start_unix_sec,
+                last_time_unix_sec=this_next_month_start_unix_sec - 1)
+
+        this_month_start_unix_sec = this_next_month_start_unix_sec + 0
+        if len(this_front_table.index) == 0:
+            continue
+
+        print 'Writing {0:d} time steps to: "{1:s}"...'.format(
+            len(numpy.unique(this_front_table[front_utils.TIME_COLUMN].values)),
+            this_columnar_file_name)
+
+        if file_type == fronts_io.POLYLINE_FILE_TYPE:
+            fronts_io.write_polylines_to_columnar_file(
+                front_table=this_front_table,
+                npz_file_name=this_columnar_file_name)
+        else:
+            fronts_io.write_narr_grids_to_columnar_file(
+                frontal_grid_table=this_front_table,
+                npz_file_name=this_columnar_file_name)
+
+        print SEPARATOR_STRING
+
+
+if __name__ == '__main__':
+    INPUT_ARG_OBJECT = INPUT_ARG_PARSER.parse_args()
+
+    _run(
+        top_front_dir_name=getattr(INPUT_ARG_OBJECT, FRONT_DIR_ARG_NAME),
+        file_type=getattr(INPUT_ARG_OBJECT, FILE_TYPE_ARG_NAME),
+        first_time_string=getattr(INPUT_ARG_OBJECT, FIRST_TIME_ARG_NAME),
+        last_time_string=getattr(INPUT_ARG_OBJECT, LAST_TIME_ARG_NAME)
+    )
@@ -0,0 +1,197 @@
+"""Converts processed NARR data from Pickle files to monthly stores.
+
+Input files (one per field, pressure level, and time step) are written by
+`processed_narr_io.write_fields_to_file`.  Output files (one per field, pressure
+level, and month) are written by
+`processed_narr_io.write_fields_to_monthly_store`.  Since
+`processed_narr_io.read_fields_from_file` falls back to the monthly store when a
+Pickle file is missing, the Pickle files may be deleted after conversion.
+"""
+
+import os.path
+import argparse
+import numpy
+from gewittergefahr.gg_utils import time_conversion
+from gewittergefahr.gg_utils import time_periods
+from generalexam.ge_io import processed_narr_io
+
+SEPARATOR_STRING = '\n\n' + '*' * 50 + '\n\n'
+
+INPUT_TIME_FORMAT = '%Y%m%d%H'
+TIME_INTERVAL_SECONDS = 10800
+MB_TO_PASCALS = 100
+
+INPUT_DIR_ARG_NAME = 'input_dir_name'
+FIRST_TIME_ARG_NAME = 'first_time_string'
+LAST_TIME_ARG_NAME = 'last_time_string'
+FIELD_NAMES_ARG_NAME = 'field_names'
+PRESSURE_LEVELS_ARG_NAME = 'pressure_levels_mb'
+OUTPUT_DIR_ARG_NAME = 'output_dir_name'
+
+INPUT_DIR_HELP_STRING = (
+    'Name of top-level directory with Pickle files.  Files therein will be '
+    'found by `processed_narr_io.find_file_for_one_time` and read by '
+    '`processed_narr_io.read_fields_from_file`.')
+
+TIME_HELP_STRING = (
+    'Valid time (format "yyyymmddHH").  Will convert data for all valid times '
+    'in the period `{0:s}`...`{1:s}`.  Missing time steps are skipped.'
+).format(FIRST_TIME_ARG_NAME, LAST_TIME_ARG_NAME)
+
+FIELD_NAMES_HELP_STRING = (
+    'List of fields to convert.  Each must be accepted by '
+    '`processed_narr_io.check_field_name`.')
+
+PRESSURE_LEVELS_HELP_STRING = (
+    'List of pressure levels (millibars) to convert.  Use 1013 for the '
+    'surface.')
+
+OUTPUT_DIR_HELP_STRING = (
+    'Name of top-level directory for monthly stores.  Output will be written '
+    'here by `processed_narr_io.write_fields_to_monthly_store`.  This may be '
+    'the same as `{0:s}`.'
+).format(INPUT_DIR_ARG_NAME)
+
+TOP_INPUT_DIR_NAME_DEFAULT = '/condo/swatwork/ralager/narr_data/processed'
+TOP_OUTPUT_DIR_NAME_DEFAULT = '/condo/swatwork/ralager/narr_data/processed'
+
+INPUT_ARG_PARSER = argparse.ArgumentParser()
+INPUT_ARG_PARSER.add_argument(
+    '--' + INPUT_DIR_ARG_NAME, type=str, required=False,
+    default=TOP_INPUT_DIR_NAME_DEFAULT, help=INPUT_DIR_HELP_STRING)
+
+INPUT_ARG_PARSER.add_argument(
+    '--' + FIRST_TIME_ARG_NAME, type=str, required=True, help=TIME_HELP_STRING)
+
+INPUT_ARG_PARSER.add_argument(
+    '--' + LAST_TIME_ARG_NAME, type=str, required=True, help=TIME_HELP_STRING)
+
+INPUT_ARG_PARSER.add_argument(
+    '--' + FIELD_NAMES_ARG_NAME, type=str, nargs='+', required=False,
+    default=processed_narr_io.FIELD_NAMES, help=FIELD_NAMES_HELP_STRING)
+
+INPUT_ARG_PARSER.add_argument(
+    '--' + PRESSURE_LEVELS_ARG_NAME, type=int, nargs='+', required=True,
+    help=PRESSURE_LEVELS_HELP_STRING)
+
+INPUT_ARG_PARSER.add_argument(
+    '--' + OUTPUT_DIR_ARG_NAME, type=str, required=False,
+    default=TOP_OUTPUT_DIR_NAME_DEFAULT, help=OUTPUT_DIR_HELP_STRING)
+
+
+def _convert_one_month(
+        top_input_dir_name, field_name, pressure_level_mb,
+        valid_times_unix_sec, top_output_dir_name):
+    """Converts data for one field, pressure level, and month.
+
+    :param top_input_dir_name: See documentation at top of file.
+    :param field_name: Field name.
+    :param pressure_level_mb: Pressure level.
+    :param valid_times_unix_sec: 1-D numpy array of valid times (all in the same
+        month).
+    :param top_output_dir_name: See documentation at top of file.
+    """
+
+    field_matrix = None
+    found_time_indices = []
+
+    for i in range(len(valid_times_unix_sec)):
+        this_file_name = processed_narr_io.find_file_for_one_time(
+            top_directory_name=top_input_dir_name, field_name=field_name,
+            pressure_level_mb=pressure_level_mb,
+            valid_time_unix_sec=valid_times_unix_sec[i],
+            raise_error_if_missing=False)
+
+        if not os.path.isfile(this_file_name):
+            continue
+
+        print 'Reading data from: "{0:s}"...'.format(this_file_name)
+        this_field_matrix = processed_narr_io.read_fields_from_file(
+            this_file_name)[0]
+
+        if field_matrix is None:
+            field_matrix = numpy.full(
+                (len(valid_times_unix_sec),) + this_field_matrix.shape[1:],
+                numpy.nan, dtype=numpy.float32)
+
+        field_matrix[i, ...] = this_field_matrix[0, ...]
+        found_time_indices.append(i)
+
+    if field_matrix is None:
+        return
+
+    found_time_indices = numpy.array(found_time_indices, dtype=int)
+    store_file_name = processed_narr_io.find_monthly_store_file(
+        top_directory_name=top_output_dir_name, field_name=field_name,
+        pressure_level_mb=pressure_level_mb,
+        valid_time_unix_sec=valid_times_unix_sec[0],
+        raise_error_if_missing=False)
+
+    print 'Writing {0:d} time steps to: "{1:s}"...'.format(
+        len(found_time_indices), store_file_name)
+
+    processed_narr_io.write_fields_to_monthly_store(
+        top_directory_name=top_output_dir_name,
+        field_matrix=field_matrix[found_time_indices, ...],
+        field_name=field_name,
+        pressure_level_pascals=pressure_level_mb * MB_TO_PASCALS,
+        valid_times_unix_sec=valid_times_unix_sec[found_time_indices])
+
+
+def _run(top_input_dir_name, first_time_string, last_time_string, field_names,
+         pressure_levels_mb, top_output_dir_name):
+    """Converts processed NARR data from Pickle files to monthly stores.
+
+    This is effectively the main method.
+
+    :param top_input_dir_name: See documentation at top of file.
+    :param first_time_string: Same.
+    :param last_time_string: Same.
+    :param field_names: Same.
+    :param pressure_levels_mb: Same.
+    :param top_output_dir_name: Same.
+    """
+
+    first_time_unix_sec = time_conversion.string_to_unix_sec(
+        first_time_string, INPUT_TIME_FORMAT)
+    last_time_unix_sec = time_conversion.string_to_unix_sec(
+        last_time_string, INPUT_TIME_FORMAT)
+
+    valid_times_unix_sec = time_periods.range_and_interval_to_list(
+        start_time_unix_sec=first_time_unix_sec,
+        end_time_unix_sec=last_time_unix_sec,
+        time_interval_sec=TIME_INTERVAL_SECONDS, include_endpoint=True)
+
+    month_strings = numpy.array([
+        time_conversion.unix_sec_to_string(
+            t, processed_narr_io.TIME_FORMAT_MONTH)
+        for t in valid_times_unix_sec
+    ])
+
+    for this_month_string in numpy.unique(month_strings):
+        these_valid_times_unix_sec = valid_times_unix_sec[
+            month_strings == this_month_string]
+
+        for this_field_name in field_names:
+            for this_pressure_level_mb in pressure_levels_mb:
+                _convert_one_month(
+                    top_input_dir_name=top_input_dir_name,
+                    field_name=this_field_name,
+                    pressure_level_mb=this_pressure_level_mb,
+                    valid_times_unix_sec=these_valid_times_unix_sec,
+                    top_output_dir_name=top_output_dir_name)
+
+        print SEPARATOR_STRING
+
+
+if __name__ == '__main__':
+    INPUT_ARG_OBJECT = INPUT_ARG_PARSER.parse_args()
+
+    _run(
+        top_input_dir_name=getattr(INPUT_ARG_OBJECT, INPUT_DIR_ARG_NAME),
+        first_time_string=getattr(INPUT_ARG_OBJECT, FIRST_TIME_ARG_NAME),
+        last_time_string=getattr(INPUT_ARG_OBJECT, LAST_TIME_ARG_NAME),
+        field_names=getattr(INPUT_ARG_OBJECT, FIELD_NAMES_ARG_NAME),
+        pressure_levels_mb=getattr(INPUT_ARG_OBJECT, PRESSURE_LEVELS_ARG_NAME),
+        top_output_dir_name=getattr(INPUT_ARG_OBJECT, OUTPUT_DIR_ARG_NAME)
+    )
@@ -3,11 +3,11 @@
 import random
 import os.path
 import argparse
+from functools import partial
 import numpy
 import pandas
 from gewittergefahr.gg_utils import time_conversion
 from gewittergefahr.gg_utils import time_periods
-from gewittergefahr.gg_utils import nwp_model_utils
 from generalexam.ge_io import fronts_io
 from generalexam.ge_utils import nfa
 from generalexam.evaluation import object_based_evaluation as object_eval
@@ -30,6 +30,7 @@ BINARIZATION_THRESHOLD_ARG_NAME = 'binarization_threshold'
 MIN_AREA_ARG_NAME = 'min_object_area_metres2'
 MIN_LENGTH_ARG_NAME = 'min_endpoint_length_metres'
 FRONT_LINE_DIR_ARG_NAME = 'input_front_line_dir_name'
+NUM_PROCESSES_ARG_NAME = 'num_processes'
 OUTPUT_FILE_ARG_NAME = 'output_file_name'
 
 USE_ENSEMBLE_HELP_STRING = (
@@ -69,6 +70,10 @@ FRONT_LINE_DIR_HELP_STRING = (
     ' will be found by `fronts_io.find_file_for_one_time` and read by '
     '`fronts_io.read_polylines_from_file`.')
 
+NUM_PROCESSES_HELP_STRING = (
+    'Number of processes.  Time steps will be converted to objects in '
+    'parallel.')
+
 OUTPUT_FILE_HELP_STRING = (
     'Path to output file.  Actual and predicted fronts (polylines) will be '
     'written here by `object_based_evaluation.write_predictions_and_obs`.')
@@ -113,11 +118,50 @@ INPUT_ARG_PARSER.add_argument(
     '--' + FRONT_LINE_DIR_ARG_NAME, type=str, required=False,
     default=TOP_FRONT_LINE_DIR_NAME_DEFAULT, help=FRONT_LINE_DIR_HELP_STRING)
 
+INPUT_ARG_PARSER.add_argument(
+    '--' + NUM_PROCESSES_ARG_NAME, type=int, required=False, default=1,
+    help=NUM_PROCESSES_HELP_STRING)
+
 INPUT_ARG_PARSER.add_argument(
     '--' + OUTPUT_FILE_ARG_NAME, type=str, required=True,
     help=OUTPUT_FILE_HELP_STRING)
 
 
+def _read_predicted_labels(
+        prediction_file_name, use_ensembled_predictions,
+        binarization_threshold):
+    """Reads gridded NFA predictions and masks them.
+
+    If `use_ensembled_predictions = True`, probabilities are also determinized.
+
+    :param prediction_file_name: Path to input file (will be read by
+        `nfa.read_gridded_predictions` or `nfa.read_ensembled_predictions`).
+    :param use_ensembled_predictions: See documentation at top of file.
+    :param binarization_threshold: Same.
+    :return: predicted_label_matrix: See doc for
+        `object_based_evaluation.determinize_probabilities`.
+    """
+
+    if use_ensembled_predictions:
+        ensemble_dict = nfa.read_ensembled_predictions(prediction_file_name)
+        class_probability_matrix = ensemble_dict.pop(
+            nfa.CLASS_PROBABILITIES_KEY)
+        metadata_dict = ensemble_dict
+
+        predicted_label_matrix = object_eval.determinize_probabilities(
+            class_probability_matrix=class_probability_matrix,
+            binarization_threshold=binarization_threshold)
+    else:
+        predicted_label_matrix, metadata_dict = nfa.read_gridded_predictions(
+            prediction_file_name)
+
+    masked_grid_rows, masked_grid_columns = numpy.where(
+        metadata_dict[nfa.NARR_MASK_KEY] == 0)
+    predicted_label_matrix[:, masked_grid_rows, masked_grid_columns] = 0
+
+    return predicted_label_matrix
+
+
 def _read_actual_polylines(top_input_dir_name, unix_times_sec):
     """Reads actual fronts (polylines) for each time step.
 
@@ -154,7 +198,7 @@ def _read_actual_polylines(top_input_dir_name, unix_times_sec):
 def _run(use_ensembled_predictions, input_prediction_dir_name,
          first_time_string, last_time_string, num_times, binarization_threshold,
          min_object_area_metres2, min_endpoint_length_metres,
-         top_front_line_dir_name, output_file_name):
+         top_front_line_dir_name, num_processes, output_file_name):
     """Converts gridded NFA (numerical frontal analysis) predictions to objects.
 
     This is effectively the main method.
@@ -168,16 +212,10 @@ def _run(use_ensembled_predictions, input_prediction_dir_name,
     :param min_object_area_metres2: Same.
     :param min_endpoint_length_metres: Same.
     :param top_front_line_dir_name: Same.
+    :param num_processes: Same.
     :param output_file_name: Same.
     """
 
-    grid_spacing_metres = nwp_model_utils.get_xy_grid_spacing(
-        model_name=nwp_model_utils.NARR_MODEL_NAME
-    )[0]
-
-    num_grid_rows, num_grid_columns = nwp_model_utils.get_grid_dimensions(
-        model_name=nwp_model_utils.NARR_MODEL_NAME)
-
     first_time_unix_sec = time_conversion.string_to_unix_sec(
         first_time_string, INPUT_TIME_FORMAT)
     last_time_unix_sec = time_conversion.string_to_unix_sec(
@@ -191,14 +229,10 @@ def _run(use_ensembled_predictions, input_prediction_dir_name,
     numpy.random.shuffle(possible_times_unix_sec)
 
     unix_times_sec = []
-    list_of_predicted_region_tables = []
-
-    num_times_done = 0
-    masked_grid_rows = None
-    masked_grid_columns = None
+    prediction_file_names = []
 
     for i in range(len(possible_times_unix_sec)):
-        if num_times_done == num_times:
+        if len(unix_times_sec) == num_times:
             break
 
         this_prediction_file_name = nfa.find_prediction_file(
@@ -210,90 +244,28 @@ def _run(use_ensembled_predictions, input_prediction_dir_name,
         if not os.path.isfile(this_prediction_file_name):
             continue
 
-        num_times_done += 1
         unix_times_sec.append(possible_times_unix_sec[i])
+        prediction_file_names.append(this_prediction_file_name)
 
-        print 'Reading data from: "{0:s}"...'.format(this_prediction_file_name)
-
-        if use_ensembled_predictions:
-            this_ensemble_dict = nfa.read_ensembled_predictions(
-                this_prediction_file_name)
-
-            this_class_probability_matrix = this_ensemble_dict.pop(
-                nfa.CLASS_PROBABILITIES_KEY)
-            this_metadata_dict = this_ensemble_dict
-
-            print 'Determinizing probabilities...'
-            this_predicted_label_matrix = object_eval.determinize_probabilities(
-                class_probability_matrix=this_class_probability_matrix,
-                binarization_threshold=binarization_threshold)
-
-        else:
-            this_predicted_label_matrix, this_metadata_dict = (
-                nfa.read_gridded_predictions(this_prediction_file_name)
-            )
-
-        if masked_grid_rows is None:
-            narr_mask_matrix = this_metadata_dict[nfa.NARR_MASK_KEY]
-            masked_grid_rows, masked_grid_columns = numpy.where(
-                narr_mask_matrix == 0)
-
-        this_predicted_label_matrix[
-            :, masked_grid_rows, masked_grid_columns
-        ] = 0
-
-        print 'Converting image to frontal regions...'
-        list_of_predicted_region_tables.append(
-            object_eval.images_to_regions(
-                predicted_label_matrix=this_predicted_label_matrix,
-                image_times_unix_sec=possible_times_unix_sec[[i]])
-        )
-
-        print 'Throwing out frontal regions with area < {0:f} km^2...'.format(
-            METRES2_TO_KM2 * min_object_area_metres2)
-        list_of_predicted_region_tables[
-            -1
-        ] = object_eval.discard_regions_with_small_area(
-            predicted_region_table=list_of_predicted_region_tables[-1],
-            x_grid_spacing_metres=grid_spacing_metres,
-            y_grid_spacing_metres=grid_spacing_metres,
-            min_area_metres2=min_object_area_metres2)
-
-        print 'Skeletonizing frontal regions...'
-        list_of_predicted_region_tables[
-            -1
-        ] = object_eval.skeletonize_frontal_regions(
-            predicted_region_table=list_of_predicted_region_tables[-1],
-            num_grid_rows=num_grid_rows, num_grid_columns=num_grid_columns)
-
-        list_of_predicted_region_tables[-1] = object_eval.find_main_skeletons(
-            predicted_region_table=list_of_predicted_region_tables[-1],
-            image_times_unix_sec=possible_times_unix_sec[[i]],
-            num_grid_rows=num_grid_rows, num_grid_columns=num_grid_columns,
-            x_grid_spacing_metres=grid_spacing_metres,
-            y_grid_spacing_metres=grid_spacing_metres,
-            min_endpoint_length_metres=min_endpoint_length_metres)
-
-        if num_times_done != num_times:
-            print '\n'
-
-        if len(list_of_predicted_region_tables) == 1:
-            continue
-
-        list_of_predicted_region_tables[-1] = (
-            list_of_predicted_region_tables[-1].align(
-                list_of_predicted_region_tables[0], axis=1)[0]
-        )
+    unix_times_sec = numpy.array(unix_times_sec, dtype=int)
 
+    print (
+        'Converting predictions at {0:d} times to objects (skeleton lines with '
+        'area >= {1:f} km^2 before skeletonization)...'
+    ).format(len(unix_times_sec), METRES2_TO_KM2 * min_object_area_metres2)
+
+    predicted_region_table = object_eval.gridded_predictions_to_objects(
+        prediction_file_names=prediction_file_names,
+        valid_times_unix_sec=unix_times_sec,
+        read_label_matrix_function=partial(
+            _read_predicted_labels,
+            use_ensembled_predictions=use_ensembled_predictions,
+            binarization_threshold=binarization_threshold),
+        min_object_area_metres2=min_object_area_metres2,
+        min_endpoint_length_metres=min_endpoint_length_metres,
+        num_processes=num_processes)
     print SEPARATOR_STRING
 
-    unix_times_sec = numpy.array(unix_times_sec, dtype=int)
-    predicted_region_table = pandas.concat(
-        list_of_predicted_region_tables, axis=0, ignore_index=True)
-    predicted_region_table = object_eval.convert_regions_rowcol_to_narr_xy(
-        predicted_region_table=predicted_region_table,
-        are_predictions_from_fcn=False)
-
     actual_polyline_table = _read_actual_polylines(
         top_input_dir_name=top_front_line_dir_name,
         unix_times_sec=unix_times_sec)
@@ -327,4 +299,5 @@ if __name__ == '__main__':
         min_endpoint_length_metres=getattr(INPUT_ARG_OBJECT, MIN_LENGTH_ARG_NAME),
         top_front_line_dir_name=getattr(
             INPUT_ARG_OBJECT, FRONT_LINE_DIR_ARG_NAME),
+        num_processes=getattr(INPUT_ARG_OBJECT, NUM_PROCESSES_ARG_NAME),
         output_file_name=getattr(INPUT_ARG_OBJECT, OUTPUT_FILE_ARG_NAME))
@@ -0,0 +1,224 @@
+"""Creates monthly stores with dilated target images.
+
+Input files (one per time step) contain frontal grids and are written by
+`fronts_io.write_narr_grids_to_file`.  Output files (one per month) contain
+dilated target images and are written by
+`fronts_io.write_dilated_targets_to_store`.  Since
+`training_validation_io.read_target_matrix` reads from the store when possible,
+the generators no longer need to rasterize and dilate fronts on the fly.
+
+Only stale time steps are written, i.e., those that are not yet in the store or
+whose input file has been modified since they were written (see
+`fronts_io.find_stale_times_in_target_store`).  Thus, this script may be rerun
+to update the stores after regenerating the frontal grids.
+"""
+
+import os.path
+import argparse
+import numpy
+from gewittergefahr.gg_utils import time_conversion
+from gewittergefahr.gg_utils import time_periods
+from generalexam.ge_io import fronts_io
+from generalexam.machine_learning import training_validation_io as trainval_io
+
+SEPARATOR_STRING = '\n\n' + '*' * 50 + '\n\n'
+
+INPUT_TIME_FORMAT = '%Y%m%d%H'
+TIME_INTERVAL_SECONDS = 10800
+
+FRONTAL_GRID_DIR_ARG_NAME = 'input_frontal_grid_dir_name'
+FIRST_TIME_ARG_NAME = 'first_time_string'
+LAST_TIME_ARG_NAME = 'last_time_string'
+NUM_CLASSES_ARG_NAME = 'num_classes'
+DILATION_DISTANCE_ARG_NAME = 'dilation_distance_metres'
+FOR_FCN_INPUT_ARG_NAME = 'for_fcn_input'
+REGENERATE_ALL_ARG_NAME = 'regenerate_all'
+
+FRONTAL_GRID_DIR_HELP_STRING = (
+    'Name of top-level directory with frontal grids.  Files therein will be '
+    'found by `fronts_io.find_file_for_one_time` and read by '
+    '`fronts_io.read_narr_grids_from_file`.  Stores will be written to the '
+    'same directory.')
+
+TIME_HELP_STRING = (
+    'Valid time (format "yyyymmddHH").  Will create targets for all valid '
+    'times in the period `{0:s}`...`{1:s}`.  Missing time steps are skipped.'
+).format(FIRST_TIME_ARG_NAME, LAST_TIME_ARG_NAME)
+
+NUM_CLASSES_HELP_STRING = 'Number of classes (2 or 3).'
+
+DILATION_DISTANCE_HELP_STRING = 'Dilation distance for target images.'
+
+FOR_FCN_INPUT_HELP_STRING = (
+    'Boolean flag.  If 1, target images will be subset with '
+    '`machine_learning_utils.subset_narr_grid_for_fcn_input`, as for full-size '
+    'examples.  If 0, target images will cover the full NARR grid, as for '
+    'downsized examples.')
+
+REGENERATE_ALL_HELP_STRING = (
+    'Boolean flag.  If 1, will write all time steps, even those that are not '
+    'stale.')
+
+TOP_FRONTAL_GRID_DIR_NAME_DEFAULT = (
+    '/condo/swatwork/ralager/fronts/narr_grids/no_dilation')
+
+INPUT_ARG_PARSER = argparse.ArgumentParser()
+INPUT_ARG_PARSER.add_argument(
+    '--' + FRONTAL_GRID_DIR_ARG_NAME, type=str, required=False,
+    default=TOP_FRONTAL_GRID_DIR_NAME_DEFAULT,
+    help=FRONTAL_GRID_DIR_HELP_STRING)
+
+INPUT_ARG_PARSER.add_argument(
+    '--' + FIRST_TIME_ARG_NAME, type=str, required=True, help=TIME_HELP_STRING)
+
+INPUT_ARG_PARSER.add_argument(
+    '--' + LAST_TIME_ARG_NAME, type=str, required=True, help=TIME_HELP_STRING)
+
+INPUT_ARG_PARSER.add_argument(
+    '--' + NUM_CLASSES_ARG_NAME, type=int, required=False, default=3,
+    help=NUM_CLASSES_HELP_STRING)
+
+INPUT_ARG_PARSER.add_argument(
+    '--' + DILATION_DISTANCE_ARG_NAME, type=float, required=False,
+    default=50000, help=DILATION_DISTANCE_HELP_STRING)
+
+INPUT_ARG_PARSER.add_argument(
+    '--' + FOR_FCN_INPUT_ARG_NAME, type=int, required=False, default=0,
+    help=FOR_FCN_INPUT_HELP_STRING)
+
+INPUT_ARG_PARSER.add_argument(
+    '--' + REGENERATE_ALL_ARG_NAME, type=int, required=False, default=0,
+    help=REGENERATE_ALL_HELP_STRING)
+
+
+def _create_one_month(
+        top_frontal_grid_dir_name, valid_times_unix_sec, num_classes,
+        dilation_distance_metres, for_fcn_input, regenerate_all):
+    """Creates dilated targets for one month.
+
+    :param top_frontal_grid_dir_name: See documentation at top of file.
+    :param valid_times_unix_sec: 1-D numpy array of valid times (all in the same
+        month).
+    :param num_classes: See documentation at top of file.
+    :param dilation_distance_metres: Same.
+    :param for_fcn_input: Same.
+    :param regenerate_all: Same.
+    """
+
+    if regenerate_all:
+        stale_flags = numpy.full(len(valid_times_unix_sec), True, dtype=bool)
+    else:
+        stale_flags = fronts_io.find_stale_times_in_target_store(
+            top_directory_name=top_frontal_grid_dir_name,
+            valid_times_unix_sec=valid_times_unix_sec, num_classes=num_classes,
+            dilation_distance_metres=dilation_distance_metres,
+            for_fcn_input=for_fcn_input)
+
+    target_matrix = None
+    found_time_indices = []
+
+    for i in numpy.where(stale_flags)[0]:
+        this_file_name = fronts_io.find_file_for_one_time(
+            top_directory_name=top_frontal_grid_dir_name,
+            file_type=fronts_io.GRIDDED_FILE_TYPE,
+            valid_time_unix_sec=valid_times_unix_sec[i],
+            raise_error_if_missing=False)
+
+        if not os.path.isfile(this_file_name):
+            continue
+
+        this_target_matrix = trainval_io.create_target_matrix(
+            frontal_grid_file_name=this_file_name, num_classes=num_classes,
+            dilation_distance_metres=dilation_distance_metres,
+            subset_for_fcn_input=for_fcn_input)
+
+        if target_matrix is None:
+            target_matrix = numpy.full(
+                (len(valid_times_unix_sec),) + this_target_matrix.shape[1:], 0,
+                dtype=numpy.uint8)
+
+        target_matrix[i, ...] = this_target_matrix[0, ...]
+        found_time_indices.append(i)
+
+    num_fresh_times = numpy.sum(numpy.invert(stale_flags))
+    if target_matrix is None:
+        print '{0:d} time steps were already up to date.'.format(
+            num_fresh_times)
+        return
+
+    found_time_indices = numpy.array(found_time_indices, dtype=int)
+    store_file_name = fronts_io.find_dilated_target_store(
+        top_directory_name=top_frontal_grid_dir_name,
+        valid_time_unix_sec=valid_times_unix_sec[0], num_classes=num_classes,
+        dilation_distance_metres=dilation_distance_metres,
+        for_fcn_input=for_fcn_input, raise_error_if_missing=False)
+
+    print ('Writing {0:d} time steps to: "{1:s}" ({2:d} were already up to '
+           'date)...').format(
+               len(found_time_indices), store_file_name, num_fresh_times)
+
+    fronts_io.write_dilated_targets_to_store(
+        top_directory_name=top_frontal_grid_dir_name,
+        target_matrix=target_matrix[found_time_indices, ...],
+        valid_times_unix_sec=valid_times_unix_sec[found_time_indices],
+        num_classes=num_classes,
+        dilation_distance_metres=dilation_distance_metres,
+        for_fcn_input=for_fcn_input)
+
+
+def _run(top_frontal_grid_dir_name, first_time_string, last_time_string,
+         num_classes, dilation_distance_metres, for_fcn_input, regenerate_all):
+    """Creates monthly stores with dilated target images.
+
+    This is effectively the main method.
+
+    :param top_frontal_grid_dir_name: See documentation at top of file.
+    :param first_time_string: Same.
+    :param last_time_string: Same.
+    :param num_classes: Same.
+    :param dilation_distance_metres: Same.
+    :param for_fcn_input: Same.
+    :param regenerate_all: Same.
+    """
+
+    first_time_unix_sec = time_conversion.string_to_unix_sec(
+        first_time_string, INPUT_TIME_FORMAT)
+    last_time_unix_sec = time_conversion.string_to_unix_sec(
+        last_time_string, INPUT_TIME_FORMAT)
+
+    valid_times_unix_sec = time_periods.range_and_interval_to_list(
+        start_time_unix_sec=first_time_unix_sec,
+        end_time_unix_sec=last_time_unix_sec,
+        time_interval_sec=TIME_INTERVAL_SECONDS, include_endpoint=True)
+
+    month_strings = numpy.array([
+        time_conversion.unix_sec_to_string(t, fronts_io.TIME_FORMAT_MONTH)
+        for t in valid_times_unix_sec
+    ])
+
+    for this_month_string in numpy.unique(month_strings):
+        _create_one_month(
+            top_frontal_grid_dir_name=top_frontal_grid_dir_name,
+            valid_times_unix_sec=valid_times_unix_sec[
+                month_strings == this_month_string],
+            num_classes=num_classes,
+            dilation_distance_metres=dilation_distance_metres,
+            for_fcn_input=for_fcn_input, regenerate_all=regenerate_all)
+
+        print SEPARATOR_STRING
+
+
+if __name__ == '__main__':
+    INPUT_ARG_OBJECT = INPUT_ARG_PARSER.parse_args()
+
+    _run(
+        top_frontal_grid_dir_name=getattr(
+            INPUT_ARG_OBJECT, FRONTAL_GRID_DIR_ARG_NAME),
+        first_time_string=getattr(INPUT_ARG_OBJECT, FIRST_TIME_ARG_NAME),
+        last_time_string=getattr(INPUT_ARG_OBJECT, LAST_TIME_ARG_NAME),
+        num_classes=getattr(INPUT_ARG_OBJECT, NUM_CLASSES_ARG_NAME),
+        dilation_distance_metres=getattr(
+            INPUT_ARG_OBJECT, DILATION_DISTANCE_ARG_NAME),
+        for_fcn_input=bool(getattr(INPUT_ARG_OBJECT, FOR_FCN_INPUT_ARG_NAME)),
+        regenerate_all=bool(getattr(INPUT_ARG_OBJECT, REGENERATE_ALL_ARG_NAME))
+    )
@@ -3,8 +3,6 @@
 This mask will be defined over the NARR grid.
 """
 
-import os.path
-import warnings
 import argparse
 import numpy
 import matplotlib
@@ -26,6 +24,8 @@ SEPARATOR_STRING = '\n\n' + '*' * 50 + '\n\n'
 
 INPUT_TIME_FORMAT = '%Y%m%d%H'
 TIME_INTERVAL_SECONDS = 10800
+NUM_TIMES_PER_BATCH = 248
+NUM_CLASSES = 3
 
 PARALLEL_SPACING_DEG = 10.
 MERIDIAN_SPACING_DEG = 20.
@@ -45,9 +45,11 @@ MIN_FRONTS_ARG_NAME = 'min_num_fronts'
 OUTPUT_DIR_ARG_NAME = 'output_dir_name'
 
 FRONTAL_GRID_DIR_HELP_STRING = (
-    'Name of top-level directory with frontal grids.  Files therein will be '
-    'found by `fronts_io.find_file_for_one_time` and read by '
-    '`fronts_io.read_narr_grids_from_file`.')
+    'Name of top-level directory with frontal grids.  Dilated (3-class) target '
+    'images will be read from stores therein by '
+    '`fronts_io.read_dilated_targets_from_store`.  For time steps that are '
+    'missing or stale in the stores, frontal grids will be read by '
+    '`fronts_io.read_narr_grids_from_columnar_files` and dilated on the fly.')
 
 TIME_HELP_STRING = (
     'Time (format "yyyymmddHH").  Frontal grids will be read for `{0:s}`...'
@@ -172,6 +174,27 @@ def _plot_front_densities(
         input_file_name=output_file_name, output_file_name=output_file_name)
 
 
+def _count_fronts(frontal_image_matrix, num_warm_fronts_matrix,
+                  num_cold_fronts_matrix):
+    """Adds fronts in dilated images to the number of fronts at each grid cell.
+
+    T = number of time steps
+    M = number of grid rows (unique y-coordinates at grid points)
+    N = number of grid columns (unique x-coordinates at grid points)
+
+    :param frontal_image_matrix: T-by-M-by-N numpy array of dilated front
+        labels (integers from the list `front_utils.VALID_INTEGER_IDS`).
+    :param num_warm_fronts_matrix: M-by-N numpy array with number of warm
+        fronts at each grid cell.  This will be updated in place.
+    :param num_cold_fronts_matrix: Same but for cold fronts.
+    """
+
+    num_warm_fronts_matrix += numpy.sum(
+        frontal_image_matrix == front_utils.WARM_FRONT_INTEGER_ID, axis=0)
+    num_cold_fronts_matrix += numpy.sum(
+        frontal_image_matrix == front_utils.COLD_FRONT_INTEGER_ID, axis=0)
+
+
 def _run(top_frontal_grid_dir_name, first_time_string, last_time_string,
          dilation_distance_metres, min_num_fronts, output_dir_name):
     """Creates mask, indicating where human forecasters usually draw fronts.
@@ -194,60 +217,85 @@ def _run(top_frontal_grid_dir_name, first_time_string, last_time_string,
         first_time_string, INPUT_TIME_FORMAT)
     last_time_unix_sec = time_conversion.string_to_unix_sec(
         last_time_string, INPUT_TIME_FORMAT)
+
+    num_grid_rows, num_grid_columns = nwp_model_utils.get_grid_dimensions(
+        model_name=nwp_model_utils.NARR_MODEL_NAME)
+    num_cold_fronts_matrix = numpy.full(
+        (num_grid_rows, num_grid_columns), 0, dtype=int)
+    num_warm_fronts_matrix = numpy.full(
+        (num_grid_rows, num_grid_columns), 0, dtype=int)
+
     valid_times_unix_sec = time_periods.range_and_interval_to_list(
         start_time_unix_sec=first_time_unix_sec,
         end_time_unix_sec=last_time_unix_sec,
-        time_interval_sec=TIME_INTERVAL_SECONDS)
+        time_interval_sec=TIME_INTERVAL_SECONDS, include_endpoint=True)
+
+    stale_flags = fronts_io.find_stale_times_in_target_store(
+        top_directory_name=top_frontal_grid_dir_name,
+        valid_times_unix_sec=valid_times_unix_sec, num_classes=NUM_CLASSES,
+        dilation_distance_metres=dilation_distance_metres)
+    stored_times_unix_sec = valid_times_unix_sec[numpy.invert(stale_flags)]
+
+    num_stored_times = len(stored_times_unix_sec)
+    print (
+        'Found dilated targets in stores at {0:d} of {1:d} time steps.'
+    ).format(num_stored_times, len(valid_times_unix_sec))
+
+    for i in range(0, num_stored_times, NUM_TIMES_PER_BATCH):
+        these_times_unix_sec = stored_times_unix_sec[
+            i:(i + NUM_TIMES_PER_BATCH)]
+
+        print (
+            'Counting fronts at stored time steps {0:d}-{1:d} of {2:d}...'
+        ).format(i + 1, i + len(these_times_unix_sec), num_stored_times)
+
+        _count_fronts(
+            frontal_image_matrix=fronts_io.read_dilated_targets_from_store(
+                top_directory_name=top_frontal_grid_dir_name,
+                valid_times_unix_sec=these_times_unix_sec,
+                num_classes=NUM_CLASSES,
+                dilation_distance_metres=dilation_distance_metres),
+            num_warm_fronts_matrix=num_warm_fronts_matrix,
+            num_cold_fronts_matrix=num_cold_fronts_matrix)
+
+    # Time steps missing or stale in the stores are dilated on the fly.
+    num_times = 0
+
+    if num_stored_times < len(valid_times_unix_sec):
+        frontal_grid_table = fronts_io.read_narr_grids_from_columnar_files(
+            top_directory_name=top_frontal_grid_dir_name,
+            first_time_unix_sec=first_time_unix_sec,
+            last_time_unix_sec=last_time_unix_sec)
 
-    num_times = len(valid_times_unix_sec)
-    num_grid_rows, num_grid_columns = nwp_model_utils.get_grid_dimensions(
-        model_name=nwp_model_utils.NARR_MODEL_NAME)
+        frontal_grid_table = frontal_grid_table.loc[numpy.invert(numpy.in1d(
+            frontal_grid_table[front_utils.TIME_COLUMN].values,
+            stored_times_unix_sec
+        ))]
+        num_times = len(frontal_grid_table.index)
 
-    num_cold_fronts_matrix = None
-    num_warm_fronts_matrix = None
+    print 'Found frontal grids (not in stores) at {0:d} time steps.'.format(
+        num_times)
 
-    for i in range(num_times):
-        this_file_name = fronts_io.find_file_for_one_time(
-            top_directory_name=top_frontal_grid_dir_name,
-            file_type=fronts_io.GRIDDED_FILE_TYPE,
-            valid_time_unix_sec=valid_times_unix_sec[i],
-            raise_error_if_missing=False)
-        if not os.path.isfile(this_file_name):
-            warning_string = (
-                'POTENTIAL PROBLEM.  Cannot find file: "{0:s}"'
-            ).format(this_file_name)
-            warnings.warn(warning_string)
-            continue
-
-        print 'Reading data from: "{0:s}"...'.format(this_file_name)
-        this_frontal_grid_table = fronts_io.read_narr_grids_from_file(
-            this_file_name)
+    for i in range(0, num_times, NUM_TIMES_PER_BATCH):
+        these_indices = numpy.arange(
+            i, min([i + NUM_TIMES_PER_BATCH, num_times]), dtype=int)
+
+        print 'Counting fronts at time steps {0:d}-{1:d} of {2:d}...'.format(
+            these_indices[0] + 1, these_indices[-1] + 1, num_times)
 
         this_frontal_grid_matrix = ml_utils.front_table_to_images(
-            frontal_grid_table=this_frontal_grid_table,
+            frontal_grid_table=frontal_grid_table.iloc[these_indices],
             num_rows_per_image=num_grid_rows,
             num_columns_per_image=num_grid_columns)
 
         this_frontal_grid_matrix = ml_utils.dilate_ternary_target_images(
             target_matrix=this_frontal_grid_matrix,
             dilation_distance_metres=dilation_distance_metres, verbose=False)
-        this_frontal_grid_matrix = this_frontal_grid_matrix[0, ...]
-
-        this_num_cold_fronts_matrix = (
-            this_frontal_grid_matrix == front_utils.COLD_FRONT_INTEGER_ID
-        ).astype(int)
-        this_num_warm_fronts_matrix = (
-            this_frontal_grid_matrix == front_utils.WARM_FRONT_INTEGER_ID
-        ).astype(int)
-
-        if num_cold_fronts_matrix is None:
-            num_cold_fronts_matrix = this_num_cold_fronts_matrix + 0
-            num_warm_fronts_matrix = this_num_warm_fronts_matrix + 0
-        else:
-            num_cold_fronts_matrix = (
-                num_cold_fronts_matrix + this_num_cold_fronts_matrix)
-            num_warm_fronts_matrix = (
-                num_warm_fronts_matrix + this_num_warm_fronts_matrix)
+
+        _count_fronts(
+            frontal_image_matrix=this_frontal_grid_matrix,
+            num_warm_fronts_matrix=num_warm_fronts_matrix,
+            num_cold_fronts_matrix=num_cold_fronts_matrix)
 
     print SEPARATOR_STRING
 
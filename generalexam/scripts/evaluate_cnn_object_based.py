@@ -8,7 +8,6 @@ import random
 import os.path
 import argparse
 import numpy
-import pandas
 from generalexam.ge_utils import front_utils
 from generalexam.evaluation import object_based_evaluation as object_eval
 
@@ -24,6 +23,12 @@ NUM_REPLICATES_ARG_NAME = 'num_bootstrap_replicates'
 CONFIDENCE_LEVEL_ARG_NAME = 'confidence_level'
 EVALUATION_FILE_ARG_NAME = 'output_eval_file_name'
 
+BINARY_CT_KEYS = [
+    object_eval.NUM_ACTUAL_FRONTS_PREDICTED_KEY,
+    object_eval.NUM_PREDICTED_FRONTS_VERIFIED_KEY,
+    object_eval.NUM_FALSE_POSITIVES_KEY, object_eval.NUM_FALSE_NEGATIVES_KEY
+]
+
 PREDICTION_FILE_HELP_STRING = (
     'Path to input file.  Will be read by '
     '`object_based_evaluation.read_predictions_and_obs`.')
@@ -72,6 +77,64 @@ INPUT_ARG_PARSER.add_argument(
     help=EVALUATION_FILE_HELP_STRING)
 
 
+def _get_binary_ct_by_time(
+        front_matching_dict, predicted_region_table, actual_polyline_table,
+        matching_distance_metres, unique_times_unix_sec):
+    """Computes binary contingency table separately for each valid time.
+
+    Since fronts are matched only at the same time, the contingency table for a
+    bootstrap replicate (a sample of valid times with replacement) is just the
+    sum of tables for the sampled times.
+
+    T = number of unique times
+
+    :param front_matching_dict: Dictionary created by
+        `object_based_evaluation.match_fronts`.
+    :param predicted_region_table: See doc for
+        `object_based_evaluation.read_predictions_and_obs`.
+    :param actual_polyline_table: Same.
+    :param matching_distance_metres: See documentation at top of file.
+    :param unique_times_unix_sec: length-T numpy array of unique times.
+    :return: binary_ct_matrix_by_time: T-by-4 numpy array of counts.  The
+        columns are ordered as in `BINARY_CT_KEYS`.
+    """
+
+    actual_time_indices = numpy.searchsorted(
+        unique_times_unix_sec,
+        actual_polyline_table[front_utils.TIME_COLUMN].values)
+    predicted_time_indices = numpy.searchsorted(
+        unique_times_unix_sec,
+        predicted_region_table[front_utils.TIME_COLUMN].values)
+
+    actual_front_predicted_flags = (
+        front_matching_dict[object_eval.ACTUAL_TO_PREDICTED_DISTANCES_KEY] <
+        matching_distance_metres
+    )
+    predicted_front_verified_flags = (
+        front_matching_dict[object_eval.PREDICTED_TO_ACTUAL_DISTANCES_KEY] <
+        matching_distance_metres
+    )
+
+    num_unique_times = len(unique_times_unix_sec)
+    binary_ct_matrix_by_time = numpy.transpose(numpy.vstack((
+        numpy.bincount(
+            actual_time_indices[actual_front_predicted_flags],
+            minlength=num_unique_times),
+        numpy.bincount(
+            predicted_time_indices[predicted_front_verified_flags],
+            minlength=num_unique_times),
+        numpy.bincount(
+            predicted_time_indices[
+                numpy.invert(predicted_front_verified_flags)],
+            minlength=num_unique_times),
+        numpy.bincount(
+            actual_time_indices[numpy.invert(actual_front_predicted_flags)],
+            minlength=num_unique_times)
+    )))
+
+    return binary_ct_matrix_by_time.astype(int)
+
+
 def _run(input_prediction_file_name, matching_distance_metres,
          num_bootstrap_replicates, confidence_level, output_eval_file_name):
     """Evaluates frontal objects (skeleton lines) created by a CNN.
@@ -92,10 +155,17 @@ def _run(input_prediction_file_name, matching_distance_metres,
     (predicted_region_table, actual_polyline_table
     ) = object_eval.read_predictions_and_obs(input_prediction_file_name)
 
-    binary_contingency_table_as_dict = object_eval.get_binary_contingency_table(
+    front_matching_dict = object_eval.match_fronts(
+        predicted_region_table=predicted_region_table,
+        actual_polyline_table=actual_polyline_table)
+
+    (binary_contingency_table_as_dict, row_normalized_ct_as_matrix,
+     column_normalized_ct_as_matrix
+    ) = object_eval.get_contingency_tables(
         predicted_region_table=predicted_region_table,
         actual_polyline_table=actual_polyline_table,
-        neigh_distance_metres=matching_distance_metres)
+        neigh_distance_metres=matching_distance_metres,
+        front_matching_dict=front_matching_dict)
 
     print (
         'Binary contingency table (matching distance = {0:f} km):\n{1:s}\n'
@@ -115,23 +185,9 @@ def _run(input_prediction_file_name, matching_distance_metres,
     ).format(binary_pod, binary_success_ratio, binary_csi,
              binary_frequency_bias)
 
-    row_normalized_ct_as_matrix = (
-        object_eval.get_row_normalized_contingency_table(
-            predicted_region_table=predicted_region_table,
-            actual_polyline_table=actual_polyline_table,
-            neigh_distance_metres=matching_distance_metres)
-    )
-
     print 'Row-normalized contingency table:\n{0:s}\n'.format(
         row_normalized_ct_as_matrix)
 
-    column_normalized_ct_as_matrix = (
-        object_eval.get_column_normalized_contingency_table(
-            predicted_region_table=predicted_region_table,
-            actual_polyline_table=actual_polyline_table,
-            neigh_distance_metres=matching_distance_metres)
-    )
-
     print 'Column-normalized contingency table:\n{0:s}\n'.format(
         column_normalized_ct_as_matrix)
 
@@ -162,71 +218,33 @@ def _run(input_prediction_file_name, matching_distance_metres,
     ).format(num_unique_times)
     print SEPARATOR_STRING
 
+    binary_ct_matrix_by_time = _get_binary_ct_by_time(
+        front_matching_dict=front_matching_dict,
+        predicted_region_table=predicted_region_table,
+        actual_polyline_table=actual_polyline_table,
+        matching_distance_metres=matching_distance_metres,
+        unique_times_unix_sec=unique_times_unix_sec)
+
     binary_pod_values = numpy.full(num_bootstrap_replicates, numpy.nan)
     binary_success_ratios = numpy.full(num_bootstrap_replicates, numpy.nan)
     binary_csi_values = numpy.full(num_bootstrap_replicates, numpy.nan)
     binary_frequency_biases = numpy.full(num_bootstrap_replicates, numpy.nan)
 
     for i in range(num_bootstrap_replicates):
-        these_times_unix_sec = numpy.random.choice(
-            unique_times_unix_sec, size=len(unique_times_unix_sec),
-            replace=True)
-
-        these_predicted_region_tables = []
-        these_actual_polyline_tables = []
-
-        for this_time_unix_sec in these_times_unix_sec:
-            these_predicted_region_tables.append(
-                predicted_region_table.loc[
-                    predicted_region_table[front_utils.TIME_COLUMN] ==
-                    this_time_unix_sec
-                    ]
-            )
-
-            these_actual_polyline_tables.append(
-                actual_polyline_table.loc[
-                    actual_polyline_table[front_utils.TIME_COLUMN] ==
-                    this_time_unix_sec
-                    ]
-            )
-
-            if len(these_predicted_region_tables) == 1:
-                continue
-
-            these_predicted_region_tables[-1] = (
-                these_predicted_region_tables[-1].align(
-                    these_predicted_region_tables[0], axis=1
-                )[0]
-            )
-            these_actual_polyline_tables[-1] = (
-                these_actual_polyline_tables[-1].align(
-                    these_actual_polyline_tables[0], axis=1
-                )[0]
-            )
-
-        this_predicted_region_table = pandas.concat(
-            these_predicted_region_tables, axis=0, ignore_index=True)
-        this_actual_polyline_table = pandas.concat(
-            these_actual_polyline_tables, axis=0, ignore_index=True)
+        these_time_indices = numpy.random.choice(
+            num_unique_times, size=num_unique_times, replace=True)
 
-        print (
-            'Number of unique predicted fronts = {0:d} ... number of '
-            'predicted fronts in bootstrap replicate {1:d} of {2:d} = {3:d}'
-        ).format(len(predicted_region_table.index),
-                 i + 1, num_bootstrap_replicates,
-                 len(this_predicted_region_table.index))
+        these_counts = numpy.sum(
+            binary_ct_matrix_by_time[these_time_indices, :], axis=0)
+        this_binary_ct_as_dict = dict(zip(BINARY_CT_KEYS, these_counts))
 
         print (
-            'Number of unique actual fronts = {0:d} ... number of actual '
-            'fronts in bootstrap replicate {1:d} of {2:d} = {3:d}'
-        ).format(len(actual_polyline_table.index),
-                 i + 1, num_bootstrap_replicates,
-                 len(this_actual_polyline_table.index))
-
-        this_binary_ct_as_dict = object_eval.get_binary_contingency_table(
-            predicted_region_table=this_predicted_region_table,
-            actual_polyline_table=this_actual_polyline_table,
-            neigh_distance_metres=matching_distance_metres)
+            'Number of actual fronts in bootstrap replicate {0:d} of {1:d} = '
+            '{2:d} ... number of predicted fronts = {3:d}'
+        ).format(
+            i + 1, num_bootstrap_replicates,
+            these_counts[0] + these_counts[3], these_counts[1] + these_counts[2]
+        )
 
         binary_pod_values[i] = object_eval.get_binary_pod(
             this_binary_ct_as_dict)
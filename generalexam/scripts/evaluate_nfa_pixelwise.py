@@ -10,7 +10,7 @@ from gewittergefahr.gg_utils import time_periods
 from gewittergefahr.gg_utils import error_checking
 from generalexam.ge_io import fronts_io
 from generalexam.ge_utils import nfa
-from generalexam.machine_learning import machine_learning_utils as ml_utils
+from generalexam.machine_learning import training_validation_io as trainval_io
 from generalexam.scripts import model_evaluation_helper as model_eval_helper
 
 random.seed(6695)
@@ -62,8 +62,9 @@ DILATION_DISTANCE_HELP_STRING = 'Dilation distance for labels (true fronts).'
 
 FRONT_DIR_HELP_STRING = (
     'Name of top-level directory with labels (true fronts).  Files therein will'
-    ' be found by `fronts_io.find_file_for_one_time` and read by '
-    '`fronts_io.read_narr_grids_from_file`.')
+    ' be found by `fronts_io.find_file_for_one_time`, and dilated labels will '
+    'be read by `training_validation_io.read_target_matrix` (from the store '
+    'with dilated targets, if it is up to date).')
 
 OUTPUT_DIR_HELP_STRING = (
     'Name of output directory.  Results will be saved here.')
@@ -207,19 +208,11 @@ def _run(use_ensembled_predictions, top_prediction_dir_name, first_time_string,
             file_type=fronts_io.GRIDDED_FILE_TYPE,
             valid_time_unix_sec=this_time_unix_sec)
 
-        print 'Reading data from: "{0:s}"...'.format(this_front_file_name)
-        this_frontal_grid_table = fronts_io.read_narr_grids_from_file(
-            this_front_file_name)
-
-        this_target_matrix = ml_utils.front_table_to_images(
-            frontal_grid_table=this_frontal_grid_table,
-            num_rows_per_image=this_class_probability_matrix.shape[0],
-            num_columns_per_image=this_class_probability_matrix.shape[1]
-        )
-
-        this_target_matrix = ml_utils.dilate_ternary_target_images(
-            target_matrix=this_target_matrix,
-            dilation_distance_metres=dilation_distance_metres, verbose=False)
+        this_target_matrix = trainval_io.read_target_matrix(
+            frontal_grid_file_name=this_front_file_name,
+            num_classes=NUM_CLASSES,
+            dilation_distance_metres=dilation_distance_metres,
+            subset_for_fcn_input=False)
 
         this_class_probability_matrix = this_class_probability_matrix[
             these_grid_rows, these_grid_columns, :]
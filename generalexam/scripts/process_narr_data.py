@@ -1,6 +1,22 @@
-"""Converts NARR data to a more convenient file format."""
-
+"""Converts NARR data to a more convenient file format.
+
+Each field is processed one month at a time.  Times are grouped by input file,
+and all times in one NetCDF file are read in one slice (see
+`narr_netcdf_io.read_file_for_many_times`).  Open NetCDF files are kept in a
+least-recently-used cache, so that yearly files (used for surface data) are not
+reopened for each month.  Fields and months may be spread over a pool of
+processes.
+
+Output files that already exist are skipped.  Since
+`processed_narr_io.write_fields_to_file` renames each file only after writing
+it, any output file that exists is complete.  Thus, if this script is
+interrupted, it can be rerun with the same arguments to finish the job.
+"""
+
+import os.path
 import argparse
+import itertools
+import multiprocessing
 import numpy
 from gewittergefahr.gg_io import nwp_model_io
 from gewittergefahr.gg_utils import time_conversion
@@ -22,6 +38,15 @@ LAST_GRIB_TIME_UNIX_SEC = 1412283600
 MB_TO_PASCALS = 100
 DUMMY_PRESSURE_LEVEL_MB = 1013
 
+MAX_NUM_OPEN_FILES = 4
+HANDLE_CACHE_OBJECT = narr_netcdf_io.NetcdfHandleCache(
+    max_num_open_files=MAX_NUM_OPEN_FILES)
+
+# Filled on the first call to `_get_wind_rotation_matrices` in each process.
+ROTATION_COSINE_MATRIX_KEY = 'rotation_cosine_matrix'
+ROTATION_SINE_MATRIX_KEY = 'rotation_sine_matrix'
+WIND_ROTATION_DICT = {}
+
 WIND_FIELD_NAMES = [
     processed_narr_io.U_WIND_EARTH_RELATIVE_NAME,
     processed_narr_io.V_WIND_EARTH_RELATIVE_NAME
@@ -35,36 +60,48 @@ THERMAL_FIELD_NAMES = [
 INPUT_DIR_ARG_NAME = 'input_dir_name'
 FIRST_TIME_ARG_NAME = 'first_time_string'
 LAST_TIME_ARG_NAME = 'last_time_string'
-FIELD_NAME_ARG_NAME = 'field_name'
+FIELD_NAMES_ARG_NAME = 'field_names'
 PRESSURE_LEVEL_ARG_NAME = 'pressure_level_mb'
 OUTPUT_DIR_ARG_NAME = 'output_dir_name'
+NUM_PROCESSES_ARG_NAME = 'num_processes'
+REPROCESS_ALL_ARG_NAME = 'reprocess_all'
 
 INPUT_DIR_HELP_STRING = (
     'Name of top-level directory with unprocessed NARR data (in grib and/or '
     'NetCDF files).  Files therein will be found by '
     '`nwp_model_io.find_grib_file` or `narr_netcdf_io.find_file`, and read by '
-    '`nwp_model_io.read_field_from_grib_file` or `narr_netcdf_io.read_file`.')
+    '`nwp_model_io.read_field_from_grib_file` or '
+    '`narr_netcdf_io.read_file_for_many_times`.')
 
 TIME_HELP_STRING = (
     'Valid time (format "yyyymmddHH").  Will convert NARR data for all valid '
     'times in the period `{0:s}`...`{1:s}`.'
 ).format(FIRST_TIME_ARG_NAME, LAST_TIME_ARG_NAME)
 
-FIELD_NAME_HELP_STRING = (
-    'Field name (must be accepted by `processed_narr_io.check_field_name`).  '
-    'Only this field will be extracted and converted.')
+FIELD_NAMES_HELP_STRING = (
+    'List of field names (each must be accepted by '
+    '`processed_narr_io.check_field_name`).  Only these fields will be '
+    'extracted and converted.')
 
 PRESSURE_LEVEL_HELP_STRING = (
-    'Pressure level (millibars).  The field (`{0:s}`) will be extracted only at'
-    ' this pressure level.  If you want the surface field, leave this argument '
-    'alone.'
-).format(FIELD_NAME_ARG_NAME)
+    'Pressure level (millibars).  The fields (`{0:s}`) will be extracted only '
+    'at this pressure level.  If you want the surface fields, leave this '
+    'argument alone.'
+).format(FIELD_NAMES_ARG_NAME)
 
 OUTPUT_DIR_HELP_STRING = (
     'Name of top-level directory for processed NARR data.  Output will be '
     'written here by `processed_narr_io.write_fields_to_file`, to file '
     'locations determined by `processed_narr_io.find_file_for_one_time`.')
 
+NUM_PROCESSES_HELP_STRING = (
+    'Number of processes.  Each process handles one field for one month at a '
+    'time.')
+
+REPROCESS_ALL_HELP_STRING = (
+    'Boolean flag.  If 1, will process all time steps, even those whose output '
+    'files already exist.')
+
 TOP_INPUT_DIR_NAME_DEFAULT = '/condo/swatwork/ralager/narr_data'
 TOP_OUTPUT_DIR_NAME_DEFAULT = '/condo/swatwork/ralager/narr_data/processed'
 
@@ -80,8 +117,8 @@ INPUT_ARG_PARSER.add_argument(
     '--' + LAST_TIME_ARG_NAME, type=str, required=True, help=TIME_HELP_STRING)
 
 INPUT_ARG_PARSER.add_argument(
-    '--' + FIELD_NAME_ARG_NAME, type=str, required=True,
-    help=FIELD_NAME_HELP_STRING)
+    '--' + FIELD_NAMES_ARG_NAME, type=str, nargs='+', required=True,
+    help=FIELD_NAMES_HELP_STRING)
 
 INPUT_ARG_PARSER.add_argument(
     '--' + PRESSURE_LEVEL_ARG_NAME, type=int, required=False, default=-1,
@@ -91,6 +128,14 @@ INPUT_ARG_PARSER.add_argument(
     '--' + OUTPUT_DIR_ARG_NAME, type=str, required=False,
     default=TOP_OUTPUT_DIR_NAME_DEFAULT, help=OUTPUT_DIR_HELP_STRING)
 
+INPUT_ARG_PARSER.add_argument(
+    '--' + NUM_PROCESSES_ARG_NAME, type=int, required=False, default=1,
+    help=NUM_PROCESSES_HELP_STRING)
+
+INPUT_ARG_PARSER.add_argument(
+    '--' + REPROCESS_ALL_ARG_NAME, type=int, required=False, default=0,
+    help=REPROCESS_ALL_HELP_STRING)
+
 
 def _std_to_grib1_field_name(field_name, pressure_level_mb=None):
     """Converts field name from standard to grib1 format.
@@ -135,199 +180,378 @@ def _std_to_grib1_field_name(field_name, pressure_level_mb=None):
         return 'PRES:2 m above gnd'
 
 
-def _run(top_input_dir_name, first_time_string, last_time_string,
-         input_field_name, pressure_level_mb, top_output_dir_name):
-    """Converts NARR data to a more convenient file format.
-
-    This is effectively the main method.
+def _get_other_wind_field(field_name):
+    """Returns the other wind component.
 
-    :param top_input_dir_name: See documentation at top of file.
-    :param first_time_string: Same.
-    :param last_time_string: Same.
-    :param input_field_name: Same.
-    :param pressure_level_mb: Same.
-    :param top_output_dir_name: Same.
+    :param field_name: Field name in standard format.
+    :return: field_name_other: If `field_name` is the u-wind (v-wind), this is
+        the v-wind (u-wind).  If `field_name` is not a wind component, this is
+        None.
     """
 
-    if pressure_level_mb <= 0:
-        pressure_level_mb = None
-
-    if pressure_level_mb is None:
-        output_pressure_level_mb = DUMMY_PRESSURE_LEVEL_MB + 0
-    else:
-        output_pressure_level_mb = pressure_level_mb + 0
-
-    first_time_unix_sec = time_conversion.string_to_unix_sec(
-        first_time_string, INPUT_TIME_FORMAT)
-    last_time_unix_sec = time_conversion.string_to_unix_sec(
-        last_time_string, INPUT_TIME_FORMAT)
-
-    valid_times_unix_sec = time_periods.range_and_interval_to_list(
-        start_time_unix_sec=first_time_unix_sec,
-        end_time_unix_sec=last_time_unix_sec,
-        time_interval_sec=TIME_INTERVAL_SECONDS)
+    if field_name == processed_narr_io.U_WIND_EARTH_RELATIVE_NAME:
+        return processed_narr_io.V_WIND_EARTH_RELATIVE_NAME
+    if field_name == processed_narr_io.V_WIND_EARTH_RELATIVE_NAME:
+        return processed_narr_io.U_WIND_EARTH_RELATIVE_NAME
 
-    if input_field_name == processed_narr_io.U_WIND_EARTH_RELATIVE_NAME:
-        input_field_name_other = (
-            processed_narr_io.V_WIND_EARTH_RELATIVE_NAME
-        )
-    elif input_field_name == processed_narr_io.V_WIND_EARTH_RELATIVE_NAME:
-        input_field_name_other = (
-            processed_narr_io.U_WIND_EARTH_RELATIVE_NAME
-        )
-    else:
-        input_field_name_other = None
+    return None
 
-    input_field_name_grib1 = _std_to_grib1_field_name(
-        field_name=input_field_name, pressure_level_mb=pressure_level_mb)
 
-    if input_field_name in WIND_FIELD_NAMES:
-        input_field_name_other_grib1 = _std_to_grib1_field_name(
-            field_name=input_field_name_other,
-            pressure_level_mb=pressure_level_mb)
+def _get_wind_rotation_matrices():
+    """Returns matrices used to rotate winds from Earth- to grid-relative.
 
-        output_field_name = processed_narr_io.field_name_to_grid_relative(
-            input_field_name)
+    M = number of rows in NARR grid
+    N = number of columns in NARR grid
 
-        output_field_name_other = (
-            processed_narr_io.field_name_to_grid_relative(
-                input_field_name_other)
-        )
+    :return: rotation_cosine_matrix: M-by-N numpy array of cosines (see doc for
+        `nwp_model_utils.get_wind_rotation_angles`).
+    :return: rotation_sine_matrix: M-by-N numpy array of sines.
+    """
 
+    if len(WIND_ROTATION_DICT) == 0:
         (narr_latitude_matrix_deg, narr_longitude_matrix_deg
         ) = nwp_model_utils.get_latlng_grid_point_matrices(
             model_name=nwp_model_utils.NARR_MODEL_NAME)
 
-        (narr_rotation_cosine_matrix, narr_rotation_sine_matrix
+        (rotation_cosine_matrix, rotation_sine_matrix
         ) = nwp_model_utils.get_wind_rotation_angles(
             latitudes_deg=narr_latitude_matrix_deg,
             longitudes_deg=narr_longitude_matrix_deg,
             model_name=nwp_model_utils.NARR_MODEL_NAME)
-    else:
-        input_field_name_other_grib1 = None
-        output_field_name = input_field_name + ''
-        output_field_name_other = None
+
+        WIND_ROTATION_DICT.update({
+            ROTATION_COSINE_MATRIX_KEY: rotation_cosine_matrix,
+            ROTATION_SINE_MATRIX_KEY: rotation_sine_matrix
+        })
+
+    return (WIND_ROTATION_DICT[ROTATION_COSINE_MATRIX_KEY],
+            WIND_ROTATION_DICT[ROTATION_SINE_MATRIX_KEY])
+
+
+def _read_field_from_netcdf(
+        top_input_dir_name, field_name, valid_times_unix_sec,
+        pressure_level_mb):
+    """Reads one field at many times from NetCDF files.
+
+    Times are grouped by input file, and all times in one file are read in one
+    slice.
+
+    T = number of time steps
+    M = number of rows in grid
+    N = number of columns in grid
+
+    :param top_input_dir_name: See documentation at top of file.
+    :param field_name: Field name in standard format.
+    :param valid_times_unix_sec: length-T numpy array of valid times.
+    :param pressure_level_mb: Pressure level (millibars).  For surface field,
+        this should be None.
+    :return: field_matrix: T-by-M-by-N numpy array of values.
+    """
+
+    netcdf_file_names = numpy.array([
+        narr_netcdf_io.find_file(
+            top_directory_name=top_input_dir_name, field_name=field_name,
+            month_string=time_conversion.unix_sec_to_string(
+                t, MONTH_TIME_FORMAT),
+            is_surface=pressure_level_mb is None)
+        for t in valid_times_unix_sec
+    ])
+
+    field_matrix = None
+
+    for this_file_name in numpy.unique(netcdf_file_names):
+        these_time_indices = numpy.where(
+            netcdf_file_names == this_file_name)[0]
+
+        print 'Reading {0:d} time steps from: "{1:s}"...'.format(
+            len(these_time_indices), this_file_name)
+
+        this_field_matrix = narr_netcdf_io.read_file_for_many_times(
+            netcdf_file_name=this_file_name, field_name=field_name,
+            valid_times_unix_sec=valid_times_unix_sec[these_time_indices],
+            pressure_level_mb=pressure_level_mb,
+            handle_cache_object=HANDLE_CACHE_OBJECT)
+
+        if field_matrix is None:
+            field_matrix = numpy.full(
+                (len(valid_times_unix_sec),) + this_field_matrix.shape[1:],
+                numpy.nan)
+
+        field_matrix[these_time_indices, ...] = this_field_matrix
+
+    return field_matrix
+
+
+def _read_fields_from_grib(
+        top_input_dir_name, field_names_grib1, valid_times_unix_sec):
+    """Reads one or more fields at many times from grib files.
+
+    There is one grib file per time step, containing all fields.
+
+    F = number of fields
+
+    :param top_input_dir_name: See documentation at top of file.
+    :param field_names_grib1: length-F list of field names in grib1 format.
+    :param valid_times_unix_sec: See doc for `_read_field_from_netcdf`.
+    :return: field_matrices: length-F list, where each item is a numpy array
+        created by `_read_field_from_netcdf`.
+    """
 
     num_times = len(valid_times_unix_sec)
+    field_matrices = [None] * len(field_names_grib1)
 
     for i in range(num_times):
-        if input_field_name in WIND_FIELD_NAMES:
-            this_field_matrix_other = None
-
-        if valid_times_unix_sec[i] > LAST_GRIB_TIME_UNIX_SEC:
-            this_month_string = time_conversion.unix_sec_to_string(
-                valid_times_unix_sec[i], MONTH_TIME_FORMAT)
-
-            this_netcdf_file_name = narr_netcdf_io.find_file(
-                top_directory_name=top_input_dir_name,
-                field_name=input_field_name, month_string=this_month_string,
-                is_surface=pressure_level_mb is None)
-
-            print 'Reading data from: "{0:s}"...'.format(this_netcdf_file_name)
-            this_field_matrix = narr_netcdf_io.read_file(
-                netcdf_file_name=this_netcdf_file_name,
-                field_name=input_field_name,
-                valid_time_unix_sec=valid_times_unix_sec[i],
-                pressure_level_mb=pressure_level_mb)
+        this_grib_file_name = nwp_model_io.find_grib_file(
+            top_directory_name=top_input_dir_name,
+            model_name=nwp_model_utils.NARR_MODEL_NAME,
+            init_time_unix_sec=valid_times_unix_sec[i], lead_time_hours=0)
 
-            if input_field_name in WIND_FIELD_NAMES:
-                this_netcdf_file_name_other = narr_netcdf_io.find_file(
-                    top_directory_name=top_input_dir_name,
-                    field_name=input_field_name_other,
-                    month_string=this_month_string,
-                    is_surface=pressure_level_mb is None)
-
-                print 'Reading data from: "{0:s}"...'.format(
-                    this_netcdf_file_name_other)
-
-                this_field_matrix_other = narr_netcdf_io.read_file(
-                    netcdf_file_name=this_netcdf_file_name_other,
-                    field_name=input_field_name_other,
-                    valid_time_unix_sec=valid_times_unix_sec[i],
-                    pressure_level_mb=pressure_level_mb)
-        else:
-            this_grib_file_name = nwp_model_io.find_grib_file(
-                top_directory_name=top_input_dir_name,
-                model_name=nwp_model_utils.NARR_MODEL_NAME,
-                init_time_unix_sec=valid_times_unix_sec[i], lead_time_hours=0)
+        print 'Reading data from: "{0:s}"...'.format(this_grib_file_name)
 
-            print 'Reading data from: "{0:s}"...'.format(this_grib_file_name)
+        for j in range(len(field_names_grib1)):
             this_field_matrix = nwp_model_io.read_field_from_grib_file(
                 grib_file_name=this_grib_file_name,
-                field_name_grib1=input_field_name_grib1,
+                field_name_grib1=field_names_grib1[j],
                 model_name=nwp_model_utils.NARR_MODEL_NAME,
                 wgrib_exe_name=WGRIB_EXE_NAME, wgrib2_exe_name=WGRIB2_EXE_NAME)
 
-            if input_field_name in WIND_FIELD_NAMES:
-                this_field_matrix_other = (
-                    nwp_model_io.read_field_from_grib_file(
-                        grib_file_name=this_grib_file_name,
-                        field_name_grib1=input_field_name_other_grib1,
-                        model_name=nwp_model_utils.NARR_MODEL_NAME,
-                        wgrib_exe_name=WGRIB_EXE_NAME,
-                        wgrib2_exe_name=WGRIB2_EXE_NAME)
-                )
-
-        if input_field_name in WIND_FIELD_NAMES:
-            print 'Rotating Earth-relative winds to grid-relative...'
-
-            if input_field_name == processed_narr_io.U_WIND_EARTH_RELATIVE_NAME:
-                this_field_matrix, this_field_matrix_other = (
-                    nwp_model_utils.rotate_winds_to_grid_relative(
-                        u_winds_earth_relative_m_s01=this_field_matrix,
-                        v_winds_earth_relative_m_s01=this_field_matrix_other,
-                        rotation_angle_cosines=narr_rotation_cosine_matrix,
-                        rotation_angle_sines=narr_rotation_sine_matrix)
-                )
-            else:
-                this_field_matrix_other, this_field_matrix = (
-                    nwp_model_utils.rotate_winds_to_grid_relative(
-                        u_winds_earth_relative_m_s01=this_field_matrix_other,
-                        v_winds_earth_relative_m_s01=this_field_matrix,
-                        rotation_angle_cosines=narr_rotation_cosine_matrix,
-                        rotation_angle_sines=narr_rotation_sine_matrix)
-                )
-
-        this_output_file_name = processed_narr_io.find_file_for_one_time(
-            top_directory_name=top_output_dir_name,
-            field_name=output_field_name,
-            pressure_level_mb=output_pressure_level_mb,
-            valid_time_unix_sec=valid_times_unix_sec[i],
-            raise_error_if_missing=False)
-
-        print 'Writing processed data to: "{0:s}"...'.format(
-            this_output_file_name)
-
-        processed_narr_io.write_fields_to_file(
-            pickle_file_name=this_output_file_name,
-            field_matrix=numpy.expand_dims(this_field_matrix, axis=0),
-            field_name=output_field_name,
-            pressure_level_pascals=output_pressure_level_mb * MB_TO_PASCALS,
-            valid_times_unix_sec=valid_times_unix_sec[[i]]
-        )
+            if field_matrices[j] is None:
+                field_matrices[j] = numpy.full(
+                    (num_times,) + this_field_matrix.shape, numpy.nan)
+
+            field_matrices[j][i, ...] = this_field_matrix
+
+    return field_matrices
 
-        if input_field_name not in WIND_FIELD_NAMES:
-            print '\n'
-            continue
 
-        this_output_file_name = processed_narr_io.find_file_for_one_time(
-            top_directory_name=top_output_dir_name,
-            field_name=output_field_name_other,
+def _process_one_month(
+        top_input_dir_name, input_field_name, valid_times_unix_sec,
+        pressure_level_mb, top_output_dir_name, reprocess_all):
+    """Converts one field for one month.
+
+    If the field is a wind component, both components are converted and rotated
+    to grid-relative.
+
+    :param top_input_dir_name: See documentation at top of file.
+    :param input_field_name: Field name in standard format.
+    :param valid_times_unix_sec: 1-D numpy array of valid times (all in the same
+        month).
+    :param pressure_level_mb: Pressure level (millibars).  For surface field,
+        this should be None.
+    :param top_output_dir_name: See documentation at top of file.
+    :param reprocess_all: Same.
+    :return: num_times_processed: Number of time steps processed.
+    """
+
+    if pressure_level_mb is None:
+        output_pressure_level_mb = DUMMY_PRESSURE_LEVEL_MB + 0
+    else:
+        output_pressure_level_mb = pressure_level_mb + 0
+
+    input_field_names = [input_field_name]
+    if input_field_name in WIND_FIELD_NAMES:
+        input_field_names.append(_get_other_wind_field(input_field_name))
+        output_field_names = [
+            processed_narr_io.field_name_to_grid_relative(f)
+            for f in input_field_names
+        ]
+    else:
+        output_field_names = [input_field_name]
+
+    output_file_names_by_field = [
+        [processed_narr_io.find_file_for_one_time(
+            top_directory_name=top_output_dir_name, field_name=f,
             pressure_level_mb=output_pressure_level_mb,
-            valid_time_unix_sec=valid_times_unix_sec[i],
-            raise_error_if_missing=False)
-
-        print 'Writing processed data to: "{0:s}"...\n'.format(
-            this_output_file_name)
-
-        processed_narr_io.write_fields_to_file(
-            pickle_file_name=this_output_file_name,
-            field_matrix=numpy.expand_dims(this_field_matrix_other, axis=0),
-            field_name=output_field_name_other,
-            pressure_level_pascals=output_pressure_level_mb * MB_TO_PASCALS,
-            valid_times_unix_sec=valid_times_unix_sec[[i]]
+            valid_time_unix_sec=t, raise_error_if_missing=False)
+         for t in valid_times_unix_sec]
+        for f in output_field_names
+    ]
+
+    if reprocess_all:
+        time_indices = numpy.linspace(
+            0, len(valid_times_unix_sec) - 1, num=len(valid_times_unix_sec),
+            dtype=int)
+    else:
+        time_indices = numpy.where(numpy.array([
+            not all([os.path.isfile(n[i]) for n in output_file_names_by_field])
+            for i in range(len(valid_times_unix_sec))
+        ], dtype=bool))[0]
+
+    this_month_string = time_conversion.unix_sec_to_string(
+        valid_times_unix_sec[0], MONTH_TIME_FORMAT)
+    print (
+        'Processing {0:d} time steps of "{1:s}" for {2:s} ({3:d} were already '
+        'complete)...'
+    ).format(len(time_indices), input_field_name, this_month_string,
+             len(valid_times_unix_sec) - len(time_indices))
+
+    if len(time_indices) == 0:
+        return 0
+
+    these_times_unix_sec = valid_times_unix_sec[time_indices]
+    num_grid_rows, num_grid_columns = nwp_model_utils.get_grid_dimensions(
+        model_name=nwp_model_utils.NARR_MODEL_NAME)
+    field_matrices = [
+        numpy.full((len(time_indices), num_grid_rows, num_grid_columns),
+                   numpy.nan)
+        for _ in input_field_names
+    ]
+
+    netcdf_indices = numpy.where(
+        these_times_unix_sec > LAST_GRIB_TIME_UNIX_SEC)[0]
+    grib_indices = numpy.where(
+        these_times_unix_sec <= LAST_GRIB_TIME_UNIX_SEC)[0]
+
+    if len(netcdf_indices) > 0:
+        for j in range(len(input_field_names)):
+            field_matrices[j][netcdf_indices, ...] = _read_field_from_netcdf(
+                top_input_dir_name=top_input_dir_name,
+                field_name=input_field_names[j],
+                valid_times_unix_sec=these_times_unix_sec[netcdf_indices],
+                pressure_level_mb=pressure_level_mb)
+
+    if len(grib_indices) > 0:
+        these_field_matrices = _read_fields_from_grib(
+            top_input_dir_name=top_input_dir_name,
+            field_names_grib1=[
+                _std_to_grib1_field_name(
+                    field_name=f, pressure_level_mb=pressure_level_mb)
+                for f in input_field_names
+            ],
+            valid_times_unix_sec=these_times_unix_sec[grib_indices])
+
+        for j in range(len(input_field_names)):
+            field_matrices[j][grib_indices, ...] = these_field_matrices[j]
+
+    if input_field_name in WIND_FIELD_NAMES:
+        print 'Rotating Earth-relative winds to grid-relative...'
+        rotation_cosine_matrix, rotation_sine_matrix = (
+            _get_wind_rotation_matrices()
         )
 
+        if input_field_name == processed_narr_io.U_WIND_EARTH_RELATIVE_NAME:
+            u_wind_index = 0
+        else:
+            u_wind_index = 1
+        v_wind_index = 1 - u_wind_index
+
+        for i in range(len(time_indices)):
+            (field_matrices[u_wind_index][i, ...],
+             field_matrices[v_wind_index][i, ...]
+            ) = nwp_model_utils.rotate_winds_to_grid_relative(
+                u_winds_earth_relative_m_s01=
+                field_matrices[u_wind_index][i, ...],
+                v_winds_earth_relative_m_s01=
+                field_matrices[v_wind_index][i, ...],
+                rotation_angle_cosines=rotation_cosine_matrix,
+                rotation_angle_sines=rotation_sine_matrix)
+
+    for j in range(len(output_field_names)):
+        for i in range(len(time_indices)):
+            this_output_file_name = output_file_names_by_field[j][
+                time_indices[i]]
+
+            print 'Writing processed data to: "{0:s}"...'.format(
+                this_output_file_name)
+
+            processed_narr_io.write_fields_to_file(
+                pickle_file_name=this_output_file_name,
+                field_matrix=field_matrices[j][[i], ...],
+                field_name=output_field_names[j],
+                pressure_level_pascals=output_pressure_level_mb * MB_TO_PASCALS,
+                valid_times_unix_sec=these_times_unix_sec[[i]]
+            )
+
+    return len(time_indices)
+
+
+def _process_one_month_star(argument_tuple):
+    """Unpacks arguments for `_process_one_month` (used by `Pool.imap`).
+
+    :param argument_tuple: Tuple of arguments for `_process_one_month`.
+    :return: num_times_processed: See doc for `_process_one_month`.
+    """
+
+    this_num_times = _process_one_month(*argument_tuple)
+    print SEPARATOR_STRING
+    return this_num_times
+
+
+def _run(top_input_dir_name, first_time_string, last_time_string,
+         input_field_names, pressure_level_mb, top_output_dir_name,
+         num_processes, reprocess_all):
+    """Converts NARR data to a more convenient file format.
+
+    This is effectively the main method.
+
+    :param top_input_dir_name: See documentation at top of file.
+    :param first_time_string: Same.
+    :param last_time_string: Same.
+    :param input_field_names: Same.
+    :param pressure_level_mb: Same.
+    :param top_output_dir_name: Same.
+    :param num_processes: Same.
+    :param reprocess_all: Same.
+    """
+
+    if pressure_level_mb <= 0:
+        pressure_level_mb = None
+
+    for this_field_name in input_field_names:
+        processed_narr_io.check_field_name(
+            field_name=this_field_name, require_standard=True)
+
+    # Both wind components are converted together, so only one is needed.
+    if all([f in input_field_names for f in WIND_FIELD_NAMES]):
+        input_field_names = [
+            f for f in input_field_names
+            if f != processed_narr_io.V_WIND_EARTH_RELATIVE_NAME
+        ]
+
+    first_time_unix_sec = time_conversion.string_to_unix_sec(
+        first_time_string, INPUT_TIME_FORMAT)
+    last_time_unix_sec = time_conversion.string_to_unix_sec(
+        last_time_string, INPUT_TIME_FORMAT)
+
+    valid_times_unix_sec = time_periods.range_and_interval_to_list(
+        start_time_unix_sec=first_time_unix_sec,
+        end_time_unix_sec=last_time_unix_sec,
+        time_interval_sec=TIME_INTERVAL_SECONDS)
+
+    month_strings = numpy.array([
+        time_conversion.unix_sec_to_string(t, MONTH_TIME_FORMAT)
+        for t in valid_times_unix_sec
+    ])
+
+    argument_tuples = [
+        (top_input_dir_name, this_field_name,
+         valid_times_unix_sec[month_strings == this_month_string],
+         pressure_level_mb, top_output_dir_name, reprocess_all)
+        for this_field_name in input_field_names
+        for this_month_string in numpy.unique(month_strings)
+    ]
+
+    if num_processes == 1:
+        worker_pool = None
+        map_function = itertools.imap
+    else:
+        worker_pool = multiprocessing.Pool(processes=num_processes)
+        map_function = worker_pool.imap_unordered
+
+    num_times_processed = 0
+
+    try:
+        for this_num_times in map_function(
+                _process_one_month_star, argument_tuples):
+            num_times_processed += this_num_times
+    finally:
+        if worker_pool is not None:
+            worker_pool.close()
+            worker_pool.join()
+
+    print 'Processed {0:d} time steps in {1:d} field-months.'.format(
+        num_times_processed, len(argument_tuples))
+
 
 if __name__ == '__main__':
     INPUT_ARG_OBJECT = INPUT_ARG_PARSER.parse_args()
@@ -336,7 +560,9 @@ if __name__ == '__main__':
         top_input_dir_name=getattr(INPUT_ARG_OBJECT, INPUT_DIR_ARG_NAME),
         first_time_string=getattr(INPUT_ARG_OBJECT, FIRST_TIME_ARG_NAME),
         last_time_string=getattr(INPUT_ARG_OBJECT, LAST_TIME_ARG_NAME),
-        input_field_name=getattr(INPUT_ARG_OBJECT, FIELD_NAME_ARG_NAME),
+        input_field_names=getattr(INPUT_ARG_OBJECT, FIELD_NAMES_ARG_NAME),
         pressure_level_mb=getattr(INPUT_ARG_OBJECT, PRESSURE_LEVEL_ARG_NAME),
-        top_output_dir_name=getattr(INPUT_ARG_OBJECT, OUTPUT_DIR_ARG_NAME)
+        top_output_dir_name=getattr(INPUT_ARG_OBJECT, OUTPUT_DIR_ARG_NAME),
+        num_processes=getattr(INPUT_ARG_OBJECT, NUM_PROCESSES_ARG_NAME),
+        reprocess_all=bool(getattr(INPUT_ARG_OBJECT, REPROCESS_ALL_ARG_NAME))
     )
@@ -287,6 +287,13 @@ def _find_baseline_and_test_examples(
         if not (k in file_indices_for_test or k in file_indices_for_baseline):
             continue
 
+        these_baseline_indices = numpy.where(file_indices_for_baseline == k)[0]
+        these_test_indices = numpy.where(file_indices_for_test == k)[0]
+        these_position_indices = numpy.unique(numpy.concatenate((
+            file_position_indices_for_baseline[these_baseline_indices],
+            file_position_indices_for_test[these_test_indices]
+        )))
+
         print 'Reading data from: "{0:s}"...'.format(example_file_names[k])
         this_example_dict = trainval_io.read_downsized_3d_examples(
             netcdf_file_name=example_file_names[k], metadata_only=False,
@@ -297,7 +304,8 @@ def _find_baseline_and_test_examples(
             num_half_columns_to_keep=cnn_metadata_dict[
                 traditional_cnn.NUM_COLUMNS_IN_HALF_GRID_KEY],
             first_time_to_keep_unix_sec=first_time_unix_sec,
-            last_time_to_keep_unix_sec=last_time_unix_sec)
+            last_time_to_keep_unix_sec=last_time_unix_sec,
+            example_indices_to_keep=these_position_indices)
 
         this_predictor_matrix = this_example_dict[
             trainval_io.PREDICTOR_MATRIX_KEY]
@@ -310,20 +318,24 @@ def _find_baseline_and_test_examples(
                 (num_test_examples,) + this_predictor_matrix.shape[1:],
                 numpy.nan)
 
-        these_baseline_indices = numpy.where(file_indices_for_baseline == k)[0]
         if len(these_baseline_indices) > 0:
             baseline_image_matrix[these_baseline_indices, ...] = (
                 this_predictor_matrix[
-                    file_position_indices_for_baseline[these_baseline_indices],
-                    ...
+                    numpy.searchsorted(
+                        these_position_indices,
+                        file_position_indices_for_baseline[
+                            these_baseline_indices]
+                    ), ...
                 ]
             )
 
-        these_test_indices = numpy.where(file_indices_for_test == k)[0]
         if len(these_test_indices) > 0:
             test_image_matrix[these_test_indices, ...] = (
                 this_predictor_matrix[
-                    file_position_indices_for_test[these_test_indices], ...
+                    numpy.searchsorted(
+                        these_position_indices,
+                        file_position_indices_for_test[these_test_indices]
+                    ), ...
                 ]
             )
 
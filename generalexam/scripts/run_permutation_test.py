@@ -157,18 +157,12 @@ def _read_examples(top_example_dir_name, first_time_string, last_time_string,
         print 'Reading data from: "{0:s}"...'.format(example_file_names[i])
 
         this_example_dict = trainval_io.read_downsized_3d_examples(
-            netcdf_file_name=example_file_names[i],
-            predictor_names_to_keep=model_metadata_dict[
-                traditional_cnn.NARR_PREDICTOR_NAMES_KEY],
-            num_half_rows_to_keep=model_metadata_dict[
-                traditional_cnn.NUM_ROWS_IN_HALF_GRID_KEY],
-            num_half_columns_to_keep=model_metadata_dict[
-                traditional_cnn.NUM_COLUMNS_IN_HALF_GRID_KEY],
+            netcdf_file_name=example_file_names[i], metadata_only=True,
             first_time_to_keep_unix_sec=first_time_unix_sec,
             last_time_to_keep_unix_sec=last_time_unix_sec)
 
-        this_num_examples_total = this_example_dict[
-            trainval_io.PREDICTOR_MATRIX_KEY].shape[0]
+        this_num_examples_total = len(
+            this_example_dict[trainval_io.TARGET_TIMES_KEY])
         this_num_examples_to_keep = min(
             [num_examples_per_time, this_num_examples_total]
         )
@@ -180,10 +174,21 @@ def _read_examples(top_example_dir_name, first_time_string, last_time_string,
             these_example_indices, size=this_num_examples_to_keep,
             replace=False)
 
+        this_example_dict = trainval_io.read_downsized_3d_examples(
+            netcdf_file_name=example_file_names[i],
+            predictor_names_to_keep=model_metadata_dict[
+                traditional_cnn.NARR_PREDICTOR_NAMES_KEY],
+            num_half_rows_to_keep=model_metadata_dict[
+                traditional_cnn.NUM_ROWS_IN_HALF_GRID_KEY],
+            num_half_columns_to_keep=model_metadata_dict[
+                traditional_cnn.NUM_COLUMNS_IN_HALF_GRID_KEY],
+            first_time_to_keep_unix_sec=first_time_unix_sec,
+            last_time_to_keep_unix_sec=last_time_unix_sec,
+            example_indices_to_keep=these_example_indices)
+
         this_predictor_matrix = this_example_dict[
-            trainval_io.PREDICTOR_MATRIX_KEY][these_example_indices, ...]
-        this_target_matrix = this_example_dict[
-            trainval_io.TARGET_MATRIX_KEY][these_example_indices, ...]
+            trainval_io.PREDICTOR_MATRIX_KEY]
+        this_target_matrix = this_example_dict[trainval_io.TARGET_MATRIX_KEY]
 
         if predictor_matrix is None:
             predictor_matrix = this_predictor_matrix + 0.
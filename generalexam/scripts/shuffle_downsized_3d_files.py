@@ -1,7 +1,24 @@
-"""Randomly shuffles downsized 3-D examples among files."""
+"""Randomly shuffles downsized 3-D examples among files.
+
+This is an external-memory shuffle with two passes.
+
+[1] Scatter: each example is assigned to a random output file (so that each
+    output file ends up with exactly `num_examples_per_out_file` examples,
+    except the last).  Examples are collected in one in-memory buffer per output
+    file, and all buffers are flushed (in large sequential writes) whenever
+    the next input files would make them exceed `max_examples_in_memory`
+    examples in total.  Input files are read in groups of `num_workers`, with
+    the files in each group read in parallel.
+[2] Permute: each output file is read into memory, its examples are randomly
+    permuted, and it is rewritten.  Output files may be permuted in parallel.
+
+Together, the two passes produce a uniformly random permutation of all
+examples.
+"""
 
 import os
 import argparse
+import multiprocessing
 import numpy
 from gewittergefahr.gg_utils import time_conversion
 from gewittergefahr.gg_utils import file_system_utils
@@ -14,10 +31,14 @@ SEPARATOR_STRING = '\n\n' + '*' * 50 + '\n\n'
 INPUT_DIR_ARG_NAME = 'input_dir_name'
 FIRST_TIME_ARG_NAME = 'first_time_string'
 LAST_TIME_ARG_NAME = 'last_time_string'
-NUM_EXAMPLES_PER_CHUNK_ARG_NAME = 'num_examples_per_chunk'
+MAX_EXAMPLES_IN_MEMORY_ARG_NAME = 'max_examples_in_memory'
+NUM_WORKERS_ARG_NAME = 'num_workers'
 OUTPUT_DIR_ARG_NAME = 'top_output_dir_name'
 FIRST_BATCH_NUM_ARG_NAME = 'first_batch_number'
 NUM_EXAMPLES_PER_OUT_FILE_ARG_NAME = 'num_examples_per_out_file'
+NETCDF_FORMAT_ARG_NAME = 'netcdf_format_string'
+COMPRESSION_LEVEL_ARG_NAME = 'compression_level'
+SIGNIFICANT_DIGIT_ARG_NAME = 'least_significant_digit'
 
 INPUT_DIR_HELP_STRING = (
     'Name of input directory.  Files therein will be found by '
@@ -29,11 +50,21 @@ TIME_HELP_STRING = (
     '`{0:s}`...`{1:s}`.'
 ).format(FIRST_TIME_ARG_NAME, LAST_TIME_ARG_NAME)
 
-NUM_EXAMPLES_PER_CHUNK_HELP_STRING = (
-    'Examples will be shuffled in chunks of `{0:s}`.  The smaller the chunk '
-    'size, the more examples are shuffled.  The larger the chunk size, the less'
-    ' computing time the shuffling takes.'
-).format(NUM_EXAMPLES_PER_CHUNK_ARG_NAME)
+MAX_EXAMPLES_IN_MEMORY_HELP_STRING = (
+    'Max number of examples in output buffers.  Before reading each group of '
+    '`{0:s}` input files, the buffers will be flushed to the output files if '
+    'the group would make them exceed this size.  (The only exception is a '
+    'group that alone exceeds this size, which is read into empty buffers.)  '
+    'The larger this number, the fewer (and larger) writes to each output '
+    'file.'
+).format(NUM_WORKERS_ARG_NAME)
+
+NUM_WORKERS_HELP_STRING = (
+    'Number of worker processes, used to read input files (in the scatter '
+    'pass) and permute output files (in the permute pass).  In the scatter '
+    'pass, input files are read in groups of `{0:s}`, so this many input files '
+    'may be in memory at once (in addition to the output buffers).'
+).format(NUM_WORKERS_ARG_NAME)
 
 OUTPUT_DIR_HELP_STRING = (
     'Name of top-level output directory.  Files will be written by '
@@ -47,8 +78,29 @@ FIRST_BATCH_NUM_HELP_STRING = (
 NUM_EXAMPLES_PER_OUT_FILE_HELP_STRING = (
     'Number of examples in each randomly shuffled output file.')
 
-DEFAULT_NUM_EXAMPLES_PER_CHUNK = 8
+NETCDF_FORMAT_HELP_STRING = (
+    'Format of output files (must be in list '
+    '`training_validation_io.VALID_NETCDF_FORMAT_STRINGS`).')
+
+COMPRESSION_LEVEL_HELP_STRING = (
+    '[used only if `{0:s}` = "{1:s}"] Compression level for predictors (from '
+    '1...9).  If you do not want compression, make this non-positive.'
+).format(NETCDF_FORMAT_ARG_NAME, trainval_io.NETCDF4_FORMAT_STRING)
+
+SIGNIFICANT_DIGIT_HELP_STRING = (
+    'Number of decimal places to keep in predictors (lossy quantization).  If '
+    'you want to keep full precision, make this negative.')
+
+METADATA_KEYS = [
+    trainval_io.PREDICTOR_NAMES_KEY, trainval_io.PRESSURE_LEVEL_KEY,
+    trainval_io.DILATION_DISTANCE_KEY, trainval_io.NARR_MASK_KEY
+]
+
+DEFAULT_MAX_EXAMPLES_IN_MEMORY = 50000
+DEFAULT_NUM_WORKERS = 1
 DEFAULT_NUM_EXAMPLES_PER_OUT_FILE = 1024
+DEFAULT_COMPRESSION_LEVEL = -1
+DEFAULT_SIGNIFICANT_DIGIT = -1
 
 INPUT_ARG_PARSER = argparse.ArgumentParser()
 INPUT_ARG_PARSER.add_argument(
@@ -62,9 +114,13 @@ INPUT_ARG_PARSER.add_argument(
     '--' + LAST_TIME_ARG_NAME, type=str, required=True, help=TIME_HELP_STRING)
 
 INPUT_ARG_PARSER.add_argument(
-    '--' + NUM_EXAMPLES_PER_CHUNK_ARG_NAME, type=int, required=False,
-    default=DEFAULT_NUM_EXAMPLES_PER_CHUNK,
-    help=NUM_EXAMPLES_PER_CHUNK_HELP_STRING)
+    '--' + MAX_EXAMPLES_IN_MEMORY_ARG_NAME, type=int, required=False,
+    default=DEFAULT_MAX_EXAMPLES_IN_MEMORY,
+    help=MAX_EXAMPLES_IN_MEMORY_HELP_STRING)
+
+INPUT_ARG_PARSER.add_argument(
+    '--' + NUM_WORKERS_ARG_NAME, type=int, required=False,
+    default=DEFAULT_NUM_WORKERS, help=NUM_WORKERS_HELP_STRING)
 
 INPUT_ARG_PARSER.add_argument(
     '--' + OUTPUT_DIR_ARG_NAME, type=str, required=True,
@@ -79,6 +135,18 @@ INPUT_ARG_PARSER.add_argument(
     default=DEFAULT_NUM_EXAMPLES_PER_OUT_FILE,
     help=NUM_EXAMPLES_PER_OUT_FILE_HELP_STRING)
 
+INPUT_ARG_PARSER.add_argument(
+    '--' + NETCDF_FORMAT_ARG_NAME, type=str, required=False,
+    default=trainval_io.NETCDF3_FORMAT_STRING, help=NETCDF_FORMAT_HELP_STRING)
+
+INPUT_ARG_PARSER.add_argument(
+    '--' + COMPRESSION_LEVEL_ARG_NAME, type=int, required=False,
+    default=DEFAULT_COMPRESSION_LEVEL, help=COMPRESSION_LEVEL_HELP_STRING)
+
+INPUT_ARG_PARSER.add_argument(
+    '--' + SIGNIFICANT_DIGIT_ARG_NAME, type=int, required=False,
+    default=DEFAULT_SIGNIFICANT_DIGIT, help=SIGNIFICANT_DIGIT_HELP_STRING)
+
 
 def _find_input_files(input_dir_name, first_time_unix_sec, last_time_unix_sec):
     """Finds input files.
@@ -87,7 +155,8 @@ def _find_input_files(input_dir_name, first_time_unix_sec, last_time_unix_sec):
     :param first_time_unix_sec: Same.
     :param last_time_unix_sec: Same.
     :return: input_file_names: 1-D list of paths to input files.
-    :return: num_examples_total: Number of examples among all input files.
+    :return: num_examples_by_file: 1-D numpy array with number of examples in
+        each input file.
     """
 
     input_file_names = trainval_io.find_downsized_3d_example_files(
@@ -96,20 +165,20 @@ def _find_input_files(input_dir_name, first_time_unix_sec, last_time_unix_sec):
         last_target_time_unix_sec=last_time_unix_sec)
 
     num_input_files = len(input_file_names)
-    num_examples_total = 0
+    num_examples_by_file = numpy.full(num_input_files, 0, dtype=int)
 
     for i in range(num_input_files):
-        print 'Reading data from: "{0:s}"...'.format(input_file_names[i])
+        print 'Reading metadata from: "{0:s}"...'.format(input_file_names[i])
         this_example_dict = trainval_io.read_downsized_3d_examples(
             netcdf_file_name=input_file_names[i],
             first_time_to_keep_unix_sec=first_time_unix_sec,
             last_time_to_keep_unix_sec=last_time_unix_sec, metadata_only=True)
 
-        num_examples_total += len(
+        num_examples_by_file[i] = len(
             this_example_dict[trainval_io.TARGET_TIMES_KEY]
         )
 
-    return input_file_names, num_examples_total
+    return input_file_names, num_examples_by_file
 
 
 def _set_output_locations(
@@ -149,69 +218,175 @@ def _set_output_locations(
     return output_file_names
 
 
-def _shuffle_one_input_file(
-        input_file_name, first_time_unix_sec, last_time_unix_sec,
-        num_examples_per_chunk, output_file_names):
-    """Shuffles examples in one input file.
+def _assign_examples_to_output_files(
+        num_examples_total, num_examples_per_out_file):
+    """Randomly assigns each example to an output file.
+
+    :param num_examples_total: Number of examples among all input files.
+    :param num_examples_per_out_file: See documentation at top of file.
+    :return: output_file_indices: 1-D numpy array (length =
+        `num_examples_total`), where output_file_indices[i] is the index of the
+        output file for the [i]th example.  Each output file gets exactly
+        `num_examples_per_out_file` examples, except the last (which gets the
+        remainder).
+    """
+
+    example_indices = numpy.linspace(
+        0, num_examples_total - 1, num=num_examples_total, dtype=int)
+    output_file_indices = example_indices // num_examples_per_out_file
+    numpy.random.shuffle(output_file_indices)
+
+    return output_file_indices
+
+
+def _read_one_input_file(input_file_name, first_time_unix_sec,
+                         last_time_unix_sec):
+    """Reads examples from one input file.
 
     :param input_file_name: Path to input file.
     :param first_time_unix_sec: See documentation at top of file.
     :param last_time_unix_sec: Same.
-    :param num_examples_per_chunk: Same.
-    :param output_file_names: 1-D list of paths to output files.
+    :return: example_dict: Dictionary created by
+        `training_validation_io.read_downsized_3d_examples`.
     """
 
     print 'Reading data from: "{0:s}"...'.format(input_file_name)
-    example_dict = trainval_io.read_downsized_3d_examples(
+    return trainval_io.read_downsized_3d_examples(
         netcdf_file_name=input_file_name,
         first_time_to_keep_unix_sec=first_time_unix_sec,
         last_time_to_keep_unix_sec=last_time_unix_sec)
 
-    num_examples = len(example_dict[trainval_io.TARGET_TIMES_KEY])
-    example_indices = numpy.linspace(
-        0, num_examples - 1, num=num_examples, dtype=int)
-    numpy.random.shuffle(example_indices)
 
-    for this_key in trainval_io.MAIN_KEYS:
-        example_dict[this_key] = example_dict[this_key][example_indices, ...]
+def _read_one_input_file_star(argument_tuple):
+    """Unpacks arguments for `_read_one_input_file` (used by `Pool.map`).
 
-    num_output_files = len(output_file_names)
-    output_file_indices = numpy.random.random_integers(
-        low=0, high=num_output_files - 1, size=num_examples)
+    :param argument_tuple: Tuple of arguments for `_read_one_input_file`.
+    :return: example_dict: See doc for `_read_one_input_file`.
+    """
 
-    for j in xrange(0, num_examples, num_examples_per_chunk):
-        this_first_index = j
-        this_last_index = min(
-            [j + num_examples_per_chunk - 1, num_examples - 1]
-        )
-        these_example_indices = numpy.linspace(
-            this_first_index, this_last_index,
-            num=this_last_index - this_first_index + 1, dtype=int)
+    return _read_one_input_file(*argument_tuple)
+
+
+def _scatter_one_input_file(example_dict, output_file_indices,
+                            example_dicts_by_output_file):
+    """Adds examples from one input file to output buffers.
+
+    :param example_dict: Dictionary created by `_read_one_input_file`.
+    :param output_file_indices: 1-D numpy array with index of output file for
+        each example in `example_dict`.
+    :param example_dicts_by_output_file: 1-D list, where the [j]th item is a
+        list of example dictionaries buffered for the [j]th output file.  This
+        list will be updated in place.
+    :return: num_examples_added: Number of examples added to buffers.
+    """
+
+    sort_indices = numpy.argsort(output_file_indices, kind='mergesort')
+    unique_output_file_indices, first_sorted_indices = numpy.unique(
+        output_file_indices[sort_indices], return_index=True)
+    last_sorted_indices = numpy.concatenate((
+        first_sorted_indices[1:], numpy.array([len(sort_indices)], dtype=int)
+    ))
 
-        this_example_dict = {}
-        for this_key in trainval_io.MAIN_KEYS:
-            this_example_dict.update({
-                this_key: example_dict[this_key][these_example_indices, ...]
-            })
+    for j in range(len(unique_output_file_indices)):
+        these_example_indices = sort_indices[
+            first_sorted_indices[j]:last_sorted_indices[j]
+        ]
 
-        this_output_file_name = output_file_names[output_file_indices[j]]
-        print 'Writing shuffled examples to: "{0:s}"...'.format(
-            this_output_file_name)
+        example_dicts_by_output_file[unique_output_file_indices[j]].append({
+            this_key: example_dict[this_key][these_example_indices, ...]
+            for this_key in trainval_io.MAIN_KEYS
+        })
+
+    return len(output_file_indices)
+
+
+def _flush_output_buffers(
+        example_dicts_by_output_file, output_file_names, metadata_dict,
+        netcdf_format_string):
+    """Writes all buffered examples to output files and empties the buffers.
+
+    :param example_dicts_by_output_file: See doc for `_scatter_one_input_file`.
+    :param output_file_names: 1-D list of paths to output files.
+    :param metadata_dict: Dictionary with keys in `METADATA_KEYS` (predictor
+        names, pressure level, dilation distance, and NARR mask), taken from a
+        dictionary created by `_read_one_input_file`.
+    :param netcdf_format_string: See documentation at top of file.
+    """
+
+    for j in range(len(output_file_names)):
+        if len(example_dicts_by_output_file[j]) == 0:
+            continue
+
+        this_example_dict = {
+            this_key: numpy.concatenate(
+                [d[this_key] for d in example_dicts_by_output_file[j]], axis=0)
+            for this_key in trainval_io.MAIN_KEYS
+        }
+        example_dicts_by_output_file[j] = []
+
+        print 'Writing {0:d} examples to: "{1:s}"...'.format(
+            len(this_example_dict[trainval_io.TARGET_TIMES_KEY]),
+            output_file_names[j])
 
         trainval_io.write_downsized_3d_examples(
-            netcdf_file_name=this_output_file_name,
+            netcdf_file_name=output_file_names[j],
             example_dict=this_example_dict,
-            narr_predictor_names=example_dict[trainval_io.PREDICTOR_NAMES_KEY],
-            pressure_level_mb=example_dict[trainval_io.PRESSURE_LEVEL_KEY],
-            dilation_distance_metres=example_dict[
+            narr_predictor_names=metadata_dict[trainval_io.PREDICTOR_NAMES_KEY],
+            pressure_level_mb=metadata_dict[trainval_io.PRESSURE_LEVEL_KEY],
+            dilation_distance_metres=metadata_dict[
                 trainval_io.DILATION_DISTANCE_KEY],
-            narr_mask_matrix=example_dict[trainval_io.NARR_MASK_KEY],
-            append_to_file=os.path.isfile(this_output_file_name))
+            narr_mask_matrix=metadata_dict[trainval_io.NARR_MASK_KEY],
+            append_to_file=os.path.isfile(output_file_names[j]),
+            netcdf_format_string=netcdf_format_string)
+
+
+def _permute_one_output_file(
+        output_file_name, random_seed, netcdf_format_string, compression_level,
+        least_significant_digit):
+    """Randomly permutes examples in one output file.
+
+    :param output_file_name: Path to output file.
+    :param random_seed: Random seed (used only in this method).
+    :param netcdf_format_string: See documentation at top of file.
+    :param compression_level: Same.
+    :param least_significant_digit: Same.
+    """
+
+    print 'Permuting examples in: "{0:s}"...'.format(output_file_name)
+    example_dict = trainval_io.read_downsized_3d_examples(output_file_name)
+
+    num_examples = len(example_dict[trainval_io.TARGET_TIMES_KEY])
+    example_indices = numpy.random.RandomState(random_seed).permutation(
+        num_examples)
+
+    for this_key in trainval_io.MAIN_KEYS:
+        example_dict[this_key] = example_dict[this_key][example_indices, ...]
+
+    trainval_io.write_downsized_3d_examples(
+        netcdf_file_name=output_file_name, example_dict=example_dict,
+        narr_predictor_names=example_dict[trainval_io.PREDICTOR_NAMES_KEY],
+        pressure_level_mb=example_dict[trainval_io.PRESSURE_LEVEL_KEY],
+        dilation_distance_metres=example_dict[
+            trainval_io.DILATION_DISTANCE_KEY],
+        narr_mask_matrix=example_dict[trainval_io.NARR_MASK_KEY],
+        append_to_file=False, netcdf_format_string=netcdf_format_string,
+        compression_level=compression_level,
+        least_significant_digit=least_significant_digit)
+
+
+def _permute_one_output_file_star(argument_tuple):
+    """Unpacks arguments for `_permute_one_output_file` (used by `Pool.map`).
+
+    :param argument_tuple: Tuple of arguments for `_permute_one_output_file`.
+    """
+
+    _permute_one_output_file(*argument_tuple)
 
 
 def _run(input_dir_name, first_time_string, last_time_string,
-         num_examples_per_chunk, top_output_dir_name, first_batch_number,
-         num_examples_per_out_file):
+         max_examples_in_memory, num_workers, top_output_dir_name,
+         first_batch_number, num_examples_per_out_file, netcdf_format_string,
+         compression_level, least_significant_digit):
     """Randomly shuffles downsized 3-D examples among files.
 
     This is effectively the main method.
@@ -219,15 +394,25 @@ def _run(input_dir_name, first_time_string, last_time_string,
     :param input_dir_name: See documentation at top of file.
     :param first_time_string: Same.
     :param last_time_string: Same.
-    :param num_examples_per_chunk: Same.
+    :param max_examples_in_memory: Same.
+    :param num_workers: Same.
     :param top_output_dir_name: Same.
     :param first_batch_number: Same.
     :param num_examples_per_out_file: Same.
+    :param netcdf_format_string: Same.
+    :param compression_level: Same.
+    :param least_significant_digit: Same.
     """
 
+    if compression_level <= 0:
+        compression_level = None
+    if least_significant_digit < 0:
+        least_significant_digit = None
+
     file_system_utils.mkdir_recursive_if_necessary(
         directory_name=top_output_dir_name)
-    error_checking.assert_is_geq(num_examples_per_chunk, 1)
+    error_checking.assert_is_geq(max_examples_in_memory, 1)
+    error_checking.assert_is_geq(num_workers, 1)
     error_checking.assert_is_geq(num_examples_per_out_file, 100)
 
     first_time_unix_sec = time_conversion.string_to_unix_sec(
@@ -235,12 +420,12 @@ def _run(input_dir_name, first_time_string, last_time_string,
     last_time_unix_sec = time_conversion.string_to_unix_sec(
         last_time_string, INPUT_TIME_FORMAT)
 
-    input_file_names, num_examples_total = _find_input_files(
+    input_file_names, num_examples_by_file = _find_input_files(
         input_dir_name=input_dir_name, first_time_unix_sec=first_time_unix_sec,
         last_time_unix_sec=last_time_unix_sec)
-    num_input_files = len(input_file_names)
     print SEPARATOR_STRING
 
+    num_examples_total = numpy.sum(num_examples_by_file)
     output_file_names = _set_output_locations(
         top_output_dir_name=top_output_dir_name,
         num_examples_total=num_examples_total,
@@ -248,14 +433,93 @@ def _run(input_dir_name, first_time_string, last_time_string,
         first_batch_number=first_batch_number)
     print SEPARATOR_STRING
 
-    for i in range(num_input_files):
-        _shuffle_one_input_file(
-            input_file_name=input_file_names[i],
-            first_time_unix_sec=first_time_unix_sec,
-            last_time_unix_sec=last_time_unix_sec,
-            num_examples_per_chunk=num_examples_per_chunk,
-            output_file_names=output_file_names)
-        print '\n'
+    output_file_indices = _assign_examples_to_output_files(
+        num_examples_total=num_examples_total,
+        num_examples_per_out_file=num_examples_per_out_file)
+    last_example_indices = numpy.cumsum(num_examples_by_file)
+    first_example_indices = last_example_indices - num_examples_by_file
+
+    # `Pool.imap` would read ahead without limit, so input files are read in
+    # groups (with `Pool.map`), and buffers are flushed between groups.
+    if num_workers == 1:
+        worker_pool = None
+        map_function = map
+    else:
+        worker_pool = multiprocessing.Pool(processes=num_workers)
+        map_function = worker_pool.map
+
+    nonempty_file_indices = numpy.where(num_examples_by_file > 0)[0]
+    example_dicts_by_output_file = [[] for _ in output_file_names]
+    num_examples_in_memory = 0
+    metadata_dict = None
+
+    # Scatter pass.
+    for i in range(0, len(nonempty_file_indices), num_workers):
+        these_file_indices = nonempty_file_indices[i:(i + num_workers)]
+        this_num_examples_to_read = numpy.sum(
+            num_examples_by_file[these_file_indices])
+
+        if (num_examples_in_memory > 0 and
+                num_examples_in_memory + this_num_examples_to_read >
+                max_examples_in_memory):
+            print '\n'
+            _flush_output_buffers(
+                example_dicts_by_output_file=example_dicts_by_output_file,
+                output_file_names=output_file_names,
+                metadata_dict=metadata_dict,
+                netcdf_format_string=netcdf_format_string)
+            print '\n'
+
+            num_examples_in_memory = 0
+
+        these_argument_tuples = [
+            (input_file_names[k], first_time_unix_sec, last_time_unix_sec)
+            for k in these_file_indices
+        ]
+        these_example_dicts = map_function(
+            _read_one_input_file_star, these_argument_tuples)
+
+        for k, this_example_dict in zip(
+                these_file_indices, these_example_dicts):
+            if metadata_dict is None:
+                metadata_dict = {
+                    this_key: this_example_dict[this_key]
+                    for this_key in METADATA_KEYS
+                }
+
+            num_examples_in_memory += _scatter_one_input_file(
+                example_dict=this_example_dict,
+                output_file_indices=output_file_indices[
+                    first_example_indices[k]:last_example_indices[k]
+                ],
+                example_dicts_by_output_file=example_dicts_by_output_file)
+
+        # Release input data before reading the next group.
+        these_example_dicts = None
+
+    if num_examples_in_memory > 0:
+        _flush_output_buffers(
+            example_dicts_by_output_file=example_dicts_by_output_file,
+            output_file_names=output_file_names, metadata_dict=metadata_dict,
+            netcdf_format_string=netcdf_format_string)
+
+    print SEPARATOR_STRING
+
+    # Permute pass.
+    random_seeds = numpy.random.randint(
+        0, numpy.iinfo(numpy.int32).max, size=len(output_file_names))
+    argument_tuples = [
+        (output_file_names[j], random_seeds[j], netcdf_format_string,
+         compression_level, least_significant_digit)
+        for j in range(len(output_file_names))
+    ]
+
+    if worker_pool is None:
+        map(_permute_one_output_file_star, argument_tuples)
+    else:
+        worker_pool.map(_permute_one_output_file_star, argument_tuples)
+        worker_pool.close()
+        worker_pool.join()
 
 
 if __name__ == '__main__':
@@ -265,10 +529,15 @@ if __name__ == '__main__':
         input_dir_name=getattr(INPUT_ARG_OBJECT, INPUT_DIR_ARG_NAME),
         first_time_string=getattr(INPUT_ARG_OBJECT, FIRST_TIME_ARG_NAME),
         last_time_string=getattr(INPUT_ARG_OBJECT, LAST_TIME_ARG_NAME),
-        num_examples_per_chunk=getattr(
-            INPUT_ARG_OBJECT, NUM_EXAMPLES_PER_CHUNK_ARG_NAME),
+        max_examples_in_memory=getattr(
+            INPUT_ARG_OBJECT, MAX_EXAMPLES_IN_MEMORY_ARG_NAME),
+        num_workers=getattr(INPUT_ARG_OBJECT, NUM_WORKERS_ARG_NAME),
         top_output_dir_name=getattr(INPUT_ARG_OBJECT, OUTPUT_DIR_ARG_NAME),
         first_batch_number=getattr(INPUT_ARG_OBJECT, FIRST_BATCH_NUM_ARG_NAME),
         num_examples_per_out_file=getattr(
-            INPUT_ARG_OBJECT, NUM_EXAMPLES_PER_OUT_FILE_ARG_NAME)
+            INPUT_ARG_OBJECT, NUM_EXAMPLES_PER_OUT_FILE_ARG_NAME),
+        netcdf_format_string=getattr(INPUT_ARG_OBJECT, NETCDF_FORMAT_ARG_NAME),
+        compression_level=getattr(INPUT_ARG_OBJECT, COMPRESSION_LEVEL_ARG_NAME),
+        least_significant_digit=getattr(
+            INPUT_ARG_OBJECT, SIGNIFICANT_DIGIT_ARG_NAME)
     )
@@ -0,0 +1,103 @@
+"""Unit tests for shuffle_downsized_3d_files.py."""
+
+import unittest
+import numpy
+from generalexam.machine_learning import training_validation_io as trainval_io
+from generalexam.scripts import shuffle_downsized_3d_files as shuffle_files
+
+# The following constants are used to test _assign_examples_to_output_files.
+NUM_EXAMPLES_TOTAL = 2050
+NUM_EXAMPLES_PER_OUT_FILE = 1000
+NUM_EXAMPLES_BY_OUTPUT_FILE = numpy.array([1000, 1000, 50], dtype=int)
+
+# The following constants are used to test _scatter_one_input_file.
+NUM_OUTPUT_FILES = 4
+OUTPUT_FILE_INDICES_TO_SCATTER = numpy.array([2, 0, 2, 3, 0, 2], dtype=int)
+TARGET_TIMES_TO_SCATTER_UNIX_SEC = numpy.array(
+    [0, 10800, 21600, 32400, 43200, 54000], dtype=int)
+
+EXAMPLE_DICT_TO_SCATTER = {
+    trainval_io.PREDICTOR_MATRIX_KEY:
+        numpy.reshape(numpy.linspace(0., 23., num=24), (6, 2, 2)),
+    trainval_io.TARGET_MATRIX_KEY: numpy.array(
+        [[1, 0], [0, 1], [1, 0], [1, 0], [0, 1], [0, 1]], dtype=int),
+    trainval_io.TARGET_TIMES_KEY: TARGET_TIMES_TO_SCATTER_UNIX_SEC,
+    trainval_io.ROW_INDICES_KEY: numpy.array([0, 1, 2, 3, 4, 5], dtype=int),
+    trainval_io.COLUMN_INDICES_KEY: numpy.array([5, 4, 3, 2, 1, 0], dtype=int),
+    trainval_io.FIRST_NORM_PARAM_KEY:
+        numpy.reshape(numpy.linspace(0., 5., num=6), (6, 1)),
+    trainval_io.SECOND_NORM_PARAM_KEY:
+        numpy.reshape(numpy.linspace(10., 15., num=6), (6, 1))
+}
+
+# Examples within each output buffer keep their original order.
+SCATTERED_TARGET_TIMES_BY_OUTPUT_FILE = [
+    numpy.array([10800, 43200], dtype=int),
+    numpy.array([], dtype=int),
+    numpy.array([0, 21600, 54000], dtype=int),
+    numpy.array([32400], dtype=int)
+]
+
+
+class ShuffleDownsized3dFilesTests(unittest.TestCase):
+    """Each method is a unit test for shuffle_downsized_3d_files.py."""
+
+    def test_assign_examples_to_output_files(self):
+        """Ensures correct output from _assign_examples_to_output_files."""
+
+        these_output_file_indices = (
+            shuffle_files._assign_examples_to_output_files(
+                num_examples_total=NUM_EXAMPLES_TOTAL,
+                num_examples_per_out_file=NUM_EXAMPLES_PER_OUT_FILE)
+        )
+
+        self.assertTrue(len(these_output_file_indices) == NUM_EXAMPLES_TOTAL)
+        self.assertTrue(numpy.issubdtype(
+            these_output_file_indices.dtype, numpy.integer))
+
+        these_num_examples_by_file = numpy.bincount(these_output_file_indices)
+        self.assertTrue(numpy.array_equal(
+            these_num_examples_by_file, NUM_EXAMPLES_BY_OUTPUT_FILE))
+
+        # The assignment must be shuffled, rather than in file order.
+        self.assertFalse(numpy.array_equal(
+            these_output_file_indices,
+            numpy.sort(these_output_file_indices)))
+
+    def test_scatter_one_input_file(self):
+        """Ensures correct output from _scatter_one_input_file."""
+
+        these_example_dicts_by_output_file = [
+            [] for _ in range(NUM_OUTPUT_FILES)
+        ]
+
+        this_num_examples_added = shuffle_files._scatter_one_input_file(
+            example_dict=EXAMPLE_DICT_TO_SCATTER,
+            output_file_indices=OUTPUT_FILE_INDICES_TO_SCATTER,
+            example_dicts_by_output_file=these_example_dicts_by_output_file)
+
+        self.assertTrue(
+            this_num_examples_added == len(OUTPUT_FILE_INDICES_TO_SCATTER))
+
+        for j in range(NUM_OUTPUT_FILES):
+            if len(SCATTERED_TARGET_TIMES_BY_OUTPUT_FILE[j]) == 0:
+                self.assertTrue(len(these_example_dicts_by_output_file[j]) == 0)
+                continue
+
+            self.assertTrue(len(these_example_dicts_by_output_file[j]) == 1)
+            this_example_dict = these_example_dicts_by_output_file[j][0]
+
+            self.assertTrue(numpy.array_equal(
+                this_example_dict[trainval_io.TARGET_TIMES_KEY],
+                SCATTERED_TARGET_TIMES_BY_OUTPUT_FILE[j]))
+
+            these_indices = numpy.where(
+                OUTPUT_FILE_INDICES_TO_SCATTER == j)[0]
+            for this_key in trainval_io.MAIN_KEYS:
+                self.assertTrue(numpy.array_equal(
+                    this_example_dict[this_key],
+                    EXAMPLE_DICT_TO_SCATTER[this_key][these_indices, ...]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -26,7 +26,6 @@ CLASSIFIERS = [
 # the normal way one installs a GitHub package.
 #
 # https://github.com/matplotlib/basemap
-# https://github.com/sharppy/SHARPpy
 # https://github.com/thunderhoser/GewitterGefahr
 
 PACKAGE_REQUIREMENTS = [